@@ -24,6 +24,8 @@ from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
 from market_documents import (
+    MarketReadProfile,
+    find_market_document,
     market_doc_field,
     published_market_by_slug,
 )
@@ -364,7 +366,7 @@ def publish_results(market_id: str) -> Tuple[Dict[str, Any], int]:
     from db_config import get_database
     db = get_database()
 
-    doc = db["markets"].find_one({"id": market_id})
+    doc = find_market_document(db["markets"], market_id, MarketReadProfile.SUMMARY)
     if not doc:
         return {"error": "Market not found."}, 404
 
@@ -4,7 +4,11 @@ from typing import Any, Dict, List, Optional, Tuple
 from assignment.assignment import assign_market
 from assignment.utils import convert_keys_to_camel_case, convert_keys_to_snake_case
 from db_config import get_database
-from market_documents import market_from_document, published_market_by_slug
+from market_documents import (
+    market_doc_key,
+    market_from_document,
+    published_market_by_slug,
+)
 import api.source_data as SourceDataApi
 
 db = get_database()
@@ -16,9 +20,27 @@ def _normalize_email(email: str) -> str:
     return (email or "").strip().lower()
 
 
-def get_published_market_by_slug(market_slug: str) -> Optional[Dict[str, Any]]:
-    """Find a published (phase != draft) market whose slugified name equals slug."""
-    return published_market_by_slug(markets_collection, market_slug)
+# What the public vendor summary reads of a market: enough to rebuild the model assignment runs
+# on. The stored assignment is replaced before assigning, so it is never fetched.
+_VENDOR_SUMMARY_FIELDS = ("id", "name", "creation_date", "roles", "setup_object")
+
+
+def get_published_market_by_slug(
+    market_slug: str, fields: Optional[Tuple[str, ...]] = None,
+) -> Optional[Dict[str, Any]]:
+    """Find a published (phase != draft) market whose slugified name equals slug.
+
+    ``fields`` names the market fields the caller reads; see ``published_market_by_slug``.
+    """
+    return published_market_by_slug(markets_collection, market_slug, fields)
+
+
+def _check_in_projection() -> Dict[str, Any]:
+    """Only the parts of a market a check-in is verified against: assignments and market dates."""
+    return {
+        f"{market_doc_key('assignment_object')}.vendorAssignments": 1,
+        f"{market_doc_key('setup_object')}.marketDates": 1,
+    }
 
 
 def record_attendance(market_id: str, vendor_email: str, date: str) -> Tuple[Dict[str, Any], int]:
@@ -30,7 +52,7 @@ def record_attendance(market_id: str, vendor_email: str, date: str) -> Tuple[Dic
     if not isinstance(date, str) or not date.strip():
         return {"error": "date is required"}, 400
 
-    market_doc = markets_collection.find_one({"id": market_id})
+    market_doc = markets_collection.find_one({"id": market_id}, _check_in_projection())
     if not market_doc:
         return {"error": "Market not found"}, 404
 
@@ -106,12 +128,13 @@ def get_vendor_assignment_summary(market_slug: str, vendor_email: str) -> Tuple[
 
     target_email = _normalize_email(vendor_email)
 
-    market_doc = get_published_market_by_slug(market_slug)
+    market_doc = get_published_market_by_slug(market_slug, fields=_VENDOR_SUMMARY_FIELDS)
     if not market_doc:
         return {"error": "Market not found"}, 404
 
     market_id = market_doc.get("id")
     market_snake = convert_keys_to_snake_case(market_doc.copy())
+    market_snake.setdefault("modification_list", [])
 
     if "setup_object" in market_snake and market_snake["setup_object"]:
         if "assignment_options" not in market_snake["setup_object"]:
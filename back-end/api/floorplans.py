@@ -1,48 +1,57 @@
 """
 Floorplan API endpoints for uploading, retrieving, and deleting floorplan images.
-Uses GridFS for storage and pdf2image for PDF-to-image conversion.
+Uses GridFS for storage and pdf2image for PDF-to-image conversion; uploads can
+be processed in the request or in the background (``services.floorplan_uploads``).
 """
 
-import io
 import logging
+import time
 import traceback
+from typing import Optional
 
-from flask import Blueprint, request, jsonify, send_file
-from flask_login import login_required
-from PIL import Image as PILImage
+from flask import Blueprint, current_app, request, jsonify
+from flask_login import current_user, login_required
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from werkzeug.wsgi import wrap_file
 
-from services.gridfs_service import upload_image, get_image, delete_image
-from utils.pdf_converter import pdf_to_images, is_pdf
+from services.floorplan_uploads import QUEUED, get_upload, store_pages, submit_upload
+from services.gridfs_service import FULL_SIZE, RENDITIONS, delete_image, open_rendition, upload_owner
+from utils.pdf_converter import is_pdf
 
 logger = logging.getLogger(__name__)
 
 floorplans_bp = Blueprint("floorplans", __name__)
 
 
-def _get_image_dimensions(image_data: bytes):
-    """Extract (width, height) from image bytes using PIL.
-    Returns (0, 0) if the data is not parseable as an image.
-    """
-    try:
-        img = PILImage.open(io.BytesIO(image_data))
-        return img.size  # (width, height)
-    except Exception as exc:
-        logger.warning(f"Could not determine image dimensions: {exc}")
-        return (0, 0)
+# Stored images never change: an id always names the same bytes.
+_IMAGE_MAX_AGE_S = 365 * 24 * 60 * 60
 
+_ALLOWED_MIMES = {"image/png", "image/jpeg", "image/webp", "application/pdf"}
 
-def _detect_mimetype(image_data: bytes) -> str:
-    """Detect image MIME type from raw bytes using PIL.
-    Falls back to 'image/png' when detection fails.
-    """
-    try:
-        img = PILImage.open(io.BytesIO(image_data))
-        fmt = img.format
-        if fmt:
-            return f"image/{fmt.lower()}"
-    except Exception:
-        pass
-    return "image/png"
+
+def _requesting_user_id() -> Optional[str]:
+    return current_user.get_id() if current_user.is_authenticated else None
+
+
+def _uploaded_file():
+    """The uploaded ``file`` as ``(bytes, filename, content_type)``, or an error response."""
+    file = request.files.get("file")
+    if not file:
+        return None, (jsonify({"error": "No file provided"}), 400)
+
+    # ── MIME type whitelist ───────────────────────────────────────────────
+    content_type = file.content_type or ""
+    if content_type not in _ALLOWED_MIMES:
+        return None, (jsonify({
+            "error": f"Unsupported file type: {content_type}. "
+                     "Allowed: image/png, image/jpeg, image/webp, application/pdf"
+        }), 400)
+
+    file_bytes = file.read()
+    if not file_bytes:
+        return None, (jsonify({"error": "Empty file"}), 400)
+
+    return (file_bytes, file.filename or "floorplan", content_type), None
 
 
 # ── POST /api/floorplans/upload ──────────────────────────────────────────────
@@ -50,58 +59,40 @@ def _detect_mimetype(image_data: bytes) -> str:
 @floorplans_bp.route("/upload", methods=["POST"])
 @login_required
 def upload_floorplan():
-    """Accept a multipart file upload (image or PDF).
+    """Accept a multipart file upload (image or PDF) and process it in the request.
 
     - Image: stores directly in GridFS, returns ``{gridfs_id, width, height}``.
-    - PDF: converts each page via ``pdf_to_images``, stores each page
-      separately, returns ``{pages: [{gridfs_id, width, height}, ...]}``.
+    - PDF: renders the pages a few at a time via ``iter_pdf_pages``, stores
+      each page as soon as it is rendered, returns ``{pages: [{page,
+      gridfs_id, width, height, render_ms, store_ms}, ...], total_ms}`` in
+      page order.
+
+    Large PDFs should go to ``POST /floorplans/uploads`` instead.
     """
     try:
-        file = request.files.get("file")
-        if not file:
-            return jsonify({"error": "No file provided"}), 400
-
-        # ── MIME type whitelist ───────────────────────────────────────────
-        _ALLOWED_MIMES = {"image/png", "image/jpeg", "image/webp", "application/pdf"}
-        content_type = file.content_type or ""
-        if content_type not in _ALLOWED_MIMES:
-            return jsonify({
-                "error": f"Unsupported file type: {content_type}. "
-                         "Allowed: image/png, image/jpeg, image/webp, application/pdf"
-            }), 400
-
-        file_bytes = file.read()
-        if not file_bytes:
-            return jsonify({"error": "Empty file"}), 400
-
-        filename = file.filename or "floorplan"
+        uploaded, error = _uploaded_file()
+        if error:
+            return error
+        file_bytes, filename, content_type = uploaded
+
+        started = time.perf_counter()
+        owner = upload_owner(_requesting_user_id())
+        pages = sorted(store_pages(file_bytes, filename, content_type, owner), key=lambda entry: entry["page"])
+        if not pages:
+            return jsonify({"error": "Failed to convert PDF to images"}), 500
+        total_ms = round((time.perf_counter() - started) * 1000)
 
         # ── PDF path ───────────────────────────────────────────────────
         if is_pdf(content_type) or filename.lower().endswith(".pdf"):
-            page_images = pdf_to_images(file_bytes)
-            if not page_images:
-                return jsonify({"error": "Failed to convert PDF to images"}), 500
-
-            pages = []
-            for i, page_bytes in enumerate(page_images):
-                page_filename = f"{filename}_page_{i + 1}.png"
-                gridfs_id = upload_image(page_bytes, page_filename)
-                width, height = _get_image_dimensions(page_bytes)
-                pages.append({
-                    "gridfs_id": gridfs_id,
-                    "width": width,
-                    "height": height,
-                })
-
-            return jsonify({"pages": pages}), 201
+            logger.info(f"Converted {len(pages)} PDF page(s) of {filename} in {total_ms} ms")
+            return jsonify({"pages": pages, "total_ms": total_ms}), 201
 
         # ── Image path ─────────────────────────────────────────────────
-        gridfs_id = upload_image(file_bytes, filename)
-        width, height = _get_image_dimensions(file_bytes)
+        page = pages[0]
         return jsonify({
-            "gridfs_id": gridfs_id,
-            "width": width,
-            "height": height,
+            "gridfs_id": page["gridfs_id"],
+            "width": page["width"],
+            "height": page["height"],
         }), 201
 
     except Exception as exc:
@@ -110,6 +101,57 @@ def upload_floorplan():
         return jsonify({"error": "Internal server error"}), 500
 
 
+# ── POST /api/floorplans/uploads ─────────────────────────────────────────────
+
+@floorplans_bp.route("/uploads", methods=["POST"])
+@login_required
+def submit_floorplan_upload():
+    """Accept a multipart file upload (image or PDF) for background processing.
+
+    The file is stored as uploaded and ``202 {upload_id, status}`` returned
+    at once.  Form field ``analyze=true`` also runs AI analysis on each page.
+    Poll ``GET /floorplans/uploads/<upload_id>`` for the pages.
+    """
+    try:
+        uploaded, error = _uploaded_file()
+        if error:
+            return error
+        file_bytes, filename, content_type = uploaded
+
+        analyze = request.form.get("analyze", "false").lower() == "true"
+        upload_id = submit_upload(file_bytes, filename, content_type, _requesting_user_id(), analyze)
+        return jsonify({"upload_id": upload_id, "status": QUEUED}), 202
+
+    except Exception as exc:
+        logger.error(f"Error queueing floorplan upload: {exc}")
+        logger.error(traceback.format_exc())
+        return jsonify({"error": "Internal server error"}), 500
+
+
+# ── GET /api/floorplans/uploads/<upload_id> ──────────────────────────────────
+
+@floorplans_bp.route("/uploads/<upload_id>", methods=["GET"])
+@login_required
+def get_floorplan_upload(upload_id: str):
+    """Processing status of one of the requesting user's uploads.
+
+    Returns ``{upload_id, status, filename, pages: [...]}`` with ``status``
+    one of ``queued``, ``processing``, ``done`` or ``failed``; pages have the
+    shape ``/upload`` returns for PDFs, plus ``analysis`` when requested.
+    ``total_ms`` is set once done and ``error`` once failed.
+    """
+    try:
+        status = get_upload(upload_id, _requesting_user_id())
+        if status is None:
+            return jsonify({"error": "Upload not found"}), 404
+        return jsonify(status), 200
+
+    except Exception as exc:
+        logger.error(f"Error reading floorplan upload {upload_id}: {exc}")
+        logger.error(traceback.format_exc())
+        return jsonify({"error": "Internal server error"}), 500
+
+
 # ── GET /api/floorplans/<gridfs_id> ──────────────────────────────────────────
 
 @floorplans_bp.route("/<gridfs_id>", methods=["GET"])
@@ -117,15 +159,42 @@ def get_floorplan(gridfs_id: str):
     """Retrieve a floorplan image by its GridFS ObjectId.
 
     No authentication required — images are referenced by opaque ID.
+
+    ``?size=thumbnail`` (256 px) or ``?size=screen`` (2048 px) serves a
+    downscaled WebP rendition made at upload; ``full`` (the default) serves
+    the original.  An image already smaller than a rendition is served as is.
+
+    The file is streamed from GridFS a chunk at a time.  Ids are never
+    reused, so the served file's id is a strong ``ETag`` and the response may
+    be cached forever; ``If-None-Match`` gets a 304 and ``Range`` a 206 with
+    just the requested bytes.
     """
     try:
-        image_data = get_image(gridfs_id)
-        if image_data is None:
-            return jsonify({"error": "Image not found"}), 404
-
-        mimetype = _detect_mimetype(image_data)
-        return send_file(io.BytesIO(image_data), mimetype=mimetype)
+        size = request.args.get("size", FULL_SIZE)
+        if size != FULL_SIZE and size not in RENDITIONS:
+            sizes = ", ".join([*RENDITIONS, FULL_SIZE])
+            return jsonify({"error": f"size must be one of: {sizes}"}), 400
 
+        opened = open_rendition(gridfs_id, size)
+        if opened is None:
+            return jsonify({"error": "Image not found"}), 404
+        served_id, grid_out, metadata = opened
+
+        response = current_app.response_class(
+            wrap_file(request.environ, grid_out, buffer_size=grid_out.chunk_size),
+            mimetype=metadata["contentType"],
+            direct_passthrough=True,
+        )
+        response.content_length = grid_out.length
+        response.set_etag(served_id)
+        response.last_modified = grid_out.upload_date
+        response.cache_control.public = True
+        response.cache_control.max_age = _IMAGE_MAX_AGE_S
+        response.cache_control.immutable = True
+        return response.make_conditional(request, accept_ranges=True, complete_length=grid_out.length)
+
+    except RequestedRangeNotSatisfiable:
+        raise
     except Exception as exc:
         logger.error(f"Error retrieving floorplan {gridfs_id}: {exc}")
         logger.error(traceback.format_exc())
@@ -137,9 +206,13 @@ def get_floorplan(gridfs_id: str):
 @floorplans_bp.route("/<gridfs_id>", methods=["DELETE"])
 @login_required
 def delete_floorplan(gridfs_id: str):
-    """Delete a floorplan image from GridFS. Requires login."""
+    """Release the requesting user's hold on a floorplan image. Requires login.
+
+    GridFS drops the image once neither an uploader nor a market holds it; a
+    user who does not hold it (or no longer does) gets a 404.
+    """
     try:
-        success = delete_image(gridfs_id)
+        success = delete_image(gridfs_id, upload_owner(_requesting_user_id()))
         if not success:
             return jsonify({"error": "Image not found"}), 404
 
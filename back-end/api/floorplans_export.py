@@ -1,87 +1,102 @@
 """
 Floorplan export endpoint.
-Renders a floorplan image with table overlay rectangles and returns a PNG.
+Renders a floorplan image with table overlay rectangles and returns a PNG,
+JPEG or WebP, of the whole plan or one region or tile of it.
 """
 
+import base64
 import io
 import logging
-import math
 import traceback
 
-from flask import Blueprint, request, jsonify, send_file
-from PIL import Image, ImageDraw, ImageFont
+from flask import Blueprint, request, jsonify, send_file, url_for
 
-from services.gridfs_service import get_image
+from services.floorplan_render import (
+    DEFAULT_QUALITY,
+    EXPORT_FORMATS,
+    ExportImageError,
+    base_image,
+    parse_tables,
+    render_export,
+    tile_region,
+)
+from services.floorplan_vector import VECTOR_FORMATS, embedded_jpeg, render_pdf, render_svg
 
 logger = logging.getLogger(__name__)
 
 floorplans_export_bp = Blueprint("floorplans_export", __name__)
 
-# ── Section color palette ──────────────────────────────────────────────────────
-# Deterministic 20-color palette for section-based coloring.
-_SECTION_COLORS = [
-    "#e6194b", "#3cb44b", "#ffe119", "#4363d8", "#f58231",
-    "#911eb4", "#42d4f4", "#f032e6", "#bfef45", "#fabed4",
-    "#469990", "#dcbeff", "#9a6324", "#fffac8", "#800000",
-    "#aaffc3", "#808000", "#ffd8b1", "#000075", "#a9a9a9",
-]
 
+def _option(options, name, default=None):
+    """A display option from the JSON body ``options``, else the query string."""
+    if name in options:
+        return options[name]
+    return request.args.get(name, default)
 
-def _get_section_color(section_name: str) -> str:
-    """Return a deterministic color for a section name.
 
-    Uses hash so the same section always gets the same color across requests.
-    """
-    if not section_name:
-        return "#cccccc"
-    idx = abs(hash(section_name)) % len(_SECTION_COLORS)
-    return _SECTION_COLORS[idx]
-
-
-# ── Geometry helpers ───────────────────────────────────────────────────────────
+def _positive_int(value, name):
+    """*value* as a positive int, or an error message."""
+    if isinstance(value, bool):
+        return None, f"{name} must be a positive integer"
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return None, f"{name} must be a positive integer"
+    if number <= 0:
+        return None, f"{name} must be a positive integer"
+    return number, None
 
-def _compute_rotated_corners(
-    cx_px: float, cy_px: float,
-    w_px: float, h_px: float,
-    rotation_deg: float,
-):
-    """Compute the four corner points of a rotated rectangle.
 
-    Args:
-        cx_px, cy_px: Center point in pixel coordinates.
-        w_px, h_px: Width and height in pixels.
-        rotation_deg: Clockwise rotation in degrees (0 = horizontal).
+def _output_region(options, size):
+    """The ``(left, top, right, bottom)`` an export covers, or an error message.
 
-    Returns:
-        List of [(x1, y1), (x2, y2), (x3, y3), (x4, y4)] in order.
+    ``options.region`` is ``{"x", "y", "width", "height"}`` and
+    ``options.tile`` is ``{"size", "col", "row"}``, both in output pixels;
+    without either the export covers the whole image.
     """
-    angle = math.radians(rotation_deg)
-    cos_a = math.cos(angle)
-    sin_a = math.sin(angle)
-
-    hw = w_px / 2.0
-    hh = h_px / 2.0
-
-    # Unrotated corners relative to center (top-left, top-right, bottom-right,
-    # bottom-left)
-    corners = [(-hw, -hh), (hw, -hh), (hw, hh), (-hw, hh)]
-
-    result = []
-    for dx, dy in corners:
-        # Standard 2D rotation (counter-clockwise in math coords, but appears
-        # clockwise in image coords due to y-axis pointing down).
-        rx = dx * cos_a - dy * sin_a
-        ry = dx * sin_a + dy * cos_a
-        result.append((cx_px + rx, cy_px + ry))
+    width, height = size
+    region = options.get("region")
+    tile = options.get("tile")
+    if region is not None and tile is not None:
+        return None, "Pass either region or tile, not both"
+
+    if tile is not None:
+        if not isinstance(tile, dict):
+            return None, "tile must be an object"
+        tile_px, error = _positive_int(tile.get("size", 512), "tile.size")
+        if error:
+            return None, error
+        try:
+            col, row = int(tile.get("col", 0)), int(tile.get("row", 0))
+        except (TypeError, ValueError):
+            return None, "tile.col and tile.row must be integers"
+        bounds = tile_region(size, tile_px, col, row)
+        if bounds is None:
+            return None, "tile is outside the image"
+        return bounds, None
+
+    if region is not None:
+        if not isinstance(region, dict):
+            return None, "region must be an object"
+        try:
+            x, y = int(region.get("x", 0)), int(region.get("y", 0))
+            w, h = int(region["width"]), int(region["height"])
+        except (KeyError, TypeError, ValueError):
+            return None, "region needs integer x, y, width and height"
+        left, top = max(x, 0), max(y, 0)
+        right, bottom = min(x + w, width), min(y + h, height)
+        if right <= left or bottom <= top:
+            return None, "region is outside the image"
+        return (left, top, right, bottom), None
 
-    return result
+    return (0, 0, width, height), None
 
 
 # ── POST /api/floorplans/export ────────────────────────────────────────────────
 
 @floorplans_export_bp.route("/export", methods=["POST"])
 def export_floorplan():
-    """Render a floorplan image with table overlay rectangles and return PNG.
+    """Render a floorplan image with table overlay rectangles and return it.
 
     **Request body (JSON):**::
 
@@ -99,15 +114,31 @@ def export_floorplan():
             "scale_px_per_mm": 0.5,
             "options": {
                 "show_codes": true,
-                "show_sections": true
+                "show_sections": true,
+                "format": "png",
+                "quality": 85,
+                "max_size_px": 4096,
+                "region": {"x": 0, "y": 0, "width": 1024, "height": 768},
+                "tile": {"size": 512, "col": 0, "row": 0}
             }
         }
 
     Display options can also be passed as query parameters
-    (``?show_codes=true&show_sections=true``).  JSON body ``options``
-    overrides query params when both are present.
+    (``?show_codes=true&show_sections=true&format=webp``).  JSON body
+    ``options`` overrides query params when both are present.
 
-    Returns a ``image/png`` response.
+    ``format`` is ``png`` (default), ``jpeg`` or ``webp``; ``quality``
+    (1-100) applies to the last two.  ``max_size_px`` downscales the
+    floorplan so its long side fits.  ``region`` or ``tile`` (not both, in
+    output pixels) cut the export to part of the plan.
+
+    ``format`` ``svg`` or ``pdf`` gives a vector export instead: the
+    floorplan embedded once as a JPEG (at ``quality``, reduced to
+    ``max_size_px``) and the tables as shapes, in stored-image pixels.  For
+    SVG, ``"image": "link"`` references the stored image by URL instead of
+    embedding it.
+
+    Returns an image (PNG, JPEG, WebP or SVG) or PDF response.
     """
     try:
         data = request.get_json(silent=True)
@@ -150,110 +181,85 @@ def export_floorplan():
         if "show_sections" in options:
             show_sections = bool(options["show_sections"])
 
-        # ── Load floorplan image from GridFS ─────────────────────────────
-        image_data = get_image(gridfs_id)
-        if image_data is None:
-            return jsonify({"error": "Image not found for the given gridfs_id"}), 404
-
+        fmt = str(_option(options, "format", "png")).lower()
+        if fmt not in EXPORT_FORMATS and fmt not in VECTOR_FORMATS:
+            formats = ", ".join([*EXPORT_FORMATS, *VECTOR_FORMATS])
+            return jsonify({"error": f"format must be one of: {formats}"}), 400
+        quality, error = _positive_int(_option(options, "quality", DEFAULT_QUALITY), "quality")
+        if error or quality > 100:
+            return jsonify({"error": "quality must be an integer from 1 to 100"}), 400
+        max_size_px = _option(options, "max_size_px")
+        if max_size_px is not None:
+            max_size_px, error = _positive_int(max_size_px, "max_size_px")
+            if error:
+                return jsonify({"error": error}), 400
+
+        if fmt in VECTOR_FORMATS:
+            return _vector_export(
+                gridfs_id, parse_tables(placed_tables), scale, options, fmt, quality, max_size_px,
+                show_codes, show_sections,
+            )
+
+        # ── Load floorplan image (decoded once per id and size) ──────────
         try:
-            # Open as RGBA so we can draw cleanly, then flatten to RGB for PNG
-            img = Image.open(io.BytesIO(image_data)).convert("RGBA")
-        except Exception as exc:
+            loaded = base_image(gridfs_id, max_size_px)
+        except ExportImageError as exc:
             logger.warning(f"Could not open image {gridfs_id}: {exc}")
             return jsonify({"error": "Stored data is not a valid image"}), 400
-
-        # ── Prepare drawing ──────────────────────────────────────────────
-        draw = ImageDraw.Draw(img)
-
-        # Try to load a reasonable font for table codes; fall back to PIL default
-        _font = None
-        for font_path in (
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-            "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-        ):
-            try:
-                _font = ImageFont.truetype(font_path, 14)
-                break
-            except (IOError, OSError):
-                continue
-        if _font is None:
-            try:
-                _font = ImageFont.load_default()
-            except Exception:
-                pass
-
-        # ── Draw each table ──────────────────────────────────────────────
-        for table in placed_tables:
-            if not isinstance(table, dict):
-                continue
-
-            # Extract dimensions (all mm)
-            try:
-                x_mm = float(table.get("x_mm", 0))
-                y_mm = float(table.get("y_mm", 0))
-                w_mm = float(table.get("width_mm", 0))
-                h_mm = float(table.get("height_mm", 0))
-                rotation = float(table.get("rotation", 0))
-            except (TypeError, ValueError):
-                continue
-
-            if w_mm <= 0 or h_mm <= 0:
-                continue
-
-            table_code = str(table.get("table_code", ""))
-            section_name = str(table.get("section_name", ""))
-
-            # Convert mm → pixels
-            cx = x_mm * scale
-            cy = y_mm * scale
-            w_px = w_mm * scale
-            h_px = h_mm * scale
-
-            # Color: by section if enabled, otherwise a neutral green
-            color = _get_section_color(section_name) if show_sections else "#00cc66"
-
-            # Draw rotated rectangle outline
-            corners = _compute_rotated_corners(cx, cy, w_px, h_px, rotation)
-            draw.polygon(corners, outline=color, width=2)
-
-            # Draw table code text centered inside the rectangle
-            if show_codes and table_code:
-                # Compute approximate text dimensions for centering
-                if _font:
-                    try:
-                        bbox = draw.textbbox((0, 0), table_code, font=_font)
-                        tw = bbox[2] - bbox[0]
-                        th = bbox[3] - bbox[1]
-                    except Exception:
-                        tw = len(table_code) * 8
-                        th = 14
-                else:
-                    tw = len(table_code) * 8
-                    th = 14
-
-                tx = cx - tw / 2.0
-                ty = cy - th / 2.0
-
-                # Drop-shadow for readability against busy floorplans
-                draw.text((tx + 1, ty + 1), table_code, fill="#000000", font=_font)
-                draw.text((tx, ty), table_code, fill="#ffffff", font=_font)
-
-        # ── Flatten RGBA → RGB for PNG output ────────────────────────────
-        if img.mode == "RGBA":
-            background = Image.new("RGB", img.size, (255, 255, 255))
-            background.paste(img, mask=img.split()[3])
-            img = background
-        elif img.mode != "RGB":
-            img = img.convert("RGB")
-
-        # ── Encode and return ────────────────────────────────────────────
-        output = io.BytesIO()
-        img.save(output, format="PNG")
-        output.seek(0)
-
-        return send_file(output, mimetype="image/png")
+        if loaded is None:
+            return jsonify({"error": "Image not found for the given gridfs_id"}), 404
+        base, factor = loaded
+
+        region, error = _output_region(options, base.size)
+        if error:
+            return jsonify({"error": error}), 400
+
+        # ── Draw the tables on their own layer, composite and encode ─────
+        encoded = render_export(
+            base,
+            parse_tables(placed_tables),
+            scale * factor,
+            region=region,
+            show_codes=show_codes,
+            show_sections=show_sections,
+            fmt=fmt,
+            quality=quality,
+        )
+
+        _, mimetype = EXPORT_FORMATS[fmt]
+        return send_file(io.BytesIO(encoded), mimetype=mimetype)
 
     except Exception as exc:
         logger.error(f"Error in export_floorplan: {exc}")
         logger.error(traceback.format_exc())
         return jsonify({"error": "Internal server error"}), 500
+
+
+def _vector_export(gridfs_id, tables, scale, options, fmt, quality, max_size_px, show_codes, show_sections):
+    """An SVG or PDF export: the floorplan once, the tables as vector shapes."""
+    if "region" in options or "tile" in options:
+        return jsonify({"error": "region and tile apply to raster formats only"}), 400
+    image_mode = str(_option(options, "image", "embed")).lower()
+    if image_mode not in ("embed", "link"):
+        return jsonify({"error": "image must be 'embed' or 'link'"}), 400
+    if image_mode == "link" and fmt != "svg":
+        return jsonify({"error": "image 'link' is only supported for svg"}), 400
+
+    try:
+        embedded = embedded_jpeg(gridfs_id, max_size_px, quality)
+    except ExportImageError as exc:
+        logger.warning(f"Could not open image {gridfs_id}: {exc}")
+        return jsonify({"error": "Stored data is not a valid image"}), 400
+    if embedded is None:
+        return jsonify({"error": "Image not found for the given gridfs_id"}), 404
+    jpeg, jpeg_size, size = embedded
+
+    if fmt == "svg":
+        if image_mode == "link":
+            href = url_for("floorplans.get_floorplan", gridfs_id=gridfs_id, _external=True)
+        else:
+            href = "data:image/jpeg;base64," + base64.b64encode(jpeg).decode("ascii")
+        encoded = render_svg(size, href, tables, scale, show_codes, show_sections)
+    else:
+        encoded = render_pdf(size, jpeg, jpeg_size, tables, scale, show_codes, show_sections)
+    return send_file(io.BytesIO(encoded), mimetype=VECTOR_FORMATS[fmt])
@@ -3,22 +3,125 @@ Floorplan table auto-placement endpoint.
 
 Receives room geometry (walls, obstacles), table specifications, and
 aisle-configuration; returns a list of placed-table positions with x, y,
-rotation in millimetre coordinates.
+rotation in millimetre coordinates — in one response, or streamed as each
+better layout is found.
 """
 
 import logging
 import traceback
+from typing import Any, Dict, List, Optional, Tuple
 
-from flask import Blueprint, request, jsonify
-from flask_login import login_required
+from flask import Blueprint, Response, request, jsonify
+from flask_login import current_user, login_required
 
-from services.placement_service import auto_place_tables
+from datatypes import TableTypeObject
+from services.placement_cache import placement_cache, placement_fingerprint
+from services.placement_batch import MAX_BATCH_FLOORPLANS, place_floorplans
+from services.placement_jobs import PlacementJob
+from services.placement_service import (
+    PLACEMENT_STRATEGIES,
+    SOLVER_TIME_LIMIT_S,
+    auto_place_tables,
+    requested_table_count,
+    validate_placement,
+)
 
 logger = logging.getLogger(__name__)
 
 floorplans_placement_bp = Blueprint("floorplans_placement", __name__)
 
 
+def _requesting_user_id() -> Optional[str]:
+    return current_user.get_id() if current_user.is_authenticated else None
+
+
+def _placement_arguments(data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Validate a placement request body.
+
+    Returns the keyword arguments for the placement engine, or an error message.
+    """
+    # ── validate required fields ──────────────────────────────────────────
+    for field in ("walls", "obstacles", "table_types", "counts", "scale_px_per_mm"):
+        if field not in data:
+            return None, f"Missing required field: {field}"
+
+    walls = data["walls"]
+    obstacles = data["obstacles"]
+    table_types = data["table_types"]
+    counts = data["counts"]
+    scale_px_per_mm = data["scale_px_per_mm"]
+
+    # Type checks
+    if not isinstance(walls, list):
+        return None, "walls must be an array"
+    if not isinstance(obstacles, list):
+        return None, "obstacles must be an array"
+    if not isinstance(table_types, list):
+        return None, "table_types must be an array"
+    if not isinstance(counts, dict):
+        return None, "counts must be an object"
+    if not isinstance(scale_px_per_mm, (int, float)):
+        return None, "scale_px_per_mm must be a number"
+
+    strategy = data.get("strategy", "rows")
+    if strategy not in PLACEMENT_STRATEGIES:
+        return None, f"strategy must be one of: {', '.join(PLACEMENT_STRATEGIES)}"
+    sections = data.get("sections")
+    if sections is not None and (
+        not isinstance(sections, list) or not all(isinstance(sec, dict) for sec in sections)
+    ):
+        return None, "sections must be an array of objects"
+    locations = data.get("locations")
+    if locations is not None and (
+        not isinstance(locations, list)
+        or not all(isinstance(loc, dict) and isinstance(loc.get("polygon"), list) for loc in locations)
+    ):
+        return None, "locations must be an array of objects with a polygon"
+    time_limit_s = data.get("time_limit_s", SOLVER_TIME_LIMIT_S)
+    if isinstance(time_limit_s, bool) or not isinstance(time_limit_s, (int, float)) or time_limit_s <= 0:
+        return None, "time_limit_s must be a positive number"
+
+    return {
+        "walls": walls,
+        "obstacles": obstacles,
+        "table_types": table_types,
+        "counts": counts,
+        "scale_px_per_mm": scale_px_per_mm,
+        "aisle_config": data.get("aisle_config"),
+        "strategy": strategy,
+        "sections": sections,
+        "locations": locations,
+        "time_limit_s": float(time_limit_s),
+    }, None
+
+
+def _cached_placement(
+    arguments: Dict[str, Any], refine: bool,
+) -> Tuple[str, Optional[List[Dict[str, Any]]]]:
+    """The cache key for a validated request, and its cached layout if there is one."""
+    fingerprint = placement_fingerprint(
+        arguments["walls"], arguments["obstacles"], arguments["table_types"],
+        arguments["counts"], arguments["aisle_config"], arguments["strategy"],
+        arguments["sections"], refine, arguments["locations"],
+    )
+    return fingerprint, placement_cache.get(fingerprint)
+
+
+def _store_placement(
+    fingerprint: str, arguments: Dict[str, Any], refine: bool, placed: List[Dict[str, Any]],
+) -> None:
+    """Cache *placed* if it is reproducible.
+
+    A solver layout that fell short depends on the time limit and on whether
+    a solver slot was free; storing it would pin a worse answer.
+    """
+    requested = requested_table_count(
+        [TableTypeObject(**t) for t in arguments["table_types"]], arguments["counts"],
+    )
+    if (arguments["strategy"] == "rows" and not refine) or len(placed) >= requested:
+        placement_cache.put(fingerprint, placed, requested)
+
+
 # ── POST /api/floorplans/place-tables ──────────────────────────────────────────
 
 @floorplans_placement_bp.route("/place-tables", methods=["POST"])
@@ -43,12 +146,36 @@ def place_tables():
             "aisle_config": {
                 "wallBufferMm": 1500,
                 "tableSpacingMm": 1200
-            }
+            },
+            "strategy": "rows",
+            "sections": [{"name": "A", "count": 6, "location": {"name": "Annex"}},
+                         {"name": "B", "count": 4}],
+            "locations": [{"name": "Annex", "polygon": [[x, y], ...]}],
+            "refine": false,
+            "time_limit_s": 30
         }
 
+    ``strategy`` is ``"rows"`` (default: aisle-aligned rows, instant) or
+    ``"pack"`` (pyckingsolver bin-packing).  ``sections`` and ``refine`` are
+    optional and apply to ``"rows"``: tables are assigned to the sections in
+    contiguous blocks, and ``refine`` tries ``"pack"`` too when the rows
+    cannot fit every table.  ``time_limit_s`` bounds the solver (at most 30).
+
+    Separate rooms, and halls split by the wall buffer or an obstacle, are
+    all placed into.  ``locations`` is optional and names areas of the plan;
+    a section whose ``location`` names one is placed there.  Other tables
+    are split between the rooms by area.
+
+    Results are cached by a fingerprint of the geometry, table types, counts
+    and options (see :mod:`services.placement_cache`), so an unchanged room
+    is answered without re-placing; ``cached`` says which this was.  Only
+    layouts that are reproducible are stored: the row layout, or any layout
+    that placed every table.
+
     **Returns**::
 
         {
+            "cached": false,
             "placed_tables": [
                 {
                     "x_mm": 3000.0,
@@ -56,7 +183,8 @@ def place_tables():
                     "rotation": 0.0,
                     "width_mm": 1800,
                     "height_mm": 900,
-                    "table_type_id": "type_6ft"
+                    "table_type_id": "type_6ft",
+                    "section_name": "A"
                 }
             ]
         }
@@ -66,43 +194,259 @@ def place_tables():
         if not data:
             return jsonify({"error": "Request body must be valid JSON"}), 400
 
-        # ── validate required fields ──────────────────────────────────────
-        for field in ("walls", "obstacles", "table_types", "counts", "scale_px_per_mm"):
-            if field not in data:
-                return jsonify({"error": f"Missing required field: {field}"}), 400
+        arguments, error = _placement_arguments(data)
+        if error:
+            return jsonify({"error": error}), 400
 
-        walls = data["walls"]
-        obstacles = data["obstacles"]
-        table_types = data["table_types"]
-        counts = data["counts"]
-        scale_px_per_mm = data["scale_px_per_mm"]
-        aisle_config = data.get("aisle_config")
-
-        # Type checks
-        if not isinstance(walls, list):
-            return jsonify({"error": "walls must be an array"}), 400
-        if not isinstance(obstacles, list):
-            return jsonify({"error": "obstacles must be an array"}), 400
-        if not isinstance(table_types, list):
-            return jsonify({"error": "table_types must be an array"}), 400
-        if not isinstance(counts, dict):
-            return jsonify({"error": "counts must be an object"}), 400
-        if not isinstance(scale_px_per_mm, (int, float)):
-            return jsonify({"error": "scale_px_per_mm must be a number"}), 400
+        refine = bool(data.get("refine", False))
+
+        # ── cached result ─────────────────────────────────────────────────
+        fingerprint, placed = _cached_placement(arguments, refine)
+        if placed is not None:
+            return jsonify({"placed_tables": placed, "cached": True}), 200
 
         # ── run placement ─────────────────────────────────────────────────
         placed = auto_place_tables(
-            walls=walls,
-            obstacles=obstacles,
-            table_types=table_types,
-            counts=counts,
-            scale_px_per_mm=scale_px_per_mm,
-            aisle_config=aisle_config,
+            **arguments,
+            refine=refine,
+            user_id=_requesting_user_id(),
         )
+        _store_placement(fingerprint, arguments, refine, placed)
 
-        return jsonify({"placed_tables": placed}), 200
+        return jsonify({"placed_tables": placed, "cached": False}), 200
 
     except Exception as exc:
         logger.error("Error in place_tables: %s", exc)
         logger.error(traceback.format_exc())
         return jsonify({"error": "Internal server error"}), 500
+
+
+# ── POST /api/floorplans/place-tables/stream ───────────────────────────────────
+
+@floorplans_placement_bp.route("/place-tables/stream", methods=["POST"])
+@login_required
+def place_tables_stream():
+    """Auto-place tables, streaming each better layout as it is found.
+
+    Takes the same body as ``/place-tables``, except that ``strategy`` must be
+    ``"rows"`` and ``refine`` defaults to true: the stream starts from the row
+    layout and, unless ``refine`` is false, refines it with pyckingsolver while
+    tables are missing, for up to ``time_limit_s``.
+
+    **Returns** ``application/x-ndjson``, one event per line::
+
+        {"event": "progress", "source": "rows", "placed": 40, "placed_tables": [...]}
+        {"event": "progress", "source": "solver", "placed": 44, "placed_tables": [...]}
+        {"event": "result", "placed_tables": [...], "requested": 48, "cancelled": false}
+
+    Disconnecting cancels the job and kills the solver.
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "Request body must be valid JSON"}), 400
+
+    arguments, error = _placement_arguments(data)
+    if error:
+        return jsonify({"error": error}), 400
+    if arguments["strategy"] != "rows":
+        return jsonify({"error": "strategy must be rows when streaming"}), 400
+
+    job = PlacementJob(
+        walls=arguments["walls"],
+        obstacles=arguments["obstacles"],
+        table_types=arguments["table_types"],
+        counts=arguments["counts"],
+        aisle_config=arguments["aisle_config"],
+        sections=arguments["sections"],
+        user_id=_requesting_user_id(),
+        time_limit_s=arguments["time_limit_s"],
+        locations=arguments["locations"],
+        refine=bool(data.get("refine", True)),
+    )
+    return Response(
+        job.stream(),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# ── POST /api/floorplans/place-tables/batch ────────────────────────────────────
+
+@floorplans_placement_bp.route("/place-tables/batch", methods=["POST"])
+@login_required
+def place_tables_batch():
+    """Auto-place tables on several floorplans (floors, or PDF pages) at once.
+
+    **Request body** (JSON)::
+
+        {
+            "floorplans": [
+                {"id": "floor-1", "walls": [...], "obstacles": [...], "table_types": [...],
+                 "counts": {...}, "scale_px_per_mm": 0.1, ...},
+                {"id": "floor-2", ...}
+            ],
+            "time_limit_s": 30
+        }
+
+    Each floorplan takes the same fields as ``/place-tables`` (its own
+    ``time_limit_s`` is ignored).  Floors are placed side by side in worker
+    processes within the one shared ``time_limit_s`` (at most 30); a floor
+    the cache already holds is not placed again.
+
+    **Returns**::
+
+        {
+            "floorplans": [
+                {"id": "floor-1", "placed_tables": [...], "requested": 40, "cached": false},
+                {"id": "floor-2", "error": "Placement did not finish within the time limit"}
+            ]
+        }
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({"error": "Request body must be valid JSON"}), 400
+
+        floorplans = data.get("floorplans")
+        if not isinstance(floorplans, list) or not floorplans:
+            return jsonify({"error": "floorplans must be a non-empty array"}), 400
+        if len(floorplans) > MAX_BATCH_FLOORPLANS:
+            return jsonify({"error": f"At most {MAX_BATCH_FLOORPLANS} floorplans per batch"}), 400
+        time_limit_s = data.get("time_limit_s", SOLVER_TIME_LIMIT_S)
+        if isinstance(time_limit_s, bool) or not isinstance(time_limit_s, (int, float)) or time_limit_s <= 0:
+            return jsonify({"error": "time_limit_s must be a positive number"}), 400
+
+        # ── validate every floor before placing any ───────────────────────
+        floors = []
+        for index, floor in enumerate(floorplans):
+            if not isinstance(floor, dict):
+                return jsonify({"error": f"floorplans[{index}] must be an object"}), 400
+            arguments, error = _placement_arguments(floor)
+            if error:
+                return jsonify({"error": f"floorplans[{index}]: {error}"}), 400
+            del arguments["time_limit_s"]
+            arguments["refine"] = bool(floor.get("refine", False))
+            floors.append((floor.get("id", index), arguments))
+
+        # ── cached floors, then the rest side by side ─────────────────────
+        results: List[Optional[Dict[str, Any]]] = [None] * len(floors)
+        fingerprints: List[str] = []
+        pending: List[int] = []
+        for index, (floor_id, arguments) in enumerate(floors):
+            fingerprint, placed = _cached_placement(arguments, arguments["refine"])
+            fingerprints.append(fingerprint)
+            if placed is None:
+                pending.append(index)
+            else:
+                results[index] = {"placed_tables": placed, "cached": True}
+
+        outcomes = place_floorplans(
+            [floors[index][1] for index in pending],
+            user_id=_requesting_user_id(),
+            time_limit_s=float(time_limit_s),
+        ) if pending else []
+        for index, outcome in zip(pending, outcomes):
+            if "placed_tables" in outcome:
+                arguments = floors[index][1]
+                _store_placement(fingerprints[index], arguments, arguments["refine"], outcome["placed_tables"])
+                outcome["cached"] = False
+            results[index] = outcome
+
+        response = []
+        for (floor_id, arguments), result in zip(floors, results):
+            entry = {"id": floor_id, **result}
+            if "placed_tables" in result:
+                entry["requested"] = requested_table_count(
+                    [TableTypeObject(**t) for t in arguments["table_types"]], arguments["counts"],
+                )
+            response.append(entry)
+        return jsonify({"floorplans": response}), 200
+
+    except Exception as exc:
+        logger.error("Error in place_tables_batch: %s", exc)
+        logger.error(traceback.format_exc())
+        return jsonify({"error": "Internal server error"}), 500
+
+
+# ── GET /api/floorplans/place-tables/cache-stats ───────────────────────────────
+
+@floorplans_placement_bp.route("/place-tables/cache-stats", methods=["GET"])
+@login_required
+def placement_cache_stats():
+    """Hit/miss counters of the placement result cache, for this process.
+
+    **Returns**::
+
+        {"hits": 12, "misses": 3, "stores": 3, "evictions": 0, "errors": 0,
+         "hit_rate": 0.8, "max_entries": 5000}
+    """
+    return jsonify(placement_cache.stats()), 200
+
+
+# ── POST /api/floorplans/validate-placement ────────────────────────────────────
+
+@floorplans_placement_bp.route("/validate-placement", methods=["POST"])
+@login_required
+def validate_table_placement():
+    """Check manually placed (e.g. dragged) tables for collisions.
+
+    **Request body** (JSON)::
+
+        {
+            "walls": [...],
+            "obstacles": [...],
+            "placed_tables": [
+                {"id": "t1", "x_mm": 3000.0, "y_mm": 4500.0, "rotation": 0.0,
+                 "width_mm": 1800, "height_mm": 900}
+            ],
+            "table_ids": ["t1"],
+            "aisle_config": {"wall_buffer_mm": 1500, "table_spacing_mm": 1200}
+        }
+
+    ``table_ids`` is optional; without it every table is checked.
+
+    **Returns**::
+
+        {
+            "valid": false,
+            "conflicts": [
+                {"id": "t1", "outside_zone": false, "obstacles": [],
+                 "overlapping": ["t2"], "too_close": []}
+            ],
+            "index_stats": {"zone": {...}, "obstacles": {...}, "tables": {...}}
+        }
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({"error": "Request body must be valid JSON"}), 400
+
+        for field in ("walls", "obstacles", "placed_tables"):
+            if field not in data:
+                return jsonify({"error": f"Missing required field: {field}"}), 400
+            if not isinstance(data[field], list):
+                return jsonify({"error": f"{field} must be an array"}), 400
+
+        table_ids = data.get("table_ids")
+        if table_ids is not None and not isinstance(table_ids, list):
+            return jsonify({"error": "table_ids must be an array"}), 400
+
+        for table in data["placed_tables"]:
+            if not isinstance(table, dict):
+                return jsonify({"error": "placed_tables entries must be objects"}), 400
+            for key in ("x_mm", "y_mm", "width_mm", "height_mm"):
+                if not isinstance(table.get(key), (int, float)):
+                    return jsonify({"error": f"placed_tables entries need a numeric {key}"}), 400
+
+        result = validate_placement(
+            walls=data["walls"],
+            obstacles=data["obstacles"],
+            placed_tables=data["placed_tables"],
+            aisle_config=data.get("aisle_config"),
+            table_ids=[str(t) for t in table_ids] if table_ids is not None else None,
+        )
+        return jsonify(result), 200
+
+    except Exception as exc:
+        logger.error("Error in validate_table_placement: %s", exc)
+        logger.error(traceback.format_exc())
+        return jsonify({"error": "Internal server error"}), 500
@@ -10,6 +10,7 @@ POST /api/floorplans/save-to-market
 
 import logging
 import traceback
+import uuid
 
 from flask import Blueprint, request, jsonify
 from flask_login import login_required
@@ -17,7 +18,9 @@ from flask_login import login_required
 from db_config import get_database
 from datatypes import MarketRole
 import api.markets as MarketsApi
+from market_documents import MarketReadProfile
 import api.permissions as PermissionsApi
+from services.floorplan_geometry import compact_geometry_enabled, pack_floorplan
 
 logger = logging.getLogger(__name__)
 
@@ -75,7 +78,7 @@ def save_floorplan_to_market():
             return jsonify({"error": "floorplan is required"}), 400
 
         # ── 1. Find the market ─────────────────────────────────────────────
-        context = MarketsApi.load_market_context(market_id)
+        context = MarketsApi.load_market_context(market_id, MarketReadProfile.SETUP)
         if context is None:
             return jsonify({"error": "Market not found"}), 404
 
@@ -123,6 +126,8 @@ def save_floorplan_to_market():
             sections_data.append(section)
 
         # ── 4. Update Market.setupObject atomically ────────────────────────
+        if compact_geometry_enabled():
+            floorplan = pack_floorplan(floorplan)
         existing_setup = market_doc.get("setupObject")
 
         if isinstance(existing_setup, dict):
@@ -146,8 +151,12 @@ def save_floorplan_to_market():
                 "locations": list(locations_data.values()),
                 "floorplans": [floorplan],
             }}}
+        # The setup is changed in place rather than written whole, so there is no stored setup to
+        # hash here; any new revision retires the market's materialized table grid.
+        update["$set"][MarketsApi.MARKET_SETUP_REVISION_KEY] = uuid.uuid4().hex
 
         markets_collection.update_one({"id": market_id}, update)
+        MarketsApi.hold_floorplan_images(market_id, [floorplan])
 
         # ── 5. Return success ──────────────────────────────────────────────
         return jsonify({
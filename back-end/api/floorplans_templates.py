@@ -4,8 +4,18 @@ Floorplan Template CRUD endpoints.
 Uses MongoDB collection ``floorplan_templates`` with camelCase keys.
 Templates store table-type presets and aisle configuration that can be
 reused across floorplan layouts.
+
+Listing returns one page of summaries -- no ``tableTypes`` or ``aisles``,
+just what a template picker shows -- newest first, and the picker fetches
+the one template it loads in full from ``GET /templates/<id>``.  Pages are
+keyed by the last ``(updatedAt, id)`` seen rather than skipped by count, so
+the compound ``(owner, updatedAt, id)`` indexes below serve every page of
+a large organization's templates as one bounded index scan.
 """
 
+import base64
+import binascii
+import json
 import uuid
 import logging
 from datetime import datetime
@@ -18,8 +28,38 @@ from db_config import get_database
 
 logger = logging.getLogger(__name__)
 
+TEMPLATES_COLLECTION = "floorplan_templates"
+OWNER_USER_FIELD = "ownerUserId"
+ORGANIZATION_FIELD = "organizationId"
+UPDATED_AT_FIELD = "updatedAt"
+# Listing filters on one owner field and sorts newest first; see ``list_templates``
+TEMPLATE_OWNER_INDEX = "floorplan_templates_owner_recent"
+TEMPLATE_ORGANIZATION_INDEX = "floorplan_templates_organization_recent"
+TEMPLATE_INDEXES = {
+    TEMPLATE_OWNER_INDEX: [(OWNER_USER_FIELD, 1), (UPDATED_AT_FIELD, -1), ("id", -1)],
+    TEMPLATE_ORGANIZATION_INDEX: [(ORGANIZATION_FIELD, 1), (UPDATED_AT_FIELD, -1), ("id", -1)],
+}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# What the template picker shows; the table types themselves stay in the database
+SUMMARY_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "name": 1,
+    OWNER_USER_FIELD: 1,
+    ORGANIZATION_FIELD: 1,
+    "createdAt": 1,
+    UPDATED_AT_FIELD: 1,
+    "tableTypeCount": {"$size": {"$ifNull": ["$tableTypes", []]}},
+}
+
+# Membership is all the listing needs of an organization
+_MEMBERSHIP_PROJECTION = {"_id": 0, "owner": 1, "members": 1, "admins": 1}
+
 db = get_database()
-templates_collection = db["floorplan_templates"]
+templates_collection = db[TEMPLATES_COLLECTION]
 organizations_collection = db["organizations"]
 
 floorplans_templates_bp = Blueprint("floorplans_templates", __name__)
@@ -62,13 +102,74 @@ def _check_ownership(template_doc: dict, requesting_user) -> bool:
 
     org_id = template_doc.get("organizationId")
     if org_id:
-        org = organizations_collection.find_one({"id": org_id})
+        org = organizations_collection.find_one({"id": org_id}, _MEMBERSHIP_PROJECTION)
         if org and org.get("owner") == requesting_user.get("id"):
             return True
 
     return False
 
 
+def _is_member(org: dict, user_id) -> bool:
+    """Return True if *user_id* owns, administers or belongs to *org*."""
+    return (
+        user_id == org.get("owner")
+        or user_id in org.get("members", [])
+        or user_id in org.get("admins", [])
+    )
+
+
+def _can_view(template_doc: dict, requesting_user) -> bool:
+    """Return True if *requesting_user* may read the template.
+
+    Anyone who may modify it may read it, and so may every member of its
+    organization -- the same users who see it listed.
+    """
+    if not requesting_user:
+        return False
+
+    if template_doc.get(OWNER_USER_FIELD) == requesting_user.get("id"):
+        return True
+
+    org_id = template_doc.get(ORGANIZATION_FIELD)
+    if not org_id:
+        return False
+    org = organizations_collection.find_one({"id": org_id}, _MEMBERSHIP_PROJECTION)
+    return bool(org) and _is_member(org, requesting_user.get("id"))
+
+
+def _encode_cursor(summary: dict) -> str:
+    """An opaque page cursor: the sort key of the last template on the page."""
+    key = json.dumps([summary.get(UPDATED_AT_FIELD), summary.get("id")])
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    """The ``(updatedAt, id)`` a cursor was made from, or None if it is not one."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if not isinstance(key, list) or len(key) != 2 or not all(isinstance(part, str) for part in key):
+        return None
+    return key
+
+
+def _page_size(value):
+    """The requested page size, or None if it is not a positive integer.
+
+    Sizes above :data:`MAX_PAGE_SIZE` are capped rather than refused.
+    """
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return None
+    if size <= 0:
+        return None
+    return min(size, MAX_PAGE_SIZE)
+
+
 # ── POST /templates ─────────────────────────────────────────────────────────
 
 @floorplans_templates_bp.route("/templates", methods=["POST"])
@@ -133,35 +234,59 @@ def create_template():
 @floorplans_templates_bp.route("/templates", methods=["GET"])
 @login_required
 def list_templates():
-    """List templates accessible to the current user.
+    """List summaries of the templates accessible to the current user.
 
     Query params:
     - **organizationId** — filter by organization ID (requires org membership)
+    - **limit** — page size (default 50, at most 200)
+    - **cursor** — ``nextCursor`` of the previous page
+
+    Each summary carries ``id``, ``name``, ``ownerUserId``,
+    ``organizationId``, ``createdAt``, ``updatedAt`` and ``tableTypeCount``;
+    fetch ``GET /templates/<id>`` for the table types themselves.  Templates
+    are listed most recently updated first; ``nextCursor`` is null on the
+    last page.
     """
     try:
         user = _get_request_user()
         if not user:
             return jsonify({"error": "User not found"}), 401
 
+        limit = _page_size(request.args.get("limit"))
+        if limit is None:
+            return jsonify({"error": "limit must be a positive integer"}), 400
+
         org_id = request.args.get("organizationId")
         if org_id:
-            org = organizations_collection.find_one({"id": org_id})
+            org = organizations_collection.find_one({"id": org_id}, _MEMBERSHIP_PROJECTION)
             if not org:
                 return jsonify({"error": "Organization not found"}), 404
-            owner_id = org.get("owner")
-            members = org.get("members", [])
-            admins = org.get("admins", [])
-            user_id = user.get("id")
-            if user_id != owner_id and user_id not in members and user_id not in admins:
+            if not _is_member(org, user.get("id")):
                 return jsonify({"error": "User does not belong to this organization"}), 403
-            query = {"organizationId": org_id}
+            query = {ORGANIZATION_FIELD: org_id}
         else:
-            query = {"ownerUserId": user.get("id")}
-
-        cursor = templates_collection.find(query)
-        templates = [_doc_to_response(doc) for doc in cursor]
+            query = {OWNER_USER_FIELD: user.get("id")}
+
+        cursor = request.args.get("cursor")
+        if cursor:
+            after = _decode_cursor(cursor)
+            if after is None:
+                return jsonify({"error": "Invalid cursor"}), 400
+            updated_at, template_id = after
+            query = {"$and": [query, {"$or": [
+                {UPDATED_AT_FIELD: {"$lt": updated_at}},
+                {UPDATED_AT_FIELD: updated_at, "id": {"$lt": template_id}},
+            ]}]}
+
+        # One extra row says whether there is another page
+        summaries = list(
+            templates_collection.find(query, SUMMARY_PROJECTION)
+            .sort([(UPDATED_AT_FIELD, -1), ("id", -1)])
+            .limit(limit + 1)
+        )
+        next_cursor = _encode_cursor(summaries[limit - 1]) if len(summaries) > limit else None
 
-        return jsonify({"templates": templates}), 200
+        return jsonify({"templates": summaries[:limit], "nextCursor": next_cursor}), 200
 
     except Exception as exc:
         logger.error(f"Error listing templates: {exc}")
@@ -180,7 +305,7 @@ def get_template(template_id: str):
             return jsonify({"error": "Template not found"}), 404
 
         user = _get_request_user()
-        if not _check_ownership(doc, user):
+        if not _can_view(doc, user):
             return jsonify({"error": "You do not have permission to view this template"}), 403
 
         return jsonify({"template": _doc_to_response(doc)}), 200
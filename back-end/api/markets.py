@@ -1,8 +1,12 @@
+import hashlib
+import json
 import re
 import uuid
+from functools import lru_cache
 from typing import NamedTuple, Optional, Dict, Any, List, Tuple
+from pymongo.errors import BulkWriteError, PyMongoError
 from pymongo.results import InsertOneResult, UpdateResult, DeleteResult
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from bson import ObjectId
 from datatypes import (
     ApplicationForm,
@@ -13,17 +17,28 @@ from datatypes import (
     MarketTableRow,
     Organization,
     UnassignedTableEntry,
+    VendorAssignmentResult,
     phase_from_market_document,
 )
 from assignment.assignment import assign_market
 from assignment.utils import convert_keys_to_snake_case, convert_keys_to_camel_case, snake_to_camel
 import api.applications as ApplicationsApi
 from market_documents import (
+    MarketReadProfile,
+    find_market_document,
+    forget_market_slug_resolution,
     market_doc_field,
     market_doc_filter,
     market_doc_key,
     market_from_document,
+    market_from_profile_document,
 )
+from services.floorplan_geometry import (
+    compact_geometry_enabled,
+    pack_market_floorplans,
+    unpack_market_floorplans,
+)
+from services.gridfs_service import add_image_owner, market_owner, release_images
 import api.source_data as SourceDataApi
 import api.permissions as PermissionsApi
 import api.organizations as OrgsApi
@@ -38,7 +53,32 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 db = get_database()
+MARKET_TABLES_COLLECTION = "market_tables"
+MARKET_TABLE_ROWS_COLLECTION = "market_table_rows"
+
 markets_collection = db["markets"]
+market_tables_collection = db[MARKET_TABLES_COLLECTION]
+market_table_rows_collection = db[MARKET_TABLE_ROWS_COLLECTION]
+
+MARKET_TABLES_MARKET_ID_FIELD = "marketId"
+MARKET_TABLE_ROWS_INDEX = "market_table_rows_position"
+
+# Stamped on the market document by every write of its setup, so a reader can tell which setup a
+# materialized grid was derived from without reading the setup itself.
+MARKET_SETUP_REVISION_KEY = "setupRevision"
+
+# Bumped whenever ``derive_market_table_rows`` changes what it produces, so a grid materialized by
+# an older build is never served as if the current one had derived it.
+MARKET_TABLE_GRID_VERSION = 2
+
+_DUPLICATE_KEY_ERROR = 11000
+
+_market_table_indexes_ready = False
+
+# The two row lists a response carries by the thousand are serialized by alias, straight to camelCase,
+# rather than dumped snake-cased and then walked key by key (see ``VendorAssignmentResult``).
+_VENDOR_ASSIGNMENTS = TypeAdapter(List[VendorAssignmentResult])
+_MARKET_TABLE_ROWS = TypeAdapter(List[MarketTableRow])
 
 VALID_FORM_FIELD_TYPES = {"text", "number", "select", "multi_select", "checkbox", "date", "email"}
 
@@ -88,14 +128,20 @@ def _load_organization(organization_id: Optional[str]) -> Optional[Organization]
     return organization
 
 
-def _load_market_for(market_id: str, requesting_user: str, role: MarketRole, action: str) -> Market:
-    """Load a market and assert the requesting user holds at least ``role`` on it."""
-    market_dict = markets_collection.find_one({"id": market_id})
+def _load_market_for(
+    market_id: str,
+    requesting_user: str,
+    role: MarketRole,
+    action: str,
+    profile: MarketReadProfile = MarketReadProfile.FULL,
+) -> Market:
+    """Load a market, as far as ``profile`` reads, and assert the requesting user holds ``role`` on it."""
+    market_dict = find_market_document(markets_collection, market_id, profile)
     if not market_dict:
         raise MarketNotFoundError("Market not found")
 
     try:
-        market = market_from_document(market_dict)
+        market = market_from_profile_document(market_dict, profile)
     except Exception as e:
         raise ValueError(f"Invalid market data: {e}")
 
@@ -270,6 +316,23 @@ def _preserve_server_owned_fields(
         )
 
 
+@lru_cache(maxsize=256)
+def _table_choice_slot(table_choice: str) -> str:
+    """Which side of a table a vendor's table choice occupies: full, left, right or any.
+
+    A market has a handful of distinct table-choice labels and thousands of assignments carrying
+    them, so each label is normalized once rather than once per assignment.
+    """
+    choice_normalized = table_choice.strip().lower()
+    if "full table" in choice_normalized:
+        return "full"
+    if "half table" in choice_normalized and "left" in choice_normalized:
+        return "left"
+    if "half table" in choice_normalized and "right" in choice_normalized:
+        return "right"
+    return "any"
+
+
 def derive_market_table_rows(assigned_market: Market) -> List[MarketTableRow]:
     """Derive one row per table/date with assignment slots."""
     setup_object = assigned_market.setup_object
@@ -315,12 +378,12 @@ def derive_market_table_rows(assigned_market: Market) -> List[MarketTableRow]:
             }
 
         row = rows_by_key[key]
-        choice_normalized = assignment.table_choice.strip().lower()
-        if "full table" in choice_normalized:
+        slot = _table_choice_slot(assignment.table_choice)
+        if slot == "full":
             row["assignment_slots"] = [assignment.email, assignment.email]
-        elif "half table" in choice_normalized and "left" in choice_normalized:
+        elif slot == "left":
             row["assignment_slots"][0] = assignment.email
-        elif "half table" in choice_normalized and "right" in choice_normalized:
+        elif slot == "right":
             row["assignment_slots"][1] = assignment.email
         else:
             if row["assignment_slots"][0] is None:
@@ -382,7 +445,12 @@ def derive_unassigned_tables_from_rows(rows: List[MarketTableRow]) -> Dict[str,
 
 def get_market(market_id: str) -> Optional[Dict[str, Any]]:
     """Get a market by id. (Deprecated - use get_market_for_user instead)"""
-    return markets_collection.find_one({"id": market_id})
+    market = markets_collection.find_one({"id": market_id})
+    return unpack_market_floorplans(market) if market else market
+
+
+# Profiles whose callers go on to use the market's sub-objects; see ``load_market_context``.
+_MATERIALIZED_PROFILES = frozenset((MarketReadProfile.SUMMARY, MarketReadProfile.SETUP))
 
 
 class MarketContext(NamedTuple):
@@ -398,14 +466,27 @@ class MarketContext(NamedTuple):
     organization_dict: Optional[Dict[str, Any]]
 
 
-def load_market_context(market_id: str) -> Optional[MarketContext]:
-    """Load a market with its parsed model and owning organization, or None if absent."""
-    market_dict = markets_collection.find_one({"id": market_id})
+def load_market_context(
+    market_id: str, profile: MarketReadProfile = MarketReadProfile.FULL,
+) -> Optional[MarketContext]:
+    """Load a market with its parsed model and owning organization, or None if absent.
+
+    ``profile`` names how much of the stored market the caller reads (see
+    ``market_documents.MarketReadProfile``); the document and model hold only that much.
+
+    The model is parsed lazily. A full read serves the raw document and consults the model only
+    for permissions, so its sub-objects are never validated unless something reads them; the
+    summary and setup profiles are read by callers that transition, mutate or assign the market,
+    so everything they fetched is validated here and an invalid market is reported as one.
+    """
+    market_dict = find_market_document(markets_collection, market_id, profile)
     if not market_dict:
         return None
 
     try:
-        market = market_from_document(market_dict)
+        market = market_from_profile_document(market_dict, profile, lazy=True)
+        if profile in _MATERIALIZED_PROFILES:
+            market.materialize()
     except Exception as e:
         logger.warning("Stored market %s failed validation: %s", market_id, e)
         return MarketContext(market_dict, None, None, None)
@@ -430,7 +511,7 @@ def _stamp_effective_phase(market: Dict[str, Any], phase: MarketPhase) -> None:
 
 def get_market_for_user(user_email: str, market_id: str) -> Optional[Dict[str, Any]]:
     """Get a market by id, checking user has access."""
-    context = load_market_context(market_id)
+    context = load_market_context(market_id, MarketReadProfile.FULL)
     if context is None or context.market is None:
         return None
 
@@ -442,6 +523,7 @@ def get_market_for_user(user_email: str, market_id: str) -> Optional[Dict[str, A
     if user_role is None:
         return None
 
+    unpack_market_floorplans(market_dict)
     market_dict['_id'] = str(market_dict['_id'])
     market_dict['user_role'] = user_role.value
     _stamp_effective_phase(market_dict, market.phase)
@@ -458,7 +540,10 @@ def get_market_for_user(user_email: str, market_id: str) -> Optional[Dict[str, A
 def get_markets_by_owner_email(owner_email: str) -> List[Dict[str, Any]]:
     """Get all markets by owner. (Deprecated - use get_markets_for_user instead)"""
     # Find markets where owner_email has OWNER role
-    return list(markets_collection.find({f"roles.{owner_email}": MarketRole.OWNER.value}))
+    return [
+        unpack_market_floorplans(market)
+        for market in markets_collection.find({f"roles.{owner_email}": MarketRole.OWNER.value})
+    ]
 
 
 class _SummaryLookups:
@@ -493,6 +578,7 @@ def _decorate_market_summary(
     Kept in one place so a market exposes the same derived state - phase included -
     whether it was served by the list endpoint or by ``get_market_for_user``.
     """
+    unpack_market_floorplans(market)
     market['_id'] = str(market['_id'])
     market['user_role'] = user_role
     _stamp_effective_phase(market, phase_from_market_document(market))
@@ -570,6 +656,22 @@ def _convert_roles_keys_to_user_ids(roles: Dict[str, str]) -> Dict[str, str]:
     return result
 
 
+def hold_floorplan_images(market_id: str, floorplans: Optional[List[Dict[str, Any]]]) -> None:
+    """Make the market an owner of the images its (camelCase) floorplans show.
+
+    An uploader letting go of an image then leaves it to the markets that show it. Owners are only
+    added here: an image a market stops showing is let go when the market is deleted.
+    """
+    for floorplan in floorplans or []:
+        gridfs_id = floorplan.get("imageGridfsId") if isinstance(floorplan, dict) else None
+        if not gridfs_id:
+            continue
+        try:
+            add_image_owner(gridfs_id, market_owner(market_id))
+        except PyMongoError as e:
+            logger.warning(f"Failed to hold floorplan image {gridfs_id} for market {market_id}: {e}")
+
+
 def create_market(market: Market, owner_email: str) -> tuple:
     """Create a new market.
 
@@ -596,12 +698,16 @@ def create_market(market: Market, owner_email: str) -> tuple:
     market_id = str(uuid.uuid4())
     market_dict["id"] = market_id
     market_dict = convert_keys_to_camel_case(market_dict)
+    if compact_geometry_enabled():
+        pack_market_floorplans(market_dict)
+    market_dict[MARKET_SETUP_REVISION_KEY] = market_setup_revision(market_dict.get("setupObject"))
     
     existing_market = markets_collection.find_one({"name": market.name})
     if existing_market:
         raise ValueError("Market already exists")
     
     result = markets_collection.insert_one(market_dict)
+    hold_floorplan_images(market_id, (market_dict.get("setupObject") or {}).get("floorplans"))
     
     if market.organization_id:
         try:
@@ -617,13 +723,18 @@ def create_market(market: Market, owner_email: str) -> tuple:
 
 def update_market(market_id: str, market: Market, requesting_user: str) -> UpdateResult:
     """Update an existing market. Requires EDIT permission."""
-    existing_market = _load_market_for(market_id, requesting_user, MarketRole.EDITOR, "edit")
+    existing_market = _load_market_for(
+        market_id, requesting_user, MarketRole.EDITOR, "edit", MarketReadProfile.SUMMARY,
+    )
 
     market_dict = market.model_dump()
     _strip_persisted_assignment_statistics(market_dict)
     _preserve_server_owned_fields(market_dict, market, existing_market)
     market_dict["roles"] = _convert_roles_keys_to_user_ids(market_dict.get("roles", {}))
     market_dict = convert_keys_to_camel_case(market_dict)
+    if compact_geometry_enabled():
+        pack_market_floorplans(market_dict)
+    market_dict[MARKET_SETUP_REVISION_KEY] = market_setup_revision(market_dict.get("setupObject"))
     
     old_org_id = existing_market.organization_id
     new_org_id = market.organization_id
@@ -640,12 +751,16 @@ def update_market(market_id: str, market: Market, requesting_user: str) -> Updat
                 {"$addToSet": {"markets": market_id}}
             )
     
-    return markets_collection.update_one({"id": market_id}, {"$set": market_dict})
+    result = markets_collection.update_one({"id": market_id}, {"$set": market_dict})
+    hold_floorplan_images(market_id, (market_dict.get("setupObject") or {}).get("floorplans"))
+    # A rename moves the market to another slug; the old one must stop resolving to it.
+    forget_market_slug_resolution(market_id)
+    return result
 
 def get_assigned_market(market_id: str, requesting_user: Optional[str] = None) -> tuple[Dict[str, Any], int]:
     """Get an assigned market. Requires VIEW permission."""
     try:
-        context = load_market_context(market_id)
+        context = load_market_context(market_id, MarketReadProfile.FULL)
         if context is None:
             return {"error": "Market not found"}, 404
 
@@ -696,9 +811,12 @@ def get_assigned_market(market_id: str, requesting_user: Optional[str] = None) -
         try:
             market = market_from_document(context.document, market_dict)
             assigned_market = assign_market(market, source_data)
-            assigned_market_dict = assigned_market.model_dump()
-
-            assigned_market_dict = convert_keys_to_camel_case(assigned_market_dict)
+            assigned_market_dict = convert_keys_to_camel_case(
+                assigned_market.model_dump(exclude={"assignment_object": {"vendor_assignments"}})
+            )
+            assigned_market_dict["assignmentObject"]["vendorAssignments"] = _VENDOR_ASSIGNMENTS.dump_python(
+                assigned_market.assignment_object.vendor_assignments, by_alias=True,
+            )
             if context.organization_dict:
                 assigned_market_dict['organizationName'] = context.organization_dict.get('name')
             return assigned_market_dict, 200
@@ -740,7 +858,7 @@ def get_assigned_market(market_id: str, requesting_user: Optional[str] = None) -
 def get_assignment_statistics(market_id: str, requesting_user: Optional[str] = None) -> tuple[Dict[str, Any], int]:
     """Derive and return assignment statistics for a market."""
     try:
-        context = load_market_context(market_id)
+        context = load_market_context(market_id, MarketReadProfile.SETUP)
         if context is None:
             return {"error": "Market not found"}, 404
         if context.market is None:
@@ -797,7 +915,7 @@ def get_assignment_csv(market_id: str, requesting_user: Optional[str] = None) ->
     an error dict with the appropriate HTTP status code.
     """
     try:
-        context = load_market_context(market_id)
+        context = load_market_context(market_id, MarketReadProfile.SETUP)
         if context is None:
             return {"error": "Market not found"}, 404
         if context.market is None:
@@ -842,21 +960,252 @@ def get_assignment_csv(market_id: str, requesting_user: Optional[str] = None) ->
         }, 500
 
 
-def get_market_tables(market_id: str, requesting_user: Optional[str] = None) -> tuple[List[Dict[str, Any]] | Dict[str, Any], int]:
-    """Derive and return table rows for a market."""
+def market_setup_revision(setup: Any) -> str:
+    """A revision of a stored setup object, stamped on the market by the write that stores it.
+
+    The hash of the setup as written, so writing back an unchanged setup keeps the revision, and
+    with it the market's materialized table grid.
+    """
+    payload = json.dumps(setup, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _source_revision(source_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The upload metadata identifying a market's source data, or None when it carries none.
+
+    Every upload stamps a new ``upload_date``, so it changes whenever the data does. Source data
+    without one cannot be told apart from its next upload, and its grid is never materialized.
+    """
+    upload_date = source_data.get("upload_date")
+    if upload_date is None:
+        return None
+    return {
+        "upload_date": str(upload_date),
+        "row_count": source_data.get("row_count"),
+        "filename": source_data.get("filename"),
+    }
+
+
+def market_table_grid_fingerprint(setup_revision: str, source_revision: Dict[str, Any]) -> str:
+    """Identify the inputs a market's table grid is derived from.
+
+    The grid is a pure function of the market's setup and its uploaded source data - assignment
+    is deterministic and is not stored - so two requests with the same fingerprint would derive
+    the same rows. Both inputs are identified by what their write paths stamp on them (the
+    market's ``setupRevision``, the source data's upload metadata), so the fingerprint of the
+    current grid is known from two small reads, without loading either input.
+    """
+    payload = json.dumps(
+        {"version": MARKET_TABLE_GRID_VERSION, "setup": setup_revision, "source": source_revision},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _stored_setup_revision(market_id: str) -> Optional[str]:
+    """The setup revision stamped on a market, or None when it predates revisions or is unreadable."""
     try:
-        context = load_market_context(market_id)
+        document = markets_collection.find_one(
+            market_doc_filter("id", market_id), {MARKET_SETUP_REVISION_KEY: 1},
+        )
+    except PyMongoError as e:
+        logger.warning(f"Could not read the setup revision of {market_id}: {e}")
+        return None
+    return (document or {}).get(MARKET_SETUP_REVISION_KEY)
+
+
+def _stamp_setup_revision(market_id: str, revision: str) -> None:
+    """Give a market written before setup revisions its first one.
+
+    Only a market that still has none is stamped: a setup write that lands in between brings its
+    own revision, and that one must not be overwritten by the revision of the setup it replaced.
+    """
+    try:
+        markets_collection.update_one(
+            {**market_doc_filter("id", market_id), MARKET_SETUP_REVISION_KEY: {"$exists": False}},
+            {"$set": {MARKET_SETUP_REVISION_KEY: revision}},
+        )
+    except PyMongoError as e:
+        logger.warning(f"Could not stamp the setup revision of {market_id}: {e}")
+
+
+def _ensure_market_table_indexes() -> None:
+    """The indexes the materialized grids are written against; raises when they cannot be built.
+
+    One header per market, and one row per position of a grid: a concurrent derivation of the same
+    grid upserts the same header and collides on the same rows rather than duplicating them. Built
+    lazily rather than at import, like ``ApplicationsApi.ensure_application_indexes``.
+    """
+    global _market_table_indexes_ready
+    if _market_table_indexes_ready:
+        return
+    market_tables_collection.create_index([(MARKET_TABLES_MARKET_ID_FIELD, 1)], unique=True)
+    market_table_rows_collection.create_index(
+        [(MARKET_TABLES_MARKET_ID_FIELD, 1), ("fingerprint", 1), ("seq", 1)],
+        unique=True,
+        name=MARKET_TABLE_ROWS_INDEX,
+    )
+    _market_table_indexes_ready = True
+
+
+def _load_materialized_table_page(
+    market_id: str,
+    fingerprint: str,
+    date: Optional[str] = None,
+    section: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+    """One page of the stored grid for these inputs, and its filtered total.
+
+    None when the grid is absent, stale or unreadable: a read failure is a cache miss, not an
+    error, since the grid can always be derived again. Only the rows on the page are read.
+    """
+    grid_filter = {MARKET_TABLES_MARKET_ID_FIELD: market_id, "fingerprint": fingerprint}
+    try:
+        header = market_tables_collection.find_one(grid_filter, {"rowCount": 1})
+        if not header:
+            return None
+        query = dict(grid_filter)
+        if date is not None:
+            query["row.date"] = date
+        if section is not None:
+            query["row.section"] = section
+        if limit == 0:
+            page = []
+        else:
+            cursor = market_table_rows_collection.find(query, {"row": 1}).sort("seq", 1).skip(offset)
+            if limit is not None:
+                cursor = cursor.limit(limit)
+            page = [document["row"] for document in cursor]
+        if date is None and section is None:
+            total = header["rowCount"]
+        else:
+            total = market_table_rows_collection.count_documents(query)
+    except PyMongoError as e:
+        logger.warning(f"Could not read the materialized table grid for {market_id}: {e}")
+        return None
+    return page, total
+
+
+def _store_materialized_table_rows(market_id: str, fingerprint: str, rows: List[Dict[str, Any]]) -> None:
+    """Store freshly derived rows as a market's grid, one document per row.
+
+    The rows are written before the market's header names their fingerprint, so a reader that
+    finds the header finds every row; the grid the header named before is dropped once it has
+    moved on. Nothing is stored when the indexes cannot be built: without them a concurrent
+    derivation would duplicate the rows, and the grid can always be derived again.
+    """
+    try:
+        _ensure_market_table_indexes()
+        if rows:
+            try:
+                market_table_rows_collection.insert_many(
+                    [
+                        {MARKET_TABLES_MARKET_ID_FIELD: market_id, "fingerprint": fingerprint, "seq": seq, "row": row}
+                        for seq, row in enumerate(rows)
+                    ],
+                    ordered=False,
+                )
+            except BulkWriteError as e:
+                # Another request derived the same grid first; its rows are these rows.
+                if any(error.get("code") != _DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+                    raise
+        market_tables_collection.update_one(
+            {MARKET_TABLES_MARKET_ID_FIELD: market_id},
+            {
+                "$set": {
+                    MARKET_TABLES_MARKET_ID_FIELD: market_id,
+                    "fingerprint": fingerprint,
+                    "rowCount": len(rows),
+                },
+                "$unset": {"rows": ""},
+            },
+            upsert=True,
+        )
+        market_table_rows_collection.delete_many(
+            {MARKET_TABLES_MARKET_ID_FIELD: market_id, "fingerprint": {"$ne": fingerprint}},
+        )
+    except PyMongoError as e:
+        logger.warning(f"Could not store the materialized table grid for {market_id}: {e}")
+
+
+def filter_market_table_rows(
+    rows: List[Dict[str, Any]],
+    date: Optional[str] = None,
+    section: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """One page of camelCase table rows, and how many rows match the filters in all.
+
+    Rows are stored in (date, location, section, table_code) order, so a page is a slice of the
+    filtered rows and never needs sorting.
+    """
+    if date is not None or section is not None:
+        rows = [
+            row for row in rows
+            if (date is None or row.get("date") == date)
+            and (section is None or row.get("section") == section)
+        ]
+    total = len(rows)
+    end = None if limit is None else offset + limit
+    return rows[offset:end], total
+
+
+def get_market_table_page(
+    market_id: str,
+    requesting_user: Optional[str] = None,
+    date: Optional[str] = None,
+    section: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> tuple[Dict[str, Any], int]:
+    """Return one page of a market's table rows, served from the materialized grid when current.
+
+    The grid is keyed by ``market_table_grid_fingerprint``: while the market's setup and source
+    data are unchanged, the page is read from the stored rows, without loading either input,
+    re-running assignment or re-deriving and re-sorting the grid. Any change to either input
+    changes the fingerprint, and the next request derives the grid again and replaces the stored
+    one.
+    """
+    if offset < 0:
+        return {"error": "offset must not be negative"}, 400
+    if limit is not None and limit < 0:
+        return {"error": "limit must not be negative"}, 400
+
+    try:
+        context = load_market_context(market_id, MarketReadProfile.PERMISSIONS)
         if context is None:
             return {"error": "Market not found"}, 404
         if context.market is None:
             return {"error": "Invalid market data"}, 400
 
-        market = context.market
-
         if requesting_user:
-            if not PermissionsApi.user_has_permission(requesting_user, market, MarketRole.VIEWER, context.organization):
+            if not PermissionsApi.user_has_permission(
+                requesting_user, context.market, MarketRole.VIEWER, context.organization,
+            ):
                 return {"error": "User does not have permission to view this market"}, 403
 
+        setup_revision = _stored_setup_revision(market_id)
+        source_revision = _source_revision(SourceDataApi.get_source_data_revision(market_id) or {})
+        if setup_revision and source_revision:
+            served = _load_materialized_table_page(
+                market_id,
+                market_table_grid_fingerprint(setup_revision, source_revision),
+                date, section, offset, limit,
+            )
+            if served is not None:
+                page, total = served
+                return {"rows": page, "total": total, "offset": offset, "limit": limit}, 200
+
+        context = load_market_context(market_id, MarketReadProfile.SETUP)
+        if context is None:
+            return {"error": "Market not found"}, 404
+        if context.market is None:
+            return {"error": "Invalid market data"}, 400
+
         source_data_result = SourceDataApi.get_source_data(market_id)
         if source_data_result is None:
             return {"error": "Source data not found"}, 404
@@ -864,10 +1213,24 @@ def get_market_tables(market_id: str, requesting_user: Optional[str] = None) ->
         if source_status != 200:
             return source_data, source_status
 
+        market = context.market
         market.assignment_object.assignment_statistics = None
         assigned_market = assign_market(market, source_data)
-        rows = derive_market_table_rows(assigned_market)
-        return [convert_keys_to_camel_case(row.model_dump()) for row in rows], 200
+        rows = _MARKET_TABLE_ROWS.dump_python(derive_market_table_rows(assigned_market), by_alias=True)
+
+        # Labelled by the source data actually derived from, which may be newer than the revision
+        # read above; a market written before setup revisions gets its first one here.
+        source_revision = _source_revision(source_data)
+        if source_revision:
+            if not setup_revision:
+                setup_revision = market_setup_revision(context.document.get(market_doc_key("setup_object")))
+                _stamp_setup_revision(market_id, setup_revision)
+            _store_materialized_table_rows(
+                market_id, market_table_grid_fingerprint(setup_revision, source_revision), rows,
+            )
+
+        page, total = filter_market_table_rows(rows, date, section, offset, limit)
+        return {"rows": page, "total": total, "offset": offset, "limit": limit}, 200
     except Exception as e:
         logger.error(f"Unexpected error in get_market_tables: {str(e)}")
         logger.error(f"Error type: {type(e)}")
@@ -880,6 +1243,14 @@ def get_market_tables(market_id: str, requesting_user: Optional[str] = None) ->
         }, 500
 
 
+def get_market_tables(market_id: str, requesting_user: Optional[str] = None) -> tuple[List[Dict[str, Any]] | Dict[str, Any], int]:
+    """Derive and return every table row for a market."""
+    page, status = get_market_table_page(market_id, requesting_user)
+    if status != 200:
+        return page, status
+    return page["rows"], status
+
+
 def _top_n_by_count(counts: Optional[Dict[str, int]], n: int) -> List[tuple]:
     """Return the top-N (label, count) pairs by descending count for Discord summary fields."""
     if not counts:
@@ -939,7 +1310,7 @@ def post_assignment_to_discord(market_id: str, requesting_user: str) -> tuple[Di
     may invoke this endpoint; lesser roles receive 403.
     """
     try:
-        context = load_market_context(market_id)
+        context = load_market_context(market_id, MarketReadProfile.SETUP)
         if context is None:
             return {"error": "Market not found"}, 404
         if context.market is None:
@@ -991,7 +1362,7 @@ def post_assignment_to_discord(market_id: str, requesting_user: str) -> tuple[Di
 
 def add_market_role(market_id: str, user_email: str, role: MarketRole, requesting_user: str) -> bool:
     """Add a user role to a market. Requires permission to manage roles."""
-    context = load_market_context(market_id)
+    context = load_market_context(market_id, MarketReadProfile.PERMISSIONS)
     if context is None:
         raise ValueError("Market not found")
     if context.market is None:
@@ -1026,7 +1397,7 @@ def add_market_role(market_id: str, user_email: str, role: MarketRole, requestin
 
 def remove_market_role(market_id: str, user_id: str, requesting_user: str) -> bool:
     """Remove a user role from a market. Requires permission to manage roles."""
-    context = load_market_context(market_id)
+    context = load_market_context(market_id, MarketReadProfile.PERMISSIONS)
     if context is None:
         raise ValueError("Market not found")
     if context.market is None:
@@ -1067,7 +1438,7 @@ def remove_market_role(market_id: str, user_id: str, requesting_user: str) -> bo
 
 def update_market_role(market_id: str, user_id: str, new_role: MarketRole, requesting_user: str) -> bool:
     """Update a user's role in a market. Requires permission to manage roles."""
-    context = load_market_context(market_id)
+    context = load_market_context(market_id, MarketReadProfile.PERMISSIONS)
     if context is None:
         raise ValueError("Market not found")
     if context.market is None:
@@ -1118,7 +1489,7 @@ def update_market_role(market_id: str, user_id: str, new_role: MarketRole, reque
 
 def delete_market(market_id: str, requesting_user: str) -> DeleteResult:
     """Delete a market. Only owner can delete."""
-    context = load_market_context(market_id)
+    context = load_market_context(market_id, MarketReadProfile.PERMISSIONS)
     if context is None:
         raise ValueError("Market not found")
     if context.market is None:
@@ -1132,8 +1503,10 @@ def delete_market(market_id: str, requesting_user: str) -> DeleteResult:
 
     try:
         SourceDataApi.delete_source_data(market_id)
+        market_table_rows_collection.delete_many({MARKET_TABLES_MARKET_ID_FIELD: market_id})
+        market_tables_collection.delete_one({MARKET_TABLES_MARKET_ID_FIELD: market_id})
     except Exception as e:
-        logger.warning(f"Failed to delete source data for {market_id}: {e}")
+        logger.warning(f"Failed to delete source data and table grid for {market_id}: {e}")
 
     if market.organization_id:
         try:
@@ -1145,7 +1518,13 @@ def delete_market(market_id: str, requesting_user: str) -> DeleteResult:
         except Exception as e:
             logger.warning(f"Failed to remove market from organization: {e}")
 
-    return markets_collection.delete_one({"id": market_id})
+    result = markets_collection.delete_one({"id": market_id})
+    forget_market_slug_resolution(market_id)
+    try:
+        release_images(market_owner(market_id))
+    except PyMongoError as e:
+        logger.warning(f"Failed to release floorplan images of {market_id}: {e}")
+    return result
 
 
 def save_application_form(market_id: str, application_form_data: dict, requesting_user: str) -> dict:
@@ -1163,7 +1542,9 @@ def save_application_form(market_id: str, application_form_data: dict, requestin
         PermissionError: user lacks EDITOR+ permission
         ApplicationFormLockedError: phase gate or D9 lock prevents editing
     """
-    market = _load_market_for(market_id, requesting_user, MarketRole.EDITOR, "edit")
+    market = _load_market_for(
+        market_id, requesting_user, MarketRole.EDITOR, "edit", MarketReadProfile.SUMMARY,
+    )
     _assert_application_form_editable(market)
 
     try:
@@ -1193,7 +1574,9 @@ def get_application_form(market_id: str, requesting_user: str) -> dict:
     front-end contract and the persisted market document. ``editable``/``lock_reason``
     let the builder render read-only before an organizer invests work in a locked form.
     """
-    market = _load_market_for(market_id, requesting_user, MarketRole.VIEWER, "view")
+    market = _load_market_for(
+        market_id, requesting_user, MarketRole.VIEWER, "view", MarketReadProfile.SUMMARY,
+    )
 
     lock_reason = application_form_lock_reason(market)
     form_dict = _application_form_dump(market)
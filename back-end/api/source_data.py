@@ -75,6 +75,23 @@ def get_source_data(market_id: str) -> Dict[str, Any]:
     except Exception as e:
         return {"error": f"Error retrieving source data: {str(e)}"}, 500
 
+def get_source_data_revision(market_id: str) -> Optional[Dict[str, Any]]:
+    """The upload metadata of a market's source data, without the data itself; None when there is none.
+
+    Every upload stamps a new ``upload_date``, so this identifies the data a reader would get.
+    """
+    source_data = source_data_collection.find_one(
+        {"market_id": market_id},
+        {"upload_date": 1, "row_count": 1, "filename": 1}
+    )
+    if not source_data:
+        return None
+    return {
+        "upload_date": source_data.get("upload_date"),
+        "row_count": source_data.get("row_count"),
+        "filename": source_data.get("filename", "unknown")
+    }
+
 def get_source_data_csv(market_id: str) -> Dict[str, Any]:
     """Retrieve CSV source data as downloadable CSV file."""
     try:
@@ -33,7 +33,10 @@ from assignment.utils import convert_keys_to_camel_case, convert_keys_to_snake_c
 from guards import PreconditionResult, VALID_TRANSITIONS, evaluate_transition
 from market_documents import (
     MarketKeyMigrationError,
+    MarketReadProfile,
     assert_market_key_migration_recorded,
+    find_market_document,
+    forget_market_slug_resolution,
     market_doc_key,
 )
 import db_config
@@ -1032,7 +1035,7 @@ def transition_market(market_id: str) -> Response:
         if not UsersApi.get_user(user_email):
             return jsonify({"error": "User not found"}), 404
 
-        context = MarketsApi.load_market_context(market_id)
+        context = MarketsApi.load_market_context(market_id, MarketReadProfile.SUMMARY)
         if context is None:
             return jsonify({"error": "Market not found"}), 404
         if context.market is None:
@@ -1081,7 +1084,9 @@ def transition_market(market_id: str) -> Response:
         )
 
         if result.matched_count == 0:
-            latest_doc = MarketsApi.markets_collection.find_one({"id": market_id})
+            latest_doc = find_market_document(
+                MarketsApi.markets_collection, market_id, MarketReadProfile.PERMISSIONS,
+            )
             if latest_doc is None:
                 return jsonify({"error": "Market not found"}), 404
 
@@ -1103,6 +1108,8 @@ def transition_market(market_id: str) -> Response:
                 "blockers": [asdict(conflict)],
             })), 409
 
+        # Publishing or unpublishing changes whether the market's public URL resolves at all.
+        forget_market_slug_resolution(market_id)
         return jsonify({"phase": to_phase.value}), 200
 
     except Exception as e:
@@ -1214,14 +1221,38 @@ def post_assignment_to_discord(market_id: str) -> Response:
 @app.route('/markets/<market_id>/tables', methods=['GET'])
 @login_required
 def get_market_tables(market_id: str) -> Response:
-    """Get table-level assignments derived on-demand. Requires VIEW permission."""
+    """Get table-level assignments from the materialized grid. Requires VIEW permission.
+
+    Optional query parameters ``date`` and ``section`` filter the rows, and ``offset`` and
+    ``limit`` page through them. The body is the page of rows; ``X-Total-Count`` carries how
+    many rows match the filters in all.
+    """
     try:
         requesting_user = request.headers.get('X-Owner-Email')
         if not requesting_user:
             return jsonify({"error": "User email not provided in headers"}), 400
 
-        result, status_code = MarketsApi.get_market_tables(market_id, requesting_user)
-        return jsonify(result), status_code
+        try:
+            offset = int(request.args.get('offset', 0))
+            limit_arg = request.args.get('limit')
+            limit = int(limit_arg) if limit_arg is not None else None
+        except ValueError:
+            return jsonify({"error": "offset and limit must be integers"}), 400
+
+        result, status_code = MarketsApi.get_market_table_page(
+            market_id,
+            requesting_user,
+            date=request.args.get('date'),
+            section=request.args.get('section'),
+            offset=offset,
+            limit=limit,
+        )
+        if status_code != 200:
+            return jsonify(result), status_code
+
+        response = jsonify(result["rows"])
+        response.headers['X-Total-Count'] = str(result["total"])
+        return response, status_code
     except Exception as e:
         logger.error(f"Error in get_market_tables for {market_id}: {str(e)}")
         logger.error(f"Traceback: {traceback.format_exc()}")
@@ -1255,7 +1286,7 @@ def public_attendance_checkin(market_slug: str) -> Response:
         vendor_email = data.get('vendorEmail') or data.get('vendor_email') or ''
         date = data.get('date') or ''
 
-        market_doc = AttendanceApi.get_published_market_by_slug(market_slug)
+        market_doc = AttendanceApi.get_published_market_by_slug(market_slug, fields=("id",))
         if not market_doc:
             return jsonify({"error": "Market not found"}), 404
 
@@ -1376,7 +1407,7 @@ def list_market_applications(market_id: str) -> Response:
         if not requesting_user:
             return jsonify({"error": "User email not provided in headers"}), 400
 
-        context = MarketsApi.load_market_context(market_id)
+        context = MarketsApi.load_market_context(market_id, MarketReadProfile.PERMISSIONS)
         if context is None:
             return jsonify({"error": "Market not found"}), 404
         if context.market is None:
@@ -1404,7 +1435,7 @@ def review_application(market_id: str, application_id: str) -> Response:
         if not requesting_user:
             return jsonify({"error": "User email not provided in headers"}), 400
 
-        context = MarketsApi.load_market_context(market_id)
+        context = MarketsApi.load_market_context(market_id, MarketReadProfile.PERMISSIONS)
         if context is None:
             return jsonify({"error": "Market not found"}), 404
         if context.market is None:
@@ -1447,7 +1478,7 @@ def publish_market_results(market_id: str) -> Response:
         if not requesting_user:
             return jsonify({"error": "User email not provided in headers"}), 400
 
-        context = MarketsApi.load_market_context(market_id)
+        context = MarketsApi.load_market_context(market_id, MarketReadProfile.PERMISSIONS)
         if context is None:
             return jsonify({"error": "Market not found"}), 404
         if context.market is None:
@@ -1475,7 +1506,7 @@ def get_market_attendance(market_id: str) -> Response:
         if not requesting_user:
             return jsonify({"error": "User email not provided in headers"}), 400
 
-        context = MarketsApi.load_market_context(market_id)
+        context = MarketsApi.load_market_context(market_id, MarketReadProfile.PERMISSIONS)
         if context is None:
             return jsonify({"error": "Market not found"}), 404
         if context.market is None:
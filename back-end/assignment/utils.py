@@ -1,29 +1,73 @@
 import re
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Callable, List
 
+# Key translation is memoized: a market response repeats the same few dozen keys across thousands of
+# nested dicts (every vendor assignment carries the same seven), so each distinct key is translated
+# once and every dict that carries it shares the one translated string. The bound only matters for
+# the few payloads keyed by data (form answers, roles) rather than by field name.
+KEY_CACHE_SIZE = 4096
+
+_CAMEL_WORD = re.compile('(.)([A-Z][a-z]+)')
+_CAMEL_BOUNDARY = re.compile('([a-z0-9])([A-Z])')
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
 def camel_to_snake(name: str) -> str:
     """Convert a camelCase or PascalCase string to snake_case."""
-    name = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
-    name = re.sub('([a-z0-9])([A-Z])', r'\1_\2', name)
+    name = _CAMEL_WORD.sub(r'\1_\2', name)
+    name = _CAMEL_BOUNDARY.sub(r'\1_\2', name)
     return name.lower()
 
+
+def _convert_keys(obj: Any, translate: Callable[[str], str]) -> Any:
+    """Rebuild ``obj`` with every dict key passed through ``translate``, without recursing.
+
+    Walks an explicit stack of (source, copy) pairs, so a deeply nested payload cannot hit the
+    interpreter's recursion limit, and only dicts and lists are rebuilt - every other value is
+    carried over as the same object, as the recursive version did.
+    """
+    if not isinstance(obj, (dict, list)):
+        return obj
+
+    root: Any = {} if isinstance(obj, dict) else []
+    stack: List[Any] = [(obj, root)]
+    while stack:
+        source, target = stack.pop()
+        if isinstance(source, dict):
+            for key, value in source.items():
+                if isinstance(value, dict):
+                    copy: Any = {}
+                    stack.append((value, copy))
+                elif isinstance(value, list):
+                    copy = []
+                    stack.append((value, copy))
+                else:
+                    copy = value
+                target[translate(key)] = copy
+        else:
+            for value in source:
+                if isinstance(value, dict):
+                    copy = {}
+                    stack.append((value, copy))
+                elif isinstance(value, list):
+                    copy = []
+                    stack.append((value, copy))
+                else:
+                    copy = value
+                target.append(copy)
+    return root
+
+
 def convert_keys_to_snake_case(obj: Any) -> Any:
     """
-    Recursively convert all camelCase (or PascalCase) keys in a dict to snake_case.
+    Convert all camelCase (or PascalCase) keys in a dict to snake_case.
     Handles nested dicts and lists.
     """
-    if isinstance(obj, dict):
-        new_dict: Dict[str, Any] = {}
-        for key, value in obj.items():
-            new_key = camel_to_snake(key)
-            new_dict[new_key] = convert_keys_to_snake_case(value)
-        return new_dict
-    elif isinstance(obj, list):
-        return [convert_keys_to_snake_case(item) for item in obj]
-    else:
-        return obj
+    return _convert_keys(obj, camel_to_snake)
 
 
+@lru_cache(maxsize=KEY_CACHE_SIZE)
 def snake_to_camel(name: str) -> str:
     """Convert a snake_case string to camelCase."""
     components = name.split('_')
@@ -31,16 +75,7 @@ def snake_to_camel(name: str) -> str:
 
 def convert_keys_to_camel_case(obj: Any) -> Any:
     """
-    Recursively convert all snake_case keys in a dict to camelCase.
+    Convert all snake_case keys in a dict to camelCase.
     Handles nested dicts and lists.
     """
-    if isinstance(obj, dict):
-        new_dict: Dict[str, Any] = {}
-        for key, value in obj.items():
-            new_key = snake_to_camel(key)
-            new_dict[new_key] = convert_keys_to_camel_case(value)
-        return new_dict
-    elif isinstance(obj, list):
-        return [convert_keys_to_camel_case(item) for item in obj]
-    else:
-        return obj
+    return _convert_keys(obj, snake_to_camel)
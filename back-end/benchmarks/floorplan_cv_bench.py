@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Benchmark: the local floorplan detector on a large plan, a hatched page and a page of noise.
+
+Draws an enclosed hall with an inner wall, a chamfered corner, a pillar, a stage and lettering at
+``--width`` x ``--height``, a square page covered in short diagonal hatching (many Hough peaks, no
+wall) and a square page of random grey, then times ``analyze_plan`` on each, decoding included,
+and prints what it found.
+
+Usage:
+    python benchmarks/floorplan_cv_bench.py
+    python benchmarks/floorplan_cv_bench.py --width 6000 --height 3000 --side 3000 --repeats 7
+"""
+
+import argparse
+import io
+import os
+import sys
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from market_documents_bench import report_timing
+from services.floorplan_cv import analyze_plan
+
+
+def encoded(img: Image.Image) -> bytes:
+    output = io.BytesIO()
+    img.save(output, format="PNG")
+    return output.getvalue()
+
+
+def build_hall(width: int, height: int) -> Image.Image:
+    img = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(img)
+    sx, sy = width / 2000, height / 1000
+    draw.rectangle([100 * sx, 100 * sy, 1900 * sx, 900 * sy], outline="black", width=int(8 * sx))
+    draw.line([(1000 * sx, 100 * sy), (1000 * sx, 600 * sy)], fill="black", width=int(6 * sx))
+    draw.line([(1200 * sx, 900 * sy), (1900 * sx, 400 * sy)], fill="black", width=int(6 * sx))
+    draw.rectangle([400 * sx, 400 * sy, 440 * sx, 440 * sy], fill="black")
+    draw.rectangle([1300 * sx, 150 * sy, 1500 * sx, 250 * sy], fill="black")
+    draw.text((300 * sx, 300 * sy), "Main hall", fill="black")
+    draw.text((1100 * sx, 700 * sy), "Stage left 12m", fill="black")
+    return img
+
+
+def build_hatched(side: int) -> Image.Image:
+    img = Image.new("RGB", (side, side), "white")
+    draw = ImageDraw.Draw(img)
+    step = max(side // 70, 8)
+    for y in range(step * 3, side - step * 3, step * 4):
+        for x in range(0, side - step * 2, step):
+            draw.line([(x, y), (x + step * 1.5, y + step * 1.5)], fill="black", width=max(side // 1000, 1))
+    return img
+
+
+def build_noise(side: int) -> Image.Image:
+    return Image.fromarray(np.random.default_rng(0).integers(0, 256, (side, side), dtype=np.uint8))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=6000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--side", type=int, default=3000)
+    parser.add_argument("--repeats", type=int, default=7)
+    args = parser.parse_args()
+
+    pages = [
+        (f"hall {args.width}x{args.height}", encoded(build_hall(args.width, args.height))),
+        (f"hatching {args.side}x{args.side}", encoded(build_hatched(args.side))),
+        (f"noise {args.side}x{args.side}", encoded(build_noise(args.side))),
+    ]
+    print(f"analyze_plan (median of {args.repeats})")
+    for label, data in pages:
+        report_timing(label, lambda: analyze_plan(data), args.repeats)
+
+    print()
+    for label, data in pages:
+        analysis = analyze_plan(data)
+        print(
+            f"  {label:<28} {len(analysis.result['walls']):3d} walls, "
+            f"{len(analysis.result['obstacles']):3d} obstacles, confidence {analysis.confidence:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
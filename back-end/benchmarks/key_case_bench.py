@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Benchmark: converting a market payload between the stored/wire camelCase and snake_case.
+
+Uses the same synthetic market as ``market_documents_bench.py`` (a 5k-assignment market by default)
+and times:
+
+* ``to snake``: ``convert_keys_to_snake_case`` over the stored document, as every read does.
+* ``to camel``: ``convert_keys_to_camel_case`` over the snake-cased dump, as every response does.
+* ``assignments, walked`` / ``assignments, by alias``: just the vendor assignment list, dumped
+  snake-cased and walked, against dumped straight to camelCase by alias - the path the assigned
+  market endpoint now takes for it.
+
+Usage:
+    python benchmarks/key_case_bench.py
+    python benchmarks/key_case_bench.py --assignments 5000
+"""
+
+import argparse
+import os
+import sys
+from typing import List
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter
+
+from assignment.utils import convert_keys_to_camel_case, convert_keys_to_snake_case
+from datatypes import VendorAssignmentResult
+from market_documents import market_from_document
+from market_documents_bench import build_market_document, report_timing
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assignments", type=int, default=5000)
+    parser.add_argument("--floorplans", type=int, default=8)
+    parser.add_argument("--tables", type=int, default=400)
+    parser.add_argument("--repeats", type=int, default=7)
+    args = parser.parse_args()
+
+    document = build_market_document(args.assignments, args.floorplans, args.tables)
+    market = market_from_document(document)
+    snake = market.model_dump()
+    assignments = market.assignment_object.vendor_assignments
+    adapter = TypeAdapter(List[VendorAssignmentResult])
+    print(f"Market: {args.assignments} assignments (median of {args.repeats})")
+
+    report_timing("to snake", lambda: convert_keys_to_snake_case(document), args.repeats)
+    report_timing("to camel", lambda: convert_keys_to_camel_case(snake), args.repeats)
+    walked = report_timing(
+        "assignments, walked",
+        lambda: convert_keys_to_camel_case(adapter.dump_python(assignments)),
+        args.repeats,
+    )
+    aliased = report_timing("assignments, by alias", lambda: adapter.dump_python(assignments, by_alias=True), args.repeats)
+    print(f"\nSerializing the assignments by alias is {walked / aliased:.1f}x faster.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Benchmark: parsing a stored market document, eagerly and lazily.
+
+Builds a synthetic market in stored (camelCase) form - several large floorplans and a 5k-entry
+assignment list by default - and times the reads the API actually makes of it:
+
+* ``eager``: ``market_from_document`` as every read did before, validating the whole tree.
+* ``lazy, permissions only``: a ``LazyMarket`` whose roles and phase are read, and nothing else -
+  what a permission check or the market detail endpoint needs.
+* ``lazy, setup read``: the same, then the setup read, as an assignment endpoint would.
+* ``lazy, materialized``: every deferred sub-object validated, as a mutation would.
+
+No database is involved; this measures parsing only.
+
+Usage:
+    python benchmarks/market_documents_bench.py
+    python benchmarks/market_documents_bench.py --assignments 5000 --floorplans 8 --tables 400
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_documents import market_from_document
+
+
+def build_market_document(assignments: int, floorplans: int, tables: int) -> dict:
+    """A stored market with ``floorplans`` floorplans of ``tables`` tables and ``assignments`` assignments."""
+    sections = [
+        {"name": f"S{i}", "count": tables // 4, "location": {"name": "Hall"}, "tier": {"id": 1, "name": "Gold"}}
+        for i in range(4)
+    ]
+    floorplan_docs = []
+    for f in range(floorplans):
+        floorplan_docs.append({
+            "id": f"fp-{f}",
+            "imageGridfsId": None,
+            "scaleUnit": "mm",
+            "tableTypes": [{"id": "tt", "name": "6ft", "widthMm": 1830.0, "heightMm": 760.0, "maxCapacity": 2}],
+            "walls": [
+                {"id": f"w-{f}-{w}", "start": [w * 100.0, 0.0], "end": [w * 100.0 + 100.0, 0.0], "thicknessMm": 200.0}
+                for w in range(200)
+            ],
+            "obstacles": [
+                {"id": f"o-{f}-{o}", "polygon": [[0, 0], [10, 0], [10, 10], [0, 10]], "type": "pillar"}
+                for o in range(20)
+            ],
+            "placedTables": [
+                {
+                    "id": f"t-{f}-{t}", "tableTypeId": "tt", "x": float(t * 10), "y": float(t * 5),
+                    "rotation": 0.0, "widthMm": 1830.0, "heightMm": 760.0, "tableCode": f"S{t % 4}{t}",
+                }
+                for t in range(tables)
+            ],
+            "sections": [
+                {"id": f"sec-{f}-{i}", "name": f"S{i}", "locationName": "Hall",
+                 "tableIds": [f"t-{f}-{t}" for t in range(i, tables, 4)]}
+                for i in range(4)
+            ],
+        })
+    return {
+        "id": "bench-market",
+        "name": "Bench Market",
+        "creationDate": "2026-01-01T00:00:00Z",
+        "roles": {"owner-id": "owner"},
+        "organizationId": "org-id",
+        "phase": "applications_open",
+        "isDraft": False,
+        "modificationList": [],
+        "setupObject": {
+            "colNames": ["Email", "Table Choice", "Share", "Day 1", "Day 2"],
+            "colValues": [[f"v{r}", "Full Table", "", "Yes", "Yes"] for r in range(assignments // 2)],
+            "colInclude": [True] * 5,
+            "enumPriorityOrder": [],
+            "priority": [],
+            "marketDates": [
+                {"date": "2026-05-01", "colNameIdx": 3, "colName": "Day 1"},
+                {"date": "2026-05-02", "colNameIdx": 4, "colName": "Day 2"},
+            ],
+            "tiers": [{"id": 1, "name": "Gold"}],
+            "locations": [{"name": "Hall"}],
+            "sections": sections,
+            "assignmentOptions": {
+                "emailColNameIdx": 0, "tableChoiceColNameIdx": 1, "tableShareEmailColNameIdx": 2,
+                "maxDaysColNameIdx": None, "maxAssignmentsPerVendor": None,
+                "maxHalfTableProportionPerSection": None,
+            },
+            "floorplans": floorplan_docs,
+        },
+        "assignmentObject": {
+            "assignmentDate": "2026-04-01",
+            "assignmentStatistics": None,
+            "vendorAssignments": [
+                {
+                    "email": f"vendor{i // 2}@example.com", "date": "2026-05-01" if i % 2 else "2026-05-02",
+                    "tableCode": f"S{i % 4}{i % tables}", "tableChoice": "Full Table",
+                    "section": f"S{i % 4}", "tier": "Gold", "location": "Hall",
+                }
+                for i in range(assignments)
+            ],
+        },
+    }
+
+
+def report_timing(label: str, fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    median_ms = statistics.median(samples) * 1000
+    print(f"  {label:<28} {median_ms:9.2f} ms")
+    return median_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assignments", type=int, default=5000)
+    parser.add_argument("--floorplans", type=int, default=8)
+    parser.add_argument("--tables", type=int, default=400)
+    parser.add_argument("--repeats", type=int, default=7)
+    args = parser.parse_args()
+
+    document = build_market_document(args.assignments, args.floorplans, args.tables)
+    print(
+        f"Market: {args.assignments} assignments, {args.floorplans} floorplans x {args.tables} tables "
+        f"(median of {args.repeats})"
+    )
+
+    def permissions_only():
+        market = market_from_document(document, lazy=True)
+        return market.roles, market.organization_id, market.phase
+
+    def setup_read():
+        market = market_from_document(document, lazy=True)
+        return market.roles, market.setup_object
+
+    eager = report_timing("eager", lambda: market_from_document(document), args.repeats)
+    lazy = report_timing("lazy, permissions only", permissions_only, args.repeats)
+    report_timing("lazy, setup read", setup_read, args.repeats)
+    report_timing("lazy, materialized", lambda: market_from_document(document, lazy=True).materialize(), args.repeats)
+    print(f"\nA permission read is {eager / lazy:.0f}x faster lazily.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Benchmark: the solver-free placement engines on a large hall.
+
+Auto-places a few hundred 6ft and 8ft tables in a 120 m x 80 m hall with a grid of pillars with the
+row/aisle sweep (the default strategy) and with the occupancy-grid fallback, neither touching
+pyckingsolver, and checks every placement is inside the zone.
+
+Usage:
+    python benchmarks/placement_bench.py
+    python benchmarks/placement_bench.py --tables 300 --spacing 1200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shapely.geometry import box
+
+from datatypes import AisleConfigObject, TableTypeObject
+from services.placement_service import _grid_place, _row_place
+
+
+def build_hall():
+    """A 120 m x 80 m hall, less a 1.5 m wall buffer, with 24 pillars."""
+    zone = box(1500, 1500, 118500, 78500)
+    for i in range(6):
+        for j in range(4):
+            x, y = 10000 + i * 18000, 10000 + j * 18000
+            zone = zone.difference(box(x, y, x + 600, y + 600))
+    return zone
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, default=300)
+    parser.add_argument("--spacing", type=float, default=1200.0)
+    args = parser.parse_args()
+
+    zone = build_hall()
+    table_types = [
+        TableTypeObject(id="t6", name="6ft", width_mm=1830, height_mm=760, max_capacity=2),
+        TableTypeObject(id="t8", name="8ft", width_mm=2440, height_mm=760, max_capacity=2),
+    ]
+    counts = {"t6": args.tables - args.tables // 3, "t8": args.tables // 3}
+
+    aisle = AisleConfigObject(table_spacing_mm=args.spacing)
+    engines = (
+        ("rows", lambda: _row_place(zone, table_types, counts, aisle)),
+        ("grid", lambda: _grid_place(zone, table_types, counts, args.spacing)),
+    )
+    for name, run in engines:
+        start = time.perf_counter()
+        placed = run()
+        elapsed = time.perf_counter() - start
+
+        rects = []
+        for p in placed:
+            w, h = (p["width_mm"], p["height_mm"]) if p["rotation"] == 0 else (p["height_mm"], p["width_mm"])
+            rects.append(box(p["x_mm"] - w / 2, p["y_mm"] - h / 2, p["x_mm"] + w / 2, p["y_mm"] + h / 2))
+        assert all(zone.contains(r) for r in rects), f"{name}: a table left the zone"
+
+        print(f"{name:>5}: placed {len(placed)} / {args.tables} tables in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Benchmark: building room outlines from fragmented walls, as AI floorplan detection returns them.
+
+Builds a synthetic plan of a few rooms (one with a courtyard hole and a partition wall), cuts every
+side into short fragments until the plan has about ``--segments`` walls, jitters the endpoints by
+less than the snapping tolerance, shuffles them and flips half, then times ``_build_room_polygon``
+and checks the outline's area against the plan's.
+
+Usage:
+    python benchmarks/room_polygon_bench.py
+    python benchmarks/room_polygon_bench.py --segments 1000 --repeats 7
+"""
+
+import argparse
+import os
+import random
+import sys
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datatypes import WallSegment
+from market_documents_bench import report_timing
+from services.placement_service import _build_room_polygon
+
+# (x0, y0, x1, y1) of each loop of walls; the second sits inside the first.
+LOOPS = [
+    (0, 0, 60000, 40000),
+    (20000, 10000, 35000, 25000),
+    (65000, 0, 95000, 20000),
+    (65000, 25000, 95000, 40000),
+]
+PLAN_AREA = 60000 * 40000 - 15000 * 15000 + 30000 * 20000 + 30000 * 15000
+
+
+def build_plan(segments: int, seed: int = 0):
+    rng = random.Random(seed)
+    pieces = max(1, segments // (4 * len(LOOPS)))
+
+    def jitter(p):
+        return (p[0] + rng.uniform(-0.04, 0.04), p[1] + rng.uniform(-0.04, 0.04))
+
+    walls = []
+    for x0, y0, x1, y1 in LOOPS:
+        corners = [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+        for i, (ax, ay) in enumerate(corners):
+            bx, by = corners[(i + 1) % 4]
+            for k in range(pieces):
+                start = jitter((ax + (bx - ax) * k / pieces, ay + (by - ay) * k / pieces))
+                end = jitter((ax + (bx - ax) * (k + 1) / pieces, ay + (by - ay) * (k + 1) / pieces))
+                if rng.random() < 0.5:
+                    start, end = end, start
+                walls.append(WallSegment(start=start, end=end, thickness_mm=200))
+    # A partition wall across the first room, short of the courtyard
+    walls.append(WallSegment(start=(0, 5000), end=(15000, 5000), thickness_mm=100))
+    rng.shuffle(walls)
+    return walls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=7)
+    args = parser.parse_args()
+
+    walls = build_plan(args.segments)
+    print(f"Plan: {len(walls)} wall segments, {len(LOOPS)} loops (median of {args.repeats})")
+
+    report_timing("room outline", lambda: _build_room_polygon(walls), args.repeats)
+    rooms = _build_room_polygon(walls)
+    error = abs(rooms.area - PLAN_AREA) / PLAN_AREA
+    print(f"\n{rooms.geom_type} with {len(getattr(rooms, 'geoms', [rooms]))} part(s); area off by {error:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,16 @@ import unicodedata
 import uuid
 from enum import Enum
 from typing import List, Optional, Union, Dict, Any, Tuple
-from pydantic import BaseModel, Field, ConfigDict, computed_field, field_validator, model_validator
+from pydantic import (
+    AliasGenerator,
+    BaseModel,
+    Field,
+    ConfigDict,
+    computed_field,
+    field_validator,
+    model_serializer,
+    model_validator,
+)
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -100,7 +109,20 @@ class ThemeObject(BaseModel):
     secondary_color: str
     logo_url: Optional[str] = None
 
+def to_camel(string: str) -> str:
+    parts = string.split("_")
+    return parts[0] + "".join(word.capitalize() for word in parts[1:])
+
+
+# Rows the API returns by the thousand serialize straight to the wire's camelCase with
+# ``model_dump(by_alias=True)`` instead of a snake-case dump walked key by key afterwards. The alias
+# is serialization-only: validation, attribute names and a plain ``model_dump()`` are unchanged.
+_CAMEL_SERIALIZATION = ConfigDict(alias_generator=AliasGenerator(serialization_alias=to_camel))
+
+
 class VendorAssignmentResult(BaseModel):
+    model_config = _CAMEL_SERIALIZATION
+
     email: str
     date: str
     table_code: str
@@ -111,6 +133,8 @@ class VendorAssignmentResult(BaseModel):
 
 
 class MarketTableRow(BaseModel):
+    model_config = _CAMEL_SERIALIZATION
+
     date: str
     assignment: List[str]
     location: str
@@ -290,6 +314,18 @@ class Market(BaseModel):
         """
         return market_name_slug(self.name)
 
+    def materialize(self, *names: str) -> "Market":
+        """Validate any sub-object still held unvalidated. A plain ``Market`` holds none.
+
+        ``market_documents.LazyMarket`` does; serialization calls this first, so a market nested in
+        another model dumps the same validated sub-objects it reads back.
+        """
+        return self
+
+    @model_serializer(mode='wrap')
+    def _serialize_materialized(self, handler):
+        return handler(self.materialize())
+
     @model_validator(mode='after')
     def validate_single_owner(self):
         """Ensure exactly one owner in roles dict."""
@@ -381,11 +417,6 @@ class Application(BaseModel):
     assigned_reviewer_id: Optional[str] = None
 
 
-def to_camel(string: str) -> str:
-    parts = string.split("_")
-    return parts[0] + "".join(word.capitalize() for word in parts[1:])
-
-
 class ContractModel(BaseModel):
     model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
 
@@ -15,6 +15,13 @@ from api.applications import (
     APPLICATIONS_COLLECTION,
     MARKET_ID_FIELD,
 )
+from api.floorplans_templates import TEMPLATE_INDEXES, TEMPLATES_COLLECTION
+from api.markets import (
+    MARKET_TABLE_ROWS_COLLECTION,
+    MARKET_TABLE_ROWS_INDEX,
+    MARKET_TABLES_COLLECTION,
+    MARKET_TABLES_MARKET_ID_FIELD,
+)
 from market_documents import (
     MARKET_KEY_MIGRATION,
     MARKET_SLUG_INDEX,
@@ -24,14 +31,34 @@ from market_documents import (
     pending_market_key_rewrites,
     record_market_key_migration,
 )
+from services.floorplan_analysis import FLOORPLAN_ANALYSES_COLLECTION
+from services.floorplan_uploads import (
+    CREATED_AT_FIELD,
+    FLOORPLAN_UPLOADS_COLLECTION,
+    UPLOAD_TTL_S,
+    UPLOADS_TTL_INDEX,
+)
+from services.gridfs_service import (
+    FLOORPLAN_FILES_COLLECTION,
+    FLOORPLAN_SOURCES_COLLECTION,
+    OWNERS_FIELD,
+    RENDITION_OF_FIELD,
+    SHA256_FIELD,
+    SHA256_INDEX,
+    SOURCE_PAGE_FIELD,
+)
+from services.placement_cache import LAST_USED_FIELD, PLACEMENT_CACHE_COLLECTION
 
 def init_database():
     """Initialize the database and create collections if they don't exist."""
     db = get_database('conventioner')
 
     collections_to_create = [
-        'users', 'markets', 'source_data', 'organizations', 'attendance',
-        APPLICATIONS_COLLECTION, SCHEMA_COLLECTION,
+        'users', 'markets', MARKET_TABLES_COLLECTION, MARKET_TABLE_ROWS_COLLECTION, 'source_data',
+        'organizations', 'attendance',
+        APPLICATIONS_COLLECTION, SCHEMA_COLLECTION, PLACEMENT_CACHE_COLLECTION,
+        FLOORPLAN_UPLOADS_COLLECTION, FLOORPLAN_SOURCES_COLLECTION, FLOORPLAN_ANALYSES_COLLECTION,
+        TEMPLATES_COLLECTION,
     ]
     created_collections = []
 
@@ -59,6 +86,59 @@ def init_database():
     )
     print(f"✅ Ensured unique index {APPLICANT_IDENTITY_INDEX} on {APPLICATIONS_COLLECTION}")
 
+    # The organizer's table view reads one materialized grid per market: a header by market id, and
+    # its rows a page at a time. See ``api.markets._ensure_market_table_indexes``.
+    db[MARKET_TABLES_COLLECTION].create_index([(MARKET_TABLES_MARKET_ID_FIELD, 1)], unique=True)
+    print(f"✅ Ensured unique index on {MARKET_TABLES_COLLECTION}.{MARKET_TABLES_MARKET_ID_FIELD}")
+    db[MARKET_TABLE_ROWS_COLLECTION].create_index(
+        [(MARKET_TABLES_MARKET_ID_FIELD, 1), ("fingerprint", 1), ("seq", 1)],
+        unique=True,
+        name=MARKET_TABLE_ROWS_INDEX,
+    )
+    print(f"✅ Ensured unique index {MARKET_TABLE_ROWS_INDEX} on {MARKET_TABLE_ROWS_COLLECTION}")
+
+    # Auto-placement results are evicted least recently used first. See
+    # ``services.placement_cache``.
+    db[PLACEMENT_CACHE_COLLECTION].create_index([(LAST_USED_FIELD, 1)], name="placement_cache_lru")
+    print(f"✅ Ensured index on {PLACEMENT_CACHE_COLLECTION}.{LAST_USED_FIELD}")
+
+    # Deleting a floorplan image deletes its renditions, found by the original's id. See
+    # ``services.gridfs_service``.
+    db[FLOORPLAN_FILES_COLLECTION].create_index([(RENDITION_OF_FIELD, 1)], sparse=True)
+    print(f"✅ Ensured index on {FLOORPLAN_FILES_COLLECTION}.{RENDITION_OF_FIELD}")
+
+    # Floorplan images are stored once per content: an upload of stored bytes adds an owner
+    # to the stored file, and only the database can stop two concurrent uploads of one plan from
+    # both storing it. Files stored before hashing have no hash and are left out.
+    db[FLOORPLAN_FILES_COLLECTION].create_index(
+        [(SHA256_FIELD, 1)],
+        unique=True,
+        partialFilterExpression={SHA256_FIELD: {"$exists": True}},
+        name=SHA256_INDEX,
+    )
+    print(f"✅ Ensured unique index {SHA256_INDEX} on {FLOORPLAN_FILES_COLLECTION}")
+
+    # Deleting a market lets go of the floorplan images it shows, found by owner.
+    db[FLOORPLAN_FILES_COLLECTION].create_index([(OWNERS_FIELD, 1)], sparse=True)
+    print(f"✅ Ensured index on {FLOORPLAN_FILES_COLLECTION}.{OWNERS_FIELD}")
+
+    # Deleting a floorplan image forgets the PDFs whose pages it was.
+    db[FLOORPLAN_SOURCES_COLLECTION].create_index([(SOURCE_PAGE_FIELD, 1)])
+    print(f"✅ Ensured index on {FLOORPLAN_SOURCES_COLLECTION}.{SOURCE_PAGE_FIELD}")
+
+    # Background upload status documents are only polled while the editor waits on them; they
+    # expire a week after the upload. See ``services.floorplan_uploads``.
+    db[FLOORPLAN_UPLOADS_COLLECTION].create_index(
+        [(CREATED_AT_FIELD, 1)], expireAfterSeconds=UPLOAD_TTL_S, name=UPLOADS_TTL_INDEX,
+    )
+    print(f"✅ Ensured TTL index on {FLOORPLAN_UPLOADS_COLLECTION}.{CREATED_AT_FIELD}")
+
+    # Template pickers list one owner's or one organization's templates a page at a time, newest
+    # first; each page is a single scan of one of these. See ``api.floorplans_templates``.
+    for name, keys in TEMPLATE_INDEXES.items():
+        db[TEMPLATES_COLLECTION].create_index(keys, name=name)
+        print(f"✅ Ensured index {name} on {TEMPLATES_COLLECTION}")
+
     # Every public URL a market appears on resolves it by the slug of its name, on an
     # unauthenticated endpoint. See ``market_documents.ensure_market_slug_index``.
     ensure_market_slug_index(db)
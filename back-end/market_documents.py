@@ -41,20 +41,31 @@ both, so the operator still has one command to paste - but a database migrated b
 carries only the first, which is precisely the state that has to be caught, and a build rolled
 *back* still finds the marker it knows.
 """
+import copy
+import threading
+import time
+import typing
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from pydantic import TypeAdapter, ValidationError
 
 from assignment.utils import (
+    camel_to_snake,
     convert_keys_to_camel_case,
     convert_keys_to_snake_case,
     snake_to_camel,
 )
+import datatypes
 from datatypes import (
     Market,
     MarketPhase,
     market_name_slug,
     phase_from_market_document,
 )
+from services.floorplan_geometry import unpack_setup_floorplans
 
 MONGO_ID_KEY = "_id"
 
@@ -226,6 +237,65 @@ def market_doc_projection(fields: Sequence[str]) -> Dict[str, Any]:
 _SLUG_LOOKUP_FIELDS: Tuple[str, ...] = ("name", "phase", "is_draft")
 
 
+# What a slug resolves to, and so what a cached resolution can answer on its own: the market's id,
+# plus the fields the lookup decided on. A caller that reads nothing else is served from the cache.
+_SLUG_RESOLUTION_FIELDS: Tuple[str, ...] = ("id", *_SLUG_LOOKUP_FIELDS)
+
+SLUG_RESOLUTION_TTL_SECONDS = 15.0
+SLUG_RESOLUTION_CACHE_SIZE = 4096
+
+_slug_resolutions: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_slug_resolutions_lock = threading.Lock()
+
+
+def _cached_slug_resolution(market_slug: str) -> Optional[Dict[str, Any]]:
+    """The unexpired resolution of a slug, or None."""
+    with _slug_resolutions_lock:
+        entry = _slug_resolutions.get(market_slug)
+        if entry is None:
+            return None
+        expires_at, resolution = entry
+        if expires_at <= time.monotonic():
+            del _slug_resolutions[market_slug]
+            return None
+        return dict(resolution)
+
+
+def _remember_slug_resolution(market_slug: str, document: Dict[str, Any]) -> None:
+    """Cache what a slug resolved to. Only hits are cached, so a stranger cannot fill it with misses."""
+    resolution = {
+        key: document[key]
+        for key in (market_doc_key(field) for field in _SLUG_RESOLUTION_FIELDS)
+        if key in document
+    }
+    with _slug_resolutions_lock:
+        _slug_resolutions.pop(market_slug, None)
+        while len(_slug_resolutions) >= SLUG_RESOLUTION_CACHE_SIZE:
+            del _slug_resolutions[next(iter(_slug_resolutions))]
+        _slug_resolutions[market_slug] = (time.monotonic() + SLUG_RESOLUTION_TTL_SECONDS, resolution)
+
+
+def forget_market_slug_resolution(market_id: Optional[str] = None) -> None:
+    """Drop the cached slug resolution of one market, or of every market when none is named.
+
+    Called by every write that can change what a slug resolves to - a rename moves the market to
+    another slug, a phase transition can publish or unpublish it, a delete removes it - so this
+    process never serves a public URL from a resolution it has itself made stale. The entry is
+    found by market id rather than by slug because a rename's caller knows the id, and the slug the
+    cache holds is the *old* one.
+    """
+    with _slug_resolutions_lock:
+        if market_id is None:
+            _slug_resolutions.clear()
+            return
+        id_key = market_doc_key("id")
+        for market_slug in [
+            market_slug for market_slug, (_expires_at, resolution) in _slug_resolutions.items()
+            if resolution.get(id_key) == market_id
+        ]:
+            del _slug_resolutions[market_slug]
+
+
 def non_draft_market_prefilter() -> Dict[str, Any]:
     """Mongo filter over every market that could possibly be non-draft.
 
@@ -279,26 +349,180 @@ def published_market_by_slug(
     megabytes - and the applicant's form page reads four fields of it, unauthenticated, on every
     mount of every applicant screen. Decoding the rest is work an attacker gets for free at the one
     public surface with no captcha in front of it. A caller that genuinely needs the whole document
-    (check-in does) names no fields and is served it.
+    names no fields and is served it.
+
+    A caller whose fields are all part of the resolution itself - the id, the name and the phase -
+    is answered from a short-lived cache of recent resolutions without a query at all, which is the
+    common case: applicant sign-in and check-in only need to know which market a slug names. The
+    cache holds only published markets, expires after ``SLUG_RESOLUTION_TTL_SECONDS``, and is
+    dropped per market by ``forget_market_slug_resolution`` on every rename, phase transition and
+    delete, so the window in which another process's write goes unseen is the TTL and no longer.
     """
     if not market_slug:
         return None
     target = market_slug.strip().lower()
+    covered = fields is not None and {market_doc_key(field) for field in fields} <= {
+        market_doc_key(field) for field in _SLUG_RESOLUTION_FIELDS
+    }
+    if covered:
+        cached = _cached_slug_resolution(target)
+        if cached is not None:
+            return cached
     query = {**non_draft_market_prefilter(), **market_doc_filter("slug", target)}
     projection = (
-        None if fields is None else market_doc_projection((*_SLUG_LOOKUP_FIELDS, *fields))
+        None if fields is None else market_doc_projection((*_SLUG_RESOLUTION_FIELDS, *fields))
     )
     for candidate in collection.find(query, projection):
         if market_name_slug(candidate.get("name", "")) != target:
             continue
         if phase_from_market_document(candidate) == MarketPhase.DRAFT:
             continue
+        _remember_slug_resolution(target, candidate)
         return candidate
     return None
 
 
+# The sub-objects a lazily parsed market validates on first access rather than up front. They are
+# the bulk of a stored market - the setup with its column values and floorplans, the assignment,
+# the edit history, the application form - and the part a permission check never reads.
+DEFERRED_MARKET_FIELDS: FrozenSet[str] = frozenset(
+    ("setup_object", "assignment_object", "modification_list", "application_form")
+)
+
+
+@lru_cache(maxsize=512)
+def market_field_for_key(key: str) -> Optional[str]:
+    """The ``Market`` field a top-level stored key holds, or None when it holds none.
+
+    A stored market has a few dozen distinct top-level keys and is read on nearly every request, so
+    each key is translated once per process rather than by regex on every read.
+    """
+    field = camel_to_snake(key)
+    return field if field in Market.model_fields else None
+
+
+@lru_cache(maxsize=None)
+def _market_field_adapter(field: str) -> TypeAdapter:
+    """Validator for one ``Market`` field on its own, with forward references resolved."""
+    return TypeAdapter(typing.get_type_hints(Market, vars(datatypes))[field])
+
+
+class _Deferred:
+    """A stored sub-object not yet validated: its raw value, still in stored (camelCase) form."""
+
+    __slots__ = ("raw", "converted")
+
+    def __init__(self, raw: Any, converted: bool = False) -> None:
+        self.raw = raw
+        self.converted = converted
+
+
+class LazyMarket(Market):
+    """A ``Market`` whose heavy sub-objects are validated on first access.
+
+    It is a ``Market`` in every respect a reader can observe - the deferred fields read back as the
+    same validated models, and anything that walks the fields rather than reading them by name
+    (a dump, including one of a model this market is nested in, iteration, ``repr``, a copy)
+    validates whatever is still deferred first - it only moves the cost of the sub-objects from the
+    read to the first access of each. A caller that is about to mutate or persist the market, or
+    needs an invalid sub-object reported up front rather than wherever it is first touched, calls
+    ``materialize``.
+    """
+
+    def __getattribute__(self, name: str) -> Any:
+        if name in DEFERRED_MARKET_FIELDS:
+            fields = object.__getattribute__(self, "__dict__")
+            value = fields.get(name)
+            if type(value) is _Deferred:
+                raw = value.raw if value.converted else convert_keys_to_snake_case(value.raw)
+                if name == "setup_object":
+                    raw = unpack_setup_floorplans(raw, camel=False)
+                value = _market_field_adapter(name).validate_python(raw)
+                fields[name] = value
+            return value
+        return super().__getattribute__(name)
+
+    def materialize(self, *names: str) -> "LazyMarket":
+        """Validate the named deferred sub-objects now (all of them when none are named)."""
+        for name in names or DEFERRED_MARKET_FIELDS:
+            getattr(self, name)
+        return self
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, LazyMarket):
+            other.materialize()
+        self.materialize()
+        return super().__eq__(other)
+
+    def __iter__(self) -> Any:
+        self.materialize()
+        return super().__iter__()
+
+    def __repr_args__(self) -> Any:
+        for name, value in super().__repr_args__():
+            if type(value) is _Deferred:
+                # A repr must not raise; a sub-object that does not validate shows as stored.
+                try:
+                    value = getattr(self, name)
+                except ValidationError:
+                    value = value.raw
+            yield name, value
+
+    def __copy__(self) -> "LazyMarket":
+        self.materialize()
+        return super().__copy__()
+
+    def __deepcopy__(self, memo: Optional[Dict[int, Any]] = None) -> "LazyMarket":
+        self.materialize()
+        return super().__deepcopy__(memo)
+
+    def __getstate__(self) -> Dict[Any, Any]:
+        self.materialize()
+        return super().__getstate__()
+
+
+LazyMarket.model_rebuild(_types_namespace=vars(datatypes))
+
+
+def _lazy_market_from_document(
+    document: Dict[str, Any], market_snake: Optional[Dict[str, Any]],
+) -> Market:
+    """Build a ``LazyMarket``, validating only what is not deferred."""
+    core: Dict[str, Any] = {}
+    deferred: Dict[str, _Deferred] = {}
+    for key, value in document.items():
+        field = market_field_for_key(key)
+        if field is None:
+            continue
+        if field in DEFERRED_MARKET_FIELDS:
+            deferred[field] = _Deferred(value)
+        else:
+            core[field] = convert_keys_to_snake_case(value)
+    for field, value in (market_snake or {}).items():
+        if field in DEFERRED_MARKET_FIELDS:
+            deferred[field] = _Deferred(value, converted=True)
+        elif field in Market.model_fields:
+            core[field] = value
+
+    missing = [
+        field for field in DEFERRED_MARKET_FIELDS
+        if field not in deferred and Market.model_fields[field].is_required()
+    ]
+    if missing:
+        # Let the model report a missing required field exactly as an eager parse would.
+        return Market(**core)
+
+    # Required sub-objects are stood in for by empty ones so the core validates; the stand-ins are
+    # replaced by the deferred raw values before anyone can read them.
+    market = LazyMarket(**core, modification_list=[], assignment_object=datatypes.AssignmentObject())
+    fields = object.__getattribute__(market, "__dict__")
+    fields.update(deferred)
+    market.__pydantic_fields_set__.update(deferred)
+    return market
+
+
 def market_from_document(
-    document: Dict[str, Any], market_snake: Optional[Dict[str, Any]] = None
+    document: Dict[str, Any], market_snake: Optional[Dict[str, Any]] = None, lazy: bool = False,
 ) -> Market:
     """Parse a stored market document into a Market model.
 
@@ -307,18 +531,109 @@ def market_from_document(
     ``phase_from_market_document``, and so does a document with an unrecognized phase value. The
     result is assigned to ``phase`` on the Pydantic model, so it overrides the default both ways.
     See ``Market.phase``.
+
+    ``lazy`` returns a ``LazyMarket``: the top-level fields are validated here, and the sub-objects
+    in ``DEFERRED_MARKET_FIELDS`` - converted out of their stored key spelling and validated - only
+    when first read. An invalid sub-object then raises where it is read, not here. Floorplans
+    stored packed (see ``services.floorplan_geometry``) are unpacked with the setup they belong to,
+    so a lazy read that never touches the setup never decodes them.
     """
-    if market_snake is not None:
-        doc = convert_keys_to_snake_case(document)
-        doc.update(market_snake)
+    if lazy:
+        market = _lazy_market_from_document(document, market_snake)
     else:
         doc = convert_keys_to_snake_case(document)
-    model_data = {k: v for k, v in doc.items() if k in Market.model_fields}
-    market = Market(**model_data)
+        if market_snake is not None:
+            doc.update(market_snake)
+        if "setup_object" in doc:
+            doc["setup_object"] = unpack_setup_floorplans(doc["setup_object"], camel=False)
+        model_data = {k: v for k, v in doc.items() if k in Market.model_fields}
+        market = Market(**model_data)
     object.__setattr__(market, "phase", phase_from_market_document(document))
     return market
 
 
+class MarketReadProfile(str, Enum):
+    """How much of a stored market a read fetches, named for what the reader does with it.
+
+    A market document carries the organizer's whole working state - the setup with its column
+    values and floorplans, the application form, the assignment - and most reads need a sliver of
+    it: a permission check reads the roles, the organization and the phase. Each endpoint names the
+    profile it needs rather than a field list, so what a kind of read fetches is decided here once.
+    """
+
+    PERMISSIONS = "permissions"
+    SUMMARY = "summary"
+    SETUP = "setup"
+    FULL = "full"
+
+
+# Each profile is a superset of the one before it, so an endpoint that moves up a profile can only
+# gain fields. FULL fetches the document as stored.
+_PERMISSIONS_FIELDS: Tuple[str, ...] = ("id", "name", "roles", "organization_id", "phase", "is_draft")
+_SUMMARY_FIELDS: Tuple[str, ...] = (
+    *_PERMISSIONS_FIELDS,
+    "creation_date",
+    "theme",
+    "application_form",
+    "review_config",
+    "results_published",
+    "discord_guild_id",
+    "discord_webhook_url",
+)
+_SETUP_FIELDS: Tuple[str, ...] = (*_SUMMARY_FIELDS, "setup_object")
+
+MARKET_READ_PROFILE_FIELDS: Dict[MarketReadProfile, Optional[Tuple[str, ...]]] = {
+    MarketReadProfile.PERMISSIONS: _PERMISSIONS_FIELDS,
+    MarketReadProfile.SUMMARY: _SUMMARY_FIELDS,
+    MarketReadProfile.SETUP: _SETUP_FIELDS,
+    MarketReadProfile.FULL: None,
+}
+
+# What a required model field reads as when the profile did not fetch it. These are placeholders
+# so the model can be built, not data: a reader of a field its profile leaves out reads nothing.
+_UNREAD_REQUIRED_FIELDS: Dict[str, Any] = {
+    "creation_date": "",
+    "modification_list": [],
+    "assignment_object": {"vendor_assignments": [], "assignment_statistics": None},
+}
+
+
+def market_read_projection(profile: MarketReadProfile) -> Optional[Dict[str, Any]]:
+    """Mongo projection for a read profile; None for a full read."""
+    fields = MARKET_READ_PROFILE_FIELDS[profile]
+    return None if fields is None else market_doc_projection(fields)
+
+
+def find_market_document(
+    collection: Any, market_id: str, profile: MarketReadProfile = MarketReadProfile.FULL,
+) -> Optional[Dict[str, Any]]:
+    """The stored market with this id, fetched as far as ``profile`` reads."""
+    return collection.find_one(market_doc_filter("id", market_id), market_read_projection(profile))
+
+
+def market_from_profile_document(
+    document: Dict[str, Any],
+    profile: MarketReadProfile = MarketReadProfile.FULL,
+    lazy: bool = False,
+) -> Market:
+    """Parse a document fetched under ``profile`` into a Market model.
+
+    A required field the profile does not fetch is filled with a placeholder rather than failing
+    validation. Only fields absent from the document are filled, and only those the profile leaves
+    out: a full read of a document missing one still fails, exactly as it did. ``lazy`` is passed
+    through to ``market_from_document``.
+    """
+    fields = MARKET_READ_PROFILE_FIELDS[profile]
+    if fields is None:
+        return market_from_document(document, lazy=lazy)
+    placeholders = {
+        field: copy.deepcopy(value)
+        for field, value in _UNREAD_REQUIRED_FIELDS.items()
+        if field not in fields and market_doc_key(field) not in document
+    }
+    return market_from_document(document, placeholders or None, lazy=lazy)
+
+
 def normalize_market_document(document: Dict[str, Any]) -> Dict[str, Any]:
     """Rewrite a stored market document into canonical form.
 
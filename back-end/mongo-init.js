@@ -10,6 +10,16 @@ db.createCollection('users');
 db.createCollection('markets');
 db.markets.createIndex({ slug: 1 }, { name: 'market_slug' });
 
+// The organizer's table view reads one materialized grid per market: a header by market id, and
+// its rows a page at a time (see back-end/api/markets.py).
+db.createCollection('market_tables');
+db.market_tables.createIndex({ marketId: 1 }, { unique: true });
+db.createCollection('market_table_rows');
+db.market_table_rows.createIndex(
+  { marketId: 1, fingerprint: 1, seq: 1 },
+  { unique: true, name: 'market_table_rows_position' },
+);
+
 db.createCollection('source_data');
 db.createCollection('organizations');
 db.createCollection('attendance');
@@ -19,9 +29,40 @@ db.createCollection('attendance');
 db.createCollection('applications');
 db.applications.createIndex({ market_id: 1 });
 
+// Template pickers list one owner's or one organization's templates a page at a time, newest
+// first (see back-end/api/floorplans_templates.py); each page is a single scan of one of these.
 db.createCollection('floorplan_templates');
-db.floorplan_templates.createIndex({ ownerUserId: 1 });
-db.floorplan_templates.createIndex({ organizationId: 1 });
+db.floorplan_templates.createIndex(
+  { ownerUserId: 1, updatedAt: -1, id: -1 },
+  { name: 'floorplan_templates_owner_recent' },
+);
+db.floorplan_templates.createIndex(
+  { organizationId: 1, updatedAt: -1, id: -1 },
+  { name: 'floorplan_templates_organization_recent' },
+);
+
+// Floorplan images are stored once per content: an upload of bytes already stored adds an owner to
+// the stored file, and only this index stops two concurrent uploads of one plan from both storing
+// it (see back-end/services/gridfs_service.py). Files stored before hashing have no hash.
+db.createCollection('floorplan_images.files');
+db.getCollection('floorplan_images.files').createIndex(
+  { 'metadata.sha256': 1 },
+  {
+    unique: true,
+    partialFilterExpression: { 'metadata.sha256': { $exists: true } },
+    name: 'floorplan_images_sha256',
+  },
+);
+// Deleting a market lets go of the floorplan images it shows, found by owner.
+db.getCollection('floorplan_images.files').createIndex({ 'metadata.owners': 1 }, { sparse: true });
+
+// Background upload status documents are only polled while the editor waits on them; they expire a
+// week after the upload (see back-end/services/floorplan_uploads.py).
+db.createCollection('floorplan_uploads');
+db.floorplan_uploads.createIndex(
+  { createdAt: 1 },
+  { expireAfterSeconds: 7 * 24 * 60 * 60, name: 'floorplan_uploads_ttl' },
+);
 
 // The app refuses to boot unless the market-document migration is recorded as applied, in both
 // its parts (see MARKET_MIGRATION_IDS in back-end/market_documents.py). This database is brand new
@@ -0,0 +1,443 @@
+"""
+Floorplan AI analysis.
+
+No Flask dependency.  Sends a floorplan image to Gemini 2.5 Flash (primary)
+or GPT-4o-mini (fallback) and returns the walls, obstacles and room
+boundaries they detect, in normalized 0-1 coordinate space.  Used by the
+``/floorplans/analyze`` endpoint and by background upload processing.
+
+An analysis takes seconds and costs a model call, and the editor asks for the
+same plan again every time it is opened.  Results are kept in the
+``floorplan_analyses`` collection under the SHA-256 of the image, concurrent
+requests for one image share a single call, and each provider's client is
+built once per process.
+
+Analysis is tiered.  The classical detector in :mod:`services.floorplan_cv`
+reads walls and obstacles off the drawing in a fraction of a second and says
+how confident it is; only a plan it cannot explain well enough goes to the AI
+(or a caller that asks for refinement).  Without an API key, or when the AI
+fails, the detector's answer stands.  ``FLOORPLAN_ANALYZER`` pins one tier:
+``local`` never uses the network, ``ai`` always does.  Every result says which
+tier produced it in ``source``.
+
+A PDF page rasterized at 200 DPI is a multi-megapixel PNG, far more than the
+models look at: both scale an image down to about 1.5 thousand pixels on its
+long side before reading it.  :func:`prepare_image` does that here, once per
+image, and sends a WebP of that size instead.  The whole frame is kept, so the
+0-1 coordinates the model answers in are fractions of the original too.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from PIL import Image as PILImage
+from pymongo.errors import PyMongoError
+
+from db_config import get_database
+from services.floorplan_cv import analyze_plan
+from services.floorplan_render import base_image_cache
+
+logger = logging.getLogger(__name__)
+
+FLOORPLAN_ANALYSES_COLLECTION = "floorplan_analyses"
+
+# Bump when the prompt or the local detector changes what an image analyses
+# to, so results from before stop matching.
+ANALYSIS_CACHE_VERSION = 3
+
+TIERED_ANALYZER = "tiered"
+LOCAL_ANALYZER = "local"
+AI_ANALYZER = "ai"
+_ANALYZERS = (TIERED_ANALYZER, LOCAL_ANALYZER, AI_ANALYZER)
+
+# ``source`` of a result from each tier
+CV_SOURCE = "cv"
+AI_SOURCE = "ai"
+
+_DEFAULT_MIN_CV_CONFIDENCE = 0.75
+
+# Longest side the models read an image at; more pixels only cost upload time.
+MODEL_MAX_SIDE_PX = 1536
+_MODEL_FORMAT, _MODEL_MIME_TYPE = "WEBP", "image/webp"
+_MODEL_QUALITY = 85
+
+
+class PreparedImage(NamedTuple):
+    """An image as sent to a model: encoded bytes, MIME type and pixel size."""
+
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+
+
+class AnalysisUnavailable(RuntimeError):
+    """No AI provider is configured."""
+
+
+class AnalysisFailed(RuntimeError):
+    """Every configured AI provider failed."""
+
+
+_SYSTEM_PROMPT = (
+    "You are a floorplan analysis expert. Analyze this architectural floorplan image. "
+    "Detect all walls as line segments, obstacles (pillars, columns, fixed furniture), "
+    "and room boundaries. Output coordinates normalized to 0-1 range "
+    "(x=0 is left edge, x=1 is right edge, y=0 is top edge, y=1 is bottom edge). "
+    "Output ONLY valid JSON."
+)
+
+_OUTPUT_SCHEMA = """
+Output JSON in this exact format:
+{
+  "walls": [
+    {
+      "start": [0.1, 0.2],
+      "end": [0.9, 0.2],
+      "thickness_mm": 150,
+      "is_exterior": true
+    }
+  ],
+  "obstacles": [
+    {
+      "polygon": [[0.3, 0.4], [0.35, 0.4], [0.35, 0.45], [0.3, 0.45]],
+      "type": "pillar"
+    }
+  ],
+  "rooms": [
+    {
+      "label": "main_hall",
+      "polygon": [[0, 0], [1, 0], [1, 1], [0, 1]]
+    }
+  ]
+}
+"""
+
+_FULL_PROMPT = _SYSTEM_PROMPT + "\n\n" + _OUTPUT_SCHEMA
+
+
+def prepare_image(image_bytes: bytes, digest: Optional[str] = None) -> PreparedImage:
+    """*image_bytes* at the size the models read, as WebP; prepared once per image.
+
+    The image is decoded at a reduced size where the format allows it,
+    flattened onto white and fitted within :data:`MODEL_MAX_SIDE_PX`.  An
+    image that cannot be decoded is sent as it is.  *digest* is the image's
+    SHA-256, when the caller has it.
+    """
+    key = ("analysis", digest or hashlib.sha256(image_bytes).hexdigest())
+    cached = base_image_cache.get(key)
+    if cached is not None:
+        data, _ = cached
+        with PILImage.open(io.BytesIO(data)) as img:
+            return PreparedImage(data, _MODEL_MIME_TYPE, img.width, img.height)
+
+    try:
+        img = PILImage.open(io.BytesIO(image_bytes))
+        original_size = img.size
+        img.draft("RGB", (MODEL_MAX_SIDE_PX, MODEL_MAX_SIDE_PX))
+        img.load()
+    except Exception as exc:
+        logger.warning(f"Could not prepare floorplan for analysis, sending it as is: {exc}")
+        return PreparedImage(image_bytes, "image/png", 0, 0)
+
+    if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info:
+        rgba = img.convert("RGBA")
+        img = PILImage.new("RGB", rgba.size, "white")
+        img.paste(rgba, mask=rgba.getchannel("A"))
+    else:
+        img = img.convert("RGB")
+    img.thumbnail((MODEL_MAX_SIDE_PX, MODEL_MAX_SIDE_PX), PILImage.Resampling.LANCZOS)
+    output = io.BytesIO()
+    img.save(output, format=_MODEL_FORMAT, quality=_MODEL_QUALITY)
+    data = output.getvalue()
+
+    logger.info(
+        f"Prepared floorplan for analysis: {len(image_bytes)} bytes at {original_size[0]}x{original_size[1]} "
+        f"-> {len(data)} bytes at {img.width}x{img.height}"
+    )
+    base_image_cache.put(key, data, img.width / original_size[0])
+    return PreparedImage(data, _MODEL_MIME_TYPE, img.width, img.height)
+
+
+# A model answering in fractions overshoots 1 by a little at the edges; one
+# answering in pixels of the image it was sent goes well past it.
+_PIXEL_COORDINATE_ABOVE = 1.5
+
+
+def _unit(value, extent: int, in_pixels: bool) -> float:
+    """A coordinate as a 0-1 fraction of *extent*, clamped to the image.
+
+    *in_pixels* says the model answered in pixels of the image it was sent,
+    which are divided by its size.
+    """
+    value = float(value)
+    if in_pixels and extent:
+        value /= extent
+    return min(max(value, 0.0), 1.0)
+
+
+def _to_unit_coordinates(result: dict, prepared: PreparedImage) -> dict:
+    """*result* with every point as fractions of the image, which the original shares.
+
+    Models asked for fractions sometimes answer in pixels instead.  That is
+    decided once for the whole answer - pixels only when some coordinate is
+    well past 1 - so a fraction that overshoots the edge (``1.02``) is
+    clamped rather than read as a pixel a few from the origin.
+    """
+    walls = [
+        (wall, end) for wall in result.get("walls") or [] for end in ("start", "end")
+        if isinstance(wall.get(end), list) and len(wall[end]) == 2
+    ]
+    shapes = [
+        shape for shape in (result.get("obstacles") or []) + (result.get("rooms") or [])
+        if isinstance(shape.get("polygon"), list)
+    ]
+    for shape in shapes:
+        shape["polygon"] = [p for p in shape["polygon"] if isinstance(p, list) and len(p) == 2]
+    points = [wall[end] for wall, end in walls] + [p for shape in shapes for p in shape["polygon"]]
+    in_pixels = any(float(c) > _PIXEL_COORDINATE_ABOVE for p in points for c in p)
+
+    def point(p):
+        return [_unit(p[0], prepared.width, in_pixels), _unit(p[1], prepared.height, in_pixels)]
+
+    for wall, end in walls:
+        wall[end] = point(wall[end])
+    for shape in shapes:
+        shape["polygon"] = [point(p) for p in shape["polygon"]]
+    return result
+
+
+def _parse_json_response(raw_text: str) -> dict:
+    """Parse JSON from AI response, stripping markdown fences if present."""
+    text = raw_text.strip()
+    if text.startswith("```"):
+        # Strip opening fence: ```json or ```
+        first_newline = text.find("\n")
+        if first_newline != -1:
+            text = text[first_newline + 1:]
+        else:
+            text = text[3:]
+        # Strip closing fence
+        if text.endswith("```"):
+            text = text[:-3]
+        text = text.strip()
+    return json.loads(text)
+
+
+@lru_cache(maxsize=2)
+def _gemini_client(api_key: str):
+    """One Gemini client per key, reusing its connection pool across calls."""
+    from google import genai
+
+    return genai.Client(api_key=api_key)
+
+
+@lru_cache(maxsize=2)
+def _openai_client(api_key: str):
+    """One OpenAI client per key, reusing its connection pool across calls."""
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key)
+
+
+def _call_gemini(image: PreparedImage) -> dict:
+    """Call Gemini 2.5 Flash with the floorplan image and return parsed JSON."""
+    from google.genai import types
+
+    client = _gemini_client(os.environ.get("GEMINI_API_KEY"))
+
+    image_part = types.Part.from_bytes(data=image.data, mime_type=image.mime_type)
+
+    response = client.models.generate_content(
+        model="gemini-2.5-flash",
+        contents=[
+            _FULL_PROMPT,
+            image_part,
+        ],
+    )
+
+    return _parse_json_response(response.text)
+
+
+def _call_openai(image: PreparedImage) -> dict:
+    """Call GPT-4o-mini with the floorplan image and return parsed JSON."""
+    client = _openai_client(os.environ.get("OPENAI_API_KEY"))
+
+    base64_image = base64.b64encode(image.data).decode("utf-8")
+
+    response = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": _FULL_PROMPT},
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:{image.mime_type};base64,{base64_image}",
+                        },
+                    },
+                ],
+            }
+        ],
+        response_format={"type": "json_object"},
+    )
+
+    return json.loads(response.choices[0].message.content)
+
+
+def _analyze_with_ai(image_bytes: bytes, digest: Optional[str] = None) -> dict:
+    """Gemini first, then OpenAI; see :func:`analyze_image` for the errors."""
+    gemini_key = os.environ.get("GEMINI_API_KEY")
+    openai_key = os.environ.get("OPENAI_API_KEY")
+    if not gemini_key and not openai_key:
+        raise AnalysisUnavailable(
+            "No AI API keys configured. "
+            "Set GEMINI_API_KEY and/or OPENAI_API_KEY environment variables."
+        )
+
+    image = prepare_image(image_bytes, digest)
+
+    # Try Gemini first (primary)
+    if gemini_key:
+        try:
+            return _to_unit_coordinates(_call_gemini(image), image)
+        except Exception as exc:
+            logger.warning(f"Gemini analysis failed: {exc}. Falling back to OpenAI.")
+
+    # Fallback to OpenAI
+    if openai_key:
+        try:
+            return _to_unit_coordinates(_call_openai(image), image)
+        except Exception as exc:
+            logger.error(f"OpenAI fallback also failed: {exc}")
+            raise AnalysisFailed("AI analysis failed. Check server logs for details.") from exc
+
+    raise AnalysisFailed("No AI provider available")
+
+
+def _analyzer() -> str:
+    analyzer = os.getenv("FLOORPLAN_ANALYZER", "").strip().lower()
+    return analyzer if analyzer in _ANALYZERS else TIERED_ANALYZER
+
+
+def _min_cv_confidence() -> float:
+    try:
+        return float(os.getenv("FLOORPLAN_CV_MIN_CONFIDENCE", ""))
+    except ValueError:
+        return _DEFAULT_MIN_CV_CONFIDENCE
+
+
+def _run(analyzer: str, image_bytes: bytes, digest: str) -> Tuple[dict, bool]:
+    """The result of *analyzer*, and whether it may be cached.
+
+    A tiered result that fell back to the detector because the AI was
+    unavailable or failed is not cached, so the AI gets another chance.
+    """
+    if analyzer == AI_ANALYZER:
+        return {**_analyze_with_ai(image_bytes, digest), "source": AI_SOURCE}, True
+
+    cv = analyze_plan(image_bytes)
+    local = {**cv.result, "source": CV_SOURCE, "confidence": cv.confidence}
+    if analyzer == LOCAL_ANALYZER or cv.confidence >= _min_cv_confidence():
+        return local, True
+    try:
+        return {**_analyze_with_ai(image_bytes, digest), "source": AI_SOURCE}, True
+    except AnalysisUnavailable:
+        return local, False
+    except AnalysisFailed as exc:
+        logger.warning(f"AI refinement failed ({exc}); keeping the local analysis")
+        return local, False
+
+
+# ── cache ──────────────────────────────────────────────────────────────────────
+
+class AnalysisCache:
+    """Analysis results in a Mongo collection, one document per image and analyzer.
+
+    Each document is ``{_id: key, result, analyzer, createdAt}``.  The cache
+    is an optimization only: a database error is logged and treated as a
+    miss, never surfaced to the caller.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    @staticmethod
+    def key(digest: str, analyzer: str) -> str:
+        return f"{analyzer}:{ANALYSIS_CACHE_VERSION}:{digest}"
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            doc = self._collection.find_one({"_id": key}, {"result": 1})
+        except PyMongoError as exc:
+            logger.warning(f"Floorplan analysis cache read failed: {exc}")
+            return None
+        return doc["result"] if doc else None
+
+    def put(self, key: str, result: dict, analyzer: str) -> None:
+        try:
+            self._collection.replace_one(
+                {"_id": key},
+                {"result": result, "analyzer": analyzer, "createdAt": datetime.now(timezone.utc)},
+                upsert=True,
+            )
+        except PyMongoError as exc:
+            logger.warning(f"Floorplan analysis cache write failed: {exc}")
+
+
+analysis_cache = AnalysisCache(get_database()[FLOORPLAN_ANALYSES_COLLECTION])
+
+# Cache key → the analysis in progress for it
+_in_flight: Dict[str, Future] = {}
+_in_flight_lock = threading.Lock()
+
+
+def analyze_image(image_bytes: bytes, refine: bool = False) -> dict:
+    """Detect walls, obstacles and rooms in *image_bytes*.
+
+    A cached result is returned as is.  Otherwise the configured analyzer
+    runs, once for all concurrent callers with the same image.  *refine*
+    skips the detector and asks the AI.  The AI tries Gemini first and falls
+    back to OpenAI; asked directly, it raises :class:`AnalysisUnavailable`
+    when neither API key is set and :class:`AnalysisFailed` when every
+    configured provider fails.  Failures are not cached.
+    """
+    analyzer = AI_ANALYZER if refine else _analyzer()
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    key = AnalysisCache.key(digest, analyzer)
+    cached = analysis_cache.get(key)
+    if cached is not None:
+        return cached
+
+    with _in_flight_lock:
+        pending = _in_flight.get(key)
+        leader = pending is None
+        if leader:
+            pending = _in_flight[key] = Future()
+    if not leader:
+        return pending.result()
+
+    try:
+        result, cacheable = _run(analyzer, image_bytes, digest)
+    except BaseException as exc:
+        pending.set_exception(exc)
+        raise
+    else:
+        if cacheable:
+            analysis_cache.put(key, result, analyzer)
+        pending.set_result(result)
+        return result
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
@@ -0,0 +1,404 @@
+"""
+Local floorplan analysis from the drawing itself.
+
+No Flask dependency and no network.  A deterministic, classical counterpart
+to the AI analyzers in :mod:`services.floorplan_analysis`, answering in the
+same normalized 0-1 JSON in a fraction of a second:
+
+* The plan is binarized at Otsu's threshold.  A page mostly ink is a photo
+  or a scan's grain, not a drawing, and is answered with nothing.
+* Long horizontal and vertical strokes of ink are walls; strokes in
+  consecutive rows or columns join into one wall.
+* What ink is left is searched for straight diagonal walls with a Hough
+  transform: each peak is cut into the continuous strokes along it.
+  Leftover ink too dense to be lines is not searched.
+* The rest is split into connected components.  Solid, compact blobs are
+  obstacles (pillars, fixed furniture); components too small to be part of
+  the building are lettering and are ignored.
+
+:func:`analyze_plan` also reports how much of the drawing that explains (see
+:class:`CvAnalysis`), which decides whether the AI is asked to do better.
+"""
+
+from __future__ import annotations
+
+import io
+import math
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Plans are analysed at this size; walls are strokes, not detail.
+_WORK_SIDE_PX = 1024
+
+# A stroke shorter than this share of the plan's side is lettering or hatching.
+_MIN_WALL_FRACTION = 0.05
+
+# A "stroke" thicker than this share of the plan's side is a filled area.
+_MAX_THICKNESS_FRACTION = 0.03
+
+# Strokes in consecutive rows whose ends are this close are one wall.
+_END_TOLERANCE_PX = 3
+
+# Walls this close to the outline of all walls are exterior walls.
+_EXTERIOR_FRACTION = 0.02
+
+# The plan carries no scale, so every wall gets the AI's usual thickness.
+_DEFAULT_THICKNESS_MM = 150
+
+# Ink over more of the page than this is a photo, a scan's grain or shading,
+# not line art: it is not searched, and the answer has no confidence.
+_MAX_INK_FRACTION = 0.25
+
+# ── Hough ──
+# Angles within this many degrees of the axes belong to the stroke pass; a
+# line of lettering is one too.
+_AXIS_MARGIN_DEG = 3
+# A diagonal wall is a stroke with ink at least this share of its length...
+_MIN_LINE_DENSITY = 0.9
+# ...and no gap in it wider than this.
+_MAX_LINE_GAP_PX = 3
+_MAX_DIAGONALS = 64
+# Peaks looked at before giving up: hatching and arcs give many that are no line.
+_MAX_HOUGH_PEAKS = 256
+# Leftover ink over more of the page than this is shading or grain the
+# passes before left alone, not lines.
+_MAX_HOUGH_INK_FRACTION = 0.1
+# Pixels voting at a time, so the accumulator is built without a pixel-by-angle table.
+_HOUGH_CHUNK_PX = 8192
+
+# ── Components ──
+# A component whose box is smaller than this share of the plan's side is lettering.
+_MIN_OBSTACLE_FRACTION = 0.006
+# Obstacles are solid: ink over at least this share of their box...
+_MIN_OBSTACLE_FILL = 0.6
+# ...and no longer than this many times their width.
+_MAX_OBSTACLE_ASPECT = 4
+# A pillar is a compact obstacle no bigger than this share of the plan's side.
+_PILLAR_FRACTION = 0.04
+
+_Segment = Tuple[int, int, int, int]  # first row, last row, start, end (end exclusive)
+_Line = Tuple[float, float, float, float]  # x1, y1, x2, y2 in pixels
+
+
+class CvAnalysis(NamedTuple):
+    """A plan's walls and obstacles, and how far to trust them.
+
+    ``confidence`` is 0-1: half of it is how much of the outline of the
+    walls is itself wall (an enclosed room scores 1), half the share of the
+    drawing's ink - lettering aside - that the walls and obstacles account
+    for.  Arcs, furniture outlines and hatching lower it.
+    """
+
+    result: Dict
+    confidence: float
+
+
+def _grayscale(image_bytes: bytes) -> np.ndarray:
+    img = Image.open(io.BytesIO(image_bytes))
+    img.draft("L", (_WORK_SIDE_PX, _WORK_SIDE_PX))
+    img = img.convert("L")
+    img.thumbnail((_WORK_SIDE_PX, _WORK_SIDE_PX))
+    return np.asarray(img)
+
+
+def _ink(gray: np.ndarray) -> np.ndarray:
+    """Dark pixels, split from the background at Otsu's threshold."""
+    histogram = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256)
+    weight = np.cumsum(histogram)
+    mean = np.cumsum(histogram * levels)
+    total, total_mean = weight[-1], mean[-1]
+    background = total - weight
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (total_mean * weight - mean * total) ** 2 / (weight * background)
+    between[~np.isfinite(between)] = 0
+    return gray <= int(np.argmax(between))
+
+
+def _runs(row: np.ndarray, min_length: int = 1) -> List[Tuple[int, int]]:
+    """``(start, end)`` of each run of ink at least *min_length* long."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], row.view(np.int8), [0]))))
+    starts, ends = edges[::2], edges[1::2]
+    keep = ends - starts >= min_length
+    return list(zip(starts[keep].tolist(), ends[keep].tolist()))
+
+
+# ── Axis-aligned walls ─────────────────────────────────────────────────────────
+
+def _strokes(ink: np.ndarray, min_length: int) -> List[_Segment]:
+    """Runs along each row, joined across rows into strokes."""
+    open_segments: List[_Segment] = []
+    closed: List[_Segment] = []
+    for y, row in enumerate(ink):
+        continued = []
+        for start, end in _runs(row, min_length):
+            for i, (first, last, s, e) in enumerate(open_segments):
+                if last == y - 1 and abs(s - start) <= _END_TOLERANCE_PX and abs(e - end) <= _END_TOLERANCE_PX:
+                    open_segments[i] = (first, y, min(s, start), max(e, end))
+                    continued.append(i)
+                    break
+            else:
+                open_segments.append((y, y, start, end))
+                continued.append(len(open_segments) - 1)
+        closed.extend(seg for i, seg in enumerate(open_segments) if i not in continued)
+        open_segments = [seg for i, seg in enumerate(open_segments) if i in continued]
+    return closed + open_segments
+
+
+def _axis_walls(ink: np.ndarray, walls_mask: np.ndarray) -> List[_Line]:
+    """Horizontal and vertical walls; their pixels are set in *walls_mask*."""
+    height, width = ink.shape
+    walls = []
+    for grid, mask, along, across, vertical in (
+        (ink, walls_mask, width, height, False),
+        (ink.T, walls_mask.T, height, width, True),
+    ):
+        min_length = max(int(along * _MIN_WALL_FRACTION), 2)
+        max_thickness = max(int(across * _MAX_THICKNESS_FRACTION), 1)
+        for first, last, start, end in _strokes(grid, min_length):
+            if last - first + 1 > max_thickness:
+                continue
+            mask[first:last + 1, start:end] |= grid[first:last + 1, start:end]
+            middle = (first + last + 1) / 2
+            if vertical:
+                walls.append((middle, start, middle, end))
+            else:
+                walls.append((start, middle, end, middle))
+    return walls
+
+
+# ── Diagonal walls ─────────────────────────────────────────────────────────────
+
+def _diagonal_walls(ink: np.ndarray, walls_mask: np.ndarray) -> List[_Line]:
+    """Straight strokes at an angle, from the peaks of a Hough transform of the leftover ink.
+
+    The accumulator is built once; each line found takes its pixels out of
+    it, so a thick wall is found once and its pixels vote for nothing else.
+    """
+    height, width = ink.shape
+    min_length = max(int(max(height, width) * _MIN_WALL_FRACTION), 2)
+    half_thickness = max(max(height, width) * _MAX_THICKNESS_FRACTION / 2, 1.5)
+    ys, xs = np.nonzero(ink & ~walls_mask)
+    if not min_length <= len(xs) <= _MAX_HOUGH_INK_FRACTION * height * width:
+        return []
+
+    degrees = np.array([
+        d for d in range(180) if min(d % 90, 90 - d % 90) >= _AXIS_MARGIN_DEG
+    ])
+    thetas = np.deg2rad(degrees)
+    cos, sin = np.cos(thetas), np.sin(thetas)
+    diagonal = math.hypot(height, width)
+    n_rho = int(2 * diagonal) + 1
+    offsets = np.arange(len(thetas)) * n_rho
+
+    def cells(pixels: np.ndarray) -> np.ndarray:
+        """The accumulator cell each of *pixels* votes for at every angle, flattened."""
+        rhos = np.rint(np.outer(xs[pixels], cos) + np.outer(ys[pixels], sin) + diagonal).astype(np.int64)
+        return (rhos + offsets).ravel()
+
+    votes = np.zeros(len(thetas) * n_rho, dtype=np.int64)
+    for chunk in range(0, len(xs), _HOUGH_CHUNK_PX):
+        votes += np.bincount(cells(np.arange(chunk, min(chunk + _HOUGH_CHUNK_PX, len(xs)))), minlength=len(votes))
+    alive = np.ones(len(xs), dtype=bool)
+
+    walls: List[_Line] = []
+    rejected = set()
+    for _ in range(_MAX_HOUGH_PEAKS):
+        if len(walls) >= _MAX_DIAGONALS:
+            break
+        masked = votes.copy()
+        if rejected:
+            masked[list(rejected)] = 0
+        peak = int(np.argmax(masked))
+        if masked[peak] < min_length:
+            break
+        angle, rho = divmod(peak, n_rho)
+        normal = np.array([cos[angle], sin[angle]])
+        direction = np.array([-normal[1], normal[0]])
+
+        distance = xs * normal[0] + ys * normal[1] - (rho - diagonal)
+        on_line = alive & (np.abs(distance) <= 1.0)
+        positions = np.sort(xs[on_line] * direction[0] + ys[on_line] * direction[1])
+        found = False
+        if len(positions):
+            breaks = np.flatnonzero(np.diff(positions) > _MAX_LINE_GAP_PX)
+            for first, last in zip(np.r_[0, breaks + 1], np.r_[breaks, len(positions) - 1]):
+                start, end = positions[first], positions[last]
+                length = end - start + 1
+                if length < min_length or (last - first + 1) < _MIN_LINE_DENSITY * length:
+                    continue
+                found = True
+                base = normal * (rho - diagonal)
+                p1, p2 = base + direction * start, base + direction * end
+                walls.append((float(p1[0]), float(p1[1]), float(p2[0]), float(p2[1])))
+                along = xs * direction[0] + ys * direction[1]
+                taken = alive & (np.abs(distance) <= half_thickness) & (along >= start - 1) & (along <= end + 1)
+                votes -= np.bincount(cells(np.flatnonzero(taken)), minlength=len(votes))
+                alive &= ~taken
+                walls_mask[ys[taken], xs[taken]] = True
+        if not found:
+            rejected.add(peak)
+    return walls
+
+
+# ── Obstacles ──────────────────────────────────────────────────────────────────
+
+def _components(ink: np.ndarray) -> List[Tuple[int, int, int, int, int]]:
+    """8-connected components of *ink* as ``(x0, y0, x1, y1, pixels)``, boxes inclusive.
+
+    Labelled run by run: each run of a row joins the runs of the row above
+    it touches.
+    """
+    parent: List[int] = []
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    runs: List[Tuple[int, int, int]] = []  # y, start, end
+    previous: List[Tuple[int, int, int]] = []  # start, end, run index
+    for y, row in enumerate(ink):
+        current = []
+        for start, end in _runs(row):
+            index = len(runs)
+            runs.append((y, start, end))
+            parent.append(index)
+            for p_start, p_end, p_index in previous:
+                if p_start <= end and start <= p_end:
+                    a, b = find(index), find(p_index)
+                    if a != b:
+                        parent[max(a, b)] = min(a, b)
+            current.append((start, end, index))
+        previous = current
+
+    boxes: Dict[int, List[int]] = {}
+    for index, (y, start, end) in enumerate(runs):
+        box = boxes.setdefault(find(index), [start, y, end - 1, y, 0])
+        box[0], box[1] = min(box[0], start), min(box[1], y)
+        box[2], box[3] = max(box[2], end - 1), max(box[3], y)
+        box[4] += end - start
+    return [tuple(box) for box in boxes.values()]
+
+
+def _obstacles(leftover: np.ndarray) -> Tuple[List[Tuple[int, int, int, int, str]], int, int, np.ndarray]:
+    """Solid compact blobs in *leftover* ink, as ``(x0, y0, x1, y1, type)``.
+
+    Also returns how many leftover pixels the obstacles cover, how many
+    belong to components too small to matter, and the obstacles' pixels.
+    """
+    height, width = leftover.shape
+    side = max(height, width)
+    min_side = max(int(side * _MIN_OBSTACLE_FRACTION), 2)
+    obstacles, covered, small = [], 0, 0
+    mask = np.zeros_like(leftover)
+    for x0, y0, x1, y1, pixels in _components(leftover):
+        box_w, box_h = x1 - x0 + 1, y1 - y0 + 1
+        if max(box_w, box_h) < min_side * 2 and min(box_w, box_h) < min_side:
+            small += pixels
+            continue
+        if (
+            min(box_w, box_h) >= min_side
+            and pixels >= _MIN_OBSTACLE_FILL * box_w * box_h
+            and max(box_w, box_h) <= _MAX_OBSTACLE_ASPECT * min(box_w, box_h)
+        ):
+            kind = "pillar" if max(box_w, box_h) <= side * _PILLAR_FRACTION else "fixture"
+            obstacles.append((x0, y0, x1 + 1, y1 + 1, kind))
+            covered += pixels
+            mask[y0:y1 + 1, x0:x1 + 1] |= leftover[y0:y1 + 1, x0:x1 + 1]
+        elif max(box_w, box_h) < int(side * _MIN_WALL_FRACTION):
+            small += pixels
+    return obstacles, covered, small, mask
+
+
+# ── Result ─────────────────────────────────────────────────────────────────────
+
+def _enclosure(walls: List[_Line], bounds: Tuple[float, float, float, float], margin: float) -> float:
+    """How much of each side of *bounds* the walls run along, averaged over the four sides."""
+    left, top, right, bottom = bounds
+    covered = [[], [], [], []]
+    for x1, y1, x2, y2 in walls:
+        if x1 == x2:
+            for side, edge in ((0, left), (2, right)):
+                if abs(x1 - edge) <= margin:
+                    covered[side].append((min(y1, y2), max(y1, y2)))
+        elif y1 == y2:
+            for side, edge in ((1, top), (3, bottom)):
+                if abs(y1 - edge) <= margin:
+                    covered[side].append((min(x1, x2), max(x1, x2)))
+    score = 0.0
+    for side, spans in enumerate(covered):
+        extent = (bottom - top) if side in (0, 2) else (right - left)
+        length, reach = 0.0, -math.inf
+        for start, end in sorted(spans):
+            start = max(start, reach)
+            if end > start:
+                length += end - start
+                reach = end
+        score += min(length / extent, 1.0) if extent > 0 else 0.0
+    return score / 4
+
+
+def analyze_plan(image_bytes: bytes) -> CvAnalysis:
+    """Walls and obstacles of a floorplan, in the AI analyzers' JSON, and the confidence in them.
+
+    Rooms are left to the AI: ``rooms`` is always empty.  A page that is not
+    line art gets no walls and no confidence.
+    """
+    ink = _ink(_grayscale(image_bytes))
+    if ink.mean() > _MAX_INK_FRACTION:
+        return CvAnalysis({"walls": [], "obstacles": [], "rooms": []}, 0.0)
+    height, width = ink.shape
+    walls_mask = np.zeros_like(ink)
+    axis = _axis_walls(ink, walls_mask)
+    # Solid blobs go before the Hough pass: any line through one is dense with ink
+    obstacles, obstacle_pixels, small_pixels, obstacles_mask = _obstacles(ink & ~walls_mask)
+    diagonals = _diagonal_walls(ink & ~obstacles_mask, walls_mask)
+    walls = axis + diagonals
+
+    confidence = 0.0
+    margin_x, margin_y = width * _EXTERIOR_FRACTION, height * _EXTERIOR_FRACTION
+    bounds = (0.0, 0.0, 0.0, 0.0)
+    if walls:
+        xs = [x for x1, _, x2, _ in walls for x in (x1, x2)]
+        ys = [y for _, y1, _, y2 in walls for y in (y1, y2)]
+        bounds = (min(xs), min(ys), max(xs), max(ys))
+        drawing = int(ink.sum()) - small_pixels
+        explained = (int(walls_mask.sum()) + obstacle_pixels) / drawing if drawing > 0 else 0.0
+        confidence = round(0.5 * _enclosure(walls, bounds, max(margin_x, margin_y)) + 0.5 * min(explained, 1.0), 3)
+    left, top, right, bottom = bounds
+
+    def on_outline(x: float, y: float) -> bool:
+        return min(abs(x - left), abs(x - right)) <= margin_x or min(abs(y - top), abs(y - bottom)) <= margin_y
+
+    def exterior(x1: float, y1: float, x2: float, y2: float) -> bool:
+        if x1 == x2:
+            return abs(x1 - left) <= margin_x or abs(x1 - right) <= margin_x
+        if y1 == y2:
+            return abs(y1 - top) <= margin_y or abs(y1 - bottom) <= margin_y
+        return on_outline(x1, y1) and on_outline(x2, y2)
+
+    def point(x: float, y: float) -> List[float]:
+        return [round(min(max(x / width, 0.0), 1.0), 4), round(min(max(y / height, 0.0), 1.0), 4)]
+
+    result = {
+        "walls": [
+            {
+                "start": point(x1, y1),
+                "end": point(x2, y2),
+                "thickness_mm": _DEFAULT_THICKNESS_MM,
+                "is_exterior": exterior(x1, y1, x2, y2),
+            }
+            for x1, y1, x2, y2 in walls
+        ],
+        "obstacles": [
+            {"polygon": [point(x0, y0), point(x1, y0), point(x1, y1), point(x0, y1)], "type": kind}
+            for x0, y0, x1, y1, kind in obstacles
+        ],
+        "rooms": [],
+    }
+    return CvAnalysis(result, confidence)
+
@@ -0,0 +1,286 @@
+"""
+Compact storage of floorplan geometry in market documents.
+
+No Flask dependency.  A saved floorplan carries its walls, obstacles and
+placed tables as lists of small dicts of floats, stored inside the market
+document (``setupObject.floorplans``).  A detailed hall is thousands of them:
+every ``find_one`` of the market ships them as BSON, and every validation of
+its setup rebuilds them as pydantic models.
+
+With ``FLOORPLAN_COMPACT_GEOMETRY`` enabled, :func:`pack_floorplan` stores
+each of those lists column by column instead: the numbers as one packed
+little-endian float32 array in BSON binary, quantized to
+:data:`QUANTUM_MM` (the same 0.1 mm below which ``services.placement_cache``
+already treats coordinates as equal), and the strings and flags as plain
+arrays beside it.  Counts of quanta are whole numbers, which float32 holds
+exactly up to 2**24 -- about 1.6 km -- so a packed floorplan decodes to the
+same numbers every time.
+
+Decoding is the reader's business and happens as late as possible: a
+``LazyMarket`` unpacks its setup only when the setup is first read (see
+``market_documents``), so a permission check or a summary never touches the
+geometry at all.  Every reader goes through :func:`unpack_setup_floorplans`
+or :func:`unpack_market_floorplans`, which leave a floorplan that is not
+packed exactly as it is, so documents written before packing, or with it
+switched off, read as they always did.
+
+A list is packed only when every item in it is the plain shape the models
+describe, with finite numbers in range; anything else -- an extra key the
+editor added, a missing id -- stays a list, so packing loses nothing but
+noise below the quantum.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from assignment.utils import convert_keys_to_camel_case
+
+# Stored in place of the lists it packs.  Every key inside it is a single
+# lowercase word, so the document-wide camelCase/snake_case conversions leave
+# it unchanged and it can be unpacked in either spelling.
+PACKED_KEY = "packed"
+PACKED_FORMAT_VERSION = 1
+
+QUANTUM_MM = 0.1
+_QUANTA_PER_MM = 10.0
+_MAX_QUANTA = 2 ** 24
+
+_FLOAT32 = np.dtype("<f4")
+_UINT32 = np.dtype("<u4")
+
+
+def compact_geometry_enabled() -> bool:
+    """Whether floorplans are written packed (``FLOORPLAN_COMPACT_GEOMETRY``)."""
+    return os.getenv("FLOORPLAN_COMPACT_GEOMETRY", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+# ── columns ────────────────────────────────────────────────────────────────────
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _is_point(value: Any) -> bool:
+    return isinstance(value, (list, tuple)) and len(value) == 2 and all(_is_number(v) for v in value)
+
+
+def _is_optional_str(value: Any) -> bool:
+    return value is None or isinstance(value, str)
+
+
+def _pack_numbers(values: Sequence[float]) -> Optional[bytes]:
+    """*values* as float32 quanta, or None when one is out of range."""
+    quanta = np.rint(np.asarray(values, dtype=np.float64) * _QUANTA_PER_MM)
+    if quanta.size and np.abs(quanta).max() > _MAX_QUANTA:
+        return None
+    return quanta.astype(_FLOAT32).tobytes()
+
+
+def _unpack_numbers(data: bytes, width: int) -> List[List[float]]:
+    """Rows of *width* millimetre values from :func:`_pack_numbers` bytes."""
+    values = np.frombuffer(data, dtype=_FLOAT32).astype(np.float64) / _QUANTA_PER_MM
+    return values.reshape(-1, width).tolist()
+
+
+# Each kind of item: its stored (camelCase) list key, its shape check, how it
+# packs into columns and how a row unpacks into snake_case item fields.
+
+def _is_wall(item: Any) -> bool:
+    return (
+        isinstance(item, dict)
+        and item.keys() <= {"id", "start", "end", "thicknessMm", "isExterior"}
+        and isinstance(item.get("id"), str)
+        and _is_point(item.get("start"))
+        and _is_point(item.get("end"))
+        and _is_number(item.get("thicknessMm"))
+        and isinstance(item.get("isExterior", True), bool)
+    )
+
+
+def _pack_walls(walls: List[dict]) -> Optional[dict]:
+    coords = _pack_numbers([
+        v for w in walls for v in (*w["start"], *w["end"], w["thicknessMm"])
+    ])
+    if coords is None:
+        return None
+    return {
+        "ids": [w["id"] for w in walls],
+        "exterior": bytes(int(w.get("isExterior", True)) for w in walls),
+        "coords": coords,
+    }
+
+
+def _unpack_walls(packed: dict) -> List[dict]:
+    rows = _unpack_numbers(packed["coords"], 5)
+    return [
+        {
+            "id": wall_id,
+            "start": row[0:2],
+            "end": row[2:4],
+            "thickness_mm": row[4],
+            "is_exterior": bool(exterior),
+        }
+        for wall_id, exterior, row in zip(packed["ids"], packed["exterior"], rows)
+    ]
+
+
+def _is_obstacle(item: Any) -> bool:
+    return (
+        isinstance(item, dict)
+        and item.keys() <= {"id", "polygon", "type"}
+        and isinstance(item.get("id"), str)
+        and isinstance(item.get("type"), str)
+        and isinstance(item.get("polygon"), list)
+        and all(_is_point(p) for p in item["polygon"])
+    )
+
+
+def _pack_obstacles(obstacles: List[dict]) -> Optional[dict]:
+    coords = _pack_numbers([v for o in obstacles for p in o["polygon"] for v in p])
+    if coords is None:
+        return None
+    return {
+        "ids": [o["id"] for o in obstacles],
+        "types": [o["type"] for o in obstacles],
+        "sizes": np.asarray([len(o["polygon"]) for o in obstacles], dtype=_UINT32).tobytes(),
+        "coords": coords,
+    }
+
+
+def _unpack_obstacles(packed: dict) -> List[dict]:
+    points = _unpack_numbers(packed["coords"], 2)
+    sizes = np.frombuffer(packed["sizes"], dtype=_UINT32).tolist()
+    obstacles, start = [], 0
+    for obstacle_id, kind, size in zip(packed["ids"], packed["types"], sizes):
+        obstacles.append({"id": obstacle_id, "polygon": points[start:start + size], "type": kind})
+        start += size
+    return obstacles
+
+
+def _is_placed_table(item: Any) -> bool:
+    return (
+        isinstance(item, dict)
+        and item.keys() <= {"id", "tableTypeId", "x", "y", "rotation", "widthMm", "heightMm", "tableCode"}
+        and isinstance(item.get("id"), str)
+        and isinstance(item.get("tableTypeId"), str)
+        and all(_is_number(item.get(k)) for k in ("x", "y", "widthMm", "heightMm"))
+        and _is_number(item.get("rotation", 0.0))
+        and _is_optional_str(item.get("tableCode"))
+    )
+
+
+def _pack_placed_tables(tables: List[dict]) -> Optional[dict]:
+    coords = _pack_numbers([
+        v for t in tables for v in (t["x"], t["y"], t.get("rotation", 0.0), t["widthMm"], t["heightMm"])
+    ])
+    if coords is None:
+        return None
+    return {
+        "ids": [t["id"] for t in tables],
+        "types": [t["tableTypeId"] for t in tables],
+        "codes": [t.get("tableCode") for t in tables],
+        "coords": coords,
+    }
+
+
+def _unpack_placed_tables(packed: dict) -> List[dict]:
+    rows = _unpack_numbers(packed["coords"], 5)
+    return [
+        {
+            "id": table_id,
+            "table_type_id": table_type_id,
+            "x": row[0],
+            "y": row[1],
+            "rotation": row[2],
+            "width_mm": row[3],
+            "height_mm": row[4],
+            "table_code": code,
+        }
+        for table_id, table_type_id, code, row in zip(packed["ids"], packed["types"], packed["codes"], rows)
+    ]
+
+
+# (stored list key, snake_case list key, packed key, shape check, pack, unpack)
+_KINDS: Tuple[Tuple[str, str, str, Callable, Callable, Callable], ...] = (
+    ("walls", "walls", "walls", _is_wall, _pack_walls, _unpack_walls),
+    ("obstacles", "obstacles", "obstacles", _is_obstacle, _pack_obstacles, _unpack_obstacles),
+    ("placedTables", "placed_tables", "tables", _is_placed_table, _pack_placed_tables, _unpack_placed_tables),
+)
+
+
+# ── floorplans ─────────────────────────────────────────────────────────────────
+
+def pack_floorplan(floorplan: Dict[str, Any]) -> Dict[str, Any]:
+    """A stored (camelCase) floorplan with its geometry lists packed.
+
+    Lists that cannot be packed without loss are kept as they are, and a
+    floorplan that is already packed, or has nothing to pack, comes back
+    unchanged.
+    """
+    if not isinstance(floorplan, dict) or PACKED_KEY in floorplan:
+        return floorplan
+    packed: Dict[str, Any] = {}
+    for key, _, packed_key, is_item, pack, _ in _KINDS:
+        items = floorplan.get(key)
+        if not isinstance(items, list) or not items or not all(is_item(item) for item in items):
+            continue
+        columns = pack(items)
+        if columns is not None:
+            packed[packed_key] = columns
+    if not packed:
+        return floorplan
+    replaced = {key for key, _, packed_key, *_ in _KINDS if packed_key in packed}
+    stored = {k: v for k, v in floorplan.items() if k not in replaced}
+    stored[PACKED_KEY] = {"version": PACKED_FORMAT_VERSION, **packed}
+    return stored
+
+
+def unpack_floorplan(floorplan: Dict[str, Any], camel: bool = True) -> Dict[str, Any]:
+    """A floorplan as its readers expect it, in camelCase or (``camel=False``) snake_case keys.
+
+    A floorplan that is not packed is returned as it is.
+    """
+    if not isinstance(floorplan, dict) or PACKED_KEY not in floorplan:
+        return floorplan
+    packed = floorplan[PACKED_KEY]
+    result = {k: v for k, v in floorplan.items() if k != PACKED_KEY}
+    for key, snake_key, packed_key, _, _, unpack in _KINDS:
+        if packed_key in packed:
+            items = unpack(packed[packed_key])
+            if camel:
+                result[key] = convert_keys_to_camel_case(items)
+            else:
+                result[snake_key] = items
+    return result
+
+
+def pack_market_floorplans(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Pack the floorplans of a stored (camelCase) market document in place."""
+    setup = document.get("setupObject")
+    if isinstance(setup, dict) and isinstance(setup.get("floorplans"), list):
+        setup["floorplans"] = [pack_floorplan(fp) for fp in setup["floorplans"]]
+    return document
+
+
+def unpack_setup_floorplans(setup: Any, camel: bool = True) -> Any:
+    """*setup* with its floorplans unpacked; the same object when none is packed."""
+    if not isinstance(setup, dict):
+        return setup
+    floorplans = setup.get("floorplans")
+    if not isinstance(floorplans, list) or not any(
+        isinstance(fp, dict) and PACKED_KEY in fp for fp in floorplans
+    ):
+        return setup
+    return {**setup, "floorplans": [unpack_floorplan(fp, camel) for fp in floorplans]}
+
+
+def unpack_market_floorplans(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Unpack the floorplans of a stored (camelCase) market document in place, for serving it raw."""
+    if isinstance(document, dict) and "setupObject" in document:
+        document["setupObject"] = unpack_setup_floorplans(document["setupObject"])
+    return document
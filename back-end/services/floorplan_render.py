@@ -0,0 +1,373 @@
+"""
+Floorplan export rendering.
+
+No Flask dependency.  An export is the floorplan image with the placed tables
+drawn over it.  While an organizer iterates on a layout the image stays the
+same and only the tables move, so the decoded image is kept, per GridFS id and
+output size, in a byte-bounded LRU (:class:`BaseImageCache`) and the tables
+are drawn on a transparent layer composited over a copy of it.  Fonts are
+loaded once per size.
+
+An export may be cut to a region or a tile of the image, in which case only
+that much is composited and encoded, and only the tables whose footprint
+meets it are drawn (found through a :class:`GeometryIndex`).
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import math
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from PIL import Image, ImageDraw, ImageFont
+from shapely.geometry import Polygon, box
+
+from services.gridfs_service import get_image
+from services.spatial_index import GeometryIndex
+
+logger = logging.getLogger(__name__)
+
+# format → (Pillow format, MIME type)
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    "png": ("PNG", "image/png"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+}
+DEFAULT_QUALITY = 85
+
+_FONT_PATHS = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+)
+# Table-code label size in image pixels, shared with the vector exports.
+FONT_SIZE = 14
+
+# ── Section color palette ──────────────────────────────────────────────────────
+# Deterministic 20-color palette for section-based coloring.
+_SECTION_COLORS = [
+    "#e6194b", "#3cb44b", "#ffe119", "#4363d8", "#f58231",
+    "#911eb4", "#42d4f4", "#f032e6", "#bfef45", "#fabed4",
+    "#469990", "#dcbeff", "#9a6324", "#fffac8", "#800000",
+    "#aaffc3", "#808000", "#ffd8b1", "#000075", "#a9a9a9",
+]
+
+
+class ExportImageError(ValueError):
+    """The stored data for a floorplan is not an image Pillow can decode."""
+
+
+def section_color(section_name: str) -> str:
+    """Return a deterministic color for a section name.
+
+    Uses a CRC of the name, not ``hash()``, which is salted per process and
+    gave a section a different color on each worker.
+    """
+    if not section_name:
+        return "#cccccc"
+    idx = zlib.crc32(section_name.encode("utf-8")) % len(_SECTION_COLORS)
+    return _SECTION_COLORS[idx]
+
+
+@lru_cache(maxsize=8)
+def table_font(size: int = FONT_SIZE):
+    """The label font at *size*, loaded once; PIL's default when no TrueType font is installed."""
+    for font_path in _FONT_PATHS:
+        try:
+            return ImageFont.truetype(font_path, size)
+        except (IOError, OSError):
+            continue
+    try:
+        return ImageFont.load_default()
+    except Exception:
+        return None
+
+
+# ── Geometry helpers ───────────────────────────────────────────────────────────
+
+def rotated_corners(
+    cx_px: float, cy_px: float,
+    w_px: float, h_px: float,
+    rotation_deg: float,
+) -> List[Tuple[float, float]]:
+    """Compute the four corner points of a rotated rectangle.
+
+    Args:
+        cx_px, cy_px: Center point in pixel coordinates.
+        w_px, h_px: Width and height in pixels.
+        rotation_deg: Clockwise rotation in degrees (0 = horizontal).
+
+    Returns:
+        List of [(x1, y1), (x2, y2), (x3, y3), (x4, y4)] in order.
+    """
+    angle = math.radians(rotation_deg)
+    cos_a = math.cos(angle)
+    sin_a = math.sin(angle)
+
+    hw = w_px / 2.0
+    hh = h_px / 2.0
+
+    # Unrotated corners relative to center (top-left, top-right, bottom-right,
+    # bottom-left)
+    corners = [(-hw, -hh), (hw, -hh), (hw, hh), (-hw, hh)]
+
+    result = []
+    for dx, dy in corners:
+        # Standard 2D rotation (counter-clockwise in math coords, but appears
+        # clockwise in image coords due to y-axis pointing down).
+        rx = dx * cos_a - dy * sin_a
+        ry = dx * sin_a + dy * cos_a
+        result.append((cx_px + rx, cy_px + ry))
+
+    return result
+
+
+def parse_tables(placed_tables: Iterable) -> List[Dict]:
+    """The drawable tables of an export request, with numeric fields parsed.
+
+    Entries that are not objects, have non-numeric fields or no area are
+    skipped, as they always were.
+    """
+    tables: List[Dict] = []
+    for table in placed_tables:
+        if not isinstance(table, dict):
+            continue
+        try:
+            parsed = {
+                "x_mm": float(table.get("x_mm", 0)),
+                "y_mm": float(table.get("y_mm", 0)),
+                "width_mm": float(table.get("width_mm", 0)),
+                "height_mm": float(table.get("height_mm", 0)),
+                "rotation": float(table.get("rotation", 0)),
+            }
+        except (TypeError, ValueError):
+            continue
+        if parsed["width_mm"] <= 0 or parsed["height_mm"] <= 0:
+            continue
+        parsed["table_code"] = str(table.get("table_code", ""))
+        parsed["section_name"] = str(table.get("section_name", ""))
+        tables.append(parsed)
+    return tables
+
+
+# ── Base image cache ───────────────────────────────────────────────────────────
+
+class BaseImageCache:
+    """Decoded floorplan images, least recently used evicted past *max_bytes*.
+
+    Entries are ``(image, factor)``; an entry's image may also be already
+    encoded bytes (see :mod:`services.floorplan_vector`).  GridFS ids are
+    never reused for other content, so an entry cannot go stale; it only
+    ages out.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Tuple[Union[Image.Image, bytes], float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _size(image: Union[Image.Image, bytes]) -> int:
+        if isinstance(image, bytes):
+            return len(image)
+        return image.width * image.height * len(image.getbands())
+
+    def get(self, key: Tuple) -> Optional[Tuple[Union[Image.Image, bytes], float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Tuple, image: Union[Image.Image, bytes], factor: float) -> None:
+        size = self._size(image)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= self._size(old[0])
+            self._entries[key] = (image, factor)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= self._size(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+def _cache_bytes_from_env() -> int:
+    try:
+        megabytes = int(os.getenv("EXPORT_IMAGE_CACHE_MB", ""))
+    except ValueError:
+        megabytes = 256
+    return max(megabytes, 0) * 1024 * 1024
+
+
+base_image_cache = BaseImageCache(_cache_bytes_from_env())
+
+
+def _decode_base(image_data: bytes, max_side_px: Optional[int]) -> Tuple[Image.Image, float]:
+    """Decode, flatten onto white and downscale so the long side is at most *max_side_px*.
+
+    Returns the RGB image and the factor it was scaled by.
+    """
+    try:
+        img = Image.open(io.BytesIO(image_data))
+        original_width = img.width
+        if max_side_px and max(img.size) > max_side_px:
+            # JPEG decodes straight to a reduced size; others ignore this
+            img.draft("RGB", (max_side_px, max_side_px))
+        img.load()
+    except Exception as exc:
+        raise ExportImageError(str(exc)) from exc
+
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        rgba = img.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.split()[3])
+        img = background
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+
+    if max_side_px and max(img.size) > max_side_px:
+        ratio = max_side_px / max(img.size)
+        img = img.resize(
+            (max(round(img.width * ratio), 1), max(round(img.height * ratio), 1)),
+            Image.Resampling.LANCZOS,
+        )
+    return img, img.width / original_width
+
+
+def base_image(gridfs_id: str, max_side_px: Optional[int] = None) -> Optional[Tuple[Image.Image, float]]:
+    """The flattened floorplan image for *gridfs_id*, decoded once per output size.
+
+    Returns ``(image, factor)`` - *factor* is output pixels per stored image
+    pixel - or ``None`` when there is no such image.  The image is shared:
+    callers must not draw on it.  Raises :class:`ExportImageError` when the
+    stored data is not an image.
+    """
+    key = (gridfs_id, max_side_px)
+    cached = base_image_cache.get(key)
+    if cached is not None:
+        return cached
+    image_data = get_image(gridfs_id)
+    if image_data is None:
+        return None
+    img, factor = _decode_base(image_data, max_side_px)
+    base_image_cache.put(key, img, factor)
+    return img, factor
+
+
+# ── Rendering ──────────────────────────────────────────────────────────────────
+
+def tile_region(size: Tuple[int, int], tile_px: int, col: int, row: int) -> Optional[Tuple[int, int, int, int]]:
+    """The ``(left, top, right, bottom)`` of tile (*col*, *row*) of *tile_px* squares, or ``None`` past the edge."""
+    width, height = size
+    left, top = col * tile_px, row * tile_px
+    if col < 0 or row < 0 or left >= width or top >= height:
+        return None
+    return left, top, min(left + tile_px, width), min(top + tile_px, height)
+
+
+def draw_tables(
+    tables: List[Dict],
+    px_per_mm: float,
+    region: Tuple[int, int, int, int],
+    show_codes: bool = True,
+    show_sections: bool = True,
+) -> Image.Image:
+    """The tables that meet *region*, drawn on a transparent layer the size of *region*."""
+    left, top, right, bottom = region
+    layer = Image.new("RGBA", (right - left, bottom - top), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer)
+    font = table_font()
+
+    outlines = [
+        rotated_corners(
+            t["x_mm"] * px_per_mm, t["y_mm"] * px_per_mm,
+            t["width_mm"] * px_per_mm, t["height_mm"] * px_per_mm, t["rotation"],
+        )
+        for t in tables
+    ]
+    # Outlines are stroked 2 px wide and labels overhang small tables, so the
+    # region is padded before it is matched against the footprints.
+    pad = 2 + (FONT_SIZE * 4 if show_codes else 0)
+    index = GeometryIndex((i, Polygon(corners)) for i, corners in enumerate(outlines))
+    visible = index.query(box(left - pad, top - pad, right + pad, bottom + pad))
+
+    for i in visible:
+        table = tables[i]
+        color = section_color(table["section_name"]) if show_sections else "#00cc66"
+        corners = [(x - left, y - top) for x, y in outlines[i]]
+        draw.polygon(corners, outline=color, width=2)
+
+        table_code = table["table_code"]
+        if show_codes and table_code:
+            cx = table["x_mm"] * px_per_mm - left
+            cy = table["y_mm"] * px_per_mm - top
+            if font:
+                try:
+                    bbox = draw.textbbox((0, 0), table_code, font=font)
+                    tw = bbox[2] - bbox[0]
+                    th = bbox[3] - bbox[1]
+                except Exception:
+                    tw = len(table_code) * 8
+                    th = FONT_SIZE
+            else:
+                tw = len(table_code) * 8
+                th = FONT_SIZE
+
+            tx = cx - tw / 2.0
+            ty = cy - th / 2.0
+
+            # Drop-shadow for readability against busy floorplans
+            draw.text((tx + 1, ty + 1), table_code, fill="#000000", font=font)
+            draw.text((tx, ty), table_code, fill="#ffffff", font=font)
+    return layer
+
+
+def render_export(
+    base: Image.Image,
+    tables: List[Dict],
+    px_per_mm: float,
+    region: Optional[Tuple[int, int, int, int]] = None,
+    show_codes: bool = True,
+    show_sections: bool = True,
+    fmt: str = "png",
+    quality: int = DEFAULT_QUALITY,
+) -> bytes:
+    """Composite the table layer over *region* of *base* (all of it by default) and encode it.
+
+    *px_per_mm* is in *base*'s pixels.  *quality* applies to JPEG and WebP.
+    """
+    region = region or (0, 0, base.width, base.height)
+    layer = draw_tables(tables, px_per_mm, region, show_codes, show_sections)
+    img = base.crop(region)
+    img.paste(layer, (0, 0), layer)
+
+    pil_format, _ = EXPORT_FORMATS[fmt]
+    output = io.BytesIO()
+    if pil_format == "PNG":
+        img.save(output, format="PNG")
+    else:
+        img.save(output, format=pil_format, quality=quality)
+    return output.getvalue()
@@ -0,0 +1,327 @@
+"""
+Background processing of floorplan uploads.
+
+No Flask dependency.  Rasterizing a venue PDF, storing each page with its
+renditions and, optionally, running AI analysis on it can take longer than a
+request may.  :func:`submit_upload` stores the file as uploaded and returns at
+once; a worker thread then turns it into floorplan images, recording its
+progress on a status document in the ``floorplan_uploads`` collection that the
+editor polls:
+
+* ``queued`` — stored, waiting for a worker.
+* ``processing`` — pages are appended to ``pages`` as each one is stored.
+* ``done`` — every page is stored; ``total_ms`` is set.
+* ``failed`` — carries ``error``; pages stored before the failure are kept.
+
+A worker claims an upload by moving it from ``queued`` to ``processing`` in
+one update, so an upload is processed once even when several processes pick
+up queued work.  An upload nothing has claimed for a while is queued again,
+and one whose worker went quiet is reported failed.  Status documents expire
+after a week; the file as uploaded is deleted once the upload is done or
+failed, and a file no upload is waiting on is swept up when workers start.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from gridfs import GridFS
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+from db_config import get_database
+from services.floorplan_analysis import analyze_image
+from services.gridfs_service import (
+    content_hash,
+    describe_image,
+    get_image,
+    record_pdf_pages,
+    reuse_pdf_pages,
+    upload_image,
+    upload_owner,
+)
+from utils.pdf_converter import RenderedPage, is_pdf, iter_pdf_pages
+
+logger = logging.getLogger(__name__)
+
+FLOORPLAN_UPLOADS_COLLECTION = "floorplan_uploads"
+RAW_UPLOADS_BUCKET = "floorplan_raw_uploads"
+CREATED_AT_FIELD = "createdAt"
+UPLOAD_TTL_S = 7 * 24 * 60 * 60
+UPLOADS_TTL_INDEX = "floorplan_uploads_ttl"
+
+QUEUED = "queued"
+PROCESSING = "processing"
+DONE = "done"
+FAILED = "failed"
+
+# An upload still queued, or still processing, this long after its last update
+# lost its worker to a restart.
+_STALE_AFTER = timedelta(minutes=15)
+
+db = get_database()
+uploads_collection = db[FLOORPLAN_UPLOADS_COLLECTION]
+_raw_fs = GridFS(db, collection=RAW_UPLOADS_BUCKET)
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+_indexes_ready = False
+
+
+class NoPagesStored(RuntimeError):
+    """An upload produced no floorplan image."""
+
+
+class UploadIndexError(RuntimeError):
+    """The index that expires upload status documents is not in place."""
+
+
+def ensure_upload_indexes() -> None:
+    """Expire status documents a week after their upload; raises when the index cannot be built.
+
+    Nothing else removes them, so an upload is not accepted without it.  Built lazily rather than
+    at import, like ``ApplicationsApi.ensure_application_indexes``.
+    """
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    try:
+        uploads_collection.create_index(
+            [(CREATED_AT_FIELD, 1)], expireAfterSeconds=UPLOAD_TTL_S, name=UPLOADS_TTL_INDEX,
+        )
+    except PyMongoError as exc:
+        raise UploadIndexError(f"Could not build the {UPLOADS_TTL_INDEX} index: {exc}") from exc
+    _indexes_ready = True
+
+
+def _upload_workers() -> int:
+    try:
+        return max(int(os.getenv("FLOORPLAN_UPLOAD_WORKERS", "")), 1)
+    except ValueError:
+        return 2
+
+
+def _upload_pool() -> ThreadPoolExecutor:
+    """The shared upload workers, started on first use.
+
+    Starting them also picks up uploads left queued by a previous process,
+    and deletes the raw files no upload is waiting on.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            return _pool
+        _pool = ThreadPoolExecutor(max_workers=_upload_workers(), thread_name_prefix="floorplan-upload")
+        pool = _pool
+    for doc in uploads_collection.find({"status": QUEUED}, {"_id": 1}):
+        pool.submit(process_upload, doc["_id"])
+    _drop_orphaned_raw_files()
+    return pool
+
+
+def _drop_orphaned_raw_files() -> None:
+    """Delete the raw files of uploads that are no longer queued or processing.
+
+    Processing an upload deletes its raw file, but the file of an upload whose
+    status document expired unprocessed, or whose process stopped between
+    storing the file and queueing it, is only found here.  A file younger than
+    :data:`_STALE_AFTER` may belong to an upload being submitted and is kept.
+    """
+    waiting = {
+        doc["rawId"]
+        for doc in uploads_collection.find({"status": {"$in": [QUEUED, PROCESSING]}}, {"rawId": 1})
+    }
+    for raw in _raw_fs.find({"uploadDate": {"$lt": _now() - _STALE_AFTER}}):
+        if raw._id not in waiting:
+            _raw_fs.delete(raw._id)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _ms(seconds: float) -> int:
+    return round(seconds * 1000)
+
+
+# ── Pages ──────────────────────────────────────────────────────────────────────
+
+def _analysis(png: bytes) -> Dict[str, Any]:
+    """AI analysis of one page, or the reason there is none; never raises."""
+    try:
+        return {"analysis": analyze_image(png)}
+    except Exception as exc:
+        logger.warning(f"Floorplan analysis failed during upload processing: {exc}")
+        return {"analysis_error": str(exc)}
+
+
+def store_pages(
+    file_bytes: bytes,
+    filename: str,
+    content_type: str,
+    owner: str,
+    analyze: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """Store an uploaded image or PDF as floorplan images, one page at a time.
+
+    Every page is held by *owner* (see :func:`upload_owner`).
+
+    Yields each page as soon as it is stored: ``{page, gridfs_id, width,
+    height, render_ms, store_ms}``, plus ``analysis`` (or ``analysis_error``)
+    when *analyze* is set.  PDF pages arrive in the order they finish
+    rendering; a PDF stored before is not rendered again, and its pages
+    arrive in page order.
+    """
+    pdf_sha256 = None
+    if is_pdf(content_type) or filename.lower().endswith(".pdf"):
+        pdf_sha256 = content_hash(file_bytes)
+        reused = reuse_pdf_pages(pdf_sha256, owner)
+        if reused is not None:
+            for page in reused:
+                entry = {**page, "render_ms": 0, "store_ms": 0}
+                if analyze:
+                    entry.update(_analysis(get_image(page["gridfs_id"])))
+                yield entry
+            return
+        pages = iter_pdf_pages(file_bytes)
+        names = "{filename}_page_{number}.png"
+    else:
+        pages = iter([RenderedPage(1, file_bytes, 0.0)])
+        names = "{filename}"
+
+    stored = []
+    for page in pages:
+        stored_at = time.perf_counter()
+        metadata = describe_image(page.png)
+        gridfs_id = upload_image(page.png, names.format(filename=filename, number=page.number), owner, metadata)
+        entry = {
+            "page": page.number,
+            "gridfs_id": gridfs_id,
+            "width": metadata["width"],
+            "height": metadata["height"],
+            "render_ms": _ms(page.seconds),
+            "store_ms": _ms(time.perf_counter() - stored_at),
+        }
+        if analyze:
+            entry.update(_analysis(page.png))
+        stored.append(entry)
+        yield entry
+    if pdf_sha256 and stored:
+        record_pdf_pages(pdf_sha256, stored)
+
+
+# ── Uploads ────────────────────────────────────────────────────────────────────
+
+def submit_upload(
+    file_bytes: bytes,
+    filename: str,
+    content_type: str,
+    user_id: Optional[str],
+    analyze: bool = False,
+) -> str:
+    """Store *file_bytes* as uploaded, queue it for processing and return the upload id."""
+    ensure_upload_indexes()
+    raw_id = _raw_fs.put(file_bytes, filename=filename, contentType=content_type)
+    now = _now()
+    upload_id = ObjectId()
+    uploads_collection.insert_one({
+        "_id": upload_id,
+        "userId": user_id,
+        "filename": filename,
+        "contentType": content_type,
+        "rawId": raw_id,
+        "analyze": analyze,
+        "status": QUEUED,
+        "pages": [],
+        CREATED_AT_FIELD: now,
+        "updatedAt": now,
+    })
+    _upload_pool().submit(process_upload, upload_id)
+    return str(upload_id)
+
+
+def process_upload(upload_id: ObjectId) -> None:
+    """Worker: claim a queued upload and store its pages, recording progress as it goes."""
+    doc = uploads_collection.find_one_and_update(
+        {"_id": upload_id, "status": QUEUED},
+        {"$set": {"status": PROCESSING, "updatedAt": _now()}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if doc is None:
+        return
+
+    started = time.perf_counter()
+    try:
+        file_bytes = _raw_fs.get(doc["rawId"]).read()
+        stored = 0
+        pages = store_pages(
+            file_bytes, doc["filename"], doc["contentType"], upload_owner(doc["userId"]), doc.get("analyze", False),
+        )
+        for entry in pages:
+            uploads_collection.update_one(
+                {"_id": upload_id}, {"$push": {"pages": entry}, "$set": {"updatedAt": _now()}},
+            )
+            stored += 1
+        if not stored:
+            raise NoPagesStored("Failed to convert PDF to images")
+        uploads_collection.update_one(
+            {"_id": upload_id},
+            {"$set": {"status": DONE, "total_ms": _ms(time.perf_counter() - started), "updatedAt": _now()}},
+        )
+    except Exception as exc:
+        logger.error(f"Processing floorplan upload {upload_id} failed: {exc}")
+        message = str(exc) if isinstance(exc, NoPagesStored) else "Upload processing failed"
+        uploads_collection.update_one(
+            {"_id": upload_id}, {"$set": {"status": FAILED, "error": message, "updatedAt": _now()}},
+        )
+    finally:
+        _raw_fs.delete(doc["rawId"])
+
+
+def get_upload(upload_id: str, user_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """The status of *user_id*'s upload, or ``None`` if there is no such upload of theirs.
+
+    Pages are listed in page order.
+    """
+    try:
+        oid = ObjectId(upload_id)
+    except InvalidId:
+        return None
+    doc = uploads_collection.find_one({"_id": oid, "userId": user_id})
+    if doc is None:
+        return None
+
+    updated_at = doc["updatedAt"]
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    stale = _now() - updated_at > _STALE_AFTER
+    if doc["status"] == QUEUED and stale:
+        # No worker claimed it; claiming is one update, so queueing it twice is harmless.
+        uploads_collection.update_one({"_id": oid, "status": QUEUED}, {"$set": {"updatedAt": _now()}})
+        _upload_pool().submit(process_upload, oid)
+    elif doc["status"] == PROCESSING and stale:
+        doc["status"], doc["error"] = FAILED, "Upload processing was interrupted"
+        uploads_collection.update_one(
+            {"_id": oid, "status": PROCESSING},
+            {"$set": {"status": FAILED, "error": doc["error"], "updatedAt": _now()}},
+        )
+        _raw_fs.delete(doc["rawId"])
+
+    status = {
+        "upload_id": upload_id,
+        "status": doc["status"],
+        "filename": doc["filename"],
+        "pages": sorted(doc.get("pages", []), key=lambda entry: entry["page"]),
+    }
+    for field in ("total_ms", "error"):
+        if field in doc:
+            status[field] = doc[field]
+    return status
@@ -0,0 +1,222 @@
+"""
+Vector (SVG and PDF) floorplan exports.
+
+No Flask dependency.  A raster export redraws every pixel of the floorplan at
+its full resolution, so its size and render time grow with table count times
+image resolution.  Here the floorplan goes in once, as a compressed JPEG (or,
+for SVG, a link to the stored image), and each table is a vector outline and
+a text label on top, in the same colors and positions as
+:mod:`services.floorplan_render` draws them.
+
+Coordinates are the stored image's pixels, so a table sits where it does in a
+raster export whatever size the embedded image is reduced to.  The PDF is
+written directly: one page, one image, the standard Helvetica font.
+"""
+
+from __future__ import annotations
+
+import io
+import zlib
+from typing import Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from services.floorplan_render import (
+    DEFAULT_QUALITY,
+    FONT_SIZE,
+    base_image,
+    base_image_cache,
+    rotated_corners,
+    section_color,
+)
+
+# format → MIME type
+VECTOR_FORMATS: Dict[str, str] = {
+    "svg": "image/svg+xml",
+    "pdf": "application/pdf",
+}
+
+_STROKE_PX = 2
+_UNSECTIONED_COLOR = "#00cc66"
+
+# Helvetica has no metrics here; its average advance is about this much of
+# the font size, which is near enough to centre a short table code.
+_HELVETICA_ADVANCE = 0.56
+
+
+# ── Floorplan image ────────────────────────────────────────────────────────────
+
+def embedded_jpeg(
+    gridfs_id: str,
+    max_side_px: Optional[int] = None,
+    quality: int = DEFAULT_QUALITY,
+) -> Optional[Tuple[bytes, Tuple[int, int], Tuple[int, int]]]:
+    """The floorplan as JPEG bytes, encoded once per size and quality.
+
+    Returns ``(jpeg, (width, height) of the JPEG, (width, height) of the
+    stored image)`` or ``None`` when there is no such image.  Raises
+    :class:`~services.floorplan_render.ExportImageError` like
+    :func:`base_image`.
+    """
+    loaded = base_image(gridfs_id, max_side_px)
+    if loaded is None:
+        return None
+    img, factor = loaded
+    original = (round(img.width / factor), round(img.height / factor))
+
+    key = ("jpeg", gridfs_id, max_side_px, quality)
+    cached = base_image_cache.get(key)
+    if cached is not None:
+        return cached[0], img.size, original
+    output = io.BytesIO()
+    img.save(output, format="JPEG", quality=quality)
+    jpeg = output.getvalue()
+    base_image_cache.put(key, jpeg, factor)
+    return jpeg, img.size, original
+
+
+def _outline(table: Dict, px_per_mm: float) -> List[Tuple[float, float]]:
+    return rotated_corners(
+        table["x_mm"] * px_per_mm, table["y_mm"] * px_per_mm,
+        table["width_mm"] * px_per_mm, table["height_mm"] * px_per_mm, table["rotation"],
+    )
+
+
+def _color(table: Dict, show_sections: bool) -> str:
+    return section_color(table["section_name"]) if show_sections else _UNSECTIONED_COLOR
+
+
+# ── SVG ────────────────────────────────────────────────────────────────────────
+
+def render_svg(
+    size: Tuple[int, int],
+    image_href: str,
+    tables: List[Dict],
+    px_per_mm: float,
+    show_codes: bool = True,
+    show_sections: bool = True,
+) -> bytes:
+    """An SVG of *size* stored-image pixels: the image at *image_href*, then the tables.
+
+    *image_href* is a URL or a ``data:`` URI.
+    """
+    width, height = size
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{width}" height="{height}" viewBox="0 0 {width} {height}">\n',
+        f'<image x="0" y="0" width="{width}" height="{height}" preserveAspectRatio="none" '
+        f'href={quoteattr(image_href)} xlink:href={quoteattr(image_href)}/>\n',
+        f'<g fill="none" stroke-width="{_STROKE_PX}">\n',
+    ]
+    for table in tables:
+        points = " ".join(f"{x:.2f},{y:.2f}" for x, y in _outline(table, px_per_mm))
+        parts.append(f'<polygon points="{points}" stroke="{_color(table, show_sections)}"/>\n')
+    parts.append("</g>\n")
+
+    labelled = [t for t in tables if t["table_code"]] if show_codes else []
+    if labelled:
+        parts.append(
+            f'<g font-family="DejaVu Sans, Helvetica, Arial, sans-serif" font-size="{FONT_SIZE}" '
+            f'text-anchor="middle" dominant-baseline="central">\n'
+        )
+        for table in labelled:
+            cx, cy = table["x_mm"] * px_per_mm, table["y_mm"] * px_per_mm
+            code = escape(table["table_code"])
+            # Drop-shadow for readability against busy floorplans
+            parts.append(f'<text x="{cx + 1:.2f}" y="{cy + 1:.2f}" fill="#000000">{code}</text>\n')
+            parts.append(f'<text x="{cx:.2f}" y="{cy:.2f}" fill="#ffffff">{code}</text>\n')
+        parts.append("</g>\n")
+    parts.append("</svg>\n")
+    return "".join(parts).encode("utf-8")
+
+
+# ── PDF ────────────────────────────────────────────────────────────────────────
+
+def _pdf_string(text: str) -> bytes:
+    """*text* as a PDF literal string; characters Helvetica cannot show become ``?``."""
+    raw = text.encode("latin-1", errors="replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _pdf_rgb(color: str) -> str:
+    value = color.lstrip("#")
+    return " ".join(f"{int(value[i:i + 2], 16) / 255:.3f}" for i in (0, 2, 4))
+
+
+def _pdf_content(
+    size: Tuple[int, int],
+    tables: List[Dict],
+    px_per_mm: float,
+    show_codes: bool,
+    show_sections: bool,
+) -> bytes:
+    """The page's drawing operators, in stored-image pixels with y pointing down."""
+    width, height = size
+    ops = [
+        # Flip the page so y runs down, as in the image
+        f"1 0 0 -1 0 {height} cm",
+        f"q {width} 0 0 -{height} 0 {height} cm /Im0 Do Q",
+        f"{_STROKE_PX} w 1 j",
+    ]
+    for table in tables:
+        corners = _outline(table, px_per_mm)
+        path = " ".join(f"{x:.2f} {y:.2f} {op}" for (x, y), op in zip(corners, ("m", "l", "l", "l")))
+        ops.append(f"{_pdf_rgb(_color(table, show_sections))} RG {path} h S")
+
+    if show_codes:
+        for table in tables:
+            code = table["table_code"]
+            if not code:
+                continue
+            cx, cy = table["x_mm"] * px_per_mm, table["y_mm"] * px_per_mm
+            tx = cx - len(code) * FONT_SIZE * _HELVETICA_ADVANCE / 2
+            ty = cy + FONT_SIZE * 0.35
+            text = _pdf_string(code).decode("latin-1")
+            # Text matrices flip y back so glyphs are upright
+            ops.append(f"BT /F0 {FONT_SIZE} Tf 0 g 1 0 0 -1 {tx + 1:.2f} {ty + 1:.2f} Tm {text} Tj ET")
+            ops.append(f"BT /F0 {FONT_SIZE} Tf 1 g 1 0 0 -1 {tx:.2f} {ty:.2f} Tm {text} Tj ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def _pdf_stream(dictionary: bytes, data: bytes) -> bytes:
+    return dictionary + b" /Length %d >>\nstream\n" % len(data) + data + b"\nendstream"
+
+
+def render_pdf(
+    size: Tuple[int, int],
+    jpeg: bytes,
+    jpeg_size: Tuple[int, int],
+    tables: List[Dict],
+    px_per_mm: float,
+    show_codes: bool = True,
+    show_sections: bool = True,
+) -> bytes:
+    """A one-page PDF of *size* stored-image pixels (one point each): *jpeg*, then the tables."""
+    width, height = size
+    content = _pdf_content(size, tables, px_per_mm, show_codes, show_sections)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+        b"/Resources << /XObject << /Im0 4 0 R >> /Font << /F0 5 0 R >> >> /Contents 6 0 R >>" % (width, height),
+        _pdf_stream(
+            b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB "
+            b"/BitsPerComponent 8 /Filter /DCTDecode" % jpeg_size,
+            jpeg,
+        ),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        _pdf_stream(b"<< /Filter /FlateDecode", zlib.compress(content)),
+    ]
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b"%010d 00000 n \n" % offset)
+    output.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return output.getvalue()
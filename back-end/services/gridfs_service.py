@@ -3,36 +3,373 @@ GridFS storage service for floorplan images.
 
 Provides upload, retrieval, and deletion of images using MongoDB GridFS
 with the same MongoDB connection used by the rest of the application.
+
+Each file's ``metadata`` records its ``contentType``, ``width`` and
+``height`` at upload, so serving a file never has to read it to sniff them.
+
+An upload also stores downscaled renditions of the image (see
+:data:`RENDITIONS`) as files of their own, whose ``metadata.renditionOf`` is
+the original's id; the original's ``metadata.renditions`` maps each rendition
+name to the file that serves it.  Views that show a plan small fetch those
+instead of the original, which for a PDF page rendered at 200 DPI runs to
+megabytes.
+
+Files are content-addressed: an original records the SHA-256 of its bytes in
+``metadata.sha256`` (unique) and who refers to it in ``metadata.owners``, a
+set of owner keys: the users who uploaded it (:func:`upload_owner`) and the
+markets whose floorplans show it (:func:`market_owner`).  Uploading bytes that
+are already stored returns the stored file's id and adds the uploader as an
+owner, without storing or rendering anything; :func:`delete_image` removes one
+owner, once however often it is asked, and the file goes with its last one.
+Organizers re-upload the same venue plan for every market, season after
+season.  A PDF's pages are recorded against the PDF's own hash (see
+:func:`record_pdf_pages`), so a re-uploaded PDF is not rasterized again.
 """
 
-from typing import Optional
+import hashlib
+import io
+import logging
+from typing import Dict, List, Optional, Tuple
 
 from bson import ObjectId
 from bson.errors import InvalidId
-from gridfs import GridFS
-from gridfs.errors import NoFile
+from gridfs import GridFS, GridOut
+from gridfs.errors import FileExists, NoFile
+from PIL import Image
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
 
 from db_config import get_database
 
+logger = logging.getLogger(__name__)
+
+FLOORPLAN_IMAGES_COLLECTION = "floorplan_images"
+FLOORPLAN_FILES_COLLECTION = f"{FLOORPLAN_IMAGES_COLLECTION}.files"
+RENDITION_OF_FIELD = "metadata.renditionOf"
+SHA256_FIELD = "metadata.sha256"
+OWNERS_FIELD = "metadata.owners"
+SHA256_INDEX = "floorplan_images_sha256"
+# PDF hash → the floorplan images its pages were stored as
+FLOORPLAN_SOURCES_COLLECTION = "floorplan_sources"
+SOURCE_PAGE_FIELD = "pages.gridfs_id"
+DEFAULT_CONTENT_TYPE = "image/png"
+
+# Rendition name → longest side in pixels.  "full" is the original itself.
+RENDITIONS: Dict[str, int] = {"thumbnail": 256, "screen": 2048}
+FULL_SIZE = "full"
+RENDITION_CONTENT_TYPE = "image/webp"
+_RENDITION_QUALITY = 80
+
 # Reuse the same MongoDB connection pattern as the rest of the codebase
 _db = get_database()
-_fs = GridFS(_db, collection="floorplan_images")
+_fs = GridFS(_db, collection=FLOORPLAN_IMAGES_COLLECTION)
+
+_indexes_ready = False
+
+
+class ImageIndexError(RuntimeError):
+    """The index that stores each image once is not in place."""
+
+
+def ensure_image_indexes() -> None:
+    """One original per content hash; raises when the index cannot be built.
+
+    Two concurrent uploads of one plan both find nothing stored, and only this
+    index makes the second take the first's file rather than store a copy whose
+    owners the first never learns of.  An upload is not accepted without it.
+    Built lazily rather than at import, like
+    ``ApplicationsApi.ensure_application_indexes``.
+    """
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    try:
+        _db[FLOORPLAN_FILES_COLLECTION].create_index(
+            [(SHA256_FIELD, 1)],
+            unique=True,
+            partialFilterExpression={SHA256_FIELD: {"$exists": True}},
+            name=SHA256_INDEX,
+        )
+    except PyMongoError as exc:
+        raise ImageIndexError(f"Could not build the {SHA256_INDEX} index: {exc}") from exc
+    _indexes_ready = True
+
+
+def upload_owner(user_id: Optional[str]) -> str:
+    """The owner key of the images *user_id* uploaded."""
+    return f"user:{user_id}"
+
+
+def market_owner(market_id: str) -> str:
+    """The owner key of the images *market_id*'s floorplans show."""
+    return f"market:{market_id}"
+
+
+def content_hash(data: bytes) -> str:
+    """The hex SHA-256 files are addressed by."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _describe(source) -> Dict:
+    """``{contentType, width, height}`` from an image's header; the pixels are not decoded.
+
+    Falls back to ``image/png`` and ``0 x 0`` when *source* is not an image.
+    """
+    try:
+        img = Image.open(source)
+        content_type = f"image/{img.format.lower()}" if img.format else DEFAULT_CONTENT_TYPE
+        width, height = img.size
+    except Exception as exc:
+        logger.warning(f"Could not read image header: {exc}")
+        return {"contentType": DEFAULT_CONTENT_TYPE, "width": 0, "height": 0}
+    return {"contentType": content_type, "width": width, "height": height}
+
+
+def describe_image(image_data: bytes) -> Dict:
+    """The metadata :func:`upload_image` records for *image_data*."""
+    return _describe(io.BytesIO(image_data))
+
+
+def _render_renditions(image_data: bytes) -> Dict[str, Tuple[bytes, int, int]]:
+    """Each rendition smaller than the image, largest first: ``name → (webp, width, height)``.
+
+    The image is decoded once and each rendition is reduced from the one
+    before it.  Returns ``{}`` when *image_data* is not an image.
+    """
+    try:
+        img = Image.open(io.BytesIO(image_data))
+        largest = max(RENDITIONS.values())
+        if max(img.size) > largest:
+            # JPEG decodes straight to a reduced size; others ignore this
+            img.draft("RGB", (largest, largest))
+        img.load()
+    except Exception as exc:
+        logger.warning(f"Could not render image renditions: {exc}")
+        return {}
+    img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+
+    rendered = {}
+    for name, side in sorted(RENDITIONS.items(), key=lambda item: -item[1]):
+        if max(img.size) <= side:
+            continue
+        img = img.copy()
+        img.thumbnail((side, side), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        img.save(output, format="WEBP", quality=_RENDITION_QUALITY)
+        rendered[name] = (output.getvalue(), img.width, img.height)
+    return rendered
+
+
+def _store_renditions(original_id: ObjectId, filename: str, image_data: bytes) -> Dict[str, str]:
+    """Store the renditions of *image_data*; returns ``metadata.renditions`` for the original.
+
+    A rendition the image is already smaller than is served by the original.
+    """
+    renditions = {name: str(original_id) for name in RENDITIONS}
+    for name, (data, width, height) in _render_renditions(image_data).items():
+        rendition_id = _fs.put(
+            data,
+            filename=f"{filename}.{name}.webp",
+            metadata={
+                "contentType": RENDITION_CONTENT_TYPE, "width": width, "height": height,
+                "renditionOf": original_id, "rendition": name,
+            },
+        )
+        renditions[name] = str(rendition_id)
+    return renditions
+
+
+def _add_reference(query: Dict, owner: str) -> Optional[Dict]:
+    """Add *owner* to the live original matching *query*; the file's ``_id``
+    and owners as they were before, or ``None``.
+
+    A file whose last owner was just removed is being deleted and is not
+    taken back.
+    """
+    return _db[FLOORPLAN_FILES_COLLECTION].find_one_and_update(
+        {**query, f"{OWNERS_FIELD}.0": {"$exists": True}},
+        {"$addToSet": {OWNERS_FIELD: owner}},
+        projection={OWNERS_FIELD: 1},
+    )
+
+
+def add_image_owner(gridfs_id: str, owner: str) -> bool:
+    """Add *owner* to a stored image's owners; False if there is no such live image."""
+    try:
+        oid = ObjectId(gridfs_id)
+    except (InvalidId, TypeError):
+        return False
+    return _add_reference({"_id": oid}, owner) is not None
 
 
-def upload_image(image_data: bytes, filename: str) -> str:
-    """Store an image in GridFS and return its ObjectId as a string.
+def upload_image(image_data: bytes, filename: str, owner: str, metadata: Optional[Dict] = None) -> str:
+    """Store an image and its renditions in GridFS and return its ObjectId as a string.
+
+    Bytes already stored are not stored again: the existing file's id is
+    returned, with *owner* added to its owners.
 
     Args:
         image_data: Raw image bytes to store.
         filename: The filename to associate with the stored file.
+        owner: Who holds the image, usually :func:`upload_owner`.
+        metadata: The image's :func:`describe_image`, when the caller
+            already has it.
 
     Returns:
         The GridFS file's ObjectId as a string.
     """
-    file_id = _fs.put(image_data, filename=filename)
+    ensure_image_indexes()
+    digest = content_hash(image_data)
+    existing = _add_reference({SHA256_FIELD: digest}, owner)
+    if existing is not None:
+        return str(existing["_id"])
+
+    if metadata is None:
+        metadata = describe_image(image_data)
+    file_id = ObjectId()
+    renditions = _store_renditions(file_id, filename, image_data)
+    stored = {**metadata, "renditions": renditions, "sha256": digest, "owners": [owner]}
+    try:
+        _fs.put(image_data, _id=file_id, filename=filename, metadata=stored)
+        return str(file_id)
+    except FileExists:
+        # A concurrent upload of the same bytes stored them first.  Its
+        # chunks were written before the files document was refused.
+        _fs.delete(file_id)
+
+    existing = _add_reference({SHA256_FIELD: digest}, owner)
+    if existing is not None:
+        for rendition_id in set(renditions.values()) - {str(file_id)}:
+            _fs.delete(ObjectId(rendition_id))
+        return str(existing["_id"])
+    # That file is already being deleted again: store a copy nobody else shares
+    logger.warning(f"Stored {filename} without deduplication: its twin was being deleted")
+    del stored["sha256"]
+    _fs.put(image_data, _id=file_id, filename=filename, metadata=stored)
     return str(file_id)
 
 
+def record_pdf_pages(pdf_sha256: str, pages: List[Dict]) -> None:
+    """Record the floorplan images a PDF's pages were stored as.
+
+    *pages* are the page entries of an upload, ``{page, gridfs_id, width,
+    height, ...}``; the first record for a PDF is kept.
+    """
+    pages = [{field: page[field] for field in ("page", "gridfs_id", "width", "height")} for page in pages]
+    _db[FLOORPLAN_SOURCES_COLLECTION].update_one(
+        {"_id": pdf_sha256}, {"$setOnInsert": {"pages": pages}}, upsert=True,
+    )
+
+
+def reuse_pdf_pages(pdf_sha256: str, owner: str) -> Optional[List[Dict]]:
+    """The pages a PDF was stored as before, each with *owner* added to its owners.
+
+    Returns ``[{page, gridfs_id, width, height}, ...]`` in page order, or
+    ``None`` when the PDF has not been stored or one of its pages has since
+    been deleted.
+    """
+    sources = _db[FLOORPLAN_SOURCES_COLLECTION]
+    source = sources.find_one({"_id": pdf_sha256})
+    if source is None:
+        return None
+
+    claimed, added = [], []
+    for page in source["pages"]:
+        held = _add_reference({"_id": ObjectId(page["gridfs_id"])}, owner)
+        if held is None:
+            # Let go only of the pages this reuse took: the owner may have held others before
+            for gridfs_id in added:
+                delete_image(gridfs_id, owner)
+            sources.delete_one({"_id": pdf_sha256})
+            return None
+        if owner not in held["metadata"]["owners"]:
+            added.append(page["gridfs_id"])
+        claimed.append(page)
+    return sorted(claimed, key=lambda page: page["page"])
+
+
+def open_image(gridfs_id: str) -> Optional[Tuple[GridOut, Dict]]:
+    """Open a stored image for streaming, without reading its contents.
+
+    Returns ``(grid_out, metadata)``, or ``None`` if the id is invalid or the
+    file does not exist.  A file stored before uploads recorded metadata has
+    its header read once and the metadata written back.
+    """
+    try:
+        oid = ObjectId(gridfs_id)
+    except InvalidId:
+        return None
+
+    try:
+        grid_out = _fs.get(oid)
+    except NoFile:
+        return None
+
+    metadata = grid_out.metadata or {}
+    if not metadata.get("contentType"):
+        metadata = {**metadata, **_describe(grid_out)}
+        grid_out.seek(0)
+        try:
+            _db[FLOORPLAN_FILES_COLLECTION].update_one({"_id": oid}, {"$set": {"metadata": metadata}})
+        except PyMongoError as exc:
+            logger.warning(f"Could not record metadata for image {gridfs_id}: {exc}")
+    return grid_out, metadata
+
+
+def open_rendition(gridfs_id: str, size: str = FULL_SIZE) -> Optional[Tuple[str, GridOut, Dict]]:
+    """Open the *size* rendition of a stored image for streaming.
+
+    Returns ``(id of the file served, grid_out, metadata)``, or ``None`` if
+    there is no such image.  *size* is :data:`FULL_SIZE` or a key of
+    :data:`RENDITIONS`.  An image stored before uploads made renditions has
+    them made on the first request for one.
+    """
+    opened = open_image(gridfs_id)
+    if opened is None:
+        return None
+    grid_out, metadata = opened
+    # A rendition is the only size of itself there is
+    if size == FULL_SIZE or "renditionOf" in metadata:
+        return gridfs_id, grid_out, metadata
+
+    renditions = metadata.get("renditions")
+    if renditions is None:
+        renditions = _backfill_renditions(gridfs_id, grid_out)
+    served_id = renditions.get(size, gridfs_id)
+    if served_id == gridfs_id:
+        grid_out.seek(0)
+        return gridfs_id, grid_out, metadata
+    rendition = open_image(served_id)
+    if rendition is None:
+        logger.warning(f"Rendition {size} of image {gridfs_id} is missing; serving the original")
+        grid_out.seek(0)
+        return gridfs_id, grid_out, metadata
+    return (served_id, *rendition)
+
+
+def _backfill_renditions(gridfs_id: str, grid_out: GridOut) -> Dict[str, str]:
+    """Make and record renditions for an image uploaded before they existed.
+
+    Concurrent first requests may both render; the first to record its
+    renditions wins and the others delete theirs.
+    """
+    oid = ObjectId(gridfs_id)
+    grid_out.seek(0)
+    renditions = _store_renditions(oid, grid_out.filename or "floorplan", grid_out.read())
+    files = _db[FLOORPLAN_FILES_COLLECTION]
+    result = files.update_one(
+        {"_id": oid, "metadata.renditions": {"$exists": False}},
+        {"$set": {"metadata.renditions": renditions}},
+    )
+    if result.matched_count:
+        return renditions
+
+    for rendition_id in set(renditions.values()) - {gridfs_id}:
+        _fs.delete(ObjectId(rendition_id))
+    recorded = files.find_one({"_id": oid}, {"metadata.renditions": 1}) or {}
+    return recorded.get("metadata", {}).get("renditions") or {}
+
+
 def get_image(gridfs_id: str) -> Optional[bytes]:
     """Retrieve an image from GridFS by its ObjectId string.
 
@@ -55,23 +392,50 @@ def get_image(gridfs_id: str) -> Optional[bytes]:
         return None
 
 
-def delete_image(gridfs_id: str) -> bool:
-    """Delete an image from GridFS by its ObjectId string.
+def delete_image(gridfs_id: str, owner: str) -> bool:
+    """Remove *owner* from an image's owners; the last one deletes it and its renditions.
+
+    Removing an owner the image does not have changes nothing, so a repeated
+    delete cannot take another owner's image away.
 
     Args:
         gridfs_id: The string representation of the GridFS file's ObjectId.
+        owner: The owner letting go, as given to :func:`upload_image`.
 
     Returns:
-        True if the file was deleted, False if the id was invalid
-        or the file did not exist.
+        True if *owner* was removed, False if the id was invalid, the file
+        did not exist or *owner* did not hold it.
     """
     try:
         oid = ObjectId(gridfs_id)
     except InvalidId:
         return False
 
-    try:
-        _fs.delete(oid)
+    files = _db[FLOORPLAN_FILES_COLLECTION]
+    released = files.find_one_and_update(
+        {"_id": oid, OWNERS_FIELD: owner},
+        {"$pull": {OWNERS_FIELD: owner}},
+        projection={OWNERS_FIELD: 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if released is None:
+        # Files stored before owners were recorded had a single one: whoever deletes them
+        released = files.find_one(
+            {"_id": oid, OWNERS_FIELD: {"$exists": False}, RENDITION_OF_FIELD: {"$exists": False}}, {"_id": 1},
+        )
+        if released is None:
+            return False
+    elif released["metadata"]["owners"]:
         return True
-    except NoFile:
-        return False
+
+    _fs.delete(oid)
+    for rendition in files.find({RENDITION_OF_FIELD: oid}, {"_id": 1}):
+        _fs.delete(rendition["_id"])
+    _db[FLOORPLAN_SOURCES_COLLECTION].delete_many({SOURCE_PAGE_FIELD: gridfs_id})
+    return True
+
+
+def release_images(owner: str) -> int:
+    """Remove *owner* from every image it holds (see :func:`delete_image`); how many it held."""
+    held = [str(doc["_id"]) for doc in _db[FLOORPLAN_FILES_COLLECTION].find({OWNERS_FIELD: owner}, {"_id": 1})]
+    return sum(delete_image(gridfs_id, owner) for gridfs_id in held)
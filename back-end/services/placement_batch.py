@@ -0,0 +1,129 @@
+"""
+Batch auto-placement: several floorplans (floors, or pages of one PDF) at once.
+
+No Flask dependency.  Each floorplan is placed by :func:`auto_place_tables`
+in a worker process, so floors run on separate cores rather than sharing one
+interpreter, and all of them share one time budget: a floor that starts late
+gets what is left of it.
+
+Solver slots (see :class:`SolverSlots`) are taken here, in the web process,
+where the per-user and per-host counts live; a floor that gets none is
+placed without the solver.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+import services.placement_service as PlacementService
+from services.placement_service import (
+    SOLVER_TIME_LIMIT_S,
+    SolverSlots,
+    _SOLVER_KILL_GRACE_S,
+    _env_int,
+    auto_place_tables,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_FLOORPLANS = 20
+
+# Below this much budget left, a floor is not worth starting the solver for.
+_MIN_SOLVER_BUDGET_S = 1.0
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _batch_pool() -> ProcessPoolExecutor:
+    """The shared worker pool, started on first use.
+
+    Workers are spawned, not forked: the web process holds database clients
+    and threads that a forked child would inherit half-initialized.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=_env_int("PLACEMENT_BATCH_WORKERS", max((os.cpu_count() or 2) // 2, 1)),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _place_floor(arguments: Dict, deadline: float, solver_allowed: bool) -> List[Dict]:
+    """Worker: place one floor with whatever is left of the batch's budget."""
+    remaining = deadline - time.time()
+    use_solver = solver_allowed and remaining >= _MIN_SOLVER_BUDGET_S
+    # This worker runs one floor at a time; its slot was taken by the caller.
+    PlacementService.solver_slots = SolverSlots(host_limit=int(use_solver), per_user_limit=1)
+    return auto_place_tables(**arguments, time_limit_s=max(remaining, 0.0))
+
+
+def _needs_solver(arguments: Dict) -> bool:
+    return arguments.get("strategy", "rows") == "pack" or bool(arguments.get("refine"))
+
+
+def place_floorplans(
+    floors: List[Dict],
+    user_id: Optional[str] = None,
+    time_limit_s: float = SOLVER_TIME_LIMIT_S,
+) -> List[Dict]:
+    """Place every floor in *floors* concurrently, within one shared budget.
+
+    *floors* are keyword arguments for :func:`auto_place_tables` (without
+    ``user_id`` and ``time_limit_s``).  Returns one entry per floor, in
+    order: ``{"placed_tables": [...]}``, or ``{"error": "..."}`` for a floor
+    that failed or did not finish in time.
+    """
+    time_limit_s = min(time_limit_s, SOLVER_TIME_LIMIT_S)
+    deadline = time.time() + time_limit_s
+    pool = _batch_pool()
+
+    slots = PlacementService.solver_slots
+    holding: List[bool] = []
+    futures = []
+    try:
+        for arguments in floors:
+            granted = _needs_solver(arguments) and slots.acquire(user_id)
+            holding.append(granted)
+            futures.append(pool.submit(_place_floor, arguments, deadline, granted))
+
+        # A solver overrunning the budget is killed after the grace period
+        done, _ = wait(futures, timeout=max(deadline + _SOLVER_KILL_GRACE_S - time.time(), 0))
+    finally:
+        for granted in holding:
+            if granted:
+                slots.release(user_id)
+
+    results: List[Dict] = []
+    for index, future in enumerate(futures):
+        if future not in done:
+            future.cancel()
+            results.append({"error": "Placement did not finish within the time limit"})
+            continue
+        try:
+            results.append({"placed_tables": future.result()})
+        except BrokenProcessPool:
+            logger.error("Batch placement worker died on floor %d", index)
+            _discard_pool(pool)
+            results.append({"error": "Placement failed"})
+        except Exception as exc:
+            logger.error("Batch placement failed on floor %d: %s", index, exc)
+            results.append({"error": "Placement failed"})
+    return results
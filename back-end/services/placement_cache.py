@@ -0,0 +1,226 @@
+"""
+Persistent cache of auto-placement results, keyed by a geometry fingerprint.
+
+No Flask dependency.  Organizers re-open the editor, tweak a field that does
+not touch the room, or start from a template whose room has been placed
+before; each of those asks the placement engine for a layout it has already
+computed.  :func:`placement_fingerprint` reduces a request to the inputs the
+engine actually reads, normalized for floating-point noise and ordering, and
+:class:`PlacementCache` keeps results under that key in Mongo, evicting the
+least recently used entries past a size bound.
+
+The cache is an optimization only: a database error is logged and treated as
+a miss, never surfaced to the caller.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pymongo.errors import PyMongoError
+
+from datatypes import AisleConfigObject, ObstacleZone, TableTypeObject, WallSegment
+from db_config import get_database
+from services.placement_service import section_location
+
+logger = logging.getLogger(__name__)
+
+PLACEMENT_CACHE_COLLECTION = "placement_cache"
+LAST_USED_FIELD = "lastUsedAt"
+
+# Bump when the placement engine changes the layout it returns for the same
+# input, so results computed by the old engine stop matching.
+PLACEMENT_CACHE_VERSION = 3
+
+# Coordinates closer than this are the same coordinate: the front end derives
+# millimetres from pixels, so the same room arrives as 1500.0 one time and
+# 1499.9999999998 the next.
+_QUANTUM_MM = 0.1
+
+_DEFAULT_MAX_ENTRIES = 5000
+
+
+# ── fingerprint ────────────────────────────────────────────────────────────────
+
+def _q(value: float) -> int:
+    """*value* in whole quanta, so noise below the quantum disappears."""
+    return int(round(float(value) / _QUANTUM_MM))
+
+
+def _point(p: Sequence[float]) -> Tuple[int, int]:
+    return _q(p[0]), _q(p[1])
+
+
+def _canonical_ring(polygon: Sequence[Sequence[float]]) -> List[Tuple[int, int]]:
+    """The ring started at its smallest vertex and walked in one fixed direction."""
+    ring = [_point(p) for p in polygon]
+    if len(ring) > 1 and ring[0] == ring[-1]:
+        ring.pop()
+    if len(ring) < 3:
+        return sorted(ring)
+    start = ring.index(min(ring))
+    ring = ring[start:] + ring[:start]
+    reverse = [ring[0]] + ring[:0:-1]
+    return min(ring, reverse)
+
+
+def placement_fingerprint(
+    walls: List[Dict],
+    obstacles: List[Dict],
+    table_types: List[Dict],
+    counts: Dict[str, int],
+    aisle_config: Optional[Dict] = None,
+    strategy: str = "rows",
+    sections: Optional[List[Dict]] = None,
+    refine: bool = False,
+    locations: Optional[List[Dict]] = None,
+) -> str:
+    """Hex digest identifying the layout :func:`auto_place_tables` would return.
+
+    The request is parsed through the same domain models the engine uses, so
+    only what the engine reads is hashed: ids, names and colours are left
+    out, walls and obstacles are unordered (and a wall or ring may run either
+    way), and a count for a table type that is not in the request is
+    dropped.  Section order is kept - it decides which tables each section
+    gets - as is each section's location, and locations are unordered.
+    """
+    wall_objects = [WallSegment(**w) for w in walls]
+    obstacle_objects = [ObstacleZone(**o) for o in obstacles]
+    table_objects = [TableTypeObject(**t) for t in table_types]
+    aisle = AisleConfigObject(**aisle_config) if aisle_config else AisleConfigObject()
+
+    canonical = {
+        "version": PLACEMENT_CACHE_VERSION,
+        "walls": sorted(
+            (*sorted((_point(w.start), _point(w.end))), _q(w.thickness_mm), w.is_exterior)
+            for w in wall_objects
+        ),
+        "obstacles": sorted(_canonical_ring(o.polygon) for o in obstacle_objects),
+        "tables": sorted(
+            (t.id, _q(t.width_mm), _q(t.height_mm), int(counts.get(t.id, 1)))
+            for t in table_objects
+        ),
+        "aisle": [_q(aisle.wall_buffer_mm), _q(aisle.table_spacing_mm), _q(aisle.walkway_width_mm)],
+        "strategy": strategy,
+        "sections": [
+            [str(sec.get("name", "")), int(sec.get("count", 0) or 0), section_location(sec)]
+            for sec in sections or []
+        ],
+        "locations": sorted(
+            [str(loc.get("name", "")), _canonical_ring(loc.get("polygon") or [])]
+            for loc in locations or []
+        ),
+        "refine": bool(refine),
+    }
+    encoded = json.dumps(canonical, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+# ── cache ──────────────────────────────────────────────────────────────────────
+
+class PlacementCache:
+    """Placement results in a Mongo collection, least recently used evicted first.
+
+    Each document is ``{_id: fingerprint, placedTables, requested, createdAt,
+    lastUsedAt, hits}``; a hit bumps ``lastUsedAt`` in the same round trip
+    that reads it.  Counters are per process.
+    """
+
+    def __init__(self, collection, max_entries: int = _DEFAULT_MAX_ENTRIES):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be greater than 0")
+        self._collection = collection
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._indexes_ready = False
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "errors": 0}
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def _ensure_indexes(self) -> None:
+        if self._indexes_ready:
+            return
+        self._collection.create_index([(LAST_USED_FIELD, 1)], name="placement_cache_lru")
+        self._indexes_ready = True
+
+    def get(self, fingerprint: str) -> Optional[List[Dict]]:
+        """The cached placed tables for *fingerprint*, or ``None``."""
+        try:
+            doc = self._collection.find_one_and_update(
+                {"_id": fingerprint},
+                {"$set": {LAST_USED_FIELD: datetime.now(timezone.utc)}, "$inc": {"hits": 1}},
+                projection={"placedTables": 1},
+            )
+        except PyMongoError as exc:
+            logger.warning("Placement cache read failed: %s", exc)
+            self._count("errors")
+            return None
+        if doc is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return doc["placedTables"]
+
+    def put(self, fingerprint: str, placed_tables: List[Dict], requested: int) -> None:
+        """Store a result, then evict the least recently used entries past the bound."""
+        now = datetime.now(timezone.utc)
+        try:
+            self._ensure_indexes()
+            self._collection.replace_one(
+                {"_id": fingerprint},
+                {
+                    "placedTables": placed_tables,
+                    "requested": requested,
+                    "createdAt": now,
+                    LAST_USED_FIELD: now,
+                    "hits": 0,
+                },
+                upsert=True,
+            )
+            self._count("stores")
+            self._evict()
+        except PyMongoError as exc:
+            logger.warning("Placement cache write failed: %s", exc)
+            self._count("errors")
+
+    def _evict(self) -> None:
+        excess = self._collection.estimated_document_count() - self.max_entries
+        if excess <= 0:
+            return
+        stale = [
+            doc["_id"]
+            for doc in self._collection.find({}, {"_id": 1}).sort(LAST_USED_FIELD, 1).limit(excess)
+        ]
+        if stale:
+            result = self._collection.delete_many({"_id": {"$in": stale}})
+            self._count("evictions", result.deleted_count)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process, and the entry bound."""
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = round(counters["hits"] / lookups, 4) if lookups else 0.0
+        counters["max_entries"] = self.max_entries
+        return counters
+
+
+def _max_entries_from_env() -> int:
+    try:
+        value = int(os.getenv("PLACEMENT_CACHE_MAX_ENTRIES", ""))
+    except ValueError:
+        return _DEFAULT_MAX_ENTRIES
+    return value if value > 0 else _DEFAULT_MAX_ENTRIES
+
+
+placement_cache = PlacementCache(
+    get_database()[PLACEMENT_CACHE_COLLECTION], max_entries=_max_entries_from_env(),
+)
@@ -0,0 +1,144 @@
+"""
+Anytime placement jobs.
+
+No Flask dependency — runs one placement request as a sequence of events a
+client can render as they arrive: the instant row layout first, then every
+layout pyckingsolver finds that places more tables, then the result.  The job
+can be cancelled at any point (the solver process is killed) and keeps the
+best layout found so far.  The placing itself is :func:`auto_place_tables`,
+with its progress and cancel hooks.
+
+Events are dicts with an ``event`` key:
+
+* ``progress`` — ``source`` (``"rows"`` or ``"solver"``), ``placed_tables``
+  and ``placed`` (their count), each one better than the last.
+* ``result`` — the final ``placed_tables``, ``requested`` (how many were asked
+  for) and ``cancelled``.
+* ``error`` — the job failed; carries ``error``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import threading
+from typing import Callable, Dict, Iterator, List, Optional
+
+from datatypes import TableTypeObject
+from services.placement_service import (
+    SOLVER_TIME_LIMIT_S,
+    auto_place_tables,
+    requested_table_count,
+)
+
+logger = logging.getLogger(__name__)
+
+_END_OF_STREAM = object()
+
+
+class PlacementJob:
+    """One auto-placement request, run as an anytime computation."""
+
+    def __init__(
+        self,
+        walls: List[Dict],
+        obstacles: List[Dict],
+        table_types: List[Dict],
+        counts: Dict[str, int],
+        aisle_config: Optional[Dict] = None,
+        sections: Optional[List[Dict]] = None,
+        user_id: Optional[str] = None,
+        time_limit_s: float = SOLVER_TIME_LIMIT_S,
+        locations: Optional[List[Dict]] = None,
+        refine: bool = True,
+    ):
+        self.walls = walls
+        self.obstacles = obstacles
+        self.table_types = table_types
+        self.counts = counts
+        self.aisle_config = aisle_config
+        self.sections = sections
+        self.user_id = user_id
+        self.time_limit_s = min(time_limit_s, SOLVER_TIME_LIMIT_S)
+        self.locations = locations
+        self.refine = refine
+        self._cancel = threading.Event()
+
+    # ── control ───────────────────────────────────────────────────────────
+
+    def cancel(self) -> None:
+        """Stop the job; a running solver process is killed."""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    # ── run ───────────────────────────────────────────────────────────────
+
+    def run(self, emit: Callable[[Dict], None]) -> List[Dict]:
+        """Run to completion (or cancellation), passing each event to *emit*.
+
+        Returns the final placed tables.
+        """
+        requested = requested_table_count([TableTypeObject(**t) for t in self.table_types], self.counts)
+        lock = threading.Lock()
+        best: List[Dict] = []
+
+        def improve(source: str, placed: List[Dict]) -> None:
+            nonlocal best
+            with lock:
+                if len(placed) > len(best):
+                    best = placed
+                    emit({"event": "progress", "source": source, "placed": len(placed), "placed_tables": placed})
+
+        placed = auto_place_tables(
+            self.walls, self.obstacles, self.table_types, self.counts,
+            scale_px_per_mm=1.0,
+            aisle_config=self.aisle_config,
+            sections=self.sections,
+            refine=self.refine,
+            user_id=self.user_id,
+            time_limit_s=self.time_limit_s,
+            locations=self.locations,
+            cancel=self._cancel,
+            on_progress=improve,
+        )
+        with lock:
+            if len(placed) > len(best):
+                best = placed
+
+        emit({
+            "event": "result",
+            "placed_tables": best,
+            "requested": requested,
+            "cancelled": self.cancelled,
+        })
+        return best
+
+    def stream(self) -> Iterator[str]:
+        """Run on a worker thread and yield the events as NDJSON lines.
+
+        Closing the iterator (the client went away) cancels the job.
+        """
+        events: "queue.Queue" = queue.Queue()
+
+        def work() -> None:
+            try:
+                self.run(events.put)
+            except Exception as exc:
+                logger.error("Placement job failed: %s", exc, exc_info=True)
+                events.put({"event": "error", "error": "Placement failed"})
+            finally:
+                events.put(_END_OF_STREAM)
+
+        threading.Thread(target=work, name="placement-job", daemon=True).start()
+        try:
+            while True:
+                event = events.get()
+                if event is _END_OF_STREAM:
+                    return
+                yield json.dumps(event) + "\n"
+        finally:
+            self.cancel()
@@ -7,16 +7,23 @@ Works entirely in millimetre coordinates.
 
 from __future__ import annotations
 
-import concurrent.futures
 import logging
 import math
-from typing import Dict, List, Optional, Tuple
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 
 import numpy as np
+import shapely
 from shapely import affinity
-from shapely.geometry import Polygon, box, Point
-from shapely.ops import unary_union
+from shapely.geometry import MultiPolygon, Polygon, box, Point
+from shapely.geometry.base import BaseGeometry
+from shapely.ops import polygonize, unary_union
 
+from services.spatial_index import PlacementIndex, table_footprint
 from datatypes import (
     WallSegment,
     ObstacleZone,
@@ -28,121 +35,130 @@ logger = logging.getLogger(__name__)
 
 # ── helpers ────────────────────────────────────────────────────────────────────
 
-def _points_are_close(a: Tuple[float, float], b: Tuple[float, float], tol: float = 0.1) -> bool:
-    """Return True when two 2-D points are within *tol* mm of each other."""
-    return math.hypot(a[0] - b[0], a[1] - b[1]) <= tol
+_SNAP_TOLERANCE_MM = 0.1
 
 
-def _dedupe_vertices(
-    vertices: List[Tuple[float, float]], tol: float = 0.1
-) -> List[Tuple[float, float]]:
-    """Remove near-duplicate vertices while preserving order."""
-    out: List[Tuple[float, float]] = []
-    for v in vertices:
-        if not any(_points_are_close(v, existing, tol) for existing in out):
-            out.append(v)
-    return out
+def _snap_vertices(
+    points: List[Tuple[float, float]], tol: float = _SNAP_TOLERANCE_MM
+) -> Tuple[List[int], List[Tuple[float, float]]]:
+    """Merge points within *tol* mm of each other into shared vertices.
 
+    Points are hashed into a grid of *tol*-sized cells, so each point is only
+    compared with the points in its own and the eight neighbouring cells, and
+    close pairs are joined with a union-find: near-linear, where comparing
+    every pair is quadratic.  Closeness is transitive — a run of points each
+    within *tol* of the next becomes one vertex, placed at the run's first
+    point.
 
-def _order_wall_vertices(
-    walls: List[WallSegment], tol: float = 0.1
-) -> Optional[List[Tuple[float, float]]]:
-    """Try to order wall segment endpoints into a closed polygon loop.
-
-    Returns ordered vertex list if walls form a closed chain, else ``None``.
+    Returns the vertex index of each point, and the vertex coordinates.
     """
-    if not walls:
-        return None
-
-    # Collect all directed edges
-    edges: List[Tuple[Tuple[float, float], Tuple[float, float]]] = []
-    all_verts: List[Tuple[float, float]] = []
+    parent = list(range(len(points)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    cells: Dict[Tuple[int, int], List[int]] = {}
+    for i, (x, y) in enumerate(points):
+        cx, cy = math.floor(x / tol), math.floor(y / tol)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in cells.get((cx + dx, cy + dy), ()):
+                    px, py = points[j]
+                    if math.hypot(x - px, y - py) <= tol:
+                        ri, rj = find(i), find(j)
+                        if ri != rj:
+                            parent[max(ri, rj)] = min(ri, rj)
+        cells.setdefault((cx, cy), []).append(i)
+
+    index_of_root: Dict[int, int] = {}
+    labels: List[int] = []
+    vertices: List[Tuple[float, float]] = []
+    for i in range(len(points)):
+        root = find(i)
+        if root not in index_of_root:
+            index_of_root[root] = len(vertices)
+            vertices.append(points[root])
+        labels.append(index_of_root[root])
+    return labels, vertices
+
+
+def _wall_graph(
+    walls: List[WallSegment], tol: float = _SNAP_TOLERANCE_MM
+) -> Tuple[List[Tuple[float, float]], List[List[Tuple[int, int]]]]:
+    """Snap wall endpoints together and split the walls into connected groups.
+
+    Returns the snapped vertices and, per connected group of walls, its
+    edges as vertex-index pairs.  Walls that snap to a point, and repeats
+    of the same wall, are dropped.
+    """
+    points: List[Tuple[float, float]] = []
     for w in walls:
-        edges.append((w.start, w.end))
-        all_verts.append(w.start)
-        all_verts.append(w.end)
-
-    # Build adjacency map: vertex → list of connected vertices
-    adj: Dict[int, List[int]] = {}
-    for i, vi in enumerate(all_verts):
-        adj.setdefault(i, [])
-        for j, vj in enumerate(all_verts):
-            if i == j:
-                continue
-            # Check if vi–vj is a known wall edge
-            for a, b in edges:
-                if (_points_are_close(vi, a, tol) and _points_are_close(vj, b, tol)) or \
-                   (_points_are_close(vi, b, tol) and _points_are_close(vj, a, tol)):
-                    adj[i].append(j)
-
-    if not adj:
-        return None
-
-    # Greedy chain: start from first vertex, follow adjacency
-    visited: List[int] = [0]
-    while len(visited) < len(all_verts):
-        last = visited[-1]
-        candidates = [n for n in adj.get(last, []) if n not in visited]
-        if not candidates:
-            break
-        # Pick the closest unvisited neighbour
-        candidates.sort(key=lambda n: math.hypot(
-            all_verts[last][0] - all_verts[n][0],
-            all_verts[last][1] - all_verts[n][1],
-        ))
-        visited.append(candidates[0])
-
-    # Check if we can close the loop
-    first = visited[0]
-    last = visited[-1]
-    if len(visited) >= 3:
-        # See if last connects back to first
-        closes = any(
-            _points_are_close(all_verts[last], a, tol) and _points_are_close(all_verts[first], b, tol)
-            for a, b in edges
-        ) or any(
-            _points_are_close(all_verts[last], b, tol) and _points_are_close(all_verts[first], a, tol)
-            for a, b in edges
-        )
-        if closes:
-            ordered = [all_verts[i] for i in visited]
-            return ordered
-
-    return None
+        points.append(tuple(w.start))
+        points.append(tuple(w.end))
+    labels, vertices = _snap_vertices(points, tol)
+
+    parent = list(range(len(vertices)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    edges = set()
+    for k in range(len(walls)):
+        a, b = labels[2 * k], labels[2 * k + 1]
+        if a == b:
+            continue
+        edges.add((min(a, b), max(a, b)))
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    groups: Dict[int, List[Tuple[int, int]]] = {}
+    for a, b in sorted(edges):
+        groups.setdefault(find(a), []).append((a, b))
+    return vertices, list(groups.values())
 
 
 # ── room polygon ───────────────────────────────────────────────────────────────
 
-def _build_room_polygon(walls: List[WallSegment]) -> Polygon:
+def _build_room_polygon(walls: List[WallSegment]) -> BaseGeometry:
     """Build the room boundary polygon from wall segments.
 
-    Attempts to order vertices into a closed loop first; falls back to the
-    convex hull of all wall endpoints when the segments don't form a clean
-    closed chain.
+    Wall endpoints are snapped together (see :func:`_snap_vertices`) and each
+    connected group of walls is polygonized into the area it encloses —
+    walls crossing or meeting mid-wall are split where they meet, so
+    partition walls inside a room do not cut it up.  The enclosed areas
+    combine even-odd: a separate loop of walls inside a room (a courtyard, a
+    plant room) is a hole in it, a loop inside that hole a room again.
+    Several rooms side by side come back as a ``MultiPolygon``.
+
+    Falls back to the convex hull of all wall endpoints when no group of
+    walls closes.
     """
     if not walls:
         # Default: 10×10 m room centred at origin
         return box(-5000, -5000, 5000, 5000)
 
+    vertices, groups = _wall_graph(walls)
+    rooms: BaseGeometry = Polygon()
+    for edges in groups:
+        lines = shapely.multilinestrings([[vertices[a], vertices[b]] for a, b in edges])
+        enclosed = unary_union(list(polygonize(shapely.get_parts(unary_union(lines)))))
+        if not enclosed.is_empty and enclosed.area > 0:
+            rooms = rooms.symmetric_difference(enclosed)
+    if not rooms.is_empty and rooms.area > 0:
+        return rooms
+
+    # Fallback: convex hull
     all_points: List[Tuple[float, float]] = []
     for w in walls:
         all_points.append(w.start)
         all_points.append(w.end)
-
-    # Try ordered chain first
-    ordered = _order_wall_vertices(walls)
-    if ordered and len(ordered) >= 3:
-        # Deduplicate consecutive near-identical points
-        deduped = _dedupe_vertices(ordered)
-        if len(deduped) >= 3:
-            try:
-                poly = Polygon(deduped)
-                if poly.is_valid and not poly.is_empty and poly.area > 0:
-                    return poly
-            except Exception:
-                pass
-
-    # Fallback: convex hull
     from shapely.geometry import MultiPoint
     hull = MultiPoint(all_points).convex_hull
     if isinstance(hull, Polygon) and not hull.is_empty:
@@ -155,10 +171,10 @@ def _build_room_polygon(walls: List[WallSegment]) -> Polygon:
 # ── placement zone ─────────────────────────────────────────────────────────────
 
 def _compute_placement_zone(
-    room: Polygon,
+    room: BaseGeometry,
     obstacles: List[ObstacleZone],
     wall_buffer_mm: float,
-) -> Polygon:
+) -> BaseGeometry:
     """Subtract obstacles and wall buffer from the room polygon.
 
     Returns a (possibly empty or multi-part) polygon representing the valid
@@ -170,13 +186,6 @@ def _compute_placement_zone(
         logger.warning("Room polygon became empty after wall buffer of %.1f mm", wall_buffer_mm)
         return Polygon()
 
-    # Ensure we have a Polygon (buffer on concave polygons can produce MultiPolygon)
-    if zone.geom_type == "MultiPolygon":
-        # Use the largest polygon (main room area)
-        zone = max(zone.geoms, key=lambda g: g.area)
-    if zone.geom_type != "Polygon":
-        return Polygon()
-
     # Subtract each obstacle
     for obs in obstacles:
         try:
@@ -186,35 +195,95 @@ def _compute_placement_zone(
         except Exception as exc:
             logger.warning("Skipping invalid obstacle %s: %s", obs.id, exc)
 
-    if zone.is_empty:
+    # Keep every polygonal part: separate rooms, and halls the buffer or an
+    # obstacle split, are all placed into (see :func:`placement_zones`)
+    parts = [g for g in shapely.get_parts(zone) if g.geom_type == "Polygon" and g.area > 0]
+    if not parts:
         return Polygon()
+    if len(parts) == 1:
+        return parts[0]
+    return MultiPolygon(parts)
 
-    # Take largest polygon if multi-part
-    if zone.geom_type == "MultiPolygon":
-        zone = max(zone.geoms, key=lambda g: g.area)
 
-    if zone.geom_type != "Polygon":
-        return Polygon()
+# ── pyckingsolver primary path ─────────────────────────────────────────────────
 
-    return zone
+# Upper bound on one solver run, and how long past it the solver process gets
+# before it is killed.
+SOLVER_TIME_LIMIT_S = 30.0
+_SOLVER_KILL_GRACE_S = 5.0
 
 
-# ── pyckingsolver primary path ─────────────────────────────────────────────────
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(int(os.getenv(name, "")), 1)
+    except ValueError:
+        return default
 
-def _pyckingsolver_place(
-    zone: Polygon,
-    tables: List[TableTypeObject],
-    counts: Dict[str, int],
-    spacing_mm: float,
-    time_limit_s: float = 30.0,
-) -> List[Dict]:
-    """Use pyckingsolver for optimal bin-packing of tables into *zone*.
 
-    Raises an exception on failure so the caller can fall back to grid placement.
+class SolverSlots:
+    """Counts running solver processes, per host and per user.
+
+    A request that cannot get a slot does not wait for one: it skips the solver
+    and takes the grid fallback, so a burst of placement requests cannot queue
+    up CPU-bound solver runs behind each other.
     """
-    from pyckingsolver import nest, Objective
 
-    # Build item list (one Shapely box per table instance) and metadata
+    def __init__(self, host_limit: int, per_user_limit: int):
+        self.host_limit = host_limit
+        self.per_user_limit = per_user_limit
+        self._lock = threading.Lock()
+        self._running = 0
+        self._per_user: Dict[str, int] = {}
+
+    def acquire(self, user_id: Optional[str] = None) -> bool:
+        with self._lock:
+            if self._running >= self.host_limit:
+                return False
+            if user_id is not None and self._per_user.get(user_id, 0) >= self.per_user_limit:
+                return False
+            self._running += 1
+            if user_id is not None:
+                self._per_user[user_id] = self._per_user.get(user_id, 0) + 1
+            return True
+
+    def release(self, user_id: Optional[str] = None) -> None:
+        with self._lock:
+            self._running = max(self._running - 1, 0)
+            if user_id is not None:
+                remaining = self._per_user.get(user_id, 0) - 1
+                if remaining > 0:
+                    self._per_user[user_id] = remaining
+                else:
+                    self._per_user.pop(user_id, None)
+
+    def in_use(self) -> int:
+        with self._lock:
+            return self._running
+
+
+solver_slots = SolverSlots(
+    host_limit=_env_int("PLACEMENT_SOLVER_SLOTS", max((os.cpu_count() or 2) // 2, 1)),
+    per_user_limit=_env_int("PLACEMENT_SOLVER_SLOTS_PER_USER", 1),
+)
+
+
+class _StopWhen:
+    """Event-like ``cancel`` for the solver: set once the caller cancels or the deadline passes."""
+
+    def __init__(self, cancel: Optional[threading.Event], deadline: float):
+        self.cancel = cancel
+        self.deadline = deadline
+
+    def is_set(self) -> bool:
+        if self.cancel is not None and self.cancel.is_set():
+            return True
+        return time.monotonic() >= self.deadline
+
+
+def _solver_items(
+    tables: List[TableTypeObject], counts: Dict[str, int]
+) -> Tuple[List[Polygon], List[Dict]]:
+    """One Shapely box per table instance, and the metadata parallel to it."""
     items: List[Polygon] = []
     meta: List[Dict] = []  # parallel to *items*
 
@@ -229,32 +298,11 @@ def _pyckingsolver_place(
                 "width_mm": tt.width_mm,
                 "height_mm": tt.height_mm,
             })
+    return items, meta
 
-    if not items:
-        return []
-
-    logger.info(
-        "Running pyckingsolver with %d items in zone area %.0f mm²",
-        len(items), zone.area,
-    )
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-        future = executor.submit(
-            nest,
-            items=items,
-            bins=[zone],
-            objective=Objective.KNAPSACK,
-            spacing=spacing_mm,
-            allowed_rotations=[(0, 0), (90, 90)],  # 0° and 90° only
-            group_identical=False,                  # 1:1 item-to-type mapping
-        )
-        try:
-            result = future.result(timeout=time_limit_s)
-        except concurrent.futures.TimeoutError:
-            raise TimeoutError(
-                f"pyckingsolver timed out after {time_limit_s}s"
-            )
 
+def _solution_placements(result, meta: List[Dict]) -> List[Dict]:
+    """Placed-table dicts for a (final or provisional) pyckingsolver solution."""
     placed: List[Dict] = []
     for item in result.all_items():
         shapes = result.placed_shapes(item)
@@ -271,11 +319,193 @@ def _pyckingsolver_place(
                 "height_mm": item_meta["height_mm"],
                 "table_type_id": item_meta["table_type_id"],
             })
+    return placed
+
 
+def _pyckingsolver_place(
+    zone: Polygon,
+    tables: List[TableTypeObject],
+    counts: Dict[str, int],
+    spacing_mm: float,
+    time_limit_s: float = SOLVER_TIME_LIMIT_S,
+    cancel: Optional[threading.Event] = None,
+    on_improvement: Optional[Callable[[List[Dict]], None]] = None,
+) -> List[Dict]:
+    """Use pyckingsolver for optimal bin-packing of tables into *zone*.
+
+    The solver runs as its own process: setting *cancel* kills it, as does
+    overrunning *time_limit_s* by more than the grace period.  Each improving
+    layout is passed to *on_improvement* as placed-table dicts while it runs.
+
+    Raises an exception on failure so the caller can fall back to grid placement.
+    """
+    from pyckingsolver import nest, Objective, SolverCancelled
+
+    items, meta = _solver_items(tables, counts)
+    if not items:
+        return []
+
+    logger.info(
+        "Running pyckingsolver with %d items in zone area %.0f mm²",
+        len(items), zone.area,
+    )
+
+    improvement_cb = None
+    if on_improvement is not None:
+        def improvement_cb(solution) -> None:
+            on_improvement(_solution_placements(solution, meta))
+
+    stop = _StopWhen(cancel, time.monotonic() + time_limit_s + _SOLVER_KILL_GRACE_S)
+    try:
+        result = nest(
+            items=items,
+            bins=[zone],
+            objective=Objective.KNAPSACK,
+            spacing=spacing_mm,
+            allowed_rotations=[(0, 0), (90, 90)],  # 0° and 90° only
+            group_identical=False,                  # 1:1 item-to-type mapping
+            time_limit=time_limit_s,
+            cancel=stop,
+            on_improvement=improvement_cb,
+        )
+    except SolverCancelled:
+        if cancel is not None and cancel.is_set():
+            raise
+        raise TimeoutError(f"pyckingsolver timed out after {time_limit_s}s")
+
+    if result is None:
+        raise TimeoutError(f"pyckingsolver found no layout within {time_limit_s}s")
+
+    placed = _solution_placements(result, meta)
     logger.info("pyckingsolver placed %d / %d items", len(placed), len(items))
     return placed
 
 
+# ── occupancy grid ─────────────────────────────────────────────────────────────
+
+# Cap on raster cells, so a hall with tiny tables cannot ask for a grid tens of millions of cells big;
+# past it the cells grow instead.
+_MAX_GRID_CELLS = 500_000
+
+
+def _rasterize_zone(
+    zone: Polygon, x0: float, y0: float, cell_mm: float, nx: int, ny: int
+) -> np.ndarray:
+    """Return an ``(nx, ny)`` mask of the cells lying wholly inside *zone*.
+
+    A cell is free when its four corners are covered by the zone and no stretch of the zone
+    boundary (walls, obstacle outlines) passes through its interior.  Conservative: a cell the
+    boundary clips is never free.
+    """
+    shapely.prepare(zone)
+    gx = x0 + cell_mm * np.arange(nx + 1)
+    gy = y0 + cell_mm * np.arange(ny + 1)
+    corners = shapely.intersects_xy(zone, *np.meshgrid(gx, gy, indexing="ij"))
+    free = corners[:-1, :-1] & corners[1:, :-1] & corners[:-1, 1:] & corners[1:, 1:]
+
+    # Boundary points strictly inside a cell mean the boundary crosses it, whatever its corners say
+    samples = shapely.get_coordinates(shapely.segmentize(zone.boundary, cell_mm / 4.0))
+    fx = (samples[:, 0] - x0) / cell_mm
+    fy = (samples[:, 1] - y0) / cell_mm
+    ix = np.floor(fx).astype(np.int64)
+    iy = np.floor(fy).astype(np.int64)
+    eps = 1e-6
+    crossing = (
+        (fx - ix > eps) & (fx - ix < 1 - eps)
+        & (fy - iy > eps) & (fy - iy < 1 - eps)
+        & (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+    )
+    free[ix[crossing], iy[crossing]] = False
+    return free
+
+
+class _OccupancyGrid:
+    """The placement zone rasterized once, tracking where each table footprint can still go.
+
+    Feasible anchors (bottom-left corners) for a footprint come from a summed-area table over the
+    free-cell mask: a window of free cells the footprint's size.  Placing a table then only clears
+    the rectangle of anchors whose footprint would come within *spacing_mm* of it - a slice
+    assignment per footprint, not a re-scan.  Anchors are searched x-major then y, matching the
+    scan order of the previous shape-by-shape fallback.  The chosen anchor is
+    confirmed against a :class:`PlacementIndex` (prepared zone, placed tables).
+    """
+
+    def __init__(self, zone: Polygon, cell_mm: float, spacing_mm: float):
+        minx, miny, maxx, maxy = zone.bounds
+        cell_mm = max(cell_mm, math.sqrt((maxx - minx) * (maxy - miny) / _MAX_GRID_CELLS))
+        nx = max(int(math.ceil((maxx - minx) / cell_mm)), 1)
+        ny = max(int(math.ceil((maxy - miny) / cell_mm)), 1)
+
+        self.index = PlacementIndex(zone, spacing_mm=spacing_mm)
+        self.cell_mm = cell_mm
+        self.spacing_mm = spacing_mm
+        self.xs = minx + cell_mm * np.arange(nx)
+        self.ys = miny + cell_mm * np.arange(ny)
+
+        free = _rasterize_zone(zone, minx, miny, cell_mm, nx, ny)
+        self._sat = np.zeros((nx + 1, ny + 1), dtype=np.int64)
+        self._sat[1:, 1:] = free.cumsum(axis=0).cumsum(axis=1)
+        self._anchors: Dict[Tuple[float, float], np.ndarray] = {}
+        self._occupied: List[Tuple[float, float, float, float]] = []
+
+    def _cells_spanned(self, length_mm: float) -> int:
+        return max(int(math.ceil(length_mm / self.cell_mm - 1e-9)), 1)
+
+    def _footprint_anchors(self, w: float, h: float) -> np.ndarray:
+        """Boolean ``(ix, iy)`` array of anchors where a *w* × *h* footprint still fits."""
+        key = (w, h)
+        anchors = self._anchors.get(key)
+        if anchors is not None:
+            return anchors
+
+        kw, kh = self._cells_spanned(w), self._cells_spanned(h)
+        sat = self._sat
+        if kw >= sat.shape[0] or kh >= sat.shape[1]:
+            anchors = np.zeros((0, 0), dtype=bool)
+        else:
+            window = sat[kw:, kh:] - sat[:-kw, kh:] - sat[kw:, :-kh] + sat[:-kw, :-kh]
+            anchors = window == kw * kh
+            for rect in self._occupied:
+                self._clear_near(anchors, w, h, rect)
+        self._anchors[key] = anchors
+        return anchors
+
+    def _clear_near(
+        self, anchors: np.ndarray, w: float, h: float, rect: Tuple[float, float, float, float]
+    ) -> None:
+        """Drop the anchors whose *w* × *h* footprint comes within spacing of *rect*."""
+        x0, y0, x1, y1 = rect
+        s = self.spacing_mm
+        lo_x = np.searchsorted(self.xs, x0 - s - w, side="left")
+        hi_x = np.searchsorted(self.xs, x1 + s, side="right")
+        lo_y = np.searchsorted(self.ys, y0 - s - h, side="left")
+        hi_y = np.searchsorted(self.ys, y1 + s, side="right")
+        anchors[lo_x:hi_x, lo_y:hi_y] = False
+
+    def first_fit(self, w: float, h: float) -> Optional[Tuple[float, float]]:
+        """Lowest-x, then lowest-y anchor where a *w* × *h* table fits, or ``None``."""
+        anchors = self._footprint_anchors(w, h)
+        while anchors.size:
+            flat = int(np.argmax(anchors))
+            ix, iy = divmod(flat, anchors.shape[1])
+            if not anchors[ix, iy]:
+                return None
+            x, y = float(self.xs[ix]), float(self.ys[iy])
+            # The raster is conservative; the exact check only guards against float edge cases
+            if self.index.fits(box(x, y, x + w, y + h)):
+                return x, y
+            anchors[ix, iy] = False
+        return None
+
+    def occupy(self, x: float, y: float, w: float, h: float) -> None:
+        """Mark a placed *w* × *h* table at anchor (*x*, *y*) as taken."""
+        rect = (x, y, x + w, y + h)
+        self._occupied.append(rect)
+        self.index.add(len(self._occupied), box(*rect))
+        for (fw, fh), anchors in self._anchors.items():
+            self._clear_near(anchors, fw, fh, rect)
+
+
 # ── grid-based greedy fallback ─────────────────────────────────────────────────
 
 def _grid_place(
@@ -283,36 +513,47 @@ def _grid_place(
     tables: List[TableTypeObject],
     counts: Dict[str, int],
     spacing_mm: float,
+    seed: Optional[List[Dict]] = None,
 ) -> List[Dict]:
     """Grid-based greedy placement: discretize the zone and place largest-first.
 
-    Used as a fallback when pyckingsolver is unavailable or times out.
+    Used as a fallback when pyckingsolver is unavailable or times out.  Each table
+    takes the first free anchor of an :class:`_OccupancyGrid`, unrotated before
+    rotated.  *seed* is a partial layout (the solver's best before it stopped)
+    that is kept as placed; only the tables it is missing are added.
     """
+    seed = list(seed or [])
     if zone.is_empty or zone.area <= 0:
-        return []
+        return seed
 
     # Build flat list of table instances sorted by area (largest first)
+    seeded: Dict[str, int] = {}
+    for p in seed:
+        seeded[p["table_type_id"]] = seeded.get(p["table_type_id"], 0) + 1
     table_entries: List[TableTypeObject] = []
     for tt in tables:
-        count = counts.get(tt.id, 1)
+        count = counts.get(tt.id, 1) - seeded.get(tt.id, 0)
         for _ in range(count):
             table_entries.append(tt)
-    table_entries.sort(key=lambda t: -(t.width_mm * t.height_mm))
+    table_entries.sort(key=_largest_first)
 
     if not table_entries:
-        return []
+        return seed
 
-    # Grid step: half of the smallest table dimension (ensures decent coverage)
+    # Grid step: half of the smallest table dimension (ensures decent coverage);
+    # the raster is twice as fine so footprints round up by less
     min_dim = min(
         min(t.width_mm, t.height_mm) for t in table_entries
     )
     grid_step = max(min_dim / 2, 50.0)  # at least 50 mm
+    grid = _OccupancyGrid(zone, grid_step / 2, spacing_mm)
 
-    minx, miny, maxx, maxy = zone.bounds
-
-    placed: List[Dict] = []
-    placed_polys: List[Polygon] = []  # buffered placed shapes for overlap checks
-    half_spacing = spacing_mm / 2.0
+    placed: List[Dict] = list(seed)
+    for p in seed:
+        minx, miny, maxx, maxy = table_footprint(
+            p["x_mm"], p["y_mm"], p["width_mm"], p["height_mm"], p.get("rotation") or 0.0,
+        ).bounds
+        grid.occupy(minx, miny, maxx - minx, maxy - miny)
 
     for tt in table_entries:
         best_pos: Optional[Tuple[float, float]] = None
@@ -321,27 +562,9 @@ def _grid_place(
         for rotated in (False, True):
             cw = tt.height_mm if rotated else tt.width_mm
             ch = tt.width_mm if rotated else tt.height_mm
-
-            # Build list of candidate (x, y) positions
-            for x in np.arange(minx, maxx - cw + grid_step, grid_step):
-                for y in np.arange(miny, maxy - ch + grid_step, grid_step):
-                    rect = box(x, y, x + cw, y + ch)
-
-                    # Must be fully inside the placement zone
-                    if not zone.contains(rect):
-                        continue
-
-                    # Must not overlap with already-placed tables (plus spacing)
-                    buffered = rect.buffer(half_spacing)
-                    if any(buffered.intersects(p) for p in placed_polys):
-                        continue
-
-                    best_pos = (x, y)
-                    best_rot = rotated
-                    break  # first valid spot wins for this rotation
-                if best_pos:
-                    break
+            best_pos = grid.first_fit(cw, ch)
             if best_pos:
+                best_rot = rotated
                 break
 
         if best_pos is None:
@@ -350,26 +573,428 @@ def _grid_place(
         x, y = best_pos
         cw = tt.height_mm if best_rot else tt.width_mm
         ch = tt.width_mm if best_rot else tt.height_mm
+        grid.occupy(x, y, cw, ch)
 
-        placed_rect = box(x, y, x + cw, y + ch)
-        placed_polys.append(placed_rect.buffer(half_spacing))
-
-        centroid = placed_rect.centroid
         placed.append({
-            "x_mm": round(centroid.x, 2),
-            "y_mm": round(centroid.y, 2),
+            "x_mm": round(x + cw / 2, 2),
+            "y_mm": round(y + ch / 2, 2),
             "rotation": 90.0 if best_rot else 0.0,
             "width_mm": tt.width_mm,
             "height_mm": tt.height_mm,
             "table_type_id": tt.id,
         })
 
-    logger.info("Grid fallback placed %d / %d tables", len(placed), len(table_entries))
+    logger.info(
+        "Grid fallback placed %d / %d tables (%d seeded)",
+        len(placed) - len(seed), len(table_entries), len(seed),
+    )
+    logger.debug("Grid fallback index queries: %s", grid.index.stats())
+    return placed
+
+
+# ── row / aisle sweep ──────────────────────────────────────────────────────────
+
+PLACEMENT_STRATEGIES = ("rows", "pack")
+
+# Rows stop this far short of the zone edge, so rounding the output to 0.01 mm
+# in a turned frame cannot push a table over it.
+_ROW_MARGIN_MM = 1.0
+
+
+def _dominant_axis_deg(zone: Polygon) -> float:
+    """Angle in [0, 180) of the long side of the zone's minimum rotated rectangle."""
+    rect = zone.minimum_rotated_rectangle
+    if rect.geom_type != "Polygon":
+        return 0.0
+    coords = list(rect.exterior.coords)
+    edges = [(coords[i], coords[i + 1]) for i in range(2)]
+    (x0, y0), (x1, y1) = max(edges, key=lambda e: math.hypot(e[1][0] - e[0][0], e[1][1] - e[0][1]))
+    angle = math.degrees(math.atan2(y1 - y0, x1 - x0)) % 180.0
+    # Snap near-axis rooms onto the axis so a slightly skewed trace still gives square rows
+    for axis in (0.0, 90.0, 180.0):
+        if abs(angle - axis) < 0.5:
+            return axis % 180.0
+    return angle
+
+
+def _free_intervals(zone: Polygon, y0: float, y1: float) -> List[Tuple[float, float]]:
+    """X-intervals where the strip ``y0 <= y <= y1`` lies wholly inside *zone*."""
+    minx, _, maxx, _ = zone.bounds
+    eps = 0.01  # keep edges shared with the zone out of the strip
+    strip = box(minx - 1, y0 + eps, maxx + 1, y1 - eps)
+    if not zone.intersects(strip):
+        return []
+    blocked = strip.difference(zone)
+    spans = sorted(
+        (g.bounds[0], g.bounds[2])
+        for g in getattr(blocked, "geoms", [blocked])
+        if not g.is_empty and g.area > 1e-6
+    )
+
+    intervals: List[Tuple[float, float]] = []
+    cursor = minx
+    for lo, hi in spans:
+        if lo > cursor:
+            intervals.append((cursor, lo))
+        cursor = max(cursor, hi)
+    if cursor < maxx:
+        intervals.append((cursor, maxx))
+    return intervals
+
+
+def _section_labels(sections: Optional[List[Dict]], total: int) -> List[Optional[str]]:
+    """One section name per table in sweep order, filling sections in contiguous blocks."""
+    labels: List[Optional[str]] = []
+    for section in sections or []:
+        labels.extend([section.get("name")] * max(int(section.get("count") or 0), 0))
+    labels = labels[:total]
+    return labels + [None] * (total - len(labels))
+
+
+def _row_place(
+    zone: Polygon,
+    tables: List[TableTypeObject],
+    counts: Dict[str, int],
+    aisle: AisleConfigObject,
+    sections: Optional[List[Dict]] = None,
+) -> List[Dict]:
+    """Deterministic row layout: sweep rows along the zone's dominant axis.
+
+    The zone is turned so its long axis runs along x.  Rows of tables (long
+    side along the row) are laid bottom to top, one ``walkway_width_mm`` aisle
+    apart (never less than ``table_spacing_mm``), with ``table_spacing_mm``
+    between neighbours in a row.  Rows run serpentine, so consecutive tables
+    in sweep order are neighbours and *sections* (``[{"name", "count"}]``)
+    come out as contiguous blocks.  Tables are placed largest-first.
+    """
+    if zone.is_empty or zone.area <= 0:
+        return []
+
+    table_entries: List[TableTypeObject] = []
+    for tt in tables:
+        for _ in range(counts.get(tt.id, 1)):
+            table_entries.append(tt)
+    table_entries.sort(key=_largest_first)
+    if not table_entries:
+        return []
+
+    theta = _dominant_axis_deg(zone)
+    origin = zone.centroid
+    frame = affinity.rotate(zone, -theta, origin=origin) if theta else zone
+    _, miny, _, maxy = frame.bounds
+
+    spacing = aisle.table_spacing_mm
+    depth = max(min(t.width_mm, t.height_mm) for t in table_entries)
+    row_pitch = depth + max(aisle.walkway_width_mm, spacing)
+    labels = _section_labels(sections, len(table_entries))
+
+    cos_t, sin_t = math.cos(math.radians(theta)), math.sin(math.radians(theta))
+
+    placed: List[Dict] = []
+    next_entry = 0
+    y = miny + _ROW_MARGIN_MM
+    row = 0
+    while y + depth <= maxy - _ROW_MARGIN_MM and next_entry < len(table_entries):
+        reverse = row % 2 == 1
+        intervals = [
+            (lo + _ROW_MARGIN_MM, hi - _ROW_MARGIN_MM)
+            for lo, hi in _free_intervals(frame, y, y + depth)
+        ]
+        # Spacing carries across an obstacle narrower than it, not just along an interval
+        cursor = math.inf if reverse else -math.inf
+        for lo, hi in (intervals[::-1] if reverse else intervals):
+            cursor = min(cursor, hi) if reverse else max(cursor, lo)
+            while next_entry < len(table_entries):
+                tt = table_entries[next_entry]
+                length = max(tt.width_mm, tt.height_mm)
+                if reverse:
+                    if cursor - length < lo - 1e-9:
+                        break
+                    x0, cursor = cursor - length, cursor - length - spacing
+                else:
+                    if cursor + length > hi + 1e-9:
+                        break
+                    x0, cursor = cursor, cursor + length + spacing
+
+                # Centre in the row frame, turned back into room coordinates
+                fx = x0 + length / 2 - origin.x
+                fy = y + depth / 2 - origin.y
+                rel = 0.0 if tt.width_mm >= tt.height_mm else 90.0
+                entry = {
+                    "x_mm": round(origin.x + fx * cos_t - fy * sin_t, 2),
+                    "y_mm": round(origin.y + fx * sin_t + fy * cos_t, 2),
+                    "rotation": round((theta + rel) % 360.0, 2),
+                    "width_mm": tt.width_mm,
+                    "height_mm": tt.height_mm,
+                    "table_type_id": tt.id,
+                }
+                if labels[next_entry] is not None:
+                    entry["section_name"] = labels[next_entry]
+                placed.append(entry)
+                next_entry += 1
+        y += row_pitch
+        row += 1
+
+    logger.info("Row layout placed %d / %d tables at %.1f°", len(placed), len(table_entries), theta)
     return placed
 
 
 # ── public entry point ─────────────────────────────────────────────────────────
 
+def prepare_placement(
+    walls: List[Dict],
+    obstacles: List[Dict],
+    table_types: List[Dict],
+    aisle_config: Optional[Dict] = None,
+) -> Tuple[BaseGeometry, List[TableTypeObject], AisleConfigObject]:
+    """Build the placement zone, table types and aisle config from request dicts."""
+    # ── build domain objects ──────────────────────────────────────────────
+    wall_objects = [WallSegment(**w) for w in walls]
+    obstacle_objects = [ObstacleZone(**o) for o in obstacles]
+    table_objects = [TableTypeObject(**t) for t in table_types]
+
+    # ── aisle config defaults ─────────────────────────────────────────────
+    if aisle_config:
+        aisle = AisleConfigObject(**aisle_config)
+    else:
+        aisle = AisleConfigObject()
+
+    # ── geometry prep ─────────────────────────────────────────────────────
+    room = _build_room_polygon(wall_objects)
+    zone = _compute_placement_zone(room, obstacle_objects, aisle.wall_buffer_mm)
+    return zone, table_objects, aisle
+
+
+def requested_table_count(tables: List[TableTypeObject], counts: Dict[str, int]) -> int:
+    """Number of tables a request asks for (a type missing from *counts* counts once)."""
+    return sum(counts.get(tt.id, 1) for tt in tables)
+
+
+# ── zones ──────────────────────────────────────────────────────────────────────
+
+_MAX_ZONE_WORKERS = 8
+
+
+def placement_zones(zone: BaseGeometry, tables: List[TableTypeObject]) -> List[Polygon]:
+    """The separate parts of *zone* a table fits in, largest first.
+
+    A part too narrow for the smallest table (a sliver the wall buffer left
+    along a corridor) is dropped.
+    """
+    parts = [g for g in shapely.get_parts(zone) if g.geom_type == "Polygon" and g.area > 0]
+    if tables:
+        min_dim = min(min(t.width_mm, t.height_mm) for t in tables)
+        parts = [g for g in parts if not g.buffer(-min_dim / 2).is_empty]
+    return sorted(parts, key=lambda g: -g.area)
+
+
+def _largest_first(table: TableTypeObject) -> Tuple[float, str]:
+    """Sort key putting the largest tables first, ties broken by type id.
+
+    The placers depend only on the set of table types, never on the order
+    they were listed in - which the placement cache fingerprint relies on.
+    """
+    return -(table.width_mm * table.height_mm), table.id
+
+
+def section_location(section: Dict) -> Optional[str]:
+    """The location a section is tied to: ``location.name`` (as in
+    :class:`SectionObject`) or ``location_name`` (as in a floorplan section)."""
+    location = section.get("location")
+    if isinstance(location, dict):
+        return location.get("name")
+    if isinstance(location, str):
+        return location
+    return section.get("location_name")
+
+
+def _zone_locations(zones: List[Polygon], locations: Optional[List[Dict]]) -> List[Optional[str]]:
+    """Per zone, the name of the location (``{"name", "polygon"}``) covering most of it."""
+    areas = []
+    for loc in locations or []:
+        try:
+            area = Polygon(loc["polygon"])
+        except Exception as exc:
+            logger.warning("Skipping invalid location %s: %s", loc.get("name"), exc)
+            continue
+        if area.is_valid and not area.is_empty:
+            areas.append((loc.get("name"), area))
+
+    names: List[Optional[str]] = []
+    for zone in zones:
+        overlaps = [(zone.intersection(area).area, name) for name, area in areas]
+        overlap, name = max(overlaps, key=lambda o: o[0], default=(0.0, None))
+        names.append(name if overlap > 0 else None)
+    return names
+
+
+def _apportion(total: int, weights: List[float]) -> List[int]:
+    """Split *total* in proportion to *weights*, by largest remainder."""
+    shares = [0] * len(weights)
+    weight_sum = sum(weights)
+    if total <= 0 or not weights:
+        return shares
+    if weight_sum <= 0:
+        shares[0] = total
+        return shares
+    exact = [total * w / weight_sum for w in weights]
+    shares = [math.floor(e) for e in exact]
+    by_remainder = sorted(range(len(weights)), key=lambda i: (shares[i] - exact[i], i))
+    for i in by_remainder[: total - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+
+def _zone_shares(
+    zones: List[Polygon],
+    zone_locations: List[Optional[str]],
+    tables: List[TableTypeObject],
+    counts: Dict[str, int],
+    sections: Optional[List[Dict]] = None,
+) -> List[Tuple[Dict[str, int], Optional[List[Dict]]]]:
+    """Split the requested tables between *zones*: ``(counts, sections)`` per zone.
+
+    A section tied to a location goes to that location's zones, split by
+    area.  Everything else fills the zones in order, each up to its share of
+    the total by area less what the tied sections already put there, so a
+    section is split between two zones at most.  Each zone then gets the
+    same mix of table types as the whole.
+    """
+    if len(zones) <= 1:
+        return [(counts, sections)] * len(zones)
+
+    entries: List[TableTypeObject] = []
+    for tt in tables:
+        entries.extend([tt] * counts.get(tt.id, 1))
+    entries.sort(key=_largest_first)
+    total = len(entries)
+    areas = [z.area for z in zones]
+
+    # ── tables per zone, by section ───────────────────────────────────────
+    blocks: List[Tuple[Optional[str], int, Optional[List[int]]]] = []
+    remaining = total
+    for section in sections or []:
+        count = min(max(int(section.get("count") or 0), 0), remaining)
+        remaining -= count
+        location = section_location(section)
+        tied = [i for i, name in enumerate(zone_locations) if location is not None and name == location]
+        blocks.append((section.get("name"), count, tied or None))
+    blocks.append((None, remaining, None))
+
+    pieces: List[List[Tuple[int, Optional[str], int]]] = [[] for _ in zones]
+    tied_total = [0] * len(zones)
+    for order, (name, count, tied) in enumerate(blocks):
+        if tied:
+            for i, share in zip(tied, _apportion(count, [areas[i] for i in tied])):
+                if share:
+                    pieces[i].append((order, name, share))
+                    tied_total[i] += share
+
+    room = [max(target - held, 0) for target, held in zip(_apportion(total, areas), tied_total)]
+    free_total = sum(count for _, count, tied in blocks if not tied)
+    capacity = _apportion(free_total, room if sum(room) else areas)
+    zone_index = 0
+    for order, (name, count, tied) in enumerate(blocks):
+        while not tied and count > 0:
+            while capacity[zone_index] == 0:
+                zone_index += 1
+            share = min(count, capacity[zone_index])
+            pieces[zone_index].append((order, name, share))
+            capacity[zone_index] -= share
+            count -= share
+
+    # ── table types per zone: deal them out in proportion ─────────────────
+    sizes = [sum(share for _, _, share in zone_pieces) for zone_pieces in pieces]
+    given = [0] * len(zones)
+    zone_counts: List[Dict[str, int]] = [{tt.id: 0 for tt in tables} for _ in zones]
+    for tt in entries:
+        i = max(
+            (i for i in range(len(zones)) if given[i] < sizes[i]),
+            key=lambda i: ((sizes[i] - given[i]) / sizes[i], -i),
+        )
+        zone_counts[i][tt.id] += 1
+        given[i] += 1
+
+    shares: List[Tuple[Dict[str, int], Optional[List[Dict]]]] = []
+    for i, zone_pieces in enumerate(pieces):
+        zone_sections = None
+        if sections is not None:
+            zone_sections = [
+                {"name": name, "count": share}
+                for _, name, share in sorted(zone_pieces, key=lambda p: p[0])
+                if name is not None
+            ]
+        shares.append((zone_counts[i], zone_sections))
+    return shares
+
+
+def _map_zones(place: Callable[[int], List[Dict]], n_zones: int) -> List[List[Dict]]:
+    """``place(i)`` for each zone index, the zones side by side on a thread pool.
+
+    Only for work that waits on the pyckingsolver process, which runs outside
+    the GIL: those zones overlap and take about as long as the largest.  The
+    row and grid placers are mostly pure Python and hold the GIL, so threads
+    would only interleave them; they run one zone after another instead.
+    """
+    if n_zones <= 1:
+        return [place(i) for i in range(n_zones)]
+    with ThreadPoolExecutor(
+        max_workers=min(n_zones, _MAX_ZONE_WORKERS), thread_name_prefix="placement-zone",
+    ) as pool:
+        return list(pool.map(place, range(n_zones)))
+
+
+def _spill(
+    zones: List[Polygon],
+    zone_locations: List[Optional[str]],
+    tables: List[TableTypeObject],
+    shares: List[Tuple[Dict[str, int], Optional[List[Dict]]]],
+    per_zone: List[List[Dict]],
+    spacing_mm: float,
+) -> List[List[Dict]]:
+    """Offer the tables a zone could not fit to the other zones, largest first.
+
+    Tables stay within their zone's location (a zone with no location may
+    spill anywhere) and are fitted around what the receiving zone holds by
+    the grid placer.  A spilled table keeps a section name its zone was
+    meant to place.
+    """
+    if len(zones) <= 1:
+        return per_zone
+    per_zone = [list(placed) for placed in per_zone]
+    for source, (zone_counts, zone_sections) in enumerate(shares):
+        leftover = Counter({tt.id: zone_counts.get(tt.id, 1) for tt in tables})
+        leftover.subtract(p["table_type_id"] for p in per_zone[source])
+        leftover = +leftover
+        if not leftover:
+            continue
+
+        unplaced = Counter(
+            label for label in _section_labels(zone_sections, requested_table_count(tables, zone_counts))
+            if label is not None
+        )
+        unplaced.subtract(p.get("section_name") for p in per_zone[source] if p.get("section_name"))
+        spare_labels = [
+            sec["name"] for sec in zone_sections or [] for _ in range(max(unplaced.pop(sec["name"], 0), 0))
+        ]
+
+        for target, zone in enumerate(zones):
+            if target == source or not leftover:
+                continue
+            if zone_locations[source] is not None and zone_locations[target] != zone_locations[source]:
+                continue
+            held = Counter(p["table_type_id"] for p in per_zone[target])
+            target_counts = {tt.id: held[tt.id] + leftover[tt.id] for tt in tables}
+            result = _grid_place(zone, tables, target_counts, spacing_mm, seed=per_zone[target])
+            for p in result[len(per_zone[target]):]:
+                leftover[p["table_type_id"]] -= 1
+                if spare_labels:
+                    p["section_name"] = spare_labels.pop(0)
+            leftover = +leftover
+            per_zone[target] = result
+    return per_zone
+
+
 def auto_place_tables(
     walls: List[Dict],
     obstacles: List[Dict],
@@ -377,9 +1002,23 @@ def auto_place_tables(
     counts: Dict[str, int],
     scale_px_per_mm: float,
     aisle_config: Optional[Dict] = None,
+    strategy: str = "rows",
+    sections: Optional[List[Dict]] = None,
+    refine: bool = False,
+    user_id: Optional[str] = None,
+    time_limit_s: float = SOLVER_TIME_LIMIT_S,
+    locations: Optional[List[Dict]] = None,
+    cancel: Optional[threading.Event] = None,
+    on_progress: Optional[Callable[[str, List[Dict]], None]] = None,
 ) -> List[Dict]:
     """Auto-place rectangular tables inside the room boundary.
 
+    Every separate part of the placement zone — separate rooms, a hall the
+    wall buffer or an obstacle splits — is placed into, their solver runs
+    side by side on a thread pool (see :func:`_zone_shares` for how the
+    tables are split between them).  Tables a part cannot fit spill into the
+    others.
+
     Parameters
     ----------
     walls:
@@ -400,44 +1039,224 @@ def auto_place_tables(
         Optional dict with ``wallBufferMm`` and ``tableSpacingMm`` keys
         (see :class:`AisleConfigObject`).  Defaults to 1500 mm wall buffer
         and 1200 mm table spacing.
+    strategy:
+        ``"rows"`` (default) lays aisle-aligned rows in milliseconds (see
+        :func:`_row_place`); ``"pack"`` bin-packs with pyckingsolver, falling
+        back to the grid placer.
+    sections:
+        Optional ``[{"name", "count"}]``; with ``"rows"``, tables are assigned
+        to sections in contiguous blocks and carry a ``section_name``.
+    refine:
+        With ``"rows"``, run the ``"pack"`` strategy as well when the rows
+        could not fit every table, and keep whichever placed more.
+    user_id:
+        Who asked, for the per-user bound on concurrent solver runs
+        (see :class:`SolverSlots`).
+    time_limit_s:
+        Solver time budget, capped at :data:`SOLVER_TIME_LIMIT_S`.
+    locations:
+        Optional ``[{"name", "polygon"}]`` naming the areas of the plan that
+        are market locations (see :class:`LocationObject`).  A section whose
+        ``location`` names one is placed in the zones that location covers.
+    cancel:
+        Optional event; setting it kills a running solver, and the best
+        layout found so far is returned.
+    on_progress:
+        Optional ``(source, placed_tables)`` callback, called with the row
+        layout (``"rows"``) as soon as it exists and with every layout the
+        solver improves on (``"solver"``).  It may be called from the zone
+        worker threads.
 
     Returns
     -------
     List of placed-table dicts, each with:
         ``x_mm``, ``y_mm``, ``rotation``, ``width_mm``, ``height_mm``,
-        ``table_type_id``.
+        ``table_type_id`` (and ``section_name`` when assigned).
     """
-    # ── build domain objects ──────────────────────────────────────────────
-    wall_objects = [WallSegment(**w) for w in walls]
-    obstacle_objects = [ObstacleZone(**o) for o in obstacles]
-    table_objects = [TableTypeObject(**t) for t in table_types]
-
-    # ── aisle config defaults ─────────────────────────────────────────────
-    if aisle_config:
-        aisle = AisleConfigObject(**aisle_config)
-    else:
-        aisle = AisleConfigObject()
-
-    wall_buffer = aisle.wall_buffer_mm
-    table_spacing = aisle.table_spacing_mm
+    if strategy not in PLACEMENT_STRATEGIES:
+        raise ValueError(f"strategy must be one of {', '.join(PLACEMENT_STRATEGIES)}")
 
-    # ── geometry prep ─────────────────────────────────────────────────────
-    room = _build_room_polygon(wall_objects)
-    zone = _compute_placement_zone(room, obstacle_objects, wall_buffer)
+    zone, table_objects, aisle = prepare_placement(walls, obstacles, table_types, aisle_config)
+    time_limit_s = min(time_limit_s, SOLVER_TIME_LIMIT_S)
 
-    if zone.is_empty or zone.area <= 0:
+    zones = placement_zones(zone, table_objects)
+    if not zones:
         logger.warning("Placement zone is empty — returning 0 placed tables")
         return []
 
+    # ── split the tables between the zones, place them side by side ───────
+    zone_locations = _zone_locations(zones, locations)
+    shares = _zone_shares(zones, zone_locations, table_objects, counts, sections)
+
+    spacing = aisle.table_spacing_mm
+    lock = threading.Lock()
+
+    def joined(per_zone: List[List[Dict]]) -> List[Dict]:
+        if len(per_zone) == 1:
+            return per_zone[0]
+        return [p for placed in per_zone for p in placed]
+
+    def report(source: str, placed: List[Dict]) -> None:
+        if on_progress is not None:
+            on_progress(source, placed)
+
+    # ── rows: instant deterministic layout ────────────────────────────────
+    rows: List[List[Dict]] = [[] for _ in zones]
+    if strategy == "rows":
+        rows = [
+            _row_place(zone, table_objects, zone_counts, aisle, zone_sections)
+            for zone, (zone_counts, zone_sections) in zip(zones, shares)
+        ]
+        if not refine:
+            placed = joined(_spill(zones, zone_locations, table_objects, shares, rows, spacing))
+            report("rows", placed)
+            return placed
+        report("rows", joined(_spill(zones, zone_locations, table_objects, shares, rows, spacing)))
+
+    # ── pack: pyckingsolver, per zone the rows could not complete ─────────
+    zone_best = list(rows)
+
+    def solve(i: int) -> List[Dict]:
+        zone_counts = shares[i][0]
+        if strategy == "rows" and (
+            len(rows[i]) >= requested_table_count(table_objects, zone_counts)
+            or (cancel is not None and cancel.is_set())
+        ):
+            return rows[i]
+
+        def zone_improved(placed: List[Dict]) -> None:
+            with lock:
+                if len(placed) > len(zone_best[i]):
+                    zone_best[i] = placed
+                    report("solver", joined(zone_best))
+
+        packed = _pack_place(
+            zones[i], table_objects, zone_counts, spacing, user_id, time_limit_s,
+            cancel=cancel, on_improvement=zone_improved,
+        )
+        return packed if len(packed) > len(rows[i]) else rows[i]
+
+    return joined(_spill(zones, zone_locations, table_objects, shares, _map_zones(solve, len(zones)), spacing))
+
+
+def _pack_place(
+    zone: Polygon,
+    table_objects: List[TableTypeObject],
+    counts: Dict[str, int],
+    table_spacing: float,
+    user_id: Optional[str] = None,
+    time_limit_s: float = SOLVER_TIME_LIMIT_S,
+    cancel: Optional[threading.Event] = None,
+    on_improvement: Optional[Callable[[List[Dict]], None]] = None,
+) -> List[Dict]:
+    """Bin-pack with pyckingsolver, falling back to the grid placer.
+
+    The fallback starts from the best layout the solver reported before it
+    failed or timed out, rather than from an empty room.  A caller that sets
+    *cancel* gets that best layout back as it stands.  *on_improvement* sees
+    each layout that places more tables than the last.
+    """
+    best: List[Dict] = []
+
+    def track(placed: List[Dict]) -> None:
+        nonlocal best
+        if len(placed) > len(best):
+            best = placed
+            if on_improvement is not None:
+                on_improvement(placed)
+
     # ── primary: pyckingsolver ────────────────────────────────────────────
-    try:
-        return _pyckingsolver_place(zone, table_objects, counts, table_spacing)
-    except Exception as exc:
-        logger.warning("pyckingsolver failed (%s), falling back to grid placement", exc)
+    if solver_slots.acquire(user_id):
+        try:
+            return _pyckingsolver_place(
+                zone, table_objects, counts, table_spacing,
+                time_limit_s=time_limit_s, cancel=cancel, on_improvement=track,
+            )
+        except Exception as exc:
+            if cancel is not None and cancel.is_set():
+                logger.info("Placement cancelled with %d tables placed", len(best))
+                return best
+            logger.warning(
+                "pyckingsolver failed (%s), falling back to grid placement from %d placed",
+                exc, len(best),
+            )
+        finally:
+            solver_slots.release(user_id)
+    else:
+        logger.warning("No free solver slot for this user or host; using grid placement")
 
     # ── fallback: grid-based greedy ───────────────────────────────────────
     try:
-        return _grid_place(zone, table_objects, counts, table_spacing)
+        return _grid_place(zone, table_objects, counts, table_spacing, seed=best)
     except Exception as exc:
         logger.error("Grid fallback also failed: %s", exc)
-        return []
+        return best
+
+
+# ── collision validation ───────────────────────────────────────────────────────
+
+def validate_placement(
+    walls: List[Dict],
+    obstacles: List[Dict],
+    placed_tables: List[Dict],
+    aisle_config: Optional[Dict] = None,
+    table_ids: Optional[List[str]] = None,
+) -> Dict:
+    """Check manually placed tables against the room, obstacles and each other.
+
+    Parameters
+    ----------
+    placed_tables:
+        Table dicts with ``id``, ``x_mm``, ``y_mm`` (centre), ``width_mm``,
+        ``height_mm`` and ``rotation``.
+    table_ids:
+        The tables to check (e.g. the ones just dragged); every table is
+        checked when omitted.  All tables count as neighbours either way.
+
+    Returns
+    -------
+    ``{"valid": bool, "conflicts": [...], "index_stats": {...}}`` where each
+    conflict names a table ``id`` and what it hits: ``outside_zone``,
+    ``obstacles``, ``overlapping`` and ``too_close`` (see
+    :meth:`PlacementIndex.conflicts`).
+    """
+    wall_objects = [WallSegment(**w) for w in walls]
+    obstacle_objects = [ObstacleZone(**o) for o in obstacles]
+    aisle = AisleConfigObject(**aisle_config) if aisle_config else AisleConfigObject()
+
+    room = _build_room_polygon(wall_objects)
+    zone = room.buffer(-aisle.wall_buffer_mm)
+
+    obstacle_polys = []
+    for obs in obstacle_objects:
+        try:
+            poly = Polygon(obs.polygon)
+        except Exception as exc:
+            logger.warning("Skipping invalid obstacle %s: %s", obs.id, exc)
+            continue
+        if poly.is_valid and not poly.is_empty:
+            obstacle_polys.append((obs.id, poly))
+
+    index = PlacementIndex(zone, obstacle_polys, spacing_mm=aisle.table_spacing_mm)
+
+    footprints: List[Tuple[str, Polygon]] = []
+    for i, table in enumerate(placed_tables):
+        table_id = str(table.get("id") or i)
+        rect = table_footprint(
+            float(table["x_mm"]), float(table["y_mm"]),
+            float(table["width_mm"]), float(table["height_mm"]),
+            float(table.get("rotation") or 0.0),
+        )
+        footprints.append((table_id, rect))
+        index.add(table_id, rect)
+
+    wanted = set(table_ids) if table_ids is not None else None
+    conflicts: List[Dict] = []
+    for table_id, rect in footprints:
+        if wanted is not None and table_id not in wanted:
+            continue
+        found = index.conflicts(rect, ignore=table_id)
+        if found["outside_zone"] or found["obstacles"] or found["overlapping"] or found["too_close"]:
+            conflicts.append({"id": table_id, **found})
+
+    return {"valid": not conflicts, "conflicts": conflicts, "index_stats": index.stats()}
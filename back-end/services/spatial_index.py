@@ -0,0 +1,264 @@
+"""
+Spatial indexes for floorplan geometry.
+
+No Flask dependency — shared by auto-placement, collision validation of
+manually placed tables, and export.  Works in whatever coordinates the
+geometry is given in (millimetres everywhere in this codebase).
+
+* :class:`GeometryIndex` — a Shapely ``STRtree`` over a fixed set of shapes
+  (obstacles, a saved layout).
+* :class:`GridHash` — a uniform grid hash that takes insertions one at a time
+  (tables as they are placed).
+* :class:`PlacementIndex` — both of the above plus the prepared placement
+  zone, answering "may a table go here?".
+
+Every index counts its queries, the candidates its coarse filter returned and
+the exact predicate tests it ran; ``stats()`` exposes them for profiling.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import shapely
+from shapely import affinity
+from shapely.geometry import Polygon, box
+from shapely.geometry.base import BaseGeometry
+from shapely.prepared import prep
+
+
+# ── helpers ────────────────────────────────────────────────────────────────────
+
+def table_footprint(
+    x_mm: float, y_mm: float, width_mm: float, height_mm: float, rotation: float = 0.0
+) -> Polygon:
+    """Return the rectangle a table centred at (*x_mm*, *y_mm*) covers."""
+    rect = box(x_mm - width_mm / 2, y_mm - height_mm / 2, x_mm + width_mm / 2, y_mm + height_mm / 2)
+    if rotation % 360:
+        rect = affinity.rotate(rect, rotation, origin=(x_mm, y_mm))
+    return rect
+
+
+class QueryStats:
+    """Counters for one index: queries, coarse candidates and exact tests."""
+
+    __slots__ = ("queries", "candidates", "exact_tests", "hits")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.candidates = 0
+        self.exact_tests = 0
+        self.hits = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# ── static index ───────────────────────────────────────────────────────────────
+
+class GeometryIndex:
+    """STRtree over a fixed sequence of keyed geometries."""
+
+    def __init__(self, items: Iterable[Tuple[Hashable, BaseGeometry]]):
+        pairs = [(key, geom) for key, geom in items if geom is not None and not geom.is_empty]
+        self._keys: List[Hashable] = [key for key, _ in pairs]
+        self._geoms: List[BaseGeometry] = [geom for _, geom in pairs]
+        self._by_key: Dict[Hashable, BaseGeometry] = dict(pairs)
+        self._tree = shapely.STRtree(self._geoms)
+        self.stats = QueryStats()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def query(self, geom: BaseGeometry, distance: float = 0.0) -> List[Hashable]:
+        """Keys of the geometries intersecting *geom*, or within *distance* of it."""
+        self.stats.queries += 1
+        if not self._keys:
+            return []
+        minx, miny, maxx, maxy = geom.bounds
+        candidates = self._tree.query(box(minx - distance, miny - distance, maxx + distance, maxy + distance))
+        self.stats.candidates += len(candidates)
+        self.stats.exact_tests += len(candidates)
+        if distance > 0:
+            hits = [i for i in candidates if shapely.dwithin(self._geoms[i], geom, distance)]
+        else:
+            hits = [i for i in candidates if self._geoms[i].intersects(geom)]
+        self.stats.hits += len(hits)
+        return [self._keys[i] for i in sorted(hits)]
+
+    def geometry(self, key: Hashable) -> BaseGeometry:
+        return self._by_key[key]
+
+
+# ── incremental index ──────────────────────────────────────────────────────────
+
+class GridHash:
+    """Uniform grid hash over keyed geometries, for sets built one insertion at a time.
+
+    An STRtree is immutable, so rebuilding one per placed table is quadratic; a
+    grid hash inserts in O(cells covered) and answers a query by looking only
+    at the cells the query's bounding box covers.
+    """
+
+    def __init__(self, cell_mm: float):
+        if cell_mm <= 0:
+            raise ValueError("cell_mm must be greater than 0")
+        self.cell_mm = cell_mm
+        self._cells: Dict[Tuple[int, int], List[Hashable]] = defaultdict(list)
+        self._geoms: Dict[Hashable, BaseGeometry] = {}
+        self.stats = QueryStats()
+
+    def __len__(self) -> int:
+        return len(self._geoms)
+
+    def _cell_range(self, bounds: Sequence[float], pad: float = 0.0):
+        minx, miny, maxx, maxy = bounds
+        c = self.cell_mm
+        return (
+            range(math.floor((minx - pad) / c), math.floor((maxx + pad) / c) + 1),
+            range(math.floor((miny - pad) / c), math.floor((maxy + pad) / c) + 1),
+        )
+
+    def insert(self, key: Hashable, geom: BaseGeometry) -> None:
+        """Add *geom* under *key*; a key inserted twice is moved."""
+        if key in self._geoms:
+            self.remove(key)
+        self._geoms[key] = geom
+        xs, ys = self._cell_range(geom.bounds)
+        for ix in xs:
+            for iy in ys:
+                self._cells[(ix, iy)].append(key)
+
+    def remove(self, key: Hashable) -> None:
+        geom = self._geoms.pop(key, None)
+        if geom is None:
+            return
+        xs, ys = self._cell_range(geom.bounds)
+        for ix in xs:
+            for iy in ys:
+                bucket = self._cells.get((ix, iy))
+                if bucket and key in bucket:
+                    bucket.remove(key)
+                    if not bucket:
+                        del self._cells[(ix, iy)]
+
+    def query(self, geom: BaseGeometry, distance: float = 0.0) -> List[Hashable]:
+        """Keys of the inserted geometries intersecting *geom*, or within *distance* of it."""
+        self.stats.queries += 1
+        xs, ys = self._cell_range(geom.bounds, pad=distance)
+        seen = set()
+        candidates: List[Hashable] = []
+        for ix in xs:
+            for iy in ys:
+                for key in self._cells.get((ix, iy), ()):
+                    if key not in seen:
+                        seen.add(key)
+                        candidates.append(key)
+        self.stats.candidates += len(candidates)
+        self.stats.exact_tests += len(candidates)
+        if distance > 0:
+            hits = [k for k in candidates if shapely.dwithin(self._geoms[k], geom, distance)]
+        else:
+            hits = [k for k in candidates if self._geoms[k].intersects(geom)]
+        self.stats.hits += len(hits)
+        return hits
+
+    def geometry(self, key: Hashable) -> BaseGeometry:
+        return self._geoms[key]
+
+
+# ── placement index ────────────────────────────────────────────────────────────
+
+_CLEARANCE_TOLERANCE_MM = 0.05
+
+class PlacementIndex:
+    """The placement zone, its obstacles and the tables placed so far, indexed.
+
+    *zone* is prepared once, so the containment test for each candidate skips
+    re-building the zone's edge structures.  *spacing_mm* is the clearance two
+    tables must keep; obstacles are tested for overlap only (the zone has
+    already been cut around them).
+    """
+
+    def __init__(
+        self,
+        zone: BaseGeometry,
+        obstacles: Iterable[Tuple[Hashable, BaseGeometry]] = (),
+        spacing_mm: float = 0.0,
+        cell_mm: Optional[float] = None,
+    ):
+        self.zone = zone
+        self._prepared_zone = prep(zone)
+        self.spacing_mm = spacing_mm
+        self.obstacles = GeometryIndex(obstacles)
+        self.tables = GridHash(cell_mm or max(spacing_mm * 2, 1000.0))
+        self._zone_tests = 0
+
+    def contains(self, geom: BaseGeometry) -> bool:
+        """True when *geom* lies wholly inside the placement zone."""
+        self._zone_tests += 1
+        return self._prepared_zone.contains(geom)
+
+    def _near_tables(
+        self, geom: BaseGeometry, ignore: Optional[Hashable]
+    ) -> Tuple[List[Hashable], List[Hashable]]:
+        """Table keys overlapping *geom*, and those closer than the spacing without overlapping.
+
+        A table exactly ``spacing_mm`` away keeps the clearance; the tolerance
+        absorbs the float error, and the 0.01 mm rounding of placement output,
+        of layouts built at exactly that pitch.
+        """
+        keep_apart = self.spacing_mm > _CLEARANCE_TOLERANCE_MM
+        distance = self.spacing_mm - _CLEARANCE_TOLERANCE_MM if keep_apart else 0.0
+        overlapping: List[Hashable] = []
+        too_close: List[Hashable] = []
+        for key in self.tables.query(geom, distance=distance):
+            if key == ignore:
+                continue
+            if self.tables.geometry(key).intersection(geom).area > 0:
+                overlapping.append(key)
+            elif keep_apart:
+                too_close.append(key)
+        return overlapping, too_close
+
+    def _obstacles_hit(self, geom: BaseGeometry) -> List[Hashable]:
+        return [
+            key for key in self.obstacles.query(geom)
+            if self.obstacles.geometry(key).intersection(geom).area > 0
+        ]
+
+    def conflicts(self, geom: BaseGeometry, ignore: Optional[Hashable] = None) -> Dict[str, List]:
+        """Everything *geom* would collide with if placed.
+
+        Returns a dict with ``outside_zone`` (bool), ``obstacles`` (keys it
+        overlaps), ``overlapping`` (table keys it overlaps) and ``too_close``
+        (table keys within spacing but not overlapping).  *ignore* skips one
+        table key - the table being moved.
+        """
+        overlapping, too_close = self._near_tables(geom, ignore)
+        return {
+            "outside_zone": not self.contains(geom),
+            "obstacles": self._obstacles_hit(geom),
+            "overlapping": overlapping,
+            "too_close": too_close,
+        }
+
+    def fits(self, geom: BaseGeometry, ignore: Optional[Hashable] = None) -> bool:
+        """True when *geom* is in the zone and clear of obstacles and tables."""
+        if not self.contains(geom):
+            return False
+        overlapping, too_close = self._near_tables(geom, ignore)
+        return not overlapping and not too_close and not self._obstacles_hit(geom)
+
+    def add(self, key: Hashable, geom: BaseGeometry) -> None:
+        self.tables.insert(key, geom)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Query counters per index, for profiling."""
+        return {
+            "zone": {"queries": self._zone_tests},
+            "obstacles": self.obstacles.stats.as_dict(),
+            "tables": self.tables.stats.as_dict(),
+        }
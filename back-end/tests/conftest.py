@@ -112,12 +112,16 @@ if _needs_stub("pymongo"):
     class _FakeDuplicateKeyError(_FakePyMongoError):
         pass
 
+    class _FakeBulkWriteError(_FakePyMongoError):
+        pass
+
     fake_pymongo.MongoClient = _FakeMongoClient
     fake_pymongo.results = fake_pymongo_results
     fake_pymongo.errors = fake_pymongo_errors
     fake_pymongo.ReturnDocument = SimpleNamespace(BEFORE=False, AFTER=True)
     fake_pymongo_errors.PyMongoError = _FakePyMongoError
     fake_pymongo_errors.DuplicateKeyError = _FakeDuplicateKeyError
+    fake_pymongo_errors.BulkWriteError = _FakeBulkWriteError
     fake_pymongo_results.InsertOneResult = object
     fake_pymongo_results.UpdateResult = object
     fake_pymongo_results.DeleteResult = object
@@ -401,6 +405,129 @@ class FakeApplicationsCollection:
         return self.count + matched
 
 
+class FakeMarketTablesCollection:
+    """Stand-in for the materialized grid headers: one document per market, upserted in place."""
+
+    def __init__(self):
+        self.documents: dict = {}
+        self.indexes: list = []
+        self.reads = 0
+        self.writes = 0
+
+    def create_index(self, keys, **kwargs):
+        self.indexes.append((keys, kwargs))
+
+    def find_one(self, query, projection=None):
+        self.reads += 1
+        doc = self.documents.get(query.get("marketId"))
+        if doc is None or not mongo_matches(doc, query):
+            return None
+        return mongo_project(dict(doc), projection)
+
+    def update_one(self, query, update, upsert=False):
+        self.writes += 1
+        doc = self.documents.get(query.get("marketId"))
+        if doc is None:
+            if not upsert:
+                return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+            doc = dict(query)
+            self.documents[query.get("marketId")] = doc
+        doc.update(update.get("$set") or {})
+        for key in update.get("$unset") or {}:
+            doc.pop(key, None)
+        return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+
+    def delete_one(self, query):
+        self.documents.pop(query.get("marketId"), None)
+
+
+class FakeMarketTableRowsCollection:
+    """Stand-in for the materialized grid rows, one document per row of a market's grid."""
+
+    def __init__(self):
+        self.documents: list = []
+        self.indexes: list = []
+        self.finds = 0
+
+    @staticmethod
+    def _matches(doc, query):
+        for key, condition in query.items():
+            value = doc["row"].get(key[len("row."):]) if key.startswith("row.") else doc.get(key)
+            if isinstance(condition, dict):
+                if "$ne" in condition and value == condition["$ne"]:
+                    return False
+            elif value != condition:
+                return False
+        return True
+
+    def create_index(self, keys, **kwargs):
+        self.indexes.append((keys, kwargs))
+
+    def insert_many(self, documents, ordered=True):
+        position = lambda doc: (doc["marketId"], doc["fingerprint"], doc["seq"])
+        held = {position(doc) for doc in self.documents}
+        self.documents.extend(dict(doc) for doc in documents if position(doc) not in held)
+
+    def delete_many(self, query):
+        self.documents = [doc for doc in self.documents if not self._matches(doc, query)]
+
+    def count_documents(self, query):
+        return sum(1 for doc in self.documents if self._matches(doc, query))
+
+    def find(self, query, projection=None):
+        self.finds += 1
+        matched = sorted((doc for doc in self.documents if self._matches(doc, query)), key=lambda doc: doc["seq"])
+        return FakeCursor([mongo_project(dict(doc), projection) for doc in matched])
+
+
+class FakeCursor:
+    """A cursor over documents already in the order the query sorts them."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *_args):
+        return self
+
+    def skip(self, n):
+        self.docs = self.docs[n:]
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    def __iter__(self):
+        return iter(self.docs)
+
+
+@pytest.fixture(autouse=True)
+def slug_resolutions():
+    """Public lookups cache what a slug resolved to; no test sees another test's markets."""
+    from market_documents import forget_market_slug_resolution
+
+    forget_market_slug_resolution()
+    yield
+    forget_market_slug_resolution()
+
+
+@pytest.fixture(autouse=True)
+def market_tables(monkeypatch):
+    """The table view materializes its grid; keep that off the real database everywhere.
+
+    The source data's upload metadata is read to look the grid up; by default there is none, so a
+    test that does not care derives the grid as it always did.
+    """
+    import api.markets as MarketsApi
+
+    fake = FakeMarketTablesCollection()
+    monkeypatch.setattr(MarketsApi, "market_tables_collection", fake)
+    monkeypatch.setattr(MarketsApi, "market_table_rows_collection", FakeMarketTableRowsCollection())
+    monkeypatch.setattr(MarketsApi, "_market_table_indexes_ready", False)
+    monkeypatch.setattr(MarketsApi.SourceDataApi, "get_source_data_revision", lambda _market_id: None)
+    return fake
+
+
 @pytest.fixture(autouse=True)
 def applications(monkeypatch):
     """The D9 lock counts applications; keep that off the real database everywhere."""
@@ -64,7 +64,7 @@ def test_strip_persisted_assignment_statistics_removes_stats_field():
 
 
 def test_get_assignment_statistics_returns_404_when_market_missing(monkeypatch):
-    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query: None)
+    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query, projection=None: None)
 
     result, status = MarketsApi.get_assignment_statistics("missing-market", "viewer@test.com")
 
@@ -73,7 +73,7 @@ def test_get_assignment_statistics_returns_404_when_market_missing(monkeypatch):
 
 
 def test_get_assignment_statistics_returns_403_when_user_cannot_view(monkeypatch):
-    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query: _sample_market_doc())
+    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query, projection=None: _sample_market_doc())
     monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *args, **kwargs: False)
 
     result, status = MarketsApi.get_assignment_statistics("market-123", "viewer@test.com")
@@ -83,7 +83,7 @@ def test_get_assignment_statistics_returns_403_when_user_cannot_view(monkeypatch
 
 
 def test_get_assignment_statistics_bubbles_source_data_error(monkeypatch):
-    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query: _sample_market_doc())
+    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query, projection=None: _sample_market_doc())
     monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *args, **kwargs: True)
     monkeypatch.setattr(
         MarketsApi.SourceDataApi,
@@ -98,7 +98,7 @@ def test_get_assignment_statistics_bubbles_source_data_error(monkeypatch):
 
 
 def test_get_assignment_statistics_returns_derived_statistics(monkeypatch):
-    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query: _sample_market_doc())
+    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query, projection=None: _sample_market_doc())
     monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *args, **kwargs: True)
     monkeypatch.setattr(
         MarketsApi.SourceDataApi,
@@ -236,7 +236,7 @@ def test_derive_unassigned_tables_from_rows_includes_partial_half_table():
 
 
 def test_get_market_tables_returns_404_when_market_missing(monkeypatch):
-    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query: None)
+    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query, projection=None: None)
 
     result, status = MarketsApi.get_market_tables("missing-market", "viewer@test.com")
 
@@ -248,7 +248,7 @@ def test_get_market_tables_returns_403_when_user_cannot_view(monkeypatch):
     monkeypatch.setattr(
         MarketsApi.markets_collection,
         "find_one",
-        lambda query: _sample_market_doc_with_setup(),
+        lambda query, projection=None: _sample_market_doc_with_setup(),
     )
     monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *args, **kwargs: False)
 
@@ -262,7 +262,7 @@ def test_get_market_tables_bubbles_source_data_error(monkeypatch):
     monkeypatch.setattr(
         MarketsApi.markets_collection,
         "find_one",
-        lambda query: _sample_market_doc_with_setup(),
+        lambda query, projection=None: _sample_market_doc_with_setup(),
     )
     monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *args, **kwargs: True)
     monkeypatch.setattr(
@@ -281,7 +281,7 @@ def test_get_market_tables_returns_camel_case_rows(monkeypatch):
     monkeypatch.setattr(
         MarketsApi.markets_collection,
         "find_one",
-        lambda query: _sample_market_doc_with_setup(),
+        lambda query, projection=None: _sample_market_doc_with_setup(),
     )
     monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *args, **kwargs: True)
     monkeypatch.setattr(
@@ -366,7 +366,7 @@ def test_derive_market_table_rows_includes_unassigned_tables():
 
 
 def test_get_assignment_csv_returns_404_when_market_missing(monkeypatch):
-    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query: None)
+    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query, projection=None: None)
 
     result, status = MarketsApi.get_assignment_csv("missing-market", "viewer@test.com")
 
@@ -378,7 +378,7 @@ def test_get_assignment_csv_returns_403_when_user_cannot_view(monkeypatch):
     monkeypatch.setattr(
         MarketsApi.markets_collection,
         "find_one",
-        lambda query: _sample_market_doc_with_setup(),
+        lambda query, projection=None: _sample_market_doc_with_setup(),
     )
     monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *args, **kwargs: False)
 
@@ -389,7 +389,7 @@ def test_get_assignment_csv_returns_403_when_user_cannot_view(monkeypatch):
 
 
 def test_get_assignment_csv_returns_400_when_setup_missing(monkeypatch):
-    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query: _sample_market_doc())
+    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query, projection=None: _sample_market_doc())
     monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *args, **kwargs: True)
 
     result, status = MarketsApi.get_assignment_csv("market-123", "viewer@test.com")
@@ -402,7 +402,7 @@ def test_get_assignment_csv_bubbles_source_data_error(monkeypatch):
     monkeypatch.setattr(
         MarketsApi.markets_collection,
         "find_one",
-        lambda query: _sample_market_doc_with_setup(),
+        lambda query, projection=None: _sample_market_doc_with_setup(),
     )
     monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *args, **kwargs: True)
     monkeypatch.setattr(
@@ -421,7 +421,7 @@ def test_get_assignment_csv_returns_csv_string(monkeypatch):
     monkeypatch.setattr(
         MarketsApi.markets_collection,
         "find_one",
-        lambda query: _sample_market_doc_with_setup(),
+        lambda query, projection=None: _sample_market_doc_with_setup(),
     )
     monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *args, **kwargs: True)
     monkeypatch.setattr(
@@ -453,7 +453,7 @@ def test_get_assignment_csv_surfaces_csv_value_error(monkeypatch):
     monkeypatch.setattr(
         MarketsApi.markets_collection,
         "find_one",
-        lambda query: _sample_market_doc_with_setup(),
+        lambda query, projection=None: _sample_market_doc_with_setup(),
     )
     monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *args, **kwargs: True)
     monkeypatch.setattr(
@@ -517,7 +517,7 @@ def _assigned_market_for_discord():
 
 
 def test_post_assignment_to_discord_returns_404_when_market_missing(monkeypatch):
-    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query: None)
+    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query, projection=None: None)
 
     result, status = MarketsApi.post_assignment_to_discord("missing-market", "owner@test.com")
 
@@ -529,7 +529,7 @@ def test_post_assignment_to_discord_returns_403_when_user_not_owner(monkeypatch)
     monkeypatch.setattr(
         MarketsApi.markets_collection,
         "find_one",
-        lambda query: _sample_market_doc_with_webhook(),
+        lambda query, projection=None: _sample_market_doc_with_webhook(),
     )
     monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *a, **k: False)
 
@@ -542,7 +542,7 @@ def test_post_assignment_to_discord_returns_403_when_user_not_owner(monkeypatch)
 def test_post_assignment_to_discord_returns_400_when_webhook_missing(monkeypatch):
     doc = _sample_market_doc_with_setup()
     doc["discordWebhookUrl"] = None
-    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query: doc)
+    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query, projection=None: doc)
     monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *a, **k: True)
 
     result, status = MarketsApi.post_assignment_to_discord("market-123", "owner@test.com")
@@ -554,7 +554,7 @@ def test_post_assignment_to_discord_returns_400_when_webhook_missing(monkeypatch
 def test_post_assignment_to_discord_returns_400_when_setup_missing(monkeypatch):
     doc = _sample_market_doc()
     doc["discordWebhookUrl"] = "https://discord.com/api/webhooks/abc/xyz"
-    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query: doc)
+    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query, projection=None: doc)
     monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *a, **k: True)
 
     result, status = MarketsApi.post_assignment_to_discord("market-123", "owner@test.com")
@@ -567,7 +567,7 @@ def test_post_assignment_to_discord_returns_404_when_source_data_missing(monkeyp
     monkeypatch.setattr(
         MarketsApi.markets_collection,
         "find_one",
-        lambda query: _sample_market_doc_with_webhook(),
+        lambda query, projection=None: _sample_market_doc_with_webhook(),
     )
     monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *a, **k: True)
     monkeypatch.setattr(
@@ -586,7 +586,7 @@ def test_post_assignment_to_discord_success(monkeypatch):
     monkeypatch.setattr(
         MarketsApi.markets_collection,
         "find_one",
-        lambda query: _sample_market_doc_with_webhook(),
+        lambda query, projection=None: _sample_market_doc_with_webhook(),
     )
     monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *a, **k: True)
     monkeypatch.setattr(
@@ -620,7 +620,7 @@ def test_post_assignment_to_discord_returns_502_on_discord_error_status(monkeypa
     monkeypatch.setattr(
         MarketsApi.markets_collection,
         "find_one",
-        lambda query: _sample_market_doc_with_webhook(),
+        lambda query, projection=None: _sample_market_doc_with_webhook(),
     )
     monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *a, **k: True)
     monkeypatch.setattr(
@@ -645,7 +645,7 @@ def test_post_assignment_to_discord_returns_502_on_connection_error(monkeypatch)
     monkeypatch.setattr(
         MarketsApi.markets_collection,
         "find_one",
-        lambda query: _sample_market_doc_with_webhook(),
+        lambda query, projection=None: _sample_market_doc_with_webhook(),
     )
     monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *a, **k: True)
     monkeypatch.setattr(
@@ -69,14 +69,14 @@ def test_record_attendance_validates_input(monkeypatch):
 
 
 def test_record_attendance_404_when_market_missing(monkeypatch):
-    monkeypatch.setattr(AttendanceApi.markets_collection, "find_one", lambda q: None)
+    monkeypatch.setattr(AttendanceApi.markets_collection, "find_one", lambda q, projection=None: None)
     result, status = AttendanceApi.record_attendance("missing", "v@example.com", "2026-05-01")
     assert status == 404
     assert result["error"] == "Market not found"
 
 
 def test_record_attendance_404_when_no_assignment_for_vendor_on_date(monkeypatch):
-    monkeypatch.setattr(AttendanceApi.markets_collection, "find_one", lambda q: _market_with_assignment())
+    monkeypatch.setattr(AttendanceApi.markets_collection, "find_one", lambda q, projection=None: _market_with_assignment())
     result, status = AttendanceApi.record_attendance("market-123", "other@example.com", "2026-05-01")
     assert status == 404
     assert "No assignment" in result["error"]
@@ -84,7 +84,7 @@ def test_record_attendance_404_when_no_assignment_for_vendor_on_date(monkeypatch
 
 def test_record_attendance_upserts_with_timestamp(monkeypatch):
     fake_coll = FakeAttendanceCollection()
-    monkeypatch.setattr(AttendanceApi.markets_collection, "find_one", lambda q: _market_with_assignment())
+    monkeypatch.setattr(AttendanceApi.markets_collection, "find_one", lambda q, projection=None: _market_with_assignment())
     monkeypatch.setattr(AttendanceApi, "attendance_collection", fake_coll)
 
     result, status = AttendanceApi.record_attendance("market-123", "Vendor@Example.com", "2026-05-01")
@@ -105,8 +105,27 @@ def test_record_attendance_upserts_with_timestamp(monkeypatch):
     assert len(fake_coll.docs) == 1
 
 
+def test_record_attendance_fetches_only_assignments_and_dates(monkeypatch):
+    """Check-in is public; it must not decode the whole setup to verify one assignment."""
+    projections = []
+
+    def find_one(query, projection=None):
+        projections.append(projection)
+        return _market_with_assignment()
+
+    monkeypatch.setattr(AttendanceApi.markets_collection, "find_one", find_one)
+    monkeypatch.setattr(AttendanceApi, "attendance_collection", FakeAttendanceCollection())
+
+    AttendanceApi.record_attendance("market-123", "vendor@example.com", "2026-05-01")
+
+    assert projections == [{
+        "assignmentObject.vendorAssignments": 1,
+        "setupObject.marketDates": 1,
+    }]
+
+
 def test_get_vendor_assignment_summary_404_when_market_missing(monkeypatch):
-    monkeypatch.setattr(AttendanceApi, "get_published_market_by_slug", lambda slug: None)
+    monkeypatch.setattr(AttendanceApi, "get_published_market_by_slug", lambda slug, fields=None: None)
     result, status = AttendanceApi.get_vendor_assignment_summary("nope", "v@example.com")
     assert status == 404
     assert result["error"] == "Market not found"
@@ -114,7 +133,7 @@ def test_get_vendor_assignment_summary_404_when_market_missing(monkeypatch):
 
 def test_get_vendor_assignment_summary_404_when_no_assignment(monkeypatch):
     market = _market_with_assignment()
-    monkeypatch.setattr(AttendanceApi, "get_published_market_by_slug", lambda slug: market)
+    monkeypatch.setattr(AttendanceApi, "get_published_market_by_slug", lambda slug, fields=None: market)
     monkeypatch.setattr(AttendanceApi.SourceDataApi, "get_source_data", lambda mid: ({"headers": [], "data": []}, 200))
 
     assigned = SimpleNamespace(
@@ -136,7 +155,7 @@ def test_get_vendor_assignment_summary_404_when_no_assignment(monkeypatch):
 
 def test_get_vendor_assignment_summary_returns_camel_case_with_attendance_flag(monkeypatch):
     market = _market_with_assignment()
-    monkeypatch.setattr(AttendanceApi, "get_published_market_by_slug", lambda slug: market)
+    monkeypatch.setattr(AttendanceApi, "get_published_market_by_slug", lambda slug, fields=None: market)
     monkeypatch.setattr(AttendanceApi.SourceDataApi, "get_source_data", lambda mid: ({"headers": [], "data": []}, 200))
 
     assigned = SimpleNamespace(
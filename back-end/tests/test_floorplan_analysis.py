@@ -0,0 +1,405 @@
+"""Floorplan analysis is cached by image content, coalesced across requests and can run offline."""
+import io
+import threading
+import time
+from functools import lru_cache
+
+import pytest
+from PIL import Image, ImageDraw
+from pymongo.errors import PyMongoError
+
+import app as app_module
+import services.floorplan_analysis as FloorplanAnalysis
+from services.floorplan_analysis import (
+    MODEL_MAX_SIDE_PX,
+    AnalysisCache,
+    AnalysisFailed,
+    AnalysisUnavailable,
+    analyze_image,
+    prepare_image,
+)
+from services.floorplan_cv import analyze_plan
+from services.floorplan_render import base_image_cache
+
+RESULT = {"walls": [{"start": [0, 0], "end": [1, 0], "thickness_mm": 150, "is_exterior": True}],
+          "obstacles": [], "rooms": []}
+AI_RESULT = {**RESULT, "source": "ai"}
+
+
+@lru_cache(maxsize=None)
+def _plan(size=(2000, 1000), inner_wall=True):
+    """A room outline with one inner wall and some lettering."""
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([100, 100, size[0] - 100, size[1] - 100], outline="black", width=8)
+    if inner_wall:
+        draw.line([(size[0] // 2, 100), (size[0] // 2, size[1] * 6 // 10)], fill="black", width=6)
+    draw.text((300, 300), "Main hall", fill="black")
+    output = io.BytesIO()
+    img.save(output, format="PNG")
+    return output.getvalue()
+
+
+def _detected(image_bytes):
+    return analyze_plan(image_bytes).result
+
+
+class MemoryAnalyses:
+    def __init__(self):
+        self.docs = {}
+        self.failing = False
+
+    def find_one(self, query, projection=None):
+        if self.failing:
+            raise PyMongoError("down")
+        return self.docs.get(query["_id"])
+
+    def replace_one(self, query, doc, upsert=False):
+        if self.failing:
+            raise PyMongoError("down")
+        self.docs[query["_id"]] = {"_id": query["_id"], **doc}
+
+
+@pytest.fixture
+def analyses(monkeypatch):
+    collection = MemoryAnalyses()
+    monkeypatch.setattr(FloorplanAnalysis, "analysis_cache", AnalysisCache(collection))
+    monkeypatch.setenv("GEMINI_API_KEY", "gemini-key")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("FLOORPLAN_ANALYZER", "ai")
+    return collection
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """Gemini answering :data:`RESULT` after a short delay; records each call."""
+    calls = []
+
+    def call_gemini(image_bytes):
+        calls.append(image_bytes)
+        time.sleep(0.05)
+        return RESULT
+
+    monkeypatch.setattr(FloorplanAnalysis, "_call_gemini", call_gemini)
+    return calls
+
+
+class TestResultsAreCached:
+    def test_the_same_image_is_analysed_once(self, analyses, gemini):
+        assert analyze_image(_plan()) == AI_RESULT
+        assert analyze_image(_plan()) == AI_RESULT
+
+        assert len(gemini) == 1
+        [doc] = analyses.docs.values()
+        assert doc["analyzer"] == "ai"
+
+    def test_the_key_is_the_content(self, analyses, gemini):
+        analyze_image(_plan())
+        analyze_image(_plan(inner_wall=False))
+
+        assert len(gemini) == 2
+
+    def test_a_cache_outage_is_a_miss(self, analyses, gemini):
+        analyses.failing = True
+
+        assert analyze_image(_plan()) == AI_RESULT
+        assert analyze_image(_plan()) == AI_RESULT
+        assert len(gemini) == 2
+
+    def test_a_failure_is_not_cached(self, analyses, monkeypatch):
+        monkeypatch.setattr(FloorplanAnalysis, "_call_gemini", lambda _: 1 / 0)
+
+        with pytest.raises(AnalysisFailed):
+            analyze_image(_plan())
+        assert analyses.docs == {}
+
+    def test_without_keys_the_ai_is_unavailable(self, analyses, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY")
+
+        with pytest.raises(AnalysisUnavailable):
+            analyze_image(_plan())
+
+
+class TestConcurrentRequestsShareOneAnalysis:
+    def _concurrently(self, n):
+        results, errors = [], []
+
+        def run():
+            try:
+                results.append(analyze_image(_plan()))
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=run) for _ in range(n)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_one_call_answers_them_all(self, analyses, gemini):
+        results, errors = self._concurrently(6)
+
+        assert errors == []
+        assert results == [AI_RESULT] * 6
+        assert len(gemini) == 1
+        assert FloorplanAnalysis._in_flight == {}
+
+    def test_a_failure_reaches_every_waiter(self, analyses, monkeypatch):
+        calls = []
+
+        def call_gemini(image_bytes):
+            calls.append(1)
+            time.sleep(0.05)
+            raise RuntimeError("quota")
+
+        monkeypatch.setattr(FloorplanAnalysis, "_call_gemini", call_gemini)
+
+        results, errors = self._concurrently(4)
+
+        assert results == []
+        assert len(errors) == 4 and all(isinstance(exc, AnalysisFailed) for exc in errors)
+        assert len(calls) == 1
+        assert FloorplanAnalysis._in_flight == {}
+
+
+class TestClientsAreReused:
+    def test_one_openai_client_per_key(self):
+        assert FloorplanAnalysis._openai_client("k1") is FloorplanAnalysis._openai_client("k1")
+        assert FloorplanAnalysis._openai_client("k1") is not FloorplanAnalysis._openai_client("k2")
+
+    def test_one_gemini_client_per_key(self):
+        assert FloorplanAnalysis._gemini_client("k1") is FloorplanAnalysis._gemini_client("k1")
+
+
+class TestLocalAnalyzer:
+    def test_it_finds_the_outline_and_the_inner_wall(self):
+        walls = _detected(_plan())["walls"]
+
+        horizontal = [w for w in walls if w["start"][1] == w["end"][1]]
+        vertical = sorted((w for w in walls if w["start"][0] == w["end"][0]), key=lambda w: w["start"][0])
+        assert len(horizontal) == 2 and len(vertical) == 3
+        assert all(w["is_exterior"] for w in horizontal)
+        assert [w["is_exterior"] for w in vertical] == [True, False, True]
+        inner = vertical[1]
+        assert inner["start"][0] == pytest.approx(0.5, abs=0.005)
+        assert inner["end"][1] - inner["start"][1] == pytest.approx(0.5, abs=0.01)
+
+    def test_lettering_is_not_a_wall(self):
+        img = Image.new("RGB", (1000, 500), "white")
+        ImageDraw.Draw(img).text((100, 100), "Stage  Bar  Exit", fill="black")
+        output = io.BytesIO()
+        img.save(output, format="PNG")
+
+        assert _detected(output.getvalue())["walls"] == []
+
+    def test_it_is_deterministic(self):
+        assert _detected(_plan()) == _detected(_plan())
+
+    def test_it_answers_without_keys_and_is_cached_apart_from_the_ai(self, analyses, gemini, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY")
+        monkeypatch.setenv("FLOORPLAN_ANALYZER", "local")
+
+        result = analyze_image(_plan())
+
+        assert result == {**_detected(_plan()), "source": "cv", "confidence": analyze_plan(_plan()).confidence}
+        assert gemini == []
+        [key] = analyses.docs
+        assert key.startswith("local:")
+
+    def test_the_endpoint_uses_it(self, analyses, monkeypatch):
+        monkeypatch.setenv("FLOORPLAN_ANALYZER", "local")
+        monkeypatch.setitem(app_module.app.config, "LOGIN_DISABLED", True)
+        monkeypatch.setattr(FloorplanAnalysis, "_call_gemini", lambda _: pytest.fail("called the AI"))
+        monkeypatch.setattr("api.floorplans_analysis.get_image", lambda gridfs_id: _plan())
+
+        response = app_module.app.test_client().post("/floorplans/analyze", json={"gridfs_id": "plan"})
+
+        assert response.status_code == 200
+        assert len(response.get_json()["walls"]) == 5
+
+
+@lru_cache(maxsize=None)
+def _curvy_plan():
+    """An open plan drawn mostly in arcs, which the detector cannot explain."""
+    img = Image.new("RGB", (2000, 1000), "white")
+    draw = ImageDraw.Draw(img)
+    draw.line([(100, 900), (1900, 900)], fill="black", width=8)
+    for x in range(200, 1800, 400):
+        draw.arc([x, 200, x + 300, 500], start=0, end=300, fill="black", width=4)
+    output = io.BytesIO()
+    img.save(output, format="PNG")
+    return output.getvalue()
+
+
+@pytest.fixture
+def tiered(analyses, monkeypatch):
+    monkeypatch.setenv("FLOORPLAN_ANALYZER", "tiered")
+    monkeypatch.delenv("FLOORPLAN_CV_MIN_CONFIDENCE", raising=False)
+    return analyses
+
+
+class TestTieredAnalysis:
+    def test_a_plan_the_detector_is_sure_of_never_reaches_the_ai(self, tiered, gemini):
+        result = analyze_image(_plan())
+
+        assert result["source"] == "cv"
+        assert result["confidence"] >= 0.75
+        assert gemini == []
+        [key] = tiered.docs
+        assert key.startswith("tiered:")
+
+    def test_a_plan_it_is_unsure_of_is_sent_to_the_ai(self, tiered, gemini):
+        assert analyze_image(_curvy_plan()) == AI_RESULT
+        assert analyze_image(_curvy_plan()) == AI_RESULT
+
+        assert len(gemini) == 1
+
+    def test_the_threshold_is_configurable(self, tiered, gemini, monkeypatch):
+        monkeypatch.setenv("FLOORPLAN_CV_MIN_CONFIDENCE", "1.01")
+
+        assert analyze_image(_plan()) == AI_RESULT
+
+    def test_without_the_ai_the_detector_answers_but_is_not_cached(self, tiered, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY")
+
+        result = analyze_image(_curvy_plan())
+
+        assert result == {**_detected(_curvy_plan()), "source": "cv",
+                          "confidence": analyze_plan(_curvy_plan()).confidence}
+        assert tiered.docs == {}
+
+    def test_a_failed_ai_falls_back_to_the_detector(self, tiered, monkeypatch):
+        monkeypatch.setattr(FloorplanAnalysis, "_call_gemini", lambda _: 1 / 0)
+
+        assert analyze_image(_curvy_plan())["source"] == "cv"
+        assert tiered.docs == {}
+
+    def test_refining_asks_the_ai_even_when_the_detector_is_sure(self, tiered, gemini):
+        analyze_image(_plan())
+
+        assert analyze_image(_plan(), refine=True) == AI_RESULT
+        assert len(gemini) == 1
+        assert analyze_image(_plan())["source"] == "cv"
+
+    def test_the_endpoint_passes_refine_through(self, tiered, gemini, monkeypatch):
+        monkeypatch.setitem(app_module.app.config, "LOGIN_DISABLED", True)
+        monkeypatch.setattr("api.floorplans_analysis.get_image", lambda gridfs_id: _plan())
+        client = app_module.app.test_client()
+
+        assert client.post("/floorplans/analyze", json={"gridfs_id": "plan"}).get_json()["source"] == "cv"
+        refined = client.post("/floorplans/analyze", json={"gridfs_id": "plan", "refine": True})
+        assert refined.get_json() == AI_RESULT
+        bad = client.post("/floorplans/analyze", json={"gridfs_id": "plan", "refine": "yes"})
+        assert bad.status_code == 400
+
+
+@pytest.fixture
+def prepared_cache():
+    base_image_cache.clear()
+    yield base_image_cache
+    base_image_cache.clear()
+
+
+def _encoded(img, fmt="PNG"):
+    output = io.BytesIO()
+    img.save(output, format=fmt)
+    return output.getvalue()
+
+
+class TestImagesArePreparedForTheModel:
+    def test_a_large_plan_is_sent_small_as_webp(self, prepared_cache, caplog):
+        original = _plan((6000, 3000))
+
+        with caplog.at_level("INFO", logger="services.floorplan_analysis"):
+            prepared = prepare_image(original)
+
+        assert (prepared.width, prepared.height) == (MODEL_MAX_SIDE_PX, MODEL_MAX_SIDE_PX // 2)
+        assert prepared.mime_type == "image/webp"
+        assert Image.open(io.BytesIO(prepared.data)).format == "WEBP"
+        assert len(prepared.data) * 4 < len(original)
+        assert f"{len(original)} bytes at 6000x3000" in caplog.text
+        assert f"{len(prepared.data)} bytes at 1536x768" in caplog.text
+
+    def test_a_small_plan_is_not_enlarged(self, prepared_cache):
+        assert prepare_image(_plan((800, 400)))[2:] == (800, 400)
+
+    def test_transparency_is_flattened_onto_white(self, prepared_cache):
+        prepared = prepare_image(_encoded(Image.new("RGBA", (100, 100), (0, 0, 0, 0))))
+
+        assert Image.open(io.BytesIO(prepared.data)).convert("RGB").getpixel((50, 50)) == (255, 255, 255)
+
+    def test_each_image_is_prepared_once(self, prepared_cache, monkeypatch):
+        plan = _plan((3000, 1500))
+        saves = []
+        original_save = Image.Image.save
+        monkeypatch.setattr(Image.Image, "save", lambda img, *a, **k: saves.append(1) or original_save(img, *a, **k))
+
+        first = prepare_image(plan)
+        second = prepare_image(plan)
+
+        assert first == second
+        assert len(saves) == 1
+
+    def test_what_is_not_an_image_is_sent_as_it_is(self, prepared_cache):
+        assert prepare_image(b"not an image").data == b"not an image"
+
+    def test_positions_on_the_prepared_image_are_positions_on_the_original(self, prepared_cache):
+        img = Image.new("RGB", (6001, 2999), "white")
+        ImageDraw.Draw(img).line([(1500, 300), (1500, 2700)], fill="black", width=12)
+
+        [wall] = _detected(prepare_image(_encoded(img)).data)["walls"]
+
+        assert wall["start"][0] == pytest.approx(1500 / 6001, abs=0.002)
+        assert wall["start"][1] == pytest.approx(300 / 2999, abs=0.002)
+        assert wall["end"][1] == pytest.approx(2700 / 2999, abs=0.002)
+
+    def test_the_model_is_sent_the_prepared_image(self, analyses, prepared_cache, monkeypatch):
+        sent = []
+        monkeypatch.setattr(FloorplanAnalysis, "_call_gemini", lambda image: sent.append(image) or RESULT)
+
+        analyze_image(_plan((6000, 3000)))
+
+        assert [(image.mime_type, image.width) for image in sent] == [("image/webp", MODEL_MAX_SIDE_PX)]
+
+
+class TestAnswersAreFractionsOfTheImage:
+    def _answer(self, monkeypatch, answer):
+        monkeypatch.setattr(FloorplanAnalysis, "_call_gemini", lambda image: answer)
+        return analyze_image(_plan((3072, 1536)))
+
+    def test_fractions_are_kept(self, analyses, prepared_cache, monkeypatch):
+        result = self._answer(monkeypatch, {"walls": [{"start": [0.25, 0.5], "end": [1, 0.5]}],
+                                            "obstacles": [], "rooms": []})
+
+        assert result["walls"][0]["start"] == [0.25, 0.5]
+        assert result["walls"][0]["end"] == [1.0, 0.5]
+
+    def test_pixels_of_the_image_sent_become_fractions(self, analyses, prepared_cache, monkeypatch):
+        result = self._answer(monkeypatch, {
+            "walls": [{"start": [384, 384], "end": [1536, 384]}],
+            "obstacles": [{"polygon": [[768, 192], [0, 0], [900, 900]], "type": "pillar"}],
+        })
+
+        assert result["walls"][0]["start"] == [0.25, 0.5]
+        assert result["walls"][0]["end"] == [1.0, 0.5]
+        assert result["obstacles"][0]["polygon"] == [[0.5, 0.25], [0.0, 0.0], [900 / 1536, 1.0]]
+
+    def test_points_off_the_image_are_clamped(self, analyses, prepared_cache, monkeypatch):
+        result = self._answer(monkeypatch, {"walls": [{"start": [-0.1, 384], "end": [5000, 384]}]})
+
+        assert result["walls"][0]["start"] == [0.0, 0.5]
+        assert result["walls"][0]["end"] == [1.0, 0.5]
+
+    def test_a_fraction_overshooting_the_edge_is_clamped_not_read_as_pixels(
+        self, analyses, prepared_cache, monkeypatch,
+    ):
+        monkeypatch.setattr(FloorplanAnalysis, "_call_gemini", lambda image: {
+            "walls": [{"start": [0.1, 0.2], "end": [1.02, 1.0]}],
+            "obstacles": [{"polygon": [[0.5, 0.5], [1.01, 0.5], [1.01, 1.03]], "type": "stage"}],
+        })
+
+        result = analyze_image(_plan((1536, 1086)))
+
+        assert result["walls"][0]["end"] == [1.0, 1.0]
+        assert result["obstacles"][0]["polygon"] == [[0.5, 0.5], [1.0, 0.5], [1.0, 1.0]]
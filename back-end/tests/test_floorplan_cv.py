@@ -0,0 +1,169 @@
+"""The local detector reads walls and obstacles off a plan, quickly and with a measure of its confidence."""
+import io
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from services import floorplan_cv as FloorplanCv
+from services.floorplan_cv import analyze_plan
+
+
+def _encoded(img):
+    output = io.BytesIO()
+    img.save(output, format="PNG")
+    return output.getvalue()
+
+
+def _hall(size=(2000, 1000)):
+    """An enclosed hall: the outline, an inner wall, a chamfered corner, a pillar, a stage and lettering."""
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([100, 100, 1900, 900], outline="black", width=8)
+    draw.line([(1000, 100), (1000, 600)], fill="black", width=6)
+    draw.line([(1200, 900), (1900, 400)], fill="black", width=6)
+    draw.rectangle([400, 400, 440, 440], fill="black")
+    draw.rectangle([1300, 150, 1500, 250], fill="black")
+    draw.text((300, 300), "Main hall", fill="black")
+    draw.text((1100, 700), "Stage left 12m", fill="black")
+    return img
+
+
+def _is_axis(wall):
+    return wall["start"][0] == wall["end"][0] or wall["start"][1] == wall["end"][1]
+
+
+class TestWalls:
+    def test_the_outline_and_inner_walls_are_found(self):
+        walls = analyze_plan(_encoded(_hall())).result["walls"]
+
+        axis = [w for w in walls if _is_axis(w)]
+        assert len(axis) == 5
+        assert sum(w["is_exterior"] for w in axis) == 4
+
+    def test_a_diagonal_wall_is_found_end_to_end(self):
+        walls = analyze_plan(_encoded(_hall())).result["walls"]
+
+        [diagonal] = [w for w in walls if not _is_axis(w)]
+        ends = sorted([diagonal["start"], diagonal["end"]])
+        assert ends[0] == pytest.approx([0.6, 0.9], abs=0.015)
+        assert ends[1] == pytest.approx([0.95, 0.4], abs=0.015)
+        assert diagonal["is_exterior"]
+
+    def test_hatching_is_not_a_wall(self):
+        img = Image.new("RGB", (1000, 1000), "white")
+        draw = ImageDraw.Draw(img)
+        for x in range(0, 1000, 12):
+            draw.line([(x, 400), (x + 20, 420)], fill="black", width=1)
+
+        assert analyze_plan(_encoded(img)).result["walls"] == []
+
+
+class TestObstacles:
+    def test_solid_blobs_are_obstacles_by_size(self):
+        obstacles = analyze_plan(_encoded(_hall())).result["obstacles"]
+
+        by_type = {o["type"]: o["polygon"] for o in obstacles}
+        assert set(by_type) == {"pillar", "fixture"}
+        assert by_type["pillar"][0] == pytest.approx([0.2, 0.4], abs=0.005)
+        assert by_type["pillar"][2] == pytest.approx([0.22, 0.44], abs=0.005)
+        assert by_type["fixture"][0] == pytest.approx([0.65, 0.15], abs=0.005)
+
+    def test_lettering_is_neither_a_wall_nor_an_obstacle(self):
+        img = Image.new("RGB", (1000, 500), "white")
+        ImageDraw.Draw(img).text((100, 100), "Stage  Bar  Exit  ###", fill="black")
+
+        analysis = analyze_plan(_encoded(img))
+
+        assert analysis.result == {"walls": [], "obstacles": [], "rooms": []}
+        assert analysis.confidence == 0.0
+
+    def test_outlined_furniture_is_not_solid(self):
+        img = Image.new("RGB", (1000, 1000), "white")
+        ImageDraw.Draw(img).ellipse([300, 300, 420, 420], outline="black", width=2)
+
+        assert analyze_plan(_encoded(img)).result["obstacles"] == []
+
+
+class TestConfidence:
+    def test_an_enclosed_plan_it_fully_explains_is_trusted(self):
+        assert analyze_plan(_encoded(_hall())).confidence >= 0.9
+
+    def test_an_open_plan_full_of_curves_is_not(self):
+        img = Image.new("RGB", (2000, 1000), "white")
+        draw = ImageDraw.Draw(img)
+        draw.line([(100, 900), (1900, 900)], fill="black", width=8)
+        for x in range(200, 1800, 400):
+            draw.arc([x, 200, x + 300, 500], start=0, end=300, fill="black", width=4)
+
+        assert analyze_plan(_encoded(img)).confidence < 0.6
+
+
+def _hatched(size=1024):
+    """Short diagonal strokes all over the page: many Hough peaks, none of them a wall."""
+    img = Image.new("RGB", (size, size), "white")
+    draw = ImageDraw.Draw(img)
+    for y in range(40, size - 40, 60):
+        for x in range(0, size - 30, 14):
+            draw.line([(x, y), (x + 20, y + 20)], fill="black", width=1)
+    return img
+
+
+def _counting(monkeypatch, name):
+    """Count the calls *name* of numpy gets; the call still runs."""
+    calls = []
+    real = getattr(np, name)
+    monkeypatch.setattr(FloorplanCv.np, name, lambda *a, **kw: calls.append(1) or real(*a, **kw))
+    return calls
+
+
+class TestBoundedWork:
+    def test_a_large_plan_is_analysed_at_the_working_size(self, monkeypatch):
+        sizes = []
+        real_ink = FloorplanCv._ink
+        monkeypatch.setattr(FloorplanCv, "_ink", lambda gray: sizes.append(gray.shape) or real_ink(gray))
+
+        walls = analyze_plan(_encoded(_hall((6000, 3000)))).result["walls"]
+
+        assert sizes == [(FloorplanCv._WORK_SIDE_PX // 2, FloorplanCv._WORK_SIDE_PX)]
+        assert len([w for w in walls if not _is_axis(w)]) == 1
+
+    def test_the_hough_pass_stops_after_its_peaks(self, monkeypatch):
+        ink = FloorplanCv._ink(np.asarray(_hatched().convert("L")))
+        monkeypatch.setattr(FloorplanCv, "_MAX_HOUGH_PEAKS", 5)
+        peaks = _counting(monkeypatch, "argmax")
+        votes = _counting(monkeypatch, "bincount")
+
+        assert FloorplanCv._diagonal_walls(ink, np.zeros_like(ink)) == []
+        assert len(peaks) == 5
+        assert len(votes) == -(-int(ink.sum()) // FloorplanCv._HOUGH_CHUNK_PX)
+
+    def test_a_page_of_noise_is_given_up_on_before_any_pass(self, monkeypatch):
+        noise = np.random.default_rng(7).integers(0, 256, (1024, 1024), dtype=np.uint8)
+        for name in ("_axis_walls", "_obstacles", "_diagonal_walls"):
+            monkeypatch.setattr(FloorplanCv, name, lambda *_a, **_kw: pytest.fail("a pass ran on noise"))
+
+        analysis = analyze_plan(_encoded(Image.fromarray(noise)))
+
+        assert analysis.result["walls"] == [] and analysis.result["obstacles"] == []
+        assert analysis.confidence == 0.0
+
+    def test_leftover_ink_too_dense_for_lines_is_not_searched(self, monkeypatch):
+        speckle = np.random.default_rng(7).random((1024, 1024)) < 0.15
+        monkeypatch.setattr(FloorplanCv.np, "bincount", lambda *_a, **_kw: pytest.fail("Hough pass ran"))
+
+        assert FloorplanCv._diagonal_walls(speckle, np.zeros_like(speckle)) == []
+
+    def test_the_votes_are_counted_a_chunk_at_a_time(self, monkeypatch):
+        monkeypatch.setattr(FloorplanCv, "_HOUGH_CHUNK_PX", 97)
+
+        walls = analyze_plan(_encoded(_hall())).result["walls"]
+
+        assert len([w for w in walls if not _is_axis(w)]) == 1
+
+
+class TestDeterminism:
+    def test_the_same_plan_gives_the_same_answer(self):
+        data = _encoded(_hall())
+
+        assert analyze_plan(data) == analyze_plan(data)
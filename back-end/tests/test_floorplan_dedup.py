@@ -0,0 +1,278 @@
+"""Floorplan images are stored once per content and deleted with their last owner."""
+import io
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import ServerSelectionTimeoutError
+
+import app as app_module
+import api.markets as MarketsApi
+import api.permissions as PermissionsApi
+import services.floorplan_uploads as FloorplanUploads
+import services.gridfs_service as GridfsService
+from assignment.utils import convert_keys_to_snake_case
+from conftest import FakeMarketsCollection, client_market, stored_market
+from datatypes import MarketRole, SetupObject
+from services.floorplan_uploads import store_pages
+from services.gridfs_service import (
+    add_image_owner,
+    content_hash,
+    delete_image,
+    get_image,
+    market_owner,
+    release_images,
+    upload_image,
+    upload_owner,
+)
+from test_floorplan_geometry import _floorplan
+from test_floorplan_renditions import _png, install_memory_gridfs
+from test_lazy_market import _setup_object
+from test_pdf_converter import poppler  # noqa: F401  (fixture)
+
+ALICE = upload_owner("alice")
+BOB = upload_owner("bob")
+
+
+@pytest.fixture
+def gridfs(monkeypatch):
+    return install_memory_gridfs(monkeypatch)
+
+
+def _originals(gridfs):
+    return [doc for doc in gridfs.files.docs.values() if "renditionOf" not in doc["metadata"]]
+
+
+class TestUploadingStoredBytes:
+    def test_the_stored_file_is_reused_and_owned_by_both(self, gridfs, monkeypatch):
+        first = upload_image(_png((3000, 1500)), "spring.png", ALICE)
+        monkeypatch.setattr(GridfsService, "_store_renditions", lambda *_: pytest.fail("rendered again"))
+
+        second = upload_image(_png((3000, 1500)), "autumn.png", BOB)
+
+        assert second == first
+        [original] = _originals(gridfs)
+        assert original["metadata"]["sha256"] == content_hash(_png((3000, 1500)))
+        assert original["metadata"]["owners"] == [ALICE, BOB]
+        assert len(gridfs.data) == 3
+
+    def test_an_owner_uploading_again_is_one_owner(self, gridfs):
+        upload_image(_png((600, 300)), "spring.png", ALICE)
+        upload_image(_png((600, 300)), "autumn.png", ALICE)
+
+        [original] = _originals(gridfs)
+        assert original["metadata"]["owners"] == [ALICE]
+
+    def test_different_bytes_are_different_files(self, gridfs):
+        assert upload_image(_png((600, 300)), "a.png", ALICE) != upload_image(_png((600, 301)), "b.png", ALICE)
+
+    def test_an_upload_that_loses_the_race_uses_the_winners_file(self, gridfs, monkeypatch):
+        winner = {}
+        real_put = gridfs.put
+
+        def put(data, _id=None, **kwargs):
+            if not winner and "sha256" in kwargs["metadata"]:
+                # Another worker stores the same bytes between our lookup and our insert
+                winner["id"] = real_put(data, filename="other.png", metadata={**kwargs["metadata"], "owners": [ALICE]})
+            return real_put(data, _id=_id, **kwargs)
+
+        monkeypatch.setattr(gridfs, "put", put)
+
+        assert upload_image(_png((3000, 1500)), "plan.png", BOB) == str(winner["id"])
+        assert gridfs.files.docs[winner["id"]]["metadata"]["owners"] == [ALICE, BOB]
+        # Our renditions went with our copy; the winner's renditions are the other worker's to make
+        assert len(gridfs.data) == 1
+
+
+class TestDeletingAnOwner:
+    def test_the_file_stays_until_its_last_owner_goes(self, gridfs):
+        gridfs_id = upload_image(_png((3000, 1500)), "spring.png", ALICE)
+        upload_image(_png((3000, 1500)), "autumn.png", BOB)
+
+        assert delete_image(gridfs_id, ALICE)
+        assert get_image(gridfs_id) == _png((3000, 1500))
+
+        assert delete_image(gridfs_id, BOB)
+        assert gridfs.files.docs == {}
+        assert not delete_image(gridfs_id, BOB)
+
+    def test_deleting_again_does_not_take_another_owners_file(self, gridfs):
+        gridfs_id = upload_image(_png((600, 300)), "spring.png", ALICE)
+        upload_image(_png((600, 300)), "autumn.png", BOB)
+
+        assert delete_image(gridfs_id, ALICE)
+        assert not delete_image(gridfs_id, ALICE)
+        assert not delete_image(gridfs_id, upload_owner("mallory"))
+
+        assert get_image(gridfs_id) == _png((600, 300))
+
+    def test_a_file_stored_before_owners_is_deleted_at_once(self, gridfs):
+        oid = gridfs.put(_png((600, 300)), filename="old.png", metadata={"contentType": "image/png"})
+
+        assert delete_image(str(oid), ALICE)
+        assert gridfs.files.docs == {}
+
+    def test_a_rendition_is_not_deleted_on_its_own(self, gridfs):
+        gridfs_id = upload_image(_png((3000, 1500)), "plan.png", ALICE)
+        thumbnail_id = gridfs.files.docs[ObjectId(gridfs_id)]["metadata"]["renditions"]["thumbnail"]
+
+        assert not delete_image(thumbnail_id, ALICE)
+        assert ObjectId(thumbnail_id) in gridfs.data
+
+    def test_bytes_uploaded_again_after_deletion_are_stored_afresh(self, gridfs):
+        gridfs_id = upload_image(_png((600, 300)), "plan.png", ALICE)
+        delete_image(gridfs_id, ALICE)
+
+        again = upload_image(_png((600, 300)), "plan.png", ALICE)
+
+        assert again != gridfs_id
+        assert get_image(again) == _png((600, 300))
+
+    def test_the_delete_endpoint_lets_go_of_the_users_hold_once(self, gridfs, monkeypatch):
+        monkeypatch.setitem(app_module.app.config, "LOGIN_DISABLED", True)
+        client = app_module.app.test_client()
+        gridfs_id = upload_image(_png((600, 300)), "plan.png", upload_owner(None))
+        upload_image(_png((600, 300)), "plan.png", BOB)
+
+        assert client.delete(f"/floorplans/{gridfs_id}").status_code == 200
+        assert client.delete(f"/floorplans/{gridfs_id}").status_code == 404
+        assert client.get(f"/floorplans/{gridfs_id}").status_code == 200
+
+
+class TestMarketsHoldTheirImages:
+    def test_an_image_a_market_shows_outlives_its_uploader(self, gridfs):
+        gridfs_id = upload_image(_png((600, 300)), "plan.png", ALICE)
+
+        assert add_image_owner(gridfs_id, market_owner("market-1"))
+        delete_image(gridfs_id, ALICE)
+
+        assert get_image(gridfs_id) == _png((600, 300))
+
+    def test_deleting_the_market_lets_go_of_its_images(self, gridfs):
+        kept = upload_image(_png((600, 300)), "kept.png", ALICE)
+        dropped = upload_image(_png((600, 301)), "dropped.png", ALICE)
+        for gridfs_id in (kept, dropped):
+            add_image_owner(gridfs_id, market_owner("market-1"))
+        delete_image(dropped, ALICE)
+
+        assert release_images(market_owner("market-1")) == 2
+
+        assert get_image(kept) == _png((600, 300))
+        assert get_image(dropped) is None
+
+    def test_a_deleted_image_cannot_be_held(self, gridfs):
+        gridfs_id = upload_image(_png((600, 300)), "plan.png", ALICE)
+        delete_image(gridfs_id, ALICE)
+
+        assert not add_image_owner(gridfs_id, market_owner("market-1"))
+        assert not add_image_owner("not-an-id", market_owner("market-1"))
+
+
+class DeletableMarkets(FakeMarketsCollection):
+    def delete_one(self, _query):
+        self.doc = None
+
+
+class TestMarketWritesHoldTheirImages:
+    @pytest.fixture
+    def markets(self, gridfs, monkeypatch):
+        fake = DeletableMarkets(stored_market())
+        monkeypatch.setattr(MarketsApi, "markets_collection", fake)
+        monkeypatch.setattr(PermissionsApi, "user_has_permission", lambda *_args, **_kwargs: True)
+        monkeypatch.setattr(PermissionsApi, "get_user_market_role", lambda *_args, **_kwargs: MarketRole.OWNER)
+        monkeypatch.setattr(MarketsApi.SourceDataApi, "delete_source_data", lambda _market_id: None)
+        return fake
+
+    def test_a_market_holds_the_image_it_saves_until_it_is_deleted(self, markets):
+        gridfs_id = upload_image(_png((600, 300)), "plan.png", ALICE)
+        floorplan = {**_floorplan(tables=1), "imageGridfsId": gridfs_id}
+        setup = SetupObject(**convert_keys_to_snake_case({**_setup_object(), "floorplans": [floorplan]}))
+
+        MarketsApi.update_market("market-123", client_market(setup_object=setup), "user-1")
+        delete_image(gridfs_id, ALICE)
+        assert get_image(gridfs_id) == _png((600, 300))
+
+        MarketsApi.delete_market("market-123", "user-1")
+        assert get_image(gridfs_id) is None
+
+
+class TestTheHashIndex:
+    def test_it_is_built_before_the_first_upload(self, gridfs):
+        upload_image(_png((600, 300)), "plan.png", ALICE)
+
+        [(keys, options)] = gridfs.files.indexes
+        assert keys == [(GridfsService.SHA256_FIELD, 1)]
+        assert options["unique"] and options["name"] == GridfsService.SHA256_INDEX
+
+    def test_no_image_is_stored_without_it(self, gridfs, monkeypatch):
+        def create_index(*_args, **_kwargs):
+            raise ServerSelectionTimeoutError("no primary")
+
+        monkeypatch.setattr(gridfs.files, "create_index", create_index)
+
+        with pytest.raises(GridfsService.ImageIndexError):
+            upload_image(_png((600, 300)), "plan.png", ALICE)
+        assert gridfs.data == {}
+
+
+class TestUploadingAStoredPdf:
+    def test_its_pages_are_not_rendered_again(self, gridfs, poppler):  # noqa: F811
+        fake = poppler(3)
+        first = sorted(store_pages(b"%PDF", "venue.pdf", "application/pdf", ALICE), key=lambda page: page["page"])
+        rendered = len(fake.rendered)
+
+        second = list(store_pages(b"%PDF", "venue.pdf", "application/pdf", ALICE))
+
+        assert len(fake.rendered) == rendered == 3
+        assert [page["gridfs_id"] for page in second] == [page["gridfs_id"] for page in first]
+        assert [page["width"] for page in second] == [401, 402, 403]
+        assert all(doc["metadata"]["owners"] == [ALICE] for doc in _originals(gridfs))
+
+    def test_a_pdf_whose_page_went_missing_is_rendered_again(self, gridfs, poppler):  # noqa: F811
+        fake = poppler(2)
+        pages = sorted(store_pages(b"%PDF", "venue.pdf", "application/pdf", ALICE), key=lambda page: page["page"])
+        gridfs.delete(ObjectId(pages[0]["gridfs_id"]))
+
+        again = list(store_pages(b"%PDF", "venue.pdf", "application/pdf", ALICE))
+
+        assert len(fake.rendered) == 4
+        assert len(again) == 2
+        # The surviving page was shared by both uploads, not leaked by the abandoned reuse
+        survivor = next(doc for doc in _originals(gridfs) if str(doc["_id"]) == pages[1]["gridfs_id"])
+        assert survivor["metadata"]["owners"] == [ALICE]
+
+    def test_deleting_a_page_forgets_the_pdf(self, gridfs, poppler):  # noqa: F811
+        poppler(2)
+        pages = list(store_pages(b"%PDF", "venue.pdf", "application/pdf", ALICE))
+
+        delete_image(pages[0]["gridfs_id"], ALICE)
+
+        assert gridfs.sources.docs == {}
+
+    def test_reused_pages_are_analysed_when_asked(self, gridfs, poppler, monkeypatch):  # noqa: F811
+        poppler(1)
+        monkeypatch.setattr(FloorplanUploads, "analyze_image", lambda png: {"bytes": len(png)})
+        list(store_pages(b"%PDF", "venue.pdf", "application/pdf", ALICE))
+
+        [page] = store_pages(b"%PDF", "venue.pdf", "application/pdf", ALICE, analyze=True)
+
+        assert page["analysis"] == {"bytes": len(get_image(page["gridfs_id"]))}
+
+    def test_the_upload_endpoint_reuses_the_pages(self, gridfs, poppler, monkeypatch):  # noqa: F811
+        monkeypatch.setitem(app_module.app.config, "LOGIN_DISABLED", True)
+        client = app_module.app.test_client()
+        fake = poppler(2)
+
+        def upload():
+            return client.post(
+                "/floorplans/upload",
+                data={"file": (io.BytesIO(b"%PDF"), "venue.pdf", "application/pdf")},
+                content_type="multipart/form-data",
+            ).get_json()["pages"]
+
+        first = upload()
+        second = upload()
+
+        assert len(fake.rendered) == 2
+        assert [page["page"] for page in second] == [1, 2]
+        assert [page["gridfs_id"] for page in second] == [page["gridfs_id"] for page in first]
+        assert all(ObjectId(page["gridfs_id"]) in gridfs.files.docs for page in second)
@@ -0,0 +1,227 @@
+"""Exports reuse the decoded floorplan, draw tables on their own layer and can be cut to a region or tile."""
+import io
+
+import pytest
+from PIL import Image
+
+import app as app_module
+import services.floorplan_render as FloorplanRender
+from services.floorplan_render import (
+    BaseImageCache,
+    base_image_cache,
+    draw_tables,
+    section_color,
+    tile_region,
+)
+
+# 2000 x 1000 px plan at 0.5 px/mm: 4 m x 2 m
+PLAN_SIZE = (2000, 1000)
+SCALE = 0.5
+
+
+def _png(size=PLAN_SIZE, mode="RGB", color=(200, 200, 200)):
+    output = io.BytesIO()
+    Image.new(mode, size, color).save(output, format="PNG")
+    return output.getvalue()
+
+
+def _table(x_mm, y_mm, code="A1", section="A"):
+    return {"x_mm": x_mm, "y_mm": y_mm, "width_mm": 400, "height_mm": 200, "rotation": 0,
+            "table_code": code, "section_name": section}
+
+
+@pytest.fixture
+def stored_images(monkeypatch):
+    """GridFS reads, counted per id."""
+    images = {"plan": _png()}
+    reads = []
+
+    def get_image(gridfs_id):
+        reads.append(gridfs_id)
+        return images.get(gridfs_id)
+
+    monkeypatch.setattr(FloorplanRender, "get_image", get_image)
+    base_image_cache.clear()
+    yield images, reads
+    base_image_cache.clear()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(app_module.app.config, "LOGIN_DISABLED", True)
+    return app_module.app.test_client()
+
+
+def _export(client, options=None, **overrides):
+    body = {"gridfs_id": "plan", "placed_tables": [_table(1000, 500)], "scale_px_per_mm": SCALE}
+    if options is not None:
+        body["options"] = options
+    body.update(overrides)
+    return client.post("/floorplans/export", json=body)
+
+
+def _decoded(response):
+    return Image.open(io.BytesIO(response.data))
+
+
+class TestTheBaseImageIsDecodedOnce:
+    def test_a_second_export_of_the_same_plan_does_not_read_it_again(self, client, stored_images):
+        _, reads = stored_images
+
+        first = _export(client)
+        second = _export(client, placed_tables=[_table(2000, 1000, code="B7")])
+
+        assert first.status_code == second.status_code == 200
+        assert reads == ["plan"]
+        assert first.data != second.data
+
+    def test_drawing_an_export_leaves_the_cached_image_untouched(self, client, stored_images):
+        _export(client)
+
+        image, _ = FloorplanRender.base_image("plan")
+
+        assert image.getpixel((500, 250)) == (200, 200, 200)
+
+    def test_the_cache_evicts_the_least_recently_used_image_past_its_byte_bound(self):
+        small = Image.new("RGB", (10, 10))
+        cache = BaseImageCache(max_bytes=2 * 10 * 10 * 3)
+        cache.put(("a", None), small, 1.0)
+        cache.put(("b", None), small, 1.0)
+        cache.get(("a", None))
+
+        cache.put(("c", None), small, 1.0)
+
+        assert cache.get(("b", None)) is None
+        assert cache.get(("a", None)) is not None
+        assert cache.stats()["bytes"] == 2 * 10 * 10 * 3
+
+    def test_a_transparent_plan_is_flattened_onto_white(self, client, stored_images):
+        images, _ = stored_images
+        images["plan"] = _png(mode="RGBA", color=(0, 0, 0, 0))
+
+        response = _export(client, placed_tables=[_table(3800, 1800)])
+
+        assert _decoded(response).getpixel((10, 10)) == (255, 255, 255)
+
+
+class TestCheaperFormats:
+    @pytest.mark.parametrize("fmt, mimetype, pil_format", [
+        ("jpeg", "image/jpeg", "JPEG"),
+        ("webp", "image/webp", "WEBP"),
+    ])
+    def test_the_format_can_be_chosen(self, client, stored_images, fmt, mimetype, pil_format):
+        response = _export(client, {"format": fmt, "quality": 60})
+
+        assert response.status_code == 200
+        assert response.mimetype == mimetype
+        assert _decoded(response).format == pil_format
+
+    def test_lower_quality_is_smaller(self, client, stored_images):
+        images, _ = stored_images
+        noisy = Image.effect_noise(PLAN_SIZE, 64).convert("RGB")
+        output = io.BytesIO()
+        noisy.save(output, format="PNG")
+        images["plan"] = output.getvalue()
+
+        high = _export(client, {"format": "jpeg", "quality": 95})
+        low = _export(client, {"format": "jpeg", "quality": 30})
+
+        assert len(low.data) < len(high.data)
+
+    def test_the_format_can_come_from_the_query_string(self, client, stored_images):
+        response = client.post(
+            "/floorplans/export?format=webp",
+            json={"gridfs_id": "plan", "placed_tables": [_table(1000, 500)], "scale_px_per_mm": SCALE},
+        )
+
+        assert response.mimetype == "image/webp"
+
+    @pytest.mark.parametrize("options", [{"format": "gif"}, {"quality": 0}, {"quality": 101}, {"quality": "high"}])
+    def test_unknown_formats_and_qualities_are_refused(self, client, stored_images, options):
+        assert _export(client, options).status_code == 400
+
+
+class TestRegionsAndTiles:
+    def test_a_region_export_is_the_size_of_the_region(self, client, stored_images):
+        response = _export(client, {"region": {"x": 100, "y": 50, "width": 300, "height": 200}})
+
+        assert _decoded(response).size == (300, 200)
+
+    def test_a_region_is_clipped_to_the_image(self, client, stored_images):
+        response = _export(client, {"region": {"x": 1900, "y": 900, "width": 500, "height": 500}})
+
+        assert _decoded(response).size == (100, 100)
+
+    def test_tiles_cover_the_image_and_the_last_is_cut_short(self, client, stored_images):
+        last = _export(client, {"tile": {"size": 768, "col": 2, "row": 1}})
+
+        assert _decoded(last).size == (2000 - 2 * 768, 1000 - 768)
+        assert _export(client, {"tile": {"size": 768, "col": 3, "row": 0}}).status_code == 400
+
+    def test_a_table_is_drawn_in_the_tile_it_falls_in(self, client, stored_images):
+        # Table centred at (500, 250) px, 200 x 100 px
+        tables = [_table(1000, 500, code="")]
+
+        inside = _decoded(_export(client, {"tile": {"size": 512, "col": 0, "row": 0}}, placed_tables=tables))
+        outside = _decoded(_export(client, {"tile": {"size": 512, "col": 2, "row": 1}}, placed_tables=tables))
+
+        assert inside.getpixel((400, 250)) != (200, 200, 200)
+        assert outside.getcolors() == [(512 * 488, (200, 200, 200))]
+
+    def test_tables_away_from_the_region_are_not_drawn(self, monkeypatch):
+        colored = []
+        monkeypatch.setattr(FloorplanRender, "section_color", lambda name: colored.append(name) or "#ff0000")
+        tables = FloorplanRender.parse_tables([_table(1000, 500, section="near"), _table(3500, 1500, section="far")])
+
+        layer = draw_tables(tables, SCALE, (0, 0, 512, 512), show_codes=False)
+
+        assert colored == ["near"]
+        assert layer.getpixel((400, 250))[3] > 0
+        assert tile_region(PLAN_SIZE, 512, 3, 1) == (1536, 512, 2000, 1000)
+
+    def test_region_and_tile_together_are_refused(self, client, stored_images):
+        options = {"region": {"x": 0, "y": 0, "width": 10, "height": 10}, "tile": {"size": 512}}
+
+        assert _export(client, options).status_code == 400
+
+
+class TestDownscaledExports:
+    def test_max_size_fits_the_long_side_and_tables_scale_with_it(self, client, stored_images):
+        tables = [_table(1000, 500, code="")]
+
+        full = _decoded(_export(client, placed_tables=tables))
+        half = _decoded(_export(client, {"max_size_px": 1000}, placed_tables=tables))
+
+        assert half.size == (1000, 500)
+        assert full.getpixel((400, 250)) != (200, 200, 200)
+        assert half.getpixel((200, 125)) != (200, 200, 200)
+
+    def test_each_size_is_cached_separately(self, client, stored_images):
+        _, reads = stored_images
+
+        _export(client, {"max_size_px": 1000})
+        _export(client, {"max_size_px": 1000})
+        _export(client)
+
+        assert reads == ["plan", "plan"]
+
+
+class TestExportErrors:
+    def test_a_missing_image_is_not_found(self, client, stored_images):
+        assert _export(client, gridfs_id="nope").status_code == 404
+
+    def test_data_that_is_not_an_image_is_refused(self, client, stored_images):
+        images, _ = stored_images
+        images["plan"] = b"not an image"
+
+        response = _export(client)
+
+        assert response.status_code == 400
+        assert response.get_json()["error"] == "Stored data is not a valid image"
+
+
+class TestSectionColors:
+    def test_a_section_gets_the_same_color_in_every_process(self):
+        # crc32("A") picks a fixed palette entry; hash() would vary per process
+        assert section_color("A") == section_color("A") == "#aaffc3"
+        assert section_color("") == "#cccccc"
@@ -0,0 +1,195 @@
+"""Floorplan geometry can be stored packed, and reads the same however it was stored."""
+import bson
+import pytest
+
+from conftest import FakeMarketsCollection, client_market, stored_market
+
+import api.markets as MarketsApi
+import api.permissions as PermissionsApi
+import market_documents as MarketDocuments
+from assignment.utils import convert_keys_to_camel_case, convert_keys_to_snake_case
+from datatypes import FloorplanObject, MarketRole, SetupObject
+from market_documents import market_from_document
+from services.floorplan_geometry import (
+    PACKED_KEY,
+    pack_floorplan,
+    unpack_floorplan,
+    unpack_setup_floorplans,
+)
+from test_lazy_market import _setup_object
+
+
+def _floorplan(tables=400):
+    """A stored (camelCase) floorplan: a room, a pillar and rows of placed tables."""
+    corners = [(0.0, 0.0), (42000.25, 0.0), (42000.25, 30000.75), (0.0, 30000.75)]
+    return {
+        "id": "fp-1",
+        "imageGridfsId": "gridfs-1",
+        "scaleUnit": "mm",
+        "tableTypes": [{"id": "6ft", "name": "6 ft", "widthMm": 1830.0, "heightMm": 760.0, "maxCapacity": 2}],
+        "walls": [
+            {"id": f"w{i}", "start": list(corners[i]), "end": list(corners[(i + 1) % 4]),
+             "thicknessMm": 150.0, "isExterior": True}
+            for i in range(4)
+        ] + [{"id": "w-inner", "start": [21000.0, 0.0], "end": [21000.0, 12345.67], "thicknessMm": 100,
+              "isExterior": False}],
+        "obstacles": [
+            {"id": "o1", "polygon": [[5000.0, 5000.0], [5400.0, 5000.0], [5400.0, 5400.0]], "type": "pillar"},
+            {"id": "o2", "polygon": [[100.5, 200.5], [900.5, 200.5], [900.5, 900.5], [100.5, 900.5]],
+             "type": "stage"},
+        ],
+        "placedTables": [
+            {"id": f"t{i}", "tableTypeId": "6ft", "x": 2000.0 + (i % 20) * 1900.123, "y": 2000.0 + (i // 20) * 1400.0,
+             "rotation": 90.0 if i % 3 else 0.0, "widthMm": 1830.0, "heightMm": 760.0,
+             "tableCode": f"A{i}" if i % 2 else None}
+            for i in range(tables)
+        ],
+        "sections": [],
+        "imageWidth": 4200,
+        "imageHeight": 3000,
+    }
+
+
+def _to_quantum(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return value
+    return round(value, 1)
+
+
+def _quantized(obj):
+    if isinstance(obj, dict):
+        return {k: _quantized(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_quantized(v) for v in obj]
+    return _to_quantum(obj)
+
+
+class TestPacking:
+    def test_a_packed_floorplan_unpacks_to_the_same_geometry(self):
+        floorplan = _floorplan()
+
+        packed = pack_floorplan(floorplan)
+
+        assert {"walls", "obstacles", "placedTables"}.isdisjoint(packed)
+        assert _quantized(unpack_floorplan(packed)) == _quantized(floorplan)
+
+    def test_it_is_a_fraction_of_the_size(self):
+        floorplan = _floorplan()
+
+        assert len(bson.encode(pack_floorplan(floorplan))) * 2 < len(bson.encode(floorplan))
+
+    def test_unpacking_is_stable(self):
+        once = unpack_floorplan(pack_floorplan(_floorplan()))
+
+        assert unpack_floorplan(pack_floorplan(once)) == once
+
+    def test_it_validates_as_the_same_model(self):
+        floorplan = _floorplan()
+
+        unpacked = unpack_floorplan(convert_keys_to_snake_case(pack_floorplan(floorplan)), camel=False)
+
+        assert FloorplanObject(**unpacked) == FloorplanObject(**convert_keys_to_snake_case(_quantized(floorplan)))
+
+    def test_the_packed_form_survives_the_document_key_conversions(self):
+        packed = pack_floorplan(_floorplan())
+
+        assert convert_keys_to_snake_case(packed)[PACKED_KEY] == packed[PACKED_KEY]
+        assert convert_keys_to_camel_case(packed)[PACKED_KEY] == packed[PACKED_KEY]
+
+    def test_an_item_with_fields_the_models_do_not_know_is_kept_as_a_list(self):
+        floorplan = _floorplan(tables=3)
+        floorplan["placedTables"][1]["note"] = "by the door"
+
+        packed = pack_floorplan(floorplan)
+
+        assert packed["placedTables"] == floorplan["placedTables"]
+        assert "walls" not in packed
+        assert unpack_floorplan(packed)["placedTables"] == floorplan["placedTables"]
+
+    def test_coordinates_float32_cannot_hold_are_kept_as_a_list(self):
+        floorplan = _floorplan(tables=1)
+        floorplan["walls"][0]["end"] = [5e6, 0.0]
+
+        assert pack_floorplan(floorplan)["walls"] == floorplan["walls"]
+
+    def test_a_floorplan_with_no_geometry_is_unchanged(self):
+        floorplan = {"id": "fp-1", "walls": [], "obstacles": [], "placedTables": []}
+
+        assert pack_floorplan(floorplan) is floorplan
+        assert unpack_floorplan(floorplan) is floorplan
+
+    def test_a_setup_without_packed_floorplans_is_read_as_it_is(self):
+        setup = {"floorplans": [_floorplan(tables=2)]}
+
+        assert unpack_setup_floorplans(setup) is setup
+
+
+def _stored_with_floorplan(floorplan):
+    return stored_market(setupObject={**_setup_object(), "floorplans": [floorplan]})
+
+
+class TestReadingAPackedMarket:
+    def test_eager_and_lazy_reads_see_the_same_floorplan(self):
+        plain = market_from_document(_stored_with_floorplan(_quantized(_floorplan())))
+        packed_document = _stored_with_floorplan(pack_floorplan(_floorplan()))
+
+        assert market_from_document(packed_document) == plain
+        assert market_from_document(packed_document, lazy=True).setup_object == plain.setup_object
+        assert market_from_document(packed_document, lazy=True).model_dump() == plain.model_dump()
+
+    def test_a_lazy_read_decodes_only_when_the_setup_is_read(self, monkeypatch):
+        decoded = []
+        real_unpack = MarketDocuments.unpack_setup_floorplans
+        monkeypatch.setattr(
+            MarketDocuments, "unpack_setup_floorplans", lambda *a, **kw: decoded.append(1) or real_unpack(*a, **kw),
+        )
+        market = market_from_document(_stored_with_floorplan(pack_floorplan(_floorplan())), lazy=True)
+
+        assert market.roles and decoded == []
+        assert isinstance(market.setup_object, SetupObject)
+        assert len(market.setup_object.floorplans[0].placed_tables) == 400
+        assert decoded == [1]
+
+    def test_a_market_served_raw_carries_the_lists(self, monkeypatch):
+        fake = FakeMarketsCollection(_stored_with_floorplan(pack_floorplan(_floorplan(tables=5))))
+        fake.doc["_id"] = "mongo-id"
+        monkeypatch.setattr(MarketsApi, "markets_collection", fake)
+        monkeypatch.setattr(
+            PermissionsApi, "get_user_market_role", lambda *_args, **_kwargs: MarketRole.OWNER,
+        )
+        monkeypatch.setattr(MarketsApi.UsersApi, "get_user_by_id", lambda _uid: None)
+
+        served = MarketsApi.get_market_for_user("owner@example.com", "market-123")
+
+        [floorplan] = served["setupObject"]["floorplans"]
+        assert PACKED_KEY not in floorplan
+        assert _quantized(floorplan) == _quantized(_floorplan(tables=5))
+
+
+class TestWritingPacked:
+    @pytest.fixture
+    def collection(self, monkeypatch):
+        fake = FakeMarketsCollection(stored_market())
+        monkeypatch.setattr(MarketsApi, "markets_collection", fake)
+        monkeypatch.setattr(PermissionsApi, "user_has_permission", lambda *_args, **_kwargs: True)
+        return fake
+
+    def _update(self):
+        setup = SetupObject(**convert_keys_to_snake_case({**_setup_object(), "floorplans": [_floorplan(tables=5)]}))
+        MarketsApi.update_market("market-123", client_market(setup_object=setup), "user-1")
+
+    def test_an_update_packs_floorplans_when_enabled(self, collection, monkeypatch):
+        monkeypatch.setenv("FLOORPLAN_COMPACT_GEOMETRY", "true")
+
+        self._update()
+
+        [floorplan] = collection.last_update["$set"]["setupObject"]["floorplans"]
+        assert PACKED_KEY in floorplan and "placedTables" not in floorplan
+
+    def test_an_update_stores_lists_by_default(self, collection, monkeypatch):
+        monkeypatch.delenv("FLOORPLAN_COMPACT_GEOMETRY", raising=False)
+
+        self._update()
+
+        [floorplan] = collection.last_update["$set"]["setupObject"]["floorplans"]
+        assert PACKED_KEY not in floorplan and len(floorplan["placedTables"]) == 5
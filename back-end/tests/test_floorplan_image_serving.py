@@ -0,0 +1,158 @@
+"""Floorplan images are served straight from GridFS: streamed, range-addressable and cached forever."""
+import io
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+from PIL import Image
+
+import app as app_module
+import api.floorplans as FloorplansApi
+import services.gridfs_service as GridfsService
+from services.gridfs_service import describe_image, open_image
+
+IMAGE_ID = str(ObjectId())
+
+
+def _png(size=(300, 200)):
+    output = io.BytesIO()
+    Image.new("RGB", size, (10, 20, 30)).save(output, format="PNG")
+    return output.getvalue()
+
+
+class FakeGridOut(io.BytesIO):
+    """The parts of ``GridOut`` the service reads, counting bytes read."""
+
+    chunk_size = 64
+
+    def __init__(self, data, metadata=None):
+        super().__init__(data)
+        self.length = len(data)
+        self.metadata = metadata
+        self.upload_date = datetime(2026, 1, 2, tzinfo=timezone.utc)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+class FakeFiles:
+    def __init__(self):
+        self.updates = []
+
+    def create_index(self, keys, **kwargs):
+        pass
+
+    def update_one(self, query, update):
+        self.updates.append((query, update))
+
+    def find_one_and_update(self, query, update, **kwargs):
+        return None
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    """GridFS holding one image: replace its GridOut by assigning ``stored["file"]``."""
+    files = FakeFiles()
+    state = {"file": FakeGridOut(_png(), {"contentType": "image/png", "width": 300, "height": 200}),
+             "files": files, "puts": []}
+
+    class FakeFs:
+        def get(self, oid):
+            if str(oid) != IMAGE_ID:
+                raise GridfsService.NoFile()
+            return state["file"]
+
+        def put(self, data, **kwargs):
+            state["puts"].append(kwargs)
+            return kwargs.get("_id", ObjectId())
+
+    monkeypatch.setattr(GridfsService, "_fs", FakeFs())
+    monkeypatch.setattr(GridfsService, "_db", {"floorplan_images.files": files})
+    monkeypatch.setattr(GridfsService, "_indexes_ready", False)
+    return state
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(app_module.app.config, "LOGIN_DISABLED", True)
+    return app_module.app.test_client()
+
+
+class TestUploadsRecordTheirMetadata:
+    def test_content_type_and_size_come_from_the_header(self):
+        assert describe_image(_png((640, 480))) == {"contentType": "image/png", "width": 640, "height": 480}
+
+    def test_the_upload_stores_them_with_the_file(self, client, stored):
+        response = client.post(
+            "/floorplans/upload",
+            data={"file": (io.BytesIO(_png((640, 480))), "plan.png", "image/png")},
+            content_type="multipart/form-data",
+        )
+
+        assert response.status_code == 201
+        original = stored["puts"][-1]
+        assert response.get_json() == {"gridfs_id": str(original["_id"]), "width": 640, "height": 480}
+        assert original["filename"] == "plan.png"
+        assert original["metadata"].items() >= {"contentType": "image/png", "width": 640, "height": 480}.items()
+
+
+class TestServingStreamsTheFile:
+    def test_the_whole_image_with_its_stored_type_and_cache_headers(self, client, stored):
+        response = client.get(f"/floorplans/{IMAGE_ID}")
+
+        assert response.status_code == 200
+        assert response.mimetype == "image/png"
+        assert response.data == _png()
+        assert response.headers["ETag"] == f'"{IMAGE_ID}"'
+        assert response.headers["Accept-Ranges"] == "bytes"
+        assert "immutable" in response.headers["Cache-Control"]
+        assert "max-age=31536000" in response.headers["Cache-Control"]
+
+    def test_the_image_is_not_decoded_to_serve_it(self, client, stored, monkeypatch):
+        monkeypatch.setattr(GridfsService.Image, "open", lambda *_: pytest.fail("image was decoded"))
+
+        assert client.get(f"/floorplans/{IMAGE_ID}").status_code == 200
+
+    def test_a_matching_etag_is_not_modified(self, client, stored):
+        response = client.get(f"/floorplans/{IMAGE_ID}", headers={"If-None-Match": f'"{IMAGE_ID}"'})
+
+        assert response.status_code == 304
+        assert response.data == b""
+
+    def test_a_range_returns_only_those_bytes(self, client, stored):
+        stored["file"] = FakeGridOut(bytes(range(256)) * 40, {"contentType": "image/png"})
+
+        response = client.get(f"/floorplans/{IMAGE_ID}", headers={"Range": "bytes=5000-5009"})
+
+        assert response.status_code == 206
+        assert response.data == (bytes(range(256)) * 40)[5000:5010]
+        assert response.headers["Content-Range"] == "bytes 5000-5009/10240"
+        assert stored["file"].bytes_read < 200
+
+    def test_a_range_past_the_end_is_not_satisfiable(self, client, stored):
+        response = client.get(f"/floorplans/{IMAGE_ID}", headers={"Range": "bytes=999999-"})
+
+        assert response.status_code == 416
+
+    def test_an_unknown_id_is_not_found(self, client, stored):
+        assert client.get(f"/floorplans/{ObjectId()}").status_code == 404
+        assert client.get("/floorplans/not-an-id").status_code == 404
+
+
+class TestFilesStoredBeforeMetadata:
+    def test_the_header_is_read_once_and_recorded(self, stored):
+        stored["file"] = FakeGridOut(_png((50, 40)), None)
+
+        grid_out, metadata = open_image(IMAGE_ID)
+
+        assert metadata == {"contentType": "image/png", "width": 50, "height": 40}
+        assert grid_out.tell() == 0
+        assert stored["files"].updates == [({"_id": ObjectId(IMAGE_ID)}, {"$set": {"metadata": metadata}})]
+
+    def test_files_with_metadata_are_not_rewritten(self, stored):
+        open_image(IMAGE_ID)
+
+        assert stored["files"].updates == []
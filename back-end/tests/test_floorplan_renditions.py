@@ -0,0 +1,277 @@
+"""Uploads store downscaled renditions, and ``?size=`` serves them instead of the original."""
+import copy
+import io
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import pytest
+from bson import ObjectId
+from PIL import Image, ImageDraw
+from pymongo import ReturnDocument
+
+import app as app_module
+import services.gridfs_service as GridfsService
+from services.gridfs_service import delete_image, open_rendition, upload_image, upload_owner
+
+OWNER = upload_owner("u1")
+
+
+@lru_cache(maxsize=None)
+def _png(size):
+    """A plan-like drawing: walls as lines on white."""
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    for x in range(0, size[0], 37):
+        draw.line([(x, 0), (x, size[1])], fill=(x % 200, 90, 90), width=3)
+    for y in range(0, size[1], 53):
+        draw.line([(0, y), (size[0], y)], fill=(90, y % 200, 90), width=2)
+    output = io.BytesIO()
+    img.save(output, format="PNG")
+    return output.getvalue()
+
+
+class MemoryGridOut(io.BytesIO):
+    chunk_size = 255 * 1024
+
+    def __init__(self, doc, data):
+        super().__init__(data)
+        self.length = len(data)
+        self.filename = doc.get("filename")
+        self.metadata = doc.get("metadata")
+        self.upload_date = doc["uploadDate"]
+
+
+class MemoryFiles:
+    """``floorplan_images.files``, for the queries the service runs."""
+
+    def __init__(self):
+        self.docs = {}
+        self.indexes = []
+
+    def create_index(self, keys, **kwargs):
+        self.indexes.append((keys, kwargs))
+
+    @staticmethod
+    def _get(doc, dotted):
+        for part in dotted.split("."):
+            if isinstance(doc, list) and part.isdigit() and int(part) < len(doc):
+                doc = doc[int(part)]
+            elif isinstance(doc, dict) and part in doc:
+                doc = doc[part]
+            else:
+                return None, False
+        return doc, True
+
+    def _matches(self, doc, query):
+        for field, expected in query.items():
+            value, present = self._get(doc, field)
+            if isinstance(expected, dict) and "$exists" in expected:
+                if present != expected["$exists"]:
+                    return False
+            elif isinstance(expected, dict) and "$gte" in expected:
+                if not present or value < expected["$gte"]:
+                    return False
+            elif isinstance(value, list) and not isinstance(expected, list):
+                if expected not in value:
+                    return False
+            elif value != expected:
+                return False
+        return True
+
+    def find(self, query, projection=None):
+        return [doc for doc in self.docs.values() if self._matches(doc, query)]
+
+    def find_one(self, query, projection=None):
+        found = self.find(query)
+        return found[0] if found else None
+
+    @staticmethod
+    def _apply(doc, update):
+        for operator, fields in update.items():
+            for dotted, value in fields.items():
+                *parents, leaf = dotted.split(".")
+                target = doc
+                for part in parents:
+                    target = target.setdefault(part, {})
+                if operator == "$addToSet":
+                    target[leaf] = target.get(leaf, []) + ([] if value in target.get(leaf, []) else [value])
+                elif operator == "$pull":
+                    target[leaf] = [held for held in target.get(leaf, []) if held != value]
+                else:
+                    target[leaf] = value
+
+    def update_one(self, query, update):
+        matched = 0
+        for doc in self.find(query)[:1]:
+            matched = 1
+            self._apply(doc, update)
+        return type("UpdateResult", (), {"matched_count": matched})()
+
+    def find_one_and_update(self, query, update, projection=None, return_document=ReturnDocument.BEFORE):
+        for doc in self.find(query)[:1]:
+            before = copy.deepcopy(doc)
+            self._apply(doc, update)
+            return doc if return_document == ReturnDocument.AFTER else before
+        return None
+
+
+class MemorySources:
+    """``floorplan_sources``: PDF hash → the pages it was stored as."""
+
+    def __init__(self):
+        self.docs = {}
+
+    def find_one(self, query):
+        return self.docs.get(query["_id"])
+
+    def update_one(self, query, update, upsert=False):
+        if query["_id"] not in self.docs:
+            self.docs[query["_id"]] = {"_id": query["_id"], **update["$setOnInsert"]}
+
+    def delete_one(self, query):
+        self.docs.pop(query["_id"], None)
+
+    def delete_many(self, query):
+        gridfs_id = query[GridfsService.SOURCE_PAGE_FIELD]
+        for key, doc in list(self.docs.items()):
+            if any(page["gridfs_id"] == gridfs_id for page in doc["pages"]):
+                del self.docs[key]
+
+
+class MemoryGridFS:
+    """GridFS over :class:`MemoryFiles`, refusing a second original with the same hash."""
+
+    def __init__(self, files):
+        self.files = files
+        self.data = {}
+
+    def put(self, data, _id=None, **kwargs):
+        _id = _id or ObjectId()
+        digest = (kwargs.get("metadata") or {}).get("sha256")
+        if digest and self.files.find({GridfsService.SHA256_FIELD: digest}):
+            raise GridfsService.FileExists()
+        self.files.docs[_id] = {"_id": _id, "uploadDate": datetime.now(timezone.utc), **kwargs}
+        self.data[_id] = data
+        return _id
+
+    def get(self, oid):
+        if oid not in self.files.docs:
+            raise GridfsService.NoFile()
+        return MemoryGridOut(self.files.docs[oid], self.data[oid])
+
+    def delete(self, oid):
+        self.files.docs.pop(oid, None)
+        self.data.pop(oid, None)
+
+
+def install_memory_gridfs(monkeypatch):
+    """Point the GridFS service at in-memory collections; returns the :class:`MemoryGridFS`."""
+    files = MemoryFiles()
+    fs = MemoryGridFS(files)
+    fs.sources = MemorySources()
+    monkeypatch.setattr(GridfsService, "_fs", fs)
+    monkeypatch.setattr(GridfsService, "_indexes_ready", False)
+    monkeypatch.setattr(GridfsService, "_db", {
+        GridfsService.FLOORPLAN_FILES_COLLECTION: files,
+        GridfsService.FLOORPLAN_SOURCES_COLLECTION: fs.sources,
+    })
+    return fs
+
+
+@pytest.fixture
+def gridfs(monkeypatch):
+    return install_memory_gridfs(monkeypatch)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(app_module.app.config, "LOGIN_DISABLED", True)
+    return app_module.app.test_client()
+
+
+class TestUploadMakesRenditions:
+    def test_each_rendition_is_a_smaller_webp_linked_to_the_original(self, gridfs):
+        gridfs_id = upload_image(_png((3000, 1500)), "plan.png", OWNER)
+
+        original = gridfs.files.docs[ObjectId(gridfs_id)]["metadata"]
+        sizes = {}
+        for name, rendition_id in original["renditions"].items():
+            metadata = gridfs.files.docs[ObjectId(rendition_id)]["metadata"]
+            assert metadata["renditionOf"] == ObjectId(gridfs_id)
+            assert metadata["contentType"] == "image/webp"
+            image = Image.open(io.BytesIO(gridfs.data[ObjectId(rendition_id)]))
+            assert image.format == "WEBP"
+            sizes[name] = image.size
+        assert sizes == {"thumbnail": (256, 128), "screen": (2048, 1024)}
+
+    def test_a_small_image_is_its_own_screen_rendition(self, gridfs):
+        gridfs_id = upload_image(_png((1000, 500)), "plan.png", OWNER)
+
+        renditions = gridfs.files.docs[ObjectId(gridfs_id)]["metadata"]["renditions"]
+        assert renditions["screen"] == gridfs_id
+        assert renditions["thumbnail"] != gridfs_id
+        assert len(gridfs.data) == 2
+
+    def test_deleting_the_original_deletes_its_renditions(self, gridfs):
+        gridfs_id = upload_image(_png((3000, 1500)), "plan.png", OWNER)
+
+        assert delete_image(gridfs_id, OWNER)
+        assert gridfs.files.docs == {}
+
+
+class TestServingARendition:
+    def test_the_thumbnail_is_kilobytes_and_has_its_own_etag(self, client, gridfs):
+        gridfs_id = upload_image(_png((3000, 1500)), "plan.png", OWNER)
+
+        full = client.get(f"/floorplans/{gridfs_id}")
+        thumbnail = client.get(f"/floorplans/{gridfs_id}?size=thumbnail")
+
+        assert thumbnail.mimetype == "image/webp"
+        assert Image.open(io.BytesIO(thumbnail.data)).size == (256, 128)
+        assert len(thumbnail.data) * 20 < len(full.data)
+        assert thumbnail.headers["ETag"] != full.headers["ETag"]
+
+    def test_full_is_the_original(self, client, gridfs):
+        data = _png((600, 300))
+        gridfs_id = upload_image(data, "plan.png", OWNER)
+
+        assert client.get(f"/floorplans/{gridfs_id}?size=full").data == data
+
+    def test_an_unknown_size_is_refused(self, client, gridfs):
+        gridfs_id = upload_image(_png((600, 300)), "plan.png", OWNER)
+
+        assert client.get(f"/floorplans/{gridfs_id}?size=huge").status_code == 400
+
+
+class TestImagesStoredBeforeRenditions:
+    def test_the_first_request_makes_and_records_them(self, gridfs):
+        oid = gridfs.put(_png((3000, 1500)), filename="old.png", metadata={"contentType": "image/png"})
+
+        served_id, grid_out, metadata = open_rendition(str(oid), "screen")
+        again, _, _ = open_rendition(str(oid), "screen")
+
+        assert Image.open(grid_out).size == (2048, 1024)
+        assert served_id == again == gridfs.files.docs[oid]["metadata"]["renditions"]["screen"]
+        assert len(gridfs.data) == 3
+
+    def test_a_request_that_loses_the_race_keeps_the_recorded_renditions(self, gridfs, monkeypatch):
+        oid = gridfs.put(_png((600, 300)), filename="old.png", metadata={"contentType": "image/png"})
+        winner = {"thumbnail": "recorded", "screen": str(oid)}
+        real_update = gridfs.files.update_one
+
+        def update_one(query, update):
+            gridfs.files.docs[oid]["metadata"]["renditions"] = winner
+            return real_update(query, update)
+
+        monkeypatch.setattr(gridfs.files, "update_one", update_one)
+
+        assert GridfsService._backfill_renditions(str(oid), gridfs.get(oid)) == winner
+        assert len(gridfs.data) == 1
+
+    def test_a_rendition_asked_for_a_size_is_served_as_is(self, gridfs):
+        gridfs_id = upload_image(_png((3000, 1500)), "plan.png", OWNER)
+        thumbnail_id = gridfs.files.docs[ObjectId(gridfs_id)]["metadata"]["renditions"]["thumbnail"]
+
+        served_id, _, _ = open_rendition(thumbnail_id, "screen")
+
+        assert served_id == thumbnail_id
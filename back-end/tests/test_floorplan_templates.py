@@ -0,0 +1,223 @@
+"""Template pickers page through summaries and fetch the one template they load in full."""
+import pytest
+
+import app as app_module
+import api.floorplans_templates as FloorplanTemplates
+from api.floorplans_templates import MAX_PAGE_SIZE, TEMPLATE_INDEXES
+
+OWNER = {"_id": "u1", "id": "user-1", "email": "owner@example.com"}
+MEMBER = {"_id": "u2", "id": "user-2", "email": "member@example.com"}
+STRANGER = {"_id": "u3", "id": "user-3", "email": "stranger@example.com"}
+ORG = {"id": "org-1", "owner": OWNER["id"], "admins": [], "members": [MEMBER["id"]]}
+
+
+class MemoryCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            self.docs.sort(key=lambda doc: doc.get(field), reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    def __iter__(self):
+        return iter(self.docs)
+
+
+class MemoryCollection:
+    """A collection answering the queries and projections the templates API runs."""
+
+    def __init__(self, docs=()):
+        self.docs = [dict(doc) for doc in docs]
+        self.queries = []
+
+    def _matches(self, doc, query):
+        for field, expected in query.items():
+            if field == "$and":
+                if not all(self._matches(doc, part) for part in expected):
+                    return False
+            elif field == "$or":
+                if not any(self._matches(doc, part) for part in expected):
+                    return False
+            elif isinstance(expected, dict):
+                if not doc.get(field) < expected["$lt"]:
+                    return False
+            elif doc.get(field) != expected:
+                return False
+        return True
+
+    def _project(self, doc, projection):
+        if not projection:
+            return dict(doc)
+        projected = {}
+        for field, spec in projection.items():
+            if isinstance(spec, dict):
+                projected[field] = len(doc.get(spec["$size"]["$ifNull"][0][1:]) or [])
+            elif spec and field in doc:
+                projected[field] = doc[field]
+        return projected
+
+    def find(self, query, projection=None):
+        self.queries.append((query, projection))
+        return MemoryCursor([self._project(doc, projection) for doc in self.docs if self._matches(doc, query)])
+
+    def find_one(self, query, projection=None):
+        found = list(self.find(query, projection))
+        return found[0] if found else None
+
+    def insert_one(self, doc):
+        doc["_id"] = f"oid-{len(self.docs)}"
+        self.docs.append(dict(doc))
+        return type("Inserted", (), {"inserted_id": doc["_id"]})()
+
+
+def _template(n, owner=OWNER, organization_id=None, table_types=2):
+    return {
+        "_id": f"oid-{n}",
+        "id": f"tpl-{n:03d}",
+        "name": f"Layout {n}",
+        "ownerUserId": owner["id"],
+        "organizationId": organization_id,
+        "tableTypes": [{"name": f"Type {i}", "widthMm": 1800, "depthMm": 750} for i in range(table_types)],
+        "aisles": {"wallBufferMm": 1500.0},
+        "createdAt": "2026-01-01T00:00:00",
+        "updatedAt": f"2026-02-{n % 28 + 1:02d}T00:00:00",
+    }
+
+
+@pytest.fixture
+def store(monkeypatch):
+    state = {
+        "templates": MemoryCollection(),
+        "organizations": MemoryCollection([ORG]),
+        "users": MemoryCollection([OWNER, MEMBER, STRANGER]),
+    }
+    monkeypatch.setattr(FloorplanTemplates, "templates_collection", state["templates"])
+    monkeypatch.setattr(FloorplanTemplates, "organizations_collection", state["organizations"])
+    monkeypatch.setattr(FloorplanTemplates, "db", {"users": state["users"]})
+    return state
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(app_module.app.config, "LOGIN_DISABLED", True)
+    return app_module.app.test_client()
+
+
+def _list(client, user=OWNER, **params):
+    return client.get("/floorplans/templates", query_string=params, headers={"X-Owner-Email": user["email"]})
+
+
+def _all_pages(client, **params):
+    pages, cursor = [], None
+    while True:
+        body = _list(client, **params, **({"cursor": cursor} if cursor else {})).get_json()
+        pages.append(body["templates"])
+        cursor = body["nextCursor"]
+        if cursor is None:
+            return pages
+
+
+class TestListingIsASummary:
+    def test_a_summary_leaves_the_table_types_behind(self, client, store):
+        store["templates"].docs = [_template(1, table_types=3)]
+
+        [summary] = _list(client).get_json()["templates"]
+
+        assert summary == {
+            "id": "tpl-001",
+            "name": "Layout 1",
+            "ownerUserId": "user-1",
+            "organizationId": None,
+            "createdAt": "2026-01-01T00:00:00",
+            "updatedAt": "2026-02-02T00:00:00",
+            "tableTypeCount": 3,
+        }
+
+    def test_the_summary_is_projected_in_the_database(self, client, store):
+        _list(client)
+
+        [(_, projection)] = store["templates"].queries
+        assert "tableTypes" not in projection and "aisles" not in projection
+
+    def test_the_organization_is_read_for_its_membership_only(self, client, store):
+        _list(client, user=MEMBER, organizationId=ORG["id"])
+
+        [(_, projection)] = store["organizations"].queries
+        assert set(projection) == {"_id", "owner", "members", "admins"}
+
+
+class TestListingIsPaged:
+    def test_pages_cover_every_template_once_newest_first(self, client, store):
+        store["templates"].docs = [_template(n) for n in range(1, 26)]
+
+        pages = _all_pages(client, limit=10)
+
+        assert [len(page) for page in pages] == [10, 10, 5]
+        listed = [summary["id"] for page in pages for summary in page]
+        assert sorted(listed) == sorted(doc["id"] for doc in store["templates"].docs)
+        keys = [(summary["updatedAt"], summary["id"]) for page in pages for summary in page]
+        assert keys == sorted(keys, reverse=True)
+
+    def test_templates_updated_at_the_same_moment_are_not_skipped(self, client, store):
+        store["templates"].docs = [{**_template(n), "updatedAt": "2026-03-01T00:00:00"} for n in range(7)]
+
+        pages = _all_pages(client, limit=3)
+
+        assert sorted(s["id"] for page in pages for s in page) == [f"tpl-{n:03d}" for n in range(7)]
+
+    def test_a_small_listing_is_one_page(self, client, store):
+        store["templates"].docs = [_template(1)]
+
+        assert _list(client).get_json()["nextCursor"] is None
+
+    def test_only_the_users_own_templates_are_listed(self, client, store):
+        store["templates"].docs = [_template(1), _template(2, owner=STRANGER)]
+
+        assert [s["id"] for s in _list(client).get_json()["templates"]] == ["tpl-001"]
+
+    def test_a_page_is_at_most_the_maximum(self, client, store):
+        store["templates"].docs = [_template(n) for n in range(MAX_PAGE_SIZE + 5)]
+
+        assert len(_list(client, limit=10_000).get_json()["templates"]) == MAX_PAGE_SIZE
+
+    @pytest.mark.parametrize("limit", ["0", "-5", "ten"])
+    def test_a_bad_page_size_is_refused(self, client, store, limit):
+        assert _list(client, limit=limit).status_code == 400
+
+    @pytest.mark.parametrize("cursor", ["not-base64!", "WzFd", "bnVsbA=="])
+    def test_a_bad_cursor_is_refused(self, client, store, cursor):
+        assert _list(client, cursor=cursor).status_code == 400
+
+    def test_the_listing_order_is_what_the_indexes_hold(self):
+        for keys in TEMPLATE_INDEXES.values():
+            assert keys[1:] == [("updatedAt", -1), ("id", -1)]
+
+
+class TestFetchingOneTemplate:
+    def test_it_carries_the_table_types(self, client, store):
+        store["templates"].docs = [_template(1, table_types=3)]
+
+        response = client.get("/floorplans/templates/tpl-001", headers={"X-Owner-Email": OWNER["email"]})
+
+        assert response.status_code == 200
+        assert len(response.get_json()["template"]["tableTypes"]) == 3
+
+    def test_an_organization_member_who_can_list_it_can_load_it(self, client, store):
+        store["templates"].docs = [_template(1, organization_id=ORG["id"])]
+
+        assert [s["id"] for s in _list(client, user=MEMBER, organizationId=ORG["id"]).get_json()["templates"]] \
+            == ["tpl-001"]
+        response = client.get("/floorplans/templates/tpl-001", headers={"X-Owner-Email": MEMBER["email"]})
+        assert response.status_code == 200
+
+    def test_an_outsider_cannot(self, client, store):
+        store["templates"].docs = [_template(1, organization_id=ORG["id"])]
+
+        assert _list(client, user=STRANGER, organizationId=ORG["id"]).status_code == 403
+        response = client.get("/floorplans/templates/tpl-001", headers={"X-Owner-Email": STRANGER["email"]})
+        assert response.status_code == 403
@@ -0,0 +1,315 @@
+"""Uploads are accepted at once and turned into floorplan images by a background worker."""
+import io
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import ServerSelectionTimeoutError
+
+import app as app_module
+import services.floorplan_uploads as FloorplanUploads
+import services.gridfs_service as GridfsService
+from services.floorplan_analysis import AnalysisFailed
+from services.floorplan_uploads import get_upload, process_upload
+from test_floorplan_renditions import MemoryFiles, MemoryGridFS, _png, install_memory_gridfs
+from test_pdf_converter import poppler  # noqa: F401  (fixture)
+
+
+_start_upload_pool = FloorplanUploads._upload_pool
+
+
+class MemoryUploads:
+    """``floorplan_uploads``, for the updates the service runs."""
+
+    def __init__(self):
+        self.docs = {}
+        self.indexes = []
+
+    @staticmethod
+    def _match(value, expected):
+        if isinstance(expected, dict) and "$in" in expected:
+            return value in expected["$in"]
+        return value == expected
+
+    def _matches(self, doc, query):
+        return all(self._match(doc.get(field), expected) for field, expected in query.items())
+
+    def create_index(self, keys, **kwargs):
+        self.indexes.append((keys, kwargs))
+
+    def insert_one(self, doc):
+        self.docs[doc["_id"]] = dict(doc)
+
+    def find(self, query, projection=None):
+        return [doc for doc in self.docs.values() if self._matches(doc, query)]
+
+    def find_one(self, query, projection=None):
+        found = self.find(query)
+        return dict(found[0]) if found else None
+
+    def update_one(self, query, update):
+        for doc in self.find(query)[:1]:
+            doc.update(update.get("$set", {}))
+            for field, value in update.get("$push", {}).items():
+                doc[field] = doc[field] + [value]
+
+    def find_one_and_update(self, query, update, return_document=None):
+        found = self.find(query)
+        if not found:
+            return None
+        self.update_one({"_id": found[0]["_id"]}, update)
+        return dict(found[0])
+
+
+class ManualPool:
+    """Holds submitted work until the test runs it."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append((fn, args))
+
+    def run(self):
+        while self.submitted:
+            fn, args = self.submitted.pop(0)
+            fn(*args)
+
+
+class MemoryRawFiles(MemoryGridFS):
+    """The raw-upload bucket, with the listing the orphan sweep runs."""
+
+    def find(self, query):
+        cutoff = query["uploadDate"]["$lt"]
+        return [SimpleNamespace(_id=doc["_id"]) for doc in list(self.files.docs.values()) if doc["uploadDate"] < cutoff]
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    install_memory_gridfs(monkeypatch)
+    state = {"collection": MemoryUploads(), "raw": MemoryRawFiles(MemoryFiles()), "pool": ManualPool()}
+    monkeypatch.setattr(FloorplanUploads, "_indexes_ready", False)
+    monkeypatch.setattr(FloorplanUploads, "uploads_collection", state["collection"])
+    monkeypatch.setattr(FloorplanUploads, "_raw_fs", state["raw"])
+    monkeypatch.setattr(FloorplanUploads, "_upload_pool", lambda: state["pool"])
+    return state
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(app_module.app.config, "LOGIN_DISABLED", True)
+    return app_module.app.test_client()
+
+
+def _submit(client, data=None, filename="plan.png", content_type="image/png", **form):
+    data = _png((600, 300)) if data is None else data
+    return client.post(
+        "/floorplans/uploads",
+        data={"file": (io.BytesIO(data), filename, content_type), **form},
+        content_type="multipart/form-data",
+    )
+
+
+class TestSubmittingAnUpload:
+    def test_it_is_accepted_before_it_is_processed(self, client, uploads):
+        response = _submit(client)
+
+        body = response.get_json()
+        assert response.status_code == 202
+        assert body["status"] == "queued"
+        assert client.get(f"/floorplans/uploads/{body['upload_id']}").get_json()["pages"] == []
+        assert len(uploads["pool"].submitted) == 1
+        assert len(uploads["raw"].data) == 1
+
+    def test_an_unsupported_file_is_refused_up_front(self, client, uploads):
+        response = _submit(client, data=b"GIF89a", filename="plan.gif", content_type="image/gif")
+
+        assert response.status_code == 400
+        assert uploads["collection"].docs == {}
+
+    def test_an_empty_file_is_refused_up_front(self, client, uploads):
+        assert _submit(client, data=b"").status_code == 400
+
+
+class TestProcessingAnUpload:
+    def test_an_image_becomes_one_page_and_the_raw_file_is_dropped(self, client, uploads):
+        upload_id = _submit(client).get_json()["upload_id"]
+
+        uploads["pool"].run()
+
+        status = client.get(f"/floorplans/uploads/{upload_id}").get_json()
+        assert status["status"] == "done"
+        assert [(page["page"], page["width"], page["height"]) for page in status["pages"]] == [(1, 600, 300)]
+        assert GridfsService.get_image(status["pages"][0]["gridfs_id"]) == _png((600, 300))
+        assert status["total_ms"] >= 0
+        assert uploads["raw"].data == {}
+
+    def test_pdf_pages_are_listed_in_page_order(self, client, uploads, poppler):  # noqa: F811
+        poppler(3)
+        upload_id = _submit(client, data=b"%PDF", filename="venue.pdf", content_type="application/pdf") \
+            .get_json()["upload_id"]
+
+        uploads["pool"].run()
+
+        status = client.get(f"/floorplans/uploads/{upload_id}").get_json()
+        assert [page["page"] for page in status["pages"]] == [1, 2, 3]
+        assert [page["width"] for page in status["pages"]] == [401, 402, 403]
+
+    def test_pages_are_recorded_as_they_are_stored(self, uploads, monkeypatch):
+        seen = []
+        upload_id = FloorplanUploads.submit_upload(_png((600, 300)), "plan.png", "image/png", "u1")
+        real_update = uploads["collection"].update_one
+
+        def update_one(query, update):
+            real_update(query, update)
+            status = get_upload(upload_id, "u1")
+            seen.append((status["status"], len(status["pages"])))
+
+        monkeypatch.setattr(uploads["collection"], "update_one", update_one)
+        uploads["pool"].run()
+
+        assert seen[-2:] == [("processing", 1), ("done", 1)]
+
+    def test_a_pdf_with_no_renderable_pages_fails(self, client, uploads, poppler):  # noqa: F811
+        poppler(2, broken_pages={1, 2})
+        upload_id = _submit(client, data=b"%PDF", filename="venue.pdf", content_type="application/pdf") \
+            .get_json()["upload_id"]
+
+        uploads["pool"].run()
+
+        status = client.get(f"/floorplans/uploads/{upload_id}").get_json()
+        assert status["status"] == "failed"
+        assert status["error"] == "Failed to convert PDF to images"
+        assert uploads["raw"].data == {}
+
+    def test_an_unexpected_error_is_not_shown_to_the_user(self, uploads, monkeypatch):
+        upload_id = FloorplanUploads.submit_upload(_png((600, 300)), "plan.png", "image/png", "u1")
+        monkeypatch.setattr(FloorplanUploads, "upload_image", lambda *_: 1 / 0)
+
+        uploads["pool"].run()
+
+        assert get_upload(upload_id, "u1")["error"] == "Upload processing failed"
+
+    def test_an_upload_is_processed_once(self, uploads, monkeypatch):
+        upload_id = FloorplanUploads.submit_upload(_png((600, 300)), "plan.png", "image/png", "u1")
+        uploads["pool"].run()
+        monkeypatch.setattr(FloorplanUploads, "store_pages", lambda *_: pytest.fail("processed twice"))
+
+        process_upload(ObjectId(upload_id))
+
+        assert get_upload(upload_id, "u1")["status"] == "done"
+
+
+class TestAnalysisDuringProcessing:
+    def test_each_page_carries_its_analysis_when_asked(self, client, uploads, monkeypatch):
+        monkeypatch.setattr(FloorplanUploads, "analyze_image", lambda png: {"walls": [], "size": len(png)})
+        upload_id = _submit(client, analyze="true").get_json()["upload_id"]
+
+        uploads["pool"].run()
+
+        page = client.get(f"/floorplans/uploads/{upload_id}").get_json()["pages"][0]
+        assert page["analysis"] == {"walls": [], "size": len(_png((600, 300)))}
+
+    def test_it_is_not_run_unless_asked(self, client, uploads, monkeypatch):
+        monkeypatch.setattr(FloorplanUploads, "analyze_image", lambda png: pytest.fail("analysed"))
+        upload_id = _submit(client).get_json()["upload_id"]
+
+        uploads["pool"].run()
+
+        assert "analysis" not in client.get(f"/floorplans/uploads/{upload_id}").get_json()["pages"][0]
+
+    def test_a_failed_analysis_does_not_fail_the_upload(self, client, uploads, monkeypatch):
+        def analyze_image(png):
+            raise AnalysisFailed("Gemini analysis failed")
+
+        monkeypatch.setattr(FloorplanUploads, "analyze_image", analyze_image)
+        upload_id = _submit(client, analyze="true").get_json()["upload_id"]
+
+        uploads["pool"].run()
+
+        status = client.get(f"/floorplans/uploads/{upload_id}").get_json()
+        assert status["status"] == "done"
+        assert status["pages"][0]["analysis_error"] == "Gemini analysis failed"
+
+
+class TestReadingAnUpload:
+    def test_another_users_upload_is_not_found(self, uploads):
+        upload_id = FloorplanUploads.submit_upload(_png((600, 300)), "plan.png", "image/png", "u1")
+
+        assert get_upload(upload_id, "u2") is None
+        assert get_upload(upload_id, "u1")["status"] == "queued"
+
+    def test_an_unknown_id_is_not_found(self, client, uploads):
+        assert client.get(f"/floorplans/uploads/{ObjectId()}").status_code == 404
+        assert client.get("/floorplans/uploads/not-an-id").status_code == 404
+
+    def test_an_upload_that_lost_its_worker_is_reported_failed(self, uploads):
+        upload_id = FloorplanUploads.submit_upload(_png((600, 300)), "plan.png", "image/png", "u1")
+        doc = uploads["collection"].docs[ObjectId(upload_id)]
+        doc.update(status="processing", updatedAt=datetime.now(timezone.utc) - timedelta(hours=1))
+
+        status = get_upload(upload_id, "u1")
+
+        assert status["status"] == "failed"
+        assert doc["status"] == "failed"
+
+    def test_a_slow_upload_is_still_processing(self, uploads):
+        upload_id = FloorplanUploads.submit_upload(_png((600, 300)), "plan.png", "image/png", "u1")
+        uploads["collection"].docs[ObjectId(upload_id)]["status"] = "processing"
+
+        assert get_upload(upload_id, "u1")["status"] == "processing"
+
+    def test_an_upload_no_worker_claimed_is_queued_again(self, uploads):
+        upload_id = FloorplanUploads.submit_upload(_png((600, 300)), "plan.png", "image/png", "u1")
+        uploads["pool"].submitted.clear()
+        uploads["collection"].docs[ObjectId(upload_id)]["updatedAt"] = datetime.now(timezone.utc) - timedelta(hours=1)
+
+        assert get_upload(upload_id, "u1")["status"] == "queued"
+        uploads["pool"].run()
+
+        assert get_upload(upload_id, "u1")["status"] == "done"
+        assert uploads["raw"].data == {}
+
+    def test_an_upload_reported_failed_drops_its_raw_file(self, uploads):
+        upload_id = FloorplanUploads.submit_upload(_png((600, 300)), "plan.png", "image/png", "u1")
+        uploads["collection"].docs[ObjectId(upload_id)].update(
+            status="processing", updatedAt=datetime.now(timezone.utc) - timedelta(hours=1),
+        )
+
+        assert get_upload(upload_id, "u1")["status"] == "failed"
+        assert uploads["raw"].data == {}
+
+
+class TestHousekeeping:
+    def test_status_documents_expire(self, uploads):
+        FloorplanUploads.submit_upload(_png((600, 300)), "plan.png", "image/png", "u1")
+
+        [(keys, options)] = uploads["collection"].indexes
+        assert keys == [("createdAt", 1)]
+        assert options["expireAfterSeconds"] == FloorplanUploads.UPLOAD_TTL_S
+
+    def test_no_upload_is_accepted_without_the_expiry_index(self, uploads, monkeypatch):
+        def create_index(*_args, **_kwargs):
+            raise ServerSelectionTimeoutError("no primary")
+
+        monkeypatch.setattr(uploads["collection"], "create_index", create_index)
+
+        with pytest.raises(FloorplanUploads.UploadIndexError):
+            FloorplanUploads.submit_upload(_png((600, 300)), "plan.png", "image/png", "u1")
+        assert uploads["raw"].data == {} and uploads["collection"].docs == {}
+
+    def test_raw_files_no_upload_waits_on_are_swept_when_workers_start(self, uploads, monkeypatch):
+        raw = uploads["raw"]
+        upload_id = FloorplanUploads.submit_upload(_png((600, 300)), "plan.png", "image/png", "u1")
+        waiting = uploads["collection"].docs[ObjectId(upload_id)]["rawId"]
+        expired = raw.put(b"expired upload")
+        just_stored = raw.put(b"being submitted")
+        for oid in (waiting, expired):
+            raw.files.docs[oid]["uploadDate"] = datetime.now(timezone.utc) - timedelta(days=8)
+        monkeypatch.setattr(FloorplanUploads, "_pool", None)
+        monkeypatch.setattr(FloorplanUploads, "ThreadPoolExecutor", lambda **_kwargs: uploads["pool"])
+
+        _start_upload_pool()
+
+        assert set(raw.data) == {waiting, just_stored}
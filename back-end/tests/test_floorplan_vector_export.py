@@ -0,0 +1,164 @@
+"""SVG and PDF exports carry the floorplan once and the tables as vector shapes."""
+import base64
+import io
+import re
+import xml.etree.ElementTree as ET
+import zlib
+
+import pytest
+from PIL import Image
+
+import app as app_module
+import services.floorplan_render as FloorplanRender
+from services.floorplan_render import base_image_cache, section_color
+
+SVG = "{http://www.w3.org/2000/svg}"
+PLAN_SIZE = (2000, 1000)
+SCALE = 0.5
+
+
+def _png(size=PLAN_SIZE):
+    output = io.BytesIO()
+    Image.new("RGB", size, (200, 200, 200)).save(output, format="PNG")
+    return output.getvalue()
+
+
+def _table(x_mm, y_mm, code="A1", section="A", rotation=0):
+    return {"x_mm": x_mm, "y_mm": y_mm, "width_mm": 400, "height_mm": 200, "rotation": rotation,
+            "table_code": code, "section_name": section}
+
+
+@pytest.fixture
+def stored_images(monkeypatch):
+    images = {"plan": _png()}
+    reads = []
+
+    def get_image(gridfs_id):
+        reads.append(gridfs_id)
+        return images.get(gridfs_id)
+
+    monkeypatch.setattr(FloorplanRender, "get_image", get_image)
+    base_image_cache.clear()
+    yield images, reads
+    base_image_cache.clear()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(app_module.app.config, "LOGIN_DISABLED", True)
+    return app_module.app.test_client()
+
+
+def _export(client, options, tables=None):
+    body = {"gridfs_id": "plan", "placed_tables": tables or [_table(1000, 500)],
+            "scale_px_per_mm": SCALE, "options": options}
+    return client.post("/floorplans/export", json=body)
+
+
+def _pdf_objects(data):
+    """Object number → body, after checking every xref offset points at its object."""
+    xref = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", data).group(1))
+    rows = data[xref:].split(b"\n")
+    count = int(rows[1].split()[1])
+    objects = {}
+    for number in range(1, count):
+        offset = int(rows[2 + number].split()[0])
+        assert data[offset:].startswith(b"%d 0 obj\n" % number)
+        objects[number] = data[offset:data.index(b"\nendobj\n", offset)]
+    return objects
+
+
+def _stream(body):
+    return body[body.index(b"stream\n") + len(b"stream\n"):body.rindex(b"\nendstream")]
+
+
+class TestSvgExport:
+    def test_tables_are_polygons_over_one_embedded_image(self, client, stored_images):
+        tables = [_table(1000, 500), _table(2000, 1000, code="B2", section="B", rotation=90)]
+
+        response = _export(client, {"format": "svg"}, tables)
+
+        assert response.mimetype == "image/svg+xml"
+        root = ET.fromstring(response.data)
+        assert (root.get("width"), root.get("height")) == ("2000", "1000")
+        images = root.findall(f"{SVG}image")
+        assert len(images) == 1
+        embedded = base64.b64decode(images[0].get("href").split(",", 1)[1])
+        assert Image.open(io.BytesIO(embedded)).format == "JPEG"
+        polygons = root.findall(f".//{SVG}polygon")
+        assert [p.get("stroke") for p in polygons] == [section_color("A"), section_color("B")]
+        assert polygons[0].get("points") == "400.00,200.00 600.00,200.00 600.00,300.00 400.00,300.00"
+        labels = [t.text for t in root.findall(f".//{SVG}text")]
+        assert labels == ["A1", "A1", "B2", "B2"]
+
+    def test_a_linked_image_is_referenced_not_embedded(self, client, stored_images):
+        response = _export(client, {"format": "svg", "image": "link"})
+
+        href = ET.fromstring(response.data).find(f"{SVG}image").get("href")
+        assert href.endswith("/floorplans/plan")
+
+    def test_the_size_grows_with_tables_not_with_the_image(self, client, stored_images):
+        images, _ = stored_images
+        images["plan"] = _png((6000, 3000))
+        few = _export(client, {"format": "svg", "image": "link"}, [_table(1000, 500)] * 10)
+        many = _export(client, {"format": "svg", "image": "link"}, [_table(1000, 500)] * 1000)
+
+        per_table = (len(many.data) - len(few.data)) / 990
+        assert per_table < 250
+
+    def test_codes_are_escaped(self, client, stored_images):
+        response = _export(client, {"format": "svg"}, [_table(1000, 500, code="<A&1>")])
+
+        assert [t.text for t in ET.fromstring(response.data).iter(f"{SVG}text")] == ["<A&1>", "<A&1>"]
+
+    def test_codes_and_sections_can_be_hidden(self, client, stored_images):
+        response = _export(client, {"format": "svg", "show_codes": False, "show_sections": False})
+
+        root = ET.fromstring(response.data)
+        assert root.find(f".//{SVG}text") is None
+        assert root.find(f".//{SVG}polygon").get("stroke") == "#00cc66"
+
+
+class TestPdfExport:
+    def test_a_one_page_pdf_with_the_image_once_and_the_tables_as_paths(self, client, stored_images):
+        tables = [_table(1000, 500), _table(2000, 1000, code="(B2)", section="B")]
+
+        response = _export(client, {"format": "pdf", "max_size_px": 1000}, tables)
+
+        assert response.mimetype == "application/pdf"
+        assert response.data.startswith(b"%PDF-1.4")
+        objects = _pdf_objects(response.data)
+        assert b"/MediaBox [0 0 2000 1000]" in objects[3]
+        assert b"/Width 1000 /Height 500" in objects[4]
+        assert Image.open(io.BytesIO(_stream(objects[4]))).size == (1000, 500)
+        content = zlib.decompress(_stream(objects[6])).decode("latin-1")
+        assert content.count("/Im0 Do") == 1
+        assert "400.00 200.00 m 600.00 200.00 l 600.00 300.00 l 400.00 300.00 l h S" in content
+        assert content.count(" RG ") == 2
+        assert r"(\(B2\)) Tj" in content
+
+    def test_a_pdf_cannot_link_its_image(self, client, stored_images):
+        assert _export(client, {"format": "pdf", "image": "link"}).status_code == 400
+
+
+class TestVectorExportOptions:
+    def test_the_embedded_image_is_encoded_once(self, client, stored_images, monkeypatch):
+        _, reads = stored_images
+        saves = []
+        original_save = Image.Image.save
+        monkeypatch.setattr(Image.Image, "save", lambda img, *a, **k: saves.append(1) or original_save(img, *a, **k))
+
+        _export(client, {"format": "pdf"})
+        _export(client, {"format": "svg"}, [_table(3000, 1500)])
+
+        assert reads == ["plan"]
+        assert len(saves) == 1
+
+    def test_regions_and_tiles_are_raster_only(self, client, stored_images):
+        assert _export(client, {"format": "svg", "tile": {"size": 512}}).status_code == 400
+
+    def test_a_missing_image_is_not_found(self, client, stored_images):
+        images, _ = stored_images
+        images.clear()
+
+        assert _export(client, {"format": "pdf"}).status_code == 404
@@ -0,0 +1,92 @@
+"""The grid fallback places tables on a rasterized occupancy grid: inside the zone, apart, first-fit."""
+import pytest
+from shapely.geometry import box
+
+from datatypes import TableTypeObject
+from services.placement_service import _grid_place, _OccupancyGrid
+
+SPACING_MM = 1200.0
+
+
+def _table_type(type_id="t6", width=1830.0, height=760.0):
+    return TableTypeObject(id=type_id, name=type_id, width_mm=width, height_mm=height, max_capacity=2)
+
+
+def _footprints(placed):
+    rects = []
+    for p in placed:
+        w, h = (p["width_mm"], p["height_mm"]) if p["rotation"] == 0 else (p["height_mm"], p["width_mm"])
+        rects.append(box(p["x_mm"] - w / 2, p["y_mm"] - h / 2, p["x_mm"] + w / 2, p["y_mm"] + h / 2))
+    return rects
+
+
+def _hall_with_pillars():
+    zone = box(0, 0, 60000, 40000)
+    for i in range(3):
+        zone = zone.difference(box(10000 + i * 15000, 15000, 11000 + i * 15000, 16000))
+    return zone
+
+
+class TestPlacementsAreValid:
+    def test_every_table_is_inside_the_zone_and_clear_of_the_others(self):
+        zone = _hall_with_pillars()
+        placed = _grid_place(
+            zone, [_table_type(), _table_type("t8", 2440.0)], {"t6": 60, "t8": 40}, SPACING_MM,
+        )
+
+        rects = _footprints(placed)
+        assert len(rects) == 100
+        for rect in rects:
+            assert zone.contains(rect)
+        for i, a in enumerate(rects):
+            for b in rects[i + 1:]:
+                assert a.distance(b) >= SPACING_MM - 1e-6
+
+    def test_tables_go_around_an_obstacle_not_through_it(self):
+        pillar = box(4000, 1000, 5000, 3000)
+        zone = box(0, 0, 10000, 4000).difference(pillar)
+
+        placed = _grid_place(zone, [_table_type()], {"t6": 6}, SPACING_MM)
+
+        assert placed
+        for rect in _footprints(placed):
+            assert not rect.overlaps(pillar) and not rect.within(pillar)
+            assert zone.contains(rect)
+
+    def test_a_zone_too_small_for_any_table_places_nothing(self):
+        assert _grid_place(box(0, 0, 1000, 500), [_table_type()], {"t6": 2}, SPACING_MM) == []
+
+
+class TestFirstFitOrder:
+    def test_the_first_table_takes_the_lowest_x_then_lowest_y_anchor(self):
+        placed = _grid_place(box(0, 0, 20000, 20000), [_table_type()], {"t6": 1}, SPACING_MM)
+
+        assert placed[0]["x_mm"] == pytest.approx(1830.0 / 2)
+        assert placed[0]["y_mm"] == pytest.approx(760.0 / 2)
+        assert placed[0]["rotation"] == 0.0
+
+    def test_a_table_is_rotated_only_when_it_does_not_fit_unrotated(self):
+        placed = _grid_place(box(0, 0, 1000, 2000), [_table_type()], {"t6": 1}, SPACING_MM)
+
+        assert [p["rotation"] for p in placed] == [90.0]
+
+
+class TestTheGridIsUpdatedIncrementally:
+    def test_occupying_a_spot_clears_nearby_anchors_for_every_footprint(self):
+        grid = _OccupancyGrid(box(0, 0, 20000, 20000), 200.0, SPACING_MM)
+        first = grid.first_fit(1830.0, 760.0)
+        grid.first_fit(760.0, 1830.0)
+
+        grid.occupy(*first, 1830.0, 760.0)
+
+        x, y = grid.first_fit(760.0, 1830.0)
+        rotated = box(x, y, x + 760.0, y + 1830.0)
+        assert rotated.distance(box(*first, first[0] + 1830.0, first[1] + 760.0)) >= SPACING_MM
+
+    def test_a_footprint_first_seen_after_placements_respects_them(self):
+        grid = _OccupancyGrid(box(0, 0, 20000, 20000), 200.0, SPACING_MM)
+        grid.occupy(0.0, 0.0, 1830.0, 760.0)
+
+        x, y = grid.first_fit(2440.0, 760.0)
+
+        assert box(x, y, x + 2440.0, y + 760.0).distance(box(0, 0, 1830.0, 760.0)) >= SPACING_MM
@@ -0,0 +1,104 @@
+"""Key-case conversion is memoized and iterative, and the hot row lists skip it for alias serialization."""
+import sys
+
+from assignment.utils import (
+    camel_to_snake,
+    convert_keys_to_camel_case,
+    convert_keys_to_snake_case,
+    snake_to_camel,
+)
+from datatypes import MarketTableRow, VendorAssignmentResult
+
+
+def _assignment(i: int) -> VendorAssignmentResult:
+    return VendorAssignmentResult(
+        email=f"vendor{i}@example.com", date="2026-05-01", table_code=f"A{i}",
+        table_choice="Full Table", section="A", tier="Gold", location="Hall",
+    )
+
+
+class TestTheConvertersKeepTheirShape:
+    def test_nested_dicts_and_lists_are_converted_throughout(self):
+        payload = {
+            "setupObject": {
+                "marketDates": [{"colNameIdx": 1, "colName": "Day 1"}],
+                "colValues": [["a", "b"], []],
+            },
+            "vendorAssignments": [{"tableCode": "A1"}, {"tableCode": "A2"}],
+            "isDraft": False,
+        }
+
+        snake = convert_keys_to_snake_case(payload)
+
+        assert snake == {
+            "setup_object": {
+                "market_dates": [{"col_name_idx": 1, "col_name": "Day 1"}],
+                "col_values": [["a", "b"], []],
+            },
+            "vendor_assignments": [{"table_code": "A1"}, {"table_code": "A2"}],
+            "is_draft": False,
+        }
+        assert convert_keys_to_camel_case(snake) == payload
+
+    def test_key_order_is_preserved(self):
+        converted = convert_keys_to_snake_case({"zLast": 1, "aFirst": 2, "mMiddle": 3})
+
+        assert list(converted) == ["z_last", "a_first", "m_middle"]
+
+    def test_the_input_is_not_modified_and_leaves_are_carried_over(self):
+        leaf = ("tuple", "kept")
+        payload = {"outerKey": {"innerKey": leaf}}
+
+        converted = convert_keys_to_snake_case(payload)
+
+        assert payload == {"outerKey": {"innerKey": leaf}}
+        assert converted["outer_key"]["inner_key"] is leaf
+
+    def test_a_non_container_is_returned_as_is(self):
+        assert convert_keys_to_camel_case("plain_value") == "plain_value"
+        assert convert_keys_to_camel_case(None) is None
+
+    def test_nesting_deeper_than_the_recursion_limit_converts(self):
+        payload = leaf = {}
+        for _ in range(sys.getrecursionlimit() + 100):
+            leaf["childNode"] = {}
+            leaf = leaf["childNode"]
+
+        converted = convert_keys_to_snake_case(payload)
+
+        assert "child_node" in converted
+
+
+class TestKeysAreTranslatedOnce:
+    def test_repeated_keys_share_one_translated_string(self):
+        rows = convert_keys_to_camel_case([{"table_code": "A1"}, {"table_code": "A2"}])
+
+        first, second = (next(iter(row)) for row in rows)
+        assert first == "tableCode"
+        assert first is second
+
+    def test_the_translators_still_convert_like_before(self):
+        assert camel_to_snake("HTTPResponseCode") == "http_response_code"
+        assert camel_to_snake("colNameIdx") == "col_name_idx"
+        assert snake_to_camel("max_half_table_proportion_per_section") == "maxHalfTableProportionPerSection"
+
+
+class TestRowsSerializeByAlias:
+    def test_an_assignment_dumps_to_the_same_keys_the_converter_produced(self):
+        assignment = _assignment(1)
+
+        assert assignment.model_dump(by_alias=True) == convert_keys_to_camel_case(assignment.model_dump())
+
+    def test_a_table_row_dumps_to_the_same_keys_the_converter_produced(self):
+        row = MarketTableRow(
+            date="2026-05-01", assignment=["a@example.com"], location="Hall",
+            section="A", table_choice="Full Table", table_code="A1", tier="Gold",
+        )
+
+        assert row.model_dump(by_alias=True) == convert_keys_to_camel_case(row.model_dump())
+
+    def test_the_alias_is_for_serialization_only(self):
+        assignment = _assignment(2)
+
+        assert "table_code" in assignment.model_dump()
+        assert VendorAssignmentResult(**assignment.model_dump()) == assignment
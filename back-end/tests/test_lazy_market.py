@@ -0,0 +1,153 @@
+"""A market read for its permissions does not pay to validate its setup, assignment or history."""
+import copy
+import warnings
+from typing import List
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from conftest import FakeMarketsCollection, stored_market
+
+import api.markets as MarketsApi
+import api.permissions as PermissionsApi
+from datatypes import Market, MarketPhase, MarketRole, SetupObject
+from market_documents import LazyMarket, market_field_for_key, market_from_document
+
+
+def _setup_object():
+    return {
+        "colNames": ["Email", "Table Choice", "Table Share Email", "Day 1"],
+        "colValues": [],
+        "colInclude": [True, True, True, True],
+        "enumPriorityOrder": [],
+        "priority": [],
+        "marketDates": [{"date": "2026-01-01", "colNameIdx": 3, "colName": "Day 1"}],
+        "tiers": [{"id": 1, "name": "Gold"}],
+        "locations": [{"name": "Main Hall"}],
+        "sections": [{"name": "A", "count": 2, "location": {"name": "Main Hall"}, "tier": {"id": 1, "name": "Gold"}}],
+        "assignmentOptions": {
+            "emailColNameIdx": 0,
+            "tableChoiceColNameIdx": 1,
+            "tableShareEmailColNameIdx": 2,
+            "maxDaysColNameIdx": None,
+            "maxAssignmentsPerVendor": None,
+            "maxHalfTableProportionPerSection": None,
+        },
+    }
+
+
+class TestALazyMarketReadsAsAMarket:
+    def test_sub_objects_validate_to_the_same_models_on_first_access(self):
+        document = stored_market(phase=MarketPhase.ARCHIVED, setupObject=_setup_object())
+
+        lazy = market_from_document(document, lazy=True)
+        eager = market_from_document(document)
+
+        assert isinstance(lazy, LazyMarket) and isinstance(lazy, Market)
+        assert isinstance(lazy.setup_object, SetupObject)
+        assert lazy.setup_object == eager.setup_object
+        assert lazy.phase == MarketPhase.ARCHIVED
+
+    def test_a_dump_is_the_eager_dump(self):
+        document = stored_market(setupObject=_setup_object())
+
+        assert market_from_document(document, lazy=True).model_dump() == market_from_document(document).model_dump()
+
+    def test_sub_objects_are_not_validated_until_read(self):
+        document = stored_market(setupObject={"colNames": "not a list"})
+
+        market = market_from_document(document, lazy=True)
+
+        assert market.roles == {"user-1": MarketRole.OWNER}
+        with pytest.raises(ValidationError):
+            market.setup_object
+
+    def test_materialize_reports_an_invalid_sub_object_up_front(self):
+        market = market_from_document(stored_market(setupObject={"colNames": "not a list"}), lazy=True)
+
+        with pytest.raises(ValidationError):
+            market.materialize()
+
+    def test_a_missing_required_field_still_fails_at_the_read(self):
+        document = stored_market()
+        del document["assignmentObject"]
+
+        with pytest.raises(ValidationError):
+            market_from_document(document, lazy=True)
+
+
+class TestNothingUnvalidatedLeaksOut:
+    @pytest.fixture
+    def markets(self):
+        document = stored_market(setupObject=_setup_object())
+        return market_from_document(document, lazy=True), market_from_document(document)
+
+    def test_iterating_yields_the_validated_fields(self, markets):
+        lazy, eager = markets
+
+        assert dict(lazy) == dict(eager)
+
+    def test_the_repr_is_the_eager_repr(self, markets):
+        lazy, eager = markets
+
+        assert repr(lazy).replace("LazyMarket", "Market", 1) == repr(eager)
+
+    def test_the_repr_of_an_invalid_sub_object_shows_it_as_stored(self):
+        market = market_from_document(stored_market(setupObject={"colNames": "not a list"}), lazy=True)
+
+        assert "'colNames': 'not a list'" in repr(market)
+
+    @pytest.mark.parametrize("make_copy", [
+        lambda market: market.model_copy(),
+        lambda market: market.model_copy(deep=True),
+        copy.copy,
+        copy.deepcopy,
+    ])
+    def test_a_copy_holds_the_validated_fields(self, markets, make_copy):
+        lazy, eager = markets
+
+        copied = make_copy(lazy)
+
+        assert object.__getattribute__(copied, "__dict__") == object.__getattribute__(eager, "__dict__")
+
+    def test_a_market_nested_in_another_model_dumps_as_the_eager_one(self, markets):
+        class Listing(BaseModel):
+            markets: List[Market]
+
+        lazy, eager = markets
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            dumped = Listing(markets=[lazy]).model_dump()
+
+        assert dumped == Listing(markets=[eager]).model_dump()
+
+
+class TestTheDetailReadOnlyValidatesWhatItReads:
+    def test_a_market_whose_setup_no_longer_parses_is_still_served_to_its_owner(self, monkeypatch):
+        fake = FakeMarketsCollection(stored_market(setupObject={"colNames": "not a list"}))
+        fake.doc["_id"] = "mongo-id"
+        monkeypatch.setattr(MarketsApi, "markets_collection", fake)
+        monkeypatch.setattr(
+            PermissionsApi, "get_user_market_role", lambda *_args, **_kwargs: MarketRole.OWNER,
+        )
+        monkeypatch.setattr(MarketsApi.UsersApi, "get_user_by_id", lambda _uid: None)
+
+        served = MarketsApi.get_market_for_user("owner@example.com", "market-123")
+
+        assert served["setupObject"] == {"colNames": "not a list"}
+
+    def test_a_setup_read_validates_everything_it_fetched(self, monkeypatch):
+        fake = FakeMarketsCollection(stored_market(setupObject={"colNames": "not a list"}))
+        monkeypatch.setattr(MarketsApi, "markets_collection", fake)
+
+        context = MarketsApi.load_market_context("market-123", MarketsApi.MarketReadProfile.SETUP)
+
+        assert context.market is None
+
+
+def test_stored_keys_translate_to_model_fields():
+    assert market_field_for_key("setupObject") == "setup_object"
+    assert market_field_for_key("organizationId") == "organization_id"
+    assert market_field_for_key("slug") is None
+    assert market_field_for_key("_id") is None
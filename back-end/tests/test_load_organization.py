@@ -91,7 +91,7 @@ class TestCallSitesAdoptTheHelpersFailurePath:
     def test_market_context_logs_the_org_parse_failure_and_still_serves_the_market(
         self, monkeypatch, caplog
     ):
-        monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda _q: _market_doc())
+        monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda _q, _projection=None: _market_doc())
         monkeypatch.setattr(
             MarketsApi.OrgsApi, "get_organization", lambda _oid: _unparseable_organization_doc()
         )
@@ -105,7 +105,7 @@ class TestCallSitesAdoptTheHelpersFailurePath:
         assert ORG_ID in caplog.text
 
     def test_load_market_for_logs_the_org_parse_failure(self, monkeypatch, caplog):
-        monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda _q: _market_doc())
+        monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda _q, _projection=None: _market_doc())
         monkeypatch.setattr(
             MarketsApi.OrgsApi, "get_organization", lambda _oid: _unparseable_organization_doc()
         )
@@ -133,7 +133,7 @@ class TestGetAssignedMarketOrganizationName:
             fetches.append(org_id)
             return org_doc
 
-        monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda _q: _market_doc())
+        monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda _q, _projection=None: _market_doc())
         monkeypatch.setattr(MarketsApi.OrgsApi, "get_organization", _get_organization)
         monkeypatch.setattr(
             MarketsApi.SourceDataApi,
@@ -143,7 +143,10 @@ class TestGetAssignedMarketOrganizationName:
         monkeypatch.setattr(
             MarketsApi,
             "assign_market",
-            lambda _market, _source_data: SimpleNamespace(model_dump=lambda: {}),
+            lambda _market, _source_data: SimpleNamespace(
+                model_dump=lambda **_kwargs: {"assignment_object": {}},
+                assignment_object=SimpleNamespace(vendor_assignments=[]),
+            ),
         )
 
         result, status = MarketsApi.get_assigned_market("market-123")
@@ -8,6 +8,8 @@ from types import SimpleNamespace
 
 import pytest
 
+from conftest import mongo_project
+
 import api.markets as MarketsApi
 import api.organizations as OrgsApi
 import api.permissions as PermissionsApi
@@ -37,10 +39,10 @@ class FakeMarketsCollection:
     def __init__(self, docs):
         self.docs = docs
 
-    def find_one(self, query):
+    def find_one(self, query, projection=None):
         for doc in self.docs:
             if doc["id"] == query.get("id"):
-                return dict(doc)
+                return mongo_project(dict(doc), projection)
         return None
 
     def aggregate(self, _pipeline):
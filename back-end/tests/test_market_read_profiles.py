@@ -0,0 +1,114 @@
+"""Market reads fetch what their endpoint reads, by named profile, not the whole document."""
+import pytest
+
+from conftest import FakeMarketsCollection, mongo_project, stored_market
+
+import api.markets as MarketsApi
+import api.permissions as PermissionsApi
+from datatypes import MarketPhase, MarketRole
+from market_documents import (
+    MarketReadProfile,
+    market_from_profile_document,
+    market_read_projection,
+)
+
+
+class RecordingMarketsCollection(FakeMarketsCollection):
+    """The markets fake, remembering the projection each read asked for."""
+
+    def __init__(self, doc):
+        super().__init__(doc)
+        self.projections = []
+
+    def find_one(self, query, projection=None):
+        self.projections.append(projection)
+        return super().find_one(query, projection)
+
+
+def _heavy_market(**overrides):
+    return stored_market(
+        phase=MarketPhase.APPLICATIONS_OPEN,
+        setupObject={"colNames": ["Email"], "colValues": [["a"] * 1000]},
+        **overrides,
+    )
+
+
+class TestProfilesNameTheFieldsTheyFetch:
+    def test_a_permission_read_fetches_roles_organization_and_phase_only(self):
+        projection = market_read_projection(MarketReadProfile.PERMISSIONS)
+
+        for key in ("id", "roles", "organizationId", "phase", "isDraft"):
+            assert key in projection
+        for key in ("setupObject", "assignmentObject", "modificationList", "applicationForm"):
+            assert key not in projection
+
+    def test_each_profile_fetches_everything_the_one_before_it_does(self):
+        permissions = set(market_read_projection(MarketReadProfile.PERMISSIONS))
+        summary = set(market_read_projection(MarketReadProfile.SUMMARY))
+        setup = set(market_read_projection(MarketReadProfile.SETUP))
+
+        assert permissions < summary < setup
+        assert "setupObject" in setup and "setupObject" not in summary
+
+    def test_a_full_read_has_no_projection(self):
+        assert market_read_projection(MarketReadProfile.FULL) is None
+
+
+class TestAPartialDocumentStillParses:
+    def test_required_fields_the_profile_leaves_out_are_placeholders(self):
+        projection = market_read_projection(MarketReadProfile.PERMISSIONS)
+        document = mongo_project(_heavy_market(), projection)
+
+        market = market_from_profile_document(document, MarketReadProfile.PERMISSIONS)
+
+        assert market.roles == {"user-1": MarketRole.OWNER}
+        assert market.phase == MarketPhase.APPLICATIONS_OPEN
+        assert market.modification_list == []
+        assert market.assignment_object.vendor_assignments == []
+
+    def test_a_full_read_of_a_document_missing_a_required_field_still_fails(self):
+        document = _heavy_market()
+        del document["modificationList"]
+
+        with pytest.raises(Exception):
+            market_from_profile_document(document, MarketReadProfile.FULL)
+
+    def test_a_field_the_document_carries_is_never_replaced_by_a_placeholder(self):
+        document = stored_market(modificationList=[{}])
+
+        market = market_from_profile_document(document, MarketReadProfile.PERMISSIONS)
+
+        assert len(market.modification_list) == 1
+
+
+class TestEndpointsDeclareTheirProfile:
+    @pytest.fixture
+    def collection(self, monkeypatch):
+        fake = RecordingMarketsCollection(_heavy_market())
+        monkeypatch.setattr(MarketsApi, "markets_collection", fake)
+        monkeypatch.setattr(PermissionsApi, "user_has_permission", lambda *_args, **_kwargs: True)
+        return fake
+
+    def test_a_role_change_reads_only_what_the_permission_check_needs(self, collection, monkeypatch):
+        monkeypatch.setattr(PermissionsApi, "can_manage_roles", lambda *_args, **_kwargs: True)
+        collection.doc["roles"] = {"user-1": "owner", "user-2": "viewer"}
+
+        MarketsApi.remove_market_role("market-123", "user-2", "owner@example.com")
+
+        assert collection.projections == [market_read_projection(MarketReadProfile.PERMISSIONS)]
+
+    def test_the_application_form_read_skips_the_setup(self, collection):
+        MarketsApi.get_application_form("market-123", "viewer@example.com")
+
+        assert collection.projections == [market_read_projection(MarketReadProfile.SUMMARY)]
+
+    def test_the_market_detail_is_read_whole(self, collection, monkeypatch):
+        monkeypatch.setattr(
+            PermissionsApi, "get_user_market_role", lambda *_args, **_kwargs: MarketRole.OWNER,
+        )
+        monkeypatch.setattr(MarketsApi.UsersApi, "get_user_by_id", lambda _uid: None)
+        collection.doc["_id"] = "mongo-id"
+
+        MarketsApi.get_market_for_user("owner@example.com", "market-123")
+
+        assert collection.projections == [None]
@@ -16,7 +16,11 @@ from conftest import FakeMarketsCollection, client_market, stored_market
 import api.markets as MarketsApi
 import api.permissions as PermissionsApi
 from datatypes import Market, MarketPhase, market_name_slug
-from market_documents import market_from_document, published_market_by_slug
+from market_documents import (
+    forget_market_slug_resolution,
+    market_from_document,
+    published_market_by_slug,
+)
 
 
 @pytest.fixture
@@ -161,10 +165,80 @@ class TestThePublicLookupFetchesOnlyWhatItServes:
             assert field in collection.projections[0]
 
     def test_a_caller_that_names_nothing_still_gets_the_whole_document(self):
-        """Public check-in reads the assignment out of the market it resolves this way."""
+        """Naming no fields is how a caller asks for the market itself, setup and assignment included."""
         collection = self._collection()
 
         found = published_market_by_slug(collection, "spring-market")
 
         assert collection.projections[0] is None
         assert "assignmentObject" in found
+
+
+class TestResolvedSlugsAreCachedBriefly:
+    """Applicant sign-in and check-in only need to know which market a slug names, and they are hit
+    on every mount of every applicant screen. What a slug resolved to is cached for a few seconds
+    so those lookups skip the query, and dropped by every write that could change the answer."""
+
+    def _collection(self, phase=MarketPhase.ARCHIVED):
+        return TestTheLookupUsesTheStoredSlug._Collection([
+            stored_market(phase=phase, name="Spring Market"),
+        ])
+
+    def test_a_resolution_is_answered_without_a_second_query(self):
+        collection = self._collection()
+
+        first = published_market_by_slug(collection, "spring-market", ("id", "name"))
+        second = published_market_by_slug(collection, "spring-market", ("id",))
+
+        assert len(collection.queries) == 1
+        assert second["id"] == first["id"]
+
+    def test_a_caller_that_reads_more_than_the_resolution_still_queries(self):
+        collection = self._collection()
+
+        published_market_by_slug(collection, "spring-market", ("id",))
+        found = published_market_by_slug(collection, "spring-market", ("id", "application_form"))
+
+        assert len(collection.queries) == 2
+        assert "applicationForm" in collection.projections[1]
+        assert found is not None
+
+    def test_a_miss_is_not_cached(self):
+        collection = self._collection(phase=MarketPhase.DRAFT)
+
+        assert published_market_by_slug(collection, "spring-market", ("id",)) is None
+        collection.docs = [stored_market(phase=MarketPhase.ARCHIVED, name="Spring Market")]
+
+        assert published_market_by_slug(collection, "spring-market", ("id",)) is not None
+
+    def test_forgetting_a_market_makes_the_next_lookup_query_again(self):
+        """A phase transition back to draft must take the market off its public URL."""
+        collection = self._collection()
+        published_market_by_slug(collection, "spring-market", ("id",))
+
+        collection.docs = [stored_market(phase=MarketPhase.DRAFT, name="Spring Market")]
+        forget_market_slug_resolution("market-123")
+
+        assert published_market_by_slug(collection, "spring-market", ("id",)) is None
+
+    def test_an_expired_resolution_is_not_served(self, monkeypatch):
+        import market_documents
+
+        monkeypatch.setattr(market_documents, "SLUG_RESOLUTION_TTL_SECONDS", 0.0)
+        collection = self._collection()
+        published_market_by_slug(collection, "spring-market", ("id",))
+        published_market_by_slug(collection, "spring-market", ("id",))
+
+        assert len(collection.queries) == 2
+
+    def test_a_rename_forgets_the_old_slug(self, collection):
+        published_market_by_slug(
+            TestTheLookupUsesTheStoredSlug._Collection([stored_market(phase=MarketPhase.ARCHIVED)]),
+            "test-market",
+            ("id",),
+        )
+        renamed_store = TestTheLookupUsesTheStoredSlug._Collection([])
+
+        MarketsApi.update_market("market-123", client_market(name="Renamed Market"), "user-1")
+
+        assert published_market_by_slug(renamed_store, "test-market", ("id",)) is None
@@ -0,0 +1,265 @@
+"""The organizer's table view is served from a grid materialized per market, not re-derived per call."""
+from types import SimpleNamespace
+
+import pytest
+
+import api.markets as MarketsApi
+from assignment.utils import convert_keys_to_snake_case
+from conftest import FakeMarketsCollection, client_market, stored_market
+from datatypes import MarketRole, SetupObject
+
+
+def _market_doc(section_count: int = 2):
+    return {
+        "id": "market-123",
+        "name": "Test Market",
+        "creationDate": "2026-01-01T00:00:00Z",
+        "roles": {"user-123": "owner"},
+        "modificationList": [],
+        "assignmentObject": {"assignmentDate": "", "vendorAssignments": [], "assignmentStatistics": None},
+        "setupObject": {
+            "colNames": ["Email", "Table Choice", "Table Share Email", "Day 1", "Day 2"],
+            "colValues": [],
+            "colInclude": [True, True, True, True, True],
+            "enumPriorityOrder": [],
+            "priority": [],
+            "marketDates": [
+                {"date": "2026-01-02", "colNameIdx": 4, "colName": "Day 2"},
+                {"date": "2026-01-01", "colNameIdx": 3, "colName": "Day 1"},
+            ],
+            "tiers": [{"id": 1, "name": "Gold"}],
+            "locations": [{"name": "Main Hall"}, {"name": "Annex"}],
+            "sections": [
+                {"name": "B", "count": section_count, "location": {"name": "Main Hall"}, "tier": {"id": 1, "name": "Gold"}},
+                {"name": "A", "count": section_count, "location": {"name": "Annex"}, "tier": {"id": 1, "name": "Gold"}},
+            ],
+            "assignmentOptions": {
+                "emailColNameIdx": 0,
+                "tableChoiceColNameIdx": 1,
+                "tableShareEmailColNameIdx": 2,
+                "maxDaysColNameIdx": None,
+                "maxAssignmentsPerVendor": None,
+                "maxHalfTableProportionPerSection": None,
+            },
+        },
+    }
+
+
+@pytest.fixture
+def market(monkeypatch):
+    """A viewable market with source data, counting how often assignment actually runs."""
+    state = SimpleNamespace(
+        doc=_market_doc(), upload_date="2026-01-01T00:00:00Z", assign_calls=0, source_loads=0, stamps=0,
+    )
+
+    def stamp(query, update):
+        if "setupRevision" not in state.doc:
+            state.stamps += 1
+            state.doc.update(update["$set"])
+
+    def load_source_data(market_id):
+        state.source_loads += 1
+        return ({
+            "headers": [], "data": [], "row_count": 0,
+            "upload_date": state.upload_date, "filename": "vendors.csv",
+        }, 200)
+
+    monkeypatch.setattr(MarketsApi.markets_collection, "find_one", lambda query, projection=None: state.doc)
+    monkeypatch.setattr(MarketsApi.markets_collection, "update_one", stamp)
+    monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *args, **kwargs: True)
+    monkeypatch.setattr(MarketsApi.SourceDataApi, "get_source_data", load_source_data)
+    monkeypatch.setattr(
+        MarketsApi.SourceDataApi,
+        "get_source_data_revision",
+        lambda market_id: {"upload_date": state.upload_date, "row_count": 0, "filename": "vendors.csv"},
+    )
+
+    def counting_assign(market_model, source_data):
+        state.assign_calls += 1
+        return market_model
+
+    monkeypatch.setattr(MarketsApi, "assign_market", counting_assign)
+    return state
+
+
+class TestTheGridIsMaterializedOnce:
+    def test_a_second_request_is_served_without_reassigning(self, market, market_tables):
+        first, status = MarketsApi.get_market_tables("market-123", "viewer@test.com")
+        second, _ = MarketsApi.get_market_tables("market-123", "viewer@test.com")
+
+        assert status == 200
+        assert market.assign_calls == 1
+        assert second == first
+        assert market_tables.writes == 1
+
+    def test_a_new_source_upload_derives_the_grid_again(self, market, market_tables):
+        MarketsApi.get_market_tables("market-123", "viewer@test.com")
+        market.upload_date = "2026-02-01T00:00:00Z"
+        MarketsApi.get_market_tables("market-123", "viewer@test.com")
+
+        assert market.assign_calls == 2
+        assert len(market_tables.documents) == 1
+
+    def test_a_setup_change_derives_the_grid_again(self, market):
+        first, _ = MarketsApi.get_market_tables("market-123", "viewer@test.com")
+        market.doc = _market_doc(section_count=3)
+        second, _ = MarketsApi.get_market_tables("market-123", "viewer@test.com")
+
+        assert market.assign_calls == 2
+        assert len(second) == len(first) + 4
+
+    def test_a_stored_page_is_read_without_loading_the_setup_or_the_source_data(self, market, monkeypatch):
+        first, _ = MarketsApi.get_market_table_page("market-123", "viewer@test.com", offset=2, limit=3)
+        profiles = []
+        real_find = MarketsApi.find_market_document
+        monkeypatch.setattr(
+            MarketsApi, "find_market_document",
+            lambda collection, market_id, profile: profiles.append(profile) or real_find(collection, market_id, profile),
+        )
+
+        second, _ = MarketsApi.get_market_table_page("market-123", "viewer@test.com", offset=2, limit=3)
+
+        assert second == first
+        assert market.source_loads == 1
+        assert profiles == [MarketsApi.MarketReadProfile.PERMISSIONS]
+
+    def test_the_grid_is_stored_one_document_per_row(self, market):
+        MarketsApi.get_market_tables("market-123", "viewer@test.com")
+        market.upload_date = "2026-02-01T00:00:00Z"
+        MarketsApi.get_market_tables("market-123", "viewer@test.com")
+
+        stored = MarketsApi.market_table_rows_collection.documents
+        assert len(stored) == 8
+        assert [doc["seq"] for doc in stored] == list(range(8))
+
+    def test_a_market_written_before_setup_revisions_is_given_one_once(self, market):
+        MarketsApi.get_market_tables("market-123", "viewer@test.com")
+        MarketsApi.get_market_tables("market-123", "viewer@test.com")
+
+        assert market.stamps == 1
+        assert market.doc["setupRevision"] == MarketsApi.market_setup_revision(market.doc["setupObject"])
+        assert market.assign_calls == 1
+
+    def test_nothing_is_stored_when_the_indexes_cannot_be_built(self, market, market_tables, monkeypatch):
+        from pymongo.errors import PyMongoError
+
+        def refuse(*_args, **_kwargs):
+            raise PyMongoError("index build failed")
+
+        monkeypatch.setattr(market_tables, "create_index", refuse)
+
+        rows, status = MarketsApi.get_market_tables("market-123", "viewer@test.com")
+
+        assert status == 200
+        assert len(rows) == 8
+        assert market_tables.documents == {}
+        assert MarketsApi.market_table_rows_collection.documents == []
+
+    def test_an_unreadable_grid_is_derived_rather_than_failing(self, market, monkeypatch):
+        from pymongo.errors import PyMongoError
+
+        def unreachable(*_args, **_kwargs):
+            raise PyMongoError("unreachable")
+
+        monkeypatch.setattr(MarketsApi.market_tables_collection, "find_one", unreachable)
+        monkeypatch.setattr(MarketsApi.market_tables_collection, "update_one", unreachable)
+
+        rows, status = MarketsApi.get_market_tables("market-123", "viewer@test.com")
+
+        assert status == 200
+        assert len(rows) == 8
+
+    def test_deleting_the_market_deletes_its_grid(self, market, market_tables, monkeypatch):
+        MarketsApi.get_market_tables("market-123", "viewer@test.com")
+        MarketsApi.get_market_tables("other-market", "viewer@test.com")
+        monkeypatch.setattr(MarketsApi.PermissionsApi, "get_user_market_role", lambda *args, **kwargs: MarketRole.OWNER)
+        monkeypatch.setattr(MarketsApi.SourceDataApi, "delete_source_data", lambda market_id: None)
+        monkeypatch.setattr(MarketsApi.markets_collection, "delete_one", lambda query: None)
+        monkeypatch.setattr(MarketsApi, "release_images", lambda owner: 0)
+
+        MarketsApi.delete_market("market-123", "user-123")
+
+        assert list(market_tables.documents) == ["other-market"]
+        assert {doc["marketId"] for doc in MarketsApi.market_table_rows_collection.documents} == {"other-market"}
+
+
+class TestRowsAreServedInGridOrder:
+    def test_rows_are_ordered_by_date_location_section_and_table(self, market):
+        rows, _ = MarketsApi.get_market_tables("market-123", "viewer@test.com")
+
+        keys = [(row["date"], row["location"], row["section"], row["tableCode"]) for row in rows]
+        assert keys == sorted(keys)
+        assert keys[0] == ("2026-01-01", "Annex", "A", "A1")
+
+
+class TestTheTableViewCanBeFilteredAndPaged:
+    def test_a_date_and_section_filter_narrow_the_rows_and_the_total(self, market):
+        page, status = MarketsApi.get_market_table_page(
+            "market-123", "viewer@test.com", date="2026-01-02", section="B",
+        )
+
+        assert status == 200
+        assert page["total"] == 2
+        assert [row["tableCode"] for row in page["rows"]] == ["B1", "B2"]
+        assert {row["date"] for row in page["rows"]} == {"2026-01-02"}
+
+    def test_a_filtered_page_of_the_stored_grid_matches_the_derived_one(self, market):
+        derived, _ = MarketsApi.get_market_table_page(
+            "market-123", "viewer@test.com", date="2026-01-02", section="B", offset=1, limit=5,
+        )
+        stored, _ = MarketsApi.get_market_table_page(
+            "market-123", "viewer@test.com", date="2026-01-02", section="B", offset=1, limit=5,
+        )
+
+        assert market.assign_calls == 1
+        assert stored == derived
+        assert stored["total"] == 2 and len(stored["rows"]) == 1
+
+    def test_offset_and_limit_slice_the_ordered_rows(self, market):
+        everything, _ = MarketsApi.get_market_tables("market-123", "viewer@test.com")
+        page, status = MarketsApi.get_market_table_page("market-123", "viewer@test.com", offset=2, limit=3)
+
+        assert status == 200
+        assert page["total"] == 8
+        assert page["rows"] == everything[2:5]
+
+    def test_a_negative_offset_is_refused(self, market):
+        result, status = MarketsApi.get_market_table_page("market-123", "viewer@test.com", offset=-1)
+
+        assert status == 400
+        assert "offset" in result["error"]
+
+
+class TestSetupWritesStampARevision:
+    @pytest.fixture
+    def collection(self, monkeypatch):
+        fake = FakeMarketsCollection(stored_market())
+        monkeypatch.setattr(MarketsApi, "markets_collection", fake)
+        monkeypatch.setattr(MarketsApi.PermissionsApi, "user_has_permission", lambda *args, **kwargs: True)
+        return fake
+
+    def _market(self):
+        return client_market(setup_object=SetupObject(**convert_keys_to_snake_case(_market_doc()["setupObject"])))
+
+    def _revision_written(self, collection, market):
+        MarketsApi.update_market("market-123", market, "user-1")
+        return collection.last_update["$set"][MarketsApi.MARKET_SETUP_REVISION_KEY]
+
+    def test_rewriting_the_same_setup_keeps_the_revision(self, collection):
+        market = self._market()
+
+        assert self._revision_written(collection, market) == self._revision_written(collection, market)
+
+    def test_a_changed_setup_gets_a_new_one(self, collection):
+        market = self._market()
+        before = self._revision_written(collection, market)
+        market.setup_object.sections = market.setup_object.sections[:-1]
+
+        assert self._revision_written(collection, market) != before
+
+
+def test_table_choice_labels_resolve_to_slots():
+    assert MarketsApi._table_choice_slot(" Full Table ") == "full"
+    assert MarketsApi._table_choice_slot("Half table - Left") == "left"
+    assert MarketsApi._table_choice_slot("half TABLE right") == "right"
+    assert MarketsApi._table_choice_slot("Something else") == "any"
@@ -0,0 +1,162 @@
+"""Every room of a plan is placed into, side by side, with the tables split between them."""
+import threading
+from collections import Counter
+
+from shapely.geometry import Point, box
+
+import services.placement_service as PlacementService
+from datatypes import TableTypeObject
+from services.placement_jobs import PlacementJob
+from services.placement_service import (
+    _apportion,
+    _zone_shares,
+    auto_place_tables,
+    placement_zones,
+)
+from services.spatial_index import table_footprint
+
+TABLE_TYPES = [
+    {"id": "t6", "name": "6ft", "width_mm": 1830, "height_mm": 760, "max_capacity": 2},
+    {"id": "t8", "name": "8ft", "width_mm": 2440, "height_mm": 760, "max_capacity": 2},
+]
+AISLES = {"wall_buffer_mm": 500, "table_spacing_mm": 1200, "walkway_width_mm": 2000}
+
+
+def _loop(x0, y0, x1, y1):
+    corners = [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+    return [{"start": corners[i], "end": corners[(i + 1) % 4], "thickness_mm": 200} for i in range(4)]
+
+
+HALL = (0, 0, 30000, 20000)
+ANNEX = (35000, 0, 45000, 10000)
+TWO_ROOMS = _loop(*HALL) + _loop(*ANNEX)
+
+
+def _place(walls, counts, **kwargs):
+    return auto_place_tables(walls, [], TABLE_TYPES, counts, 0.1, AISLES, **kwargs)
+
+
+def _in(room, placed):
+    return [p for p in placed if box(*room).contains(Point(p["x_mm"], p["y_mm"]))]
+
+
+class TestEveryRoomIsPlaced:
+    def test_tables_are_split_between_the_rooms_by_area(self):
+        placed = _place(TWO_ROOMS, {"t6": 28, "t8": 0})
+
+        assert len(placed) == 28
+        assert len(_in(HALL, placed)) > len(_in(ANNEX, placed)) > 0
+
+    def test_a_hall_split_by_an_obstacle_fills_both_halves(self):
+        wall = [{"polygon": [[14000, -100], [16000, -100], [16000, 20100], [14000, 20100]], "type": "stage"}]
+
+        placed = auto_place_tables(_loop(*HALL), wall, TABLE_TYPES, {"t6": 20, "t8": 0}, 0.1, AISLES)
+
+        assert len(placed) == 20
+        assert any(p["x_mm"] < 14000 for p in placed) and any(p["x_mm"] > 16000 for p in placed)
+
+    def test_no_table_crosses_into_another_room_or_overlaps_one(self):
+        placed = _place(TWO_ROOMS, {"t6": 30, "t8": 10})
+
+        footprints = [
+            table_footprint(p["x_mm"], p["y_mm"], p["width_mm"], p["height_mm"], p["rotation"]) for p in placed
+        ]
+        assert all(box(*HALL).contains(f) or box(*ANNEX).contains(f) for f in footprints)
+        assert all(
+            a.intersection(b).area == 0 for i, a in enumerate(footprints) for b in footprints[i + 1:]
+        )
+
+    def test_a_room_too_small_for_its_share_spills_into_the_others(self):
+        closet = (35000, 0, 39000, 4000)
+        walls = _loop(*HALL) + _loop(*closet)
+
+        placed = _place(walls, {"t6": 40, "t8": 0}, sections=[{"name": "A", "count": 40}])
+
+        assert len(placed) == 40
+        assert all(p["section_name"] == "A" for p in placed)
+
+    def test_a_sliver_no_table_fits_is_not_a_zone(self):
+        zones = placement_zones(box(0, 0, 20000, 10000).union(box(30000, 0, 30500, 10000)), [
+            TableTypeObject(**TABLE_TYPES[0]),
+        ])
+
+        assert [z.bounds for z in zones] == [(0.0, 0.0, 20000.0, 10000.0)]
+
+
+class TestSectionsFollowTheirLocation:
+    def test_a_section_tied_to_a_location_is_placed_there(self):
+        sections = [
+            {"name": "Main", "count": 20},
+            {"name": "Food", "count": 6, "location": {"name": "Annex"}},
+        ]
+        locations = [{"name": "Annex", "polygon": [[34000, -1000], [46000, -1000], [46000, 11000], [34000, 11000]]}]
+
+        placed = _place(TWO_ROOMS, {"t6": 26, "t8": 0}, sections=sections, locations=locations)
+
+        annex = Counter(p.get("section_name") for p in _in(ANNEX, placed))
+        assert annex == {"Food": 6}
+        assert Counter(p.get("section_name") for p in placed) == {"Main": 20, "Food": 6}
+
+    def test_untied_sections_stay_in_one_block_per_zone(self):
+        zones = [box(0, 0, 30000, 20000), box(40000, 0, 50000, 10000)]
+        tables = [TableTypeObject(**TABLE_TYPES[0])]
+        sections = [{"name": "A", "count": 10}, {"name": "B", "count": 10}, {"name": "C", "count": 10}]
+
+        shares = _zone_shares(zones, [None, None], tables, {"t6": 30}, sections)
+
+        assert [counts["t6"] for counts, _ in shares] == [26, 4]
+        assert shares[0][1] == [{"name": "A", "count": 10}, {"name": "B", "count": 10}, {"name": "C", "count": 6}]
+        assert shares[1][1] == [{"name": "C", "count": 4}]
+
+
+class TestZonesArePlacedSideBySide:
+    def test_each_zone_runs_the_solver_at_the_same_time(self, monkeypatch):
+        arrived = threading.Barrier(3, timeout=5)
+
+        def pack_place(zone, *_args, **_kwargs):
+            arrived.wait()
+            return []
+
+        monkeypatch.setattr(PlacementService, "_pack_place", pack_place)
+        walls = _loop(*HALL) + _loop(*ANNEX) + _loop(0, 25000, 10000, 35000)
+
+        _place(walls, {"t6": 3, "t8": 0}, strategy="pack")
+
+        assert not arrived.broken
+
+    def test_the_rows_are_laid_one_zone_after_another(self, monkeypatch):
+        running = []
+        overlapped = []
+        real_row_place = PlacementService._row_place
+
+        def row_place(*args, **kwargs):
+            overlapped.append(bool(running))
+            running.append(1)
+            try:
+                return real_row_place(*args, **kwargs)
+            finally:
+                running.pop()
+
+        monkeypatch.setattr(PlacementService, "_row_place", row_place)
+
+        _place(TWO_ROOMS, {"t6": 12, "t8": 0})
+
+        assert overlapped == [False, False]
+
+
+class TestStreamedJobsPlaceEveryRoom:
+    def test_the_row_layout_covers_both_rooms(self):
+        events = []
+
+        placed = PlacementJob(TWO_ROOMS, [], TABLE_TYPES, {"t6": 12, "t8": 0}, AISLES).run(events.append)
+
+        assert events[0]["source"] == "rows"
+        assert len(placed) == 12
+        assert _in(HALL, placed) and _in(ANNEX, placed)
+
+
+class TestApportion:
+    def test_shares_add_up_and_follow_the_weights(self):
+        assert _apportion(10, [3.0, 1.0, 1.0]) == [6, 2, 2]
+        assert sum(_apportion(7, [1.0, 1.0, 1.0])) == 7
+        assert _apportion(5, [0.0, 0.0]) == [5, 0]
@@ -0,0 +1,149 @@
+"""PDF pages are rendered a few at a time and handed over as each one finishes."""
+import io
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+import app as app_module
+import utils.pdf_converter as PdfConverter
+from test_floorplan_renditions import install_memory_gridfs
+from utils.pdf_converter import iter_pdf_pages, pdf_to_images
+
+
+class FakePoppler:
+    """``pdfinfo``/``pdftoppm`` for a PDF of *pages* pages, each rendered as a small PNG."""
+
+    def __init__(self, pages, delay=0.02, broken_pages=()):
+        self.pages = pages
+        self.delay = delay
+        self.broken_pages = set(broken_pages)
+        self.rendered = []
+        self.in_flight = 0
+        self.most_in_flight = 0
+        self.lock = threading.Lock()
+
+    def pdfinfo_from_path(self, pdf_path):
+        if open(pdf_path, "rb").read() != b"%PDF":
+            raise RuntimeError("Syntax Error: Couldn't find trailer dictionary")
+        return {"Pages": self.pages}
+
+    def convert_from_path(self, pdf_path, dpi, first_page, last_page, fmt, output_folder, output_file, paths_only):
+        assert first_page == last_page and fmt == "png" and paths_only
+        with self.lock:
+            self.in_flight += 1
+            self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        try:
+            # Later pages finish first
+            time.sleep(self.delay * (self.pages - first_page + 1) / self.pages)
+            if first_page in self.broken_pages:
+                raise RuntimeError("pdftoppm failed")
+            path = os.path.join(output_folder, f"{output_file}-{first_page:02d}.png")
+            Image.new("RGB", (dpi * 2 + first_page, dpi), "white").save(path, format="PNG")
+            self.rendered.append(first_page)
+            return [path]
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def poppler(monkeypatch):
+    def install(pages, **kwargs):
+        fake = FakePoppler(pages, **kwargs)
+        monkeypatch.setattr(PdfConverter, "pdfinfo_from_path", fake.pdfinfo_from_path)
+        monkeypatch.setattr(PdfConverter, "convert_from_path", fake.convert_from_path)
+        return fake
+
+    monkeypatch.setenv("PDF_RASTER_WORKERS", "3")
+    monkeypatch.setattr(PdfConverter, "_pool", None)
+    yield install
+    if PdfConverter._pool is not None:
+        PdfConverter._pool.shutdown(wait=True)
+
+
+class TestPagesAreRenderedOneAtATime:
+    def test_every_page_comes_back_in_page_order(self, poppler):
+        poppler(7)
+
+        pages = pdf_to_images(b"%PDF", dpi=10)
+
+        assert [Image.open(io.BytesIO(png)).width for png in pages] == [21 + n for n in range(7)]
+
+    def test_no_more_pages_are_in_flight_than_there_are_workers(self, poppler):
+        fake = poppler(12)
+
+        assert len(list(iter_pdf_pages(b"%PDF", dpi=10))) == 12
+        assert fake.most_in_flight == 3
+
+    def test_pages_are_handed_over_as_they_finish(self, poppler):
+        poppler(3)
+
+        numbers = [page.number for page in iter_pdf_pages(b"%PDF", dpi=10)]
+
+        assert numbers == [3, 2, 1]
+
+    def test_each_page_reports_its_render_time(self, poppler):
+        poppler(2, delay=0.05)
+
+        assert all(page.seconds > 0.01 for page in iter_pdf_pages(b"%PDF", dpi=10))
+
+    def test_a_page_that_fails_is_skipped(self, poppler):
+        poppler(4, broken_pages={2})
+
+        assert sorted(page.number for page in iter_pdf_pages(b"%PDF", dpi=10)) == [1, 3, 4]
+
+    def test_an_unreadable_pdf_gives_no_pages(self, poppler):
+        poppler(3)
+
+        assert pdf_to_images(b"not a pdf") == []
+        assert pdf_to_images(b"") == []
+
+    def test_stopping_early_stops_rendering_and_cleans_up(self, poppler):
+        fake = poppler(20)
+        pages = iter_pdf_pages(b"%PDF", dpi=10)
+
+        next(pages)
+        pages.close()
+
+        assert len(fake.rendered) < 20
+        leftovers = [d for d in os.listdir(tempfile.gettempdir()) if d.startswith("pdf-pages-")]
+        assert leftovers == []
+
+
+class TestPdfUpload:
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setitem(app_module.app.config, "LOGIN_DISABLED", True)
+        install_memory_gridfs(monkeypatch)
+        return app_module.app.test_client()
+
+    def test_pages_are_stored_and_listed_in_order_with_their_timings(self, client, poppler):
+        poppler(4)
+
+        response = client.post(
+            "/floorplans/upload",
+            data={"file": (io.BytesIO(b"%PDF"), "venue.pdf", "application/pdf")},
+            content_type="multipart/form-data",
+        )
+
+        body = response.get_json()
+        assert response.status_code == 201
+        assert [page["page"] for page in body["pages"]] == [1, 2, 3, 4]
+        assert [page["width"] for page in body["pages"]] == [401, 402, 403, 404]
+        assert all(page["render_ms"] >= 0 and page["store_ms"] >= 0 for page in body["pages"])
+        assert body["total_ms"] >= 0
+
+    def test_a_pdf_with_no_renderable_pages_is_an_error(self, client, poppler):
+        poppler(2, broken_pages={1, 2})
+
+        response = client.post(
+            "/floorplans/upload",
+            data={"file": (io.BytesIO(b"%PDF"), "venue.pdf", "application/pdf")},
+            content_type="multipart/form-data",
+        )
+
+        assert response.status_code == 500
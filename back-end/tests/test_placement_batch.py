@@ -0,0 +1,138 @@
+"""Several floorplans are placed in one request, side by side, within one shared time budget."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pyckingsolver
+import pytest
+
+import app as app_module
+import api.floorplans_placement as PlacementApi
+import services.placement_batch as PlacementBatch
+import services.placement_service as PlacementService
+from services.placement_batch import _place_floor, place_floorplans
+from services.placement_cache import PlacementCache
+from services.placement_service import SolverSlots
+from test_placement_cache import FakeCacheCollection
+
+TABLE_TYPES = [{"id": "t6", "name": "6ft", "width_mm": 1830, "height_mm": 760, "max_capacity": 2}]
+AISLES = {"wall_buffer_mm": 500, "table_spacing_mm": 1200, "walkway_width_mm": 2000}
+
+
+def _room(width, depth):
+    corners = [(0, 0), (width, 0), (width, depth), (0, depth)]
+    return [{"start": corners[i], "end": corners[(i + 1) % 4], "thickness_mm": 200} for i in range(4)]
+
+
+def _floor(count, **overrides):
+    floor = {
+        "walls": _room(30000, 20000), "obstacles": [], "table_types": TABLE_TYPES,
+        "counts": {"t6": count}, "scale_px_per_mm": 0.1, "aisle_config": AISLES,
+    }
+    floor.update(overrides)
+    return floor
+
+
+@pytest.fixture(autouse=True)
+def free_slots(monkeypatch):
+    slots = SolverSlots(host_limit=2, per_user_limit=1)
+    monkeypatch.setattr(PlacementService, "solver_slots", slots)
+    return slots
+
+
+@pytest.fixture
+def threaded_pool(monkeypatch):
+    """Run the batch on threads, recording what each floor was allowed."""
+    pool = ThreadPoolExecutor(max_workers=4)
+    calls = []
+
+    def place_floor(arguments, deadline, solver_allowed):
+        calls.append({"counts": arguments["counts"], "deadline": deadline, "solver_allowed": solver_allowed})
+        return [{"floor": arguments["counts"]["t6"]}]
+
+    monkeypatch.setattr(PlacementBatch, "_batch_pool", lambda: pool)
+    monkeypatch.setattr(PlacementBatch, "_place_floor", place_floor)
+    yield calls
+    pool.shutdown(wait=True)
+
+
+class TestFloorsRunInWorkerProcesses:
+    def test_every_floor_comes_back_placed_in_order(self, monkeypatch):
+        monkeypatch.setenv("PLACEMENT_BATCH_WORKERS", "2")
+        monkeypatch.setattr(PlacementBatch, "_pool", None)
+        try:
+            results = place_floorplans([_floor(4), _floor(7)], time_limit_s=20)
+        finally:
+            PlacementBatch._batch_pool().shutdown(wait=True)
+            PlacementBatch._pool = None
+
+        assert [len(result["placed_tables"]) for result in results] == [4, 7]
+
+
+class TestTheBudgetIsShared:
+    def test_every_floor_gets_the_same_deadline(self, threaded_pool):
+        start = time.time()
+
+        place_floorplans([_floor(1), _floor(2), _floor(3)], time_limit_s=10)
+
+        deadlines = {call["deadline"] for call in threaded_pool}
+        assert len(deadlines) == 1
+        assert start + 10 <= deadlines.pop() <= time.time() + 10
+
+    def test_a_floor_that_starts_after_the_deadline_skips_the_solver(self, monkeypatch):
+        monkeypatch.setattr(pyckingsolver, "nest", lambda **_kwargs: pytest.fail("solver started"))
+
+        placed = _place_floor(
+            {**_floor(3, strategy="pack"), "refine": False}, deadline=time.time() - 1, solver_allowed=True,
+        )
+
+        assert len(placed) == 3
+
+    def test_a_floor_still_running_at_the_deadline_is_reported(self, monkeypatch, threaded_pool):
+        monkeypatch.setattr(PlacementBatch, "_SOLVER_KILL_GRACE_S", 0.0)
+        monkeypatch.setattr(PlacementBatch, "_place_floor", lambda *_args: time.sleep(1.0) or [])
+
+        results = place_floorplans([_floor(1)], time_limit_s=0.1)
+
+        assert results == [{"error": "Placement did not finish within the time limit"}]
+
+
+class TestSolverSlotsAreTakenByTheWebProcess:
+    def test_only_floors_that_need_the_solver_take_a_slot(self, threaded_pool, free_slots):
+        place_floorplans([_floor(1), _floor(2, strategy="pack"), _floor(3, refine=True)], user_id="alice")
+
+        assert [call["solver_allowed"] for call in threaded_pool] == [False, True, False]
+        assert free_slots.in_use() == 0
+
+
+class TestBatchEndpoint:
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setitem(app_module.app.config, "LOGIN_DISABLED", True)
+        monkeypatch.setattr(PlacementApi, "placement_cache", PlacementCache(FakeCacheCollection()))
+        return app_module.app.test_client()
+
+    def test_floors_come_back_by_id_and_a_cached_floor_is_not_placed_again(self, client, threaded_pool):
+        body = {"floorplans": [{"id": "ground", **_floor(2)}, {"id": "mezzanine", **_floor(5)}]}
+
+        first = client.post("/floorplans/place-tables/batch", json=body).get_json()
+        body["floorplans"].append({"id": "roof", **_floor(1)})
+        second = client.post("/floorplans/place-tables/batch", json=body).get_json()
+
+        assert [floor["id"] for floor in first["floorplans"]] == ["ground", "mezzanine"]
+        assert first["floorplans"][0]["placed_tables"] == [{"floor": 2}]
+        assert [floor["cached"] for floor in second["floorplans"]] == [True, True, False]
+        assert len(threaded_pool) == 3
+
+    def test_a_bad_floor_is_refused_by_its_index(self, client, threaded_pool):
+        body = {"floorplans": [_floor(1), {"walls": []}]}
+
+        response = client.post("/floorplans/place-tables/batch", json=body)
+
+        assert response.status_code == 400
+        assert response.get_json()["error"].startswith("floorplans[1]: Missing required field")
+        assert threaded_pool == []
+
+    def test_too_many_floors_are_refused(self, client, threaded_pool):
+        body = {"floorplans": [_floor(1)] * (PlacementBatch.MAX_BATCH_FLOORPLANS + 1)}
+
+        assert client.post("/floorplans/place-tables/batch", json=body).status_code == 400
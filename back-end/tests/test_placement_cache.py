@@ -0,0 +1,244 @@
+"""Placement results are cached by a canonical fingerprint of the inputs, least recently used evicted."""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import ServerSelectionTimeoutError
+
+import app as app_module
+import api.floorplans_placement as PlacementApi
+import services.placement_cache as PlacementCacheModule
+from services.placement_cache import PlacementCache, placement_fingerprint
+from services.placement_service import auto_place_tables
+
+TABLE_TYPES = [{"id": "t6", "name": "6ft", "width_mm": 1830, "height_mm": 760, "max_capacity": 2}]
+AISLES = {"wall_buffer_mm": 500, "table_spacing_mm": 1200, "walkway_width_mm": 2000}
+PILLAR = {"polygon": [[5000, 5000], [5600, 5000], [5600, 5600], [5000, 5600]], "type": "pillar"}
+
+
+def _room(width, depth):
+    corners = [(0, 0), (width, 0), (width, depth), (0, depth)]
+    return [{"start": corners[i], "end": corners[(i + 1) % 4], "thickness_mm": 200} for i in range(4)]
+
+
+def _fingerprint(**overrides):
+    arguments = {
+        "walls": _room(30000, 20000), "obstacles": [PILLAR], "table_types": TABLE_TYPES,
+        "counts": {"t6": 10}, "aisle_config": AISLES,
+    }
+    arguments.update(overrides)
+    return placement_fingerprint(**arguments)
+
+
+class _Cursor(list):
+    def sort(self, field, direction):
+        return _Cursor(sorted(self, key=lambda doc: doc[field], reverse=direction < 0))
+
+    def limit(self, n):
+        return _Cursor(self[:n])
+
+
+class FakeCacheCollection:
+    """Stand-in for the placement_cache collection, holding documents by ``_id``."""
+
+    def __init__(self):
+        self.docs = {}
+        self.indexes = []
+
+    def create_index(self, keys, **kwargs):
+        self.indexes.append(keys)
+
+    def find_one_and_update(self, query, update, projection=None):
+        doc = self.docs.get(query["_id"])
+        if doc is None:
+            return None
+        before = dict(doc)
+        doc.update(update["$set"])
+        for field, n in update["$inc"].items():
+            doc[field] = doc.get(field, 0) + n
+        return before
+
+    def replace_one(self, query, replacement, upsert=False):
+        self.docs[query["_id"]] = {"_id": query["_id"], **replacement}
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+    def find(self, _query, _projection=None):
+        return _Cursor(dict(doc) for doc in self.docs.values())
+
+    def delete_many(self, query):
+        ids = [key for key in query["_id"]["$in"] if key in self.docs]
+        for key in ids:
+            del self.docs[key]
+        return SimpleNamespace(deleted_count=len(ids))
+
+
+class UnreachableCacheCollection:
+    def __getattr__(self, _name):
+        def fail(*_args, **_kwargs):
+            raise ServerSelectionTimeoutError("no servers")
+        return fail
+
+
+class TestTheFingerprintIsCanonical:
+    def test_floating_point_noise_does_not_change_it(self):
+        noisy = [
+            {**wall, "start": [c + 1e-9 for c in wall["start"]]} for wall in _room(30000, 20000)
+        ]
+
+        assert _fingerprint(walls=noisy) == _fingerprint()
+
+    def test_wall_order_and_direction_do_not_change_it(self):
+        walls = [
+            {**wall, "start": wall["end"], "end": wall["start"]} for wall in reversed(_room(30000, 20000))
+        ]
+
+        assert _fingerprint(walls=walls) == _fingerprint()
+
+    def test_an_obstacle_ring_may_start_anywhere_and_run_either_way(self):
+        ring = PILLAR["polygon"]
+        turned = {"polygon": list(reversed(ring[2:] + ring[:2])), "type": "stage"}
+
+        assert _fingerprint(obstacles=[turned]) == _fingerprint()
+
+    def test_ids_names_and_unused_counts_are_left_out(self):
+        renamed = [{**TABLE_TYPES[0], "name": "Six foot", "color": "#fff"}]
+        walls = [{**wall, "id": f"wall-{i}"} for i, wall in enumerate(_room(30000, 20000))]
+
+        assert _fingerprint(table_types=renamed, walls=walls, counts={"t6": 10, "gone": 4}) == _fingerprint()
+
+    @pytest.mark.parametrize("overrides", [
+        {"counts": {"t6": 11}},
+        {"walls": _room(30000, 20500)},
+        {"obstacles": []},
+        {"aisle_config": {**AISLES, "table_spacing_mm": 1000}},
+        {"strategy": "pack"},
+        {"sections": [{"name": "A", "count": 10}]},
+        {"refine": True},
+    ])
+    def test_anything_the_engine_reads_changes_it(self, overrides):
+        assert _fingerprint(**overrides) != _fingerprint()
+
+    def test_section_order_is_kept(self):
+        a_then_b = [{"name": "A", "count": 4}, {"name": "B", "count": 6}]
+
+        assert _fingerprint(sections=a_then_b) != _fingerprint(sections=a_then_b[::-1])
+
+    def test_table_type_order_changes_neither_it_nor_the_layout(self):
+        # The same area, so only the tie-break decides which is laid first.
+        types = TABLE_TYPES + [{"id": "t5", "name": "5ft", "width_mm": 1520, "height_mm": 915, "max_capacity": 2}]
+        counts = {"t6": 12, "t5": 12}
+        sections = [{"name": "A", "count": 10}]
+
+        assert _fingerprint(table_types=types, counts=counts) == _fingerprint(table_types=types[::-1], counts=counts)
+        annex = [{**wall, "start": [x + 15000, y], "end": [ex + 15000, ey]}
+                 for wall in _room(6000, 6000) for (x, y), (ex, ey) in [(wall["start"], wall["end"])]]
+        for walls in (_room(12000, 9000), _room(12000, 9000) + annex):
+            layouts = [
+                auto_place_tables(walls, [], listed, counts, 0.1, AISLES, sections=sections)
+                for listed in (types, types[::-1])
+            ]
+            assert layouts[0] == layouts[1]
+
+
+class TestTheCacheEvictsTheLeastRecentlyUsed:
+    @pytest.fixture(autouse=True)
+    def ticking_clock(self, monkeypatch):
+        """Each reading of the clock is a second after the last, so no two uses tie."""
+        ticks = iter(range(10_000))
+
+        class Clock:
+            @staticmethod
+            def now(tz=None):
+                return datetime(2026, 1, 1, tzinfo=tz) + timedelta(seconds=next(ticks))
+
+        monkeypatch.setattr(PlacementCacheModule, "datetime", Clock)
+
+    def test_a_stored_result_is_served_and_counted(self):
+        cache = PlacementCache(FakeCacheCollection(), max_entries=4)
+
+        assert cache.get("a") is None
+        cache.put("a", [{"x_mm": 1.0}], requested=1)
+
+        assert cache.get("a") == [{"x_mm": 1.0}]
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["stores"]) == (1, 1, 1)
+        assert stats["hit_rate"] == 0.5
+
+    def test_past_the_bound_the_entry_read_longest_ago_goes(self):
+        collection = FakeCacheCollection()
+        cache = PlacementCache(collection, max_entries=2)
+        cache.put("old", [], requested=0)
+        cache.put("kept", [], requested=0)
+        cache.get("old")
+
+        cache.put("new", [], requested=0)
+
+        assert set(collection.docs) == {"old", "new"}
+        assert cache.stats()["evictions"] == 1
+
+    def test_an_unreachable_database_is_a_miss_not_an_error(self):
+        cache = PlacementCache(UnreachableCacheCollection())
+
+        cache.put("a", [], requested=0)
+
+        assert cache.get("a") is None
+        assert cache.stats()["errors"] == 2
+
+
+class TestThePlacementEndpointUsesTheCache:
+    @pytest.fixture
+    def cache(self, monkeypatch):
+        cache = PlacementCache(FakeCacheCollection())
+        monkeypatch.setattr(PlacementApi, "placement_cache", cache)
+        return cache
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setitem(app_module.app.config, "LOGIN_DISABLED", True)
+        return app_module.app.test_client()
+
+    @pytest.fixture
+    def engine(self, monkeypatch):
+        calls = []
+
+        def fake_auto_place_tables(**kwargs):
+            calls.append(kwargs)
+            return [{"x_mm": 1000.0, "y_mm": 1000.0}] * kwargs["counts"]["t6"]
+
+        monkeypatch.setattr(PlacementApi, "auto_place_tables", fake_auto_place_tables)
+        return calls
+
+    def _body(self, **overrides):
+        body = {
+            "walls": _room(30000, 20000), "obstacles": [], "table_types": TABLE_TYPES,
+            "counts": {"t6": 3}, "scale_px_per_mm": 0.1, "aisle_config": AISLES,
+        }
+        body.update(overrides)
+        return body
+
+    def test_the_same_room_is_placed_once(self, client, cache, engine):
+        first = client.post("/floorplans/place-tables", json=self._body())
+        second = client.post("/floorplans/place-tables", json=self._body(scale_px_per_mm=0.2))
+
+        assert len(engine) == 1
+        assert first.get_json()["cached"] is False
+        assert second.get_json() == {"placed_tables": first.get_json()["placed_tables"], "cached": True}
+
+    def test_a_packing_that_fell_short_is_not_stored(self, client, cache, engine, monkeypatch):
+        monkeypatch.setattr(PlacementApi, "auto_place_tables", lambda **kwargs: engine.append(kwargs) or [])
+
+        client.post("/floorplans/place-tables", json=self._body(strategy="pack"))
+        client.post("/floorplans/place-tables", json=self._body(strategy="pack"))
+
+        assert len(engine) == 2
+        assert cache.stats()["stores"] == 0
+
+    def test_the_stats_are_served(self, client, cache, engine):
+        client.post("/floorplans/place-tables", json=self._body())
+
+        response = client.get("/floorplans/place-tables/cache-stats")
+
+        assert response.status_code == 200
+        assert response.get_json()["misses"] == 1
@@ -0,0 +1,203 @@
+"""Solver placement is anytime: progress streams out, cancellation kills it, the fallback resumes it."""
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pyckingsolver
+import pytest
+from shapely.geometry import box
+
+import app as app_module
+import services.placement_service as PlacementService
+from services.placement_jobs import PlacementJob
+from services.placement_service import SolverSlots, _pack_place, prepare_placement
+
+TABLE_TYPES = [{"id": "t6", "name": "6ft", "width_mm": 1830, "height_mm": 760, "max_capacity": 2}]
+AISLES = {"wall_buffer_mm": 500, "table_spacing_mm": 1200, "walkway_width_mm": 2000}
+
+
+def _room(width, depth):
+    corners = [(0, 0), (width, 0), (width, depth), (0, depth)]
+    return [{"start": corners[i], "end": corners[(i + 1) % 4], "thickness_mm": 200} for i in range(4)]
+
+
+def _solution(positions):
+    """A pyckingsolver-shaped solution placing one 1830 x 760 table at each bottom-left position."""
+    items = [SimpleNamespace(item_type_id=i, angle=0.0) for i in range(len(positions))]
+    shapes = {id(item): box(x, y, x + 1830, y + 760) for item, (x, y) in zip(items, positions)}
+    return SimpleNamespace(all_items=lambda: items, placed_shapes=lambda item: [shapes[id(item)]])
+
+
+@pytest.fixture(autouse=True)
+def free_slots(monkeypatch):
+    slots = SolverSlots(host_limit=2, per_user_limit=1)
+    monkeypatch.setattr(PlacementService, "solver_slots", slots)
+    return slots
+
+
+@pytest.fixture
+def solver(monkeypatch):
+    """Replace pyckingsolver's ``nest`` with a scripted one; record how it was called."""
+    state = SimpleNamespace(calls=[], script=None)
+
+    def fake_nest(**kwargs):
+        state.calls.append(kwargs)
+        return state.script(**kwargs)
+
+    monkeypatch.setattr(pyckingsolver, "nest", fake_nest)
+    return state
+
+
+class TestSolverRunsAreBounded:
+    def test_a_user_holds_one_slot_and_the_host_a_fixed_number(self):
+        slots = SolverSlots(host_limit=2, per_user_limit=1)
+
+        assert slots.acquire("alice")
+        assert not slots.acquire("alice")
+        assert slots.acquire("bob")
+        assert not slots.acquire("carol")
+
+        slots.release("alice")
+        assert slots.acquire("carol")
+        assert slots.in_use() == 2
+
+    def test_without_a_free_slot_the_solver_is_not_started(self, solver, free_slots):
+        solver.script = lambda **_kwargs: pytest.fail("solver started without a slot")
+        free_slots.acquire("alice")
+        zone, tables, _ = prepare_placement(_room(20000, 10000), [], TABLE_TYPES, AISLES)
+
+        placed = _pack_place(zone, tables, {"t6": 4}, 1200.0, user_id="alice")
+
+        assert len(placed) == 4
+
+    def test_the_solver_is_given_the_time_limit_and_a_way_to_stop(self, solver):
+        solver.script = lambda **_kwargs: _solution([(0, 0)])
+        zone, tables, _ = prepare_placement(_room(20000, 10000), [], TABLE_TYPES, AISLES)
+
+        _pack_place(zone, tables, {"t6": 1}, 1200.0, time_limit_s=7.0)
+
+        assert solver.calls[0]["time_limit"] == 7.0
+        assert solver.calls[0]["cancel"].is_set() is False
+
+
+class TestTheFallbackResumesFromTheBestPartial:
+    def test_a_failed_solve_keeps_what_it_had_placed(self, solver):
+        zone, tables, _ = prepare_placement(_room(20000, 10000), [], TABLE_TYPES, AISLES)
+        x0, y0 = zone.bounds[0], zone.bounds[1]
+        partial = [(x0, y0), (x0 + 4000, y0)]
+
+        def fail_after_progress(on_improvement, **_kwargs):
+            on_improvement(_solution(partial))
+            raise RuntimeError("solver crashed")
+
+        solver.script = fail_after_progress
+
+        placed = _pack_place(zone, tables, {"t6": 6}, 1200.0)
+
+        assert len(placed) == 6
+        assert [(p["x_mm"], p["y_mm"]) for p in placed[:2]] == [
+            (round(x + 915, 2), round(y + 380, 2)) for x, y in partial
+        ]
+
+
+class TestPlacementJobs:
+    def test_progress_only_ever_improves_and_ends_with_a_result(self, solver):
+        events = []
+
+        def improving(on_improvement, **_kwargs):
+            from_rows = events[0]["placed"]
+            on_improvement(_solution([(0, 0)]))  # worse than the rows: not reported
+            better = _solution([(0, i * 500.0) for i in range(from_rows + 2)])
+            on_improvement(better)
+            return better
+
+        solver.script = improving
+        PlacementJob(_room(9000, 6000), [], TABLE_TYPES, {"t6": 50}, AISLES).run(events.append)
+
+        kinds = [(e["event"], e.get("source")) for e in events]
+        assert kinds == [("progress", "rows"), ("progress", "solver"), ("result", None)]
+        assert events[1]["placed"] == events[0]["placed"] + 2
+        assert events[-1]["placed_tables"] == events[1]["placed_tables"]
+        assert events[-1]["requested"] == 50
+
+    def test_a_layout_the_rows_complete_never_starts_the_solver(self, solver):
+        solver.script = lambda **_kwargs: pytest.fail("solver started")
+        events = []
+
+        PlacementJob(_room(30000, 20000), [], TABLE_TYPES, {"t6": 4}, AISLES).run(events.append)
+
+        assert [e["event"] for e in events] == ["progress", "result"]
+
+    def test_closing_the_stream_kills_the_solver(self, solver):
+        stopped = threading.Event()
+
+        def run_until_cancelled(cancel, **_kwargs):
+            deadline = time.monotonic() + 5
+            while not cancel.is_set():
+                assert time.monotonic() < deadline, "never cancelled"
+                time.sleep(0.01)
+            stopped.set()
+            raise pyckingsolver.SolverCancelled("cancelled")
+
+        solver.script = run_until_cancelled
+        job = PlacementJob(_room(9000, 6000), [], TABLE_TYPES, {"t6": 50}, AISLES)
+
+        stream = job.stream()
+        first = json.loads(next(stream))
+        stream.close()
+
+        assert first["source"] == "rows"
+        assert job.cancelled
+        assert stopped.wait(2)
+
+
+class TestStreamEndpoint:
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setitem(app_module.app.config, "LOGIN_DISABLED", True)
+        return app_module.app.test_client()
+
+    def test_events_arrive_as_ndjson(self, client):
+        body = {
+            "walls": _room(30000, 20000), "obstacles": [], "table_types": TABLE_TYPES,
+            "counts": {"t6": 3}, "scale_px_per_mm": 0.1, "aisle_config": AISLES,
+        }
+
+        response = client.post("/floorplans/place-tables/stream", json=body)
+
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert events[-1]["event"] == "result"
+        assert len(events[-1]["placed_tables"]) == 3
+
+    def test_a_bad_body_is_refused_before_streaming(self, client):
+        response = client.post("/floorplans/place-tables/stream", json={"walls": []})
+
+        assert response.status_code == 400
+        assert "Missing required field" in response.get_json()["error"]
+
+    def test_a_strategy_other_than_rows_is_refused(self, client):
+        body = {
+            "walls": _room(30000, 20000), "obstacles": [], "table_types": TABLE_TYPES,
+            "counts": {"t6": 3}, "scale_px_per_mm": 0.1, "strategy": "pack",
+        }
+
+        response = client.post("/floorplans/place-tables/stream", json=body)
+
+        assert response.status_code == 400
+        assert "rows" in response.get_json()["error"]
+
+    def test_refine_false_streams_only_the_rows(self, client, solver):
+        solver.script = lambda **_kwargs: pytest.fail("solver started")
+        body = {
+            "walls": _room(9000, 6000), "obstacles": [], "table_types": TABLE_TYPES,
+            "counts": {"t6": 50}, "scale_px_per_mm": 0.1, "aisle_config": AISLES, "refine": False,
+        }
+
+        response = client.post("/floorplans/place-tables/stream", json=body)
+
+        events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [(e["event"], e.get("source")) for e in events] == [("progress", "rows"), ("result", None)]
+        assert solver.calls == []
@@ -0,0 +1,94 @@
+"""Room outlines are built from snapped wall fragments in near-linear time, rooms and holes included."""
+import random
+
+from shapely.geometry import box
+
+from datatypes import WallSegment
+from services.placement_service import _build_room_polygon, _snap_vertices
+
+
+def _loop(corners, pieces=1, noise=0.0, rng=None):
+    """Walls around *corners*, each side cut into *pieces*, endpoints jittered by up to *noise* mm."""
+    rng = rng or random.Random(0)
+
+    def jitter(p):
+        return (p[0] + rng.uniform(-noise, noise), p[1] + rng.uniform(-noise, noise))
+
+    walls = []
+    for i, (ax, ay) in enumerate(corners):
+        bx, by = corners[(i + 1) % len(corners)]
+        for k in range(pieces):
+            start = (ax + (bx - ax) * k / pieces, ay + (by - ay) * k / pieces)
+            end = (ax + (bx - ax) * (k + 1) / pieces, ay + (by - ay) * (k + 1) / pieces)
+            walls.append(WallSegment(start=jitter(start), end=jitter(end), thickness_mm=200))
+    return walls
+
+
+def _rect(x0, y0, x1, y1):
+    return [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+
+
+class TestVerticesSnap:
+    def test_points_within_the_tolerance_share_a_vertex(self):
+        labels, vertices = _snap_vertices([(0, 0), (0.05, 0), (10, 10), (10, 10.05), (5, 5)], tol=0.1)
+
+        assert labels == [0, 0, 1, 1, 2]
+        assert vertices == [(0, 0), (10, 10), (5, 5)]
+
+    def test_points_just_past_the_tolerance_stay_apart(self):
+        labels, _ = _snap_vertices([(0, 0), (0.2, 0)], tol=0.1)
+
+        assert labels == [0, 1]
+
+
+class TestOneRoom:
+    def test_fragments_in_any_order_and_direction_make_the_room(self):
+        rng = random.Random(1)
+        walls = _loop(_rect(0, 0, 30000, 20000), pieces=50, noise=0.04, rng=rng)
+        rng.shuffle(walls)
+        walls = [WallSegment(start=w.end, end=w.start, thickness_mm=200) if rng.random() < 0.5 else w for w in walls]
+
+        room = _build_room_polygon(walls)
+
+        assert room.geom_type == "Polygon"
+        assert abs(room.area - 30000 * 20000) < 30000 * 20000 * 1e-6
+
+    def test_partition_walls_do_not_cut_the_room_up(self):
+        walls = _loop(_rect(0, 0, 30000, 20000), pieces=3)
+        walls.append(WallSegment(start=(10000, 0), end=(10000, 12000), thickness_mm=100))
+        walls.append(WallSegment(start=(0, 15000), end=(30000, 15000), thickness_mm=100))
+
+        room = _build_room_polygon(walls)
+
+        assert room.equals(box(0, 0, 30000, 20000))
+
+    def test_an_open_chain_falls_back_to_the_hull(self):
+        walls = _loop(_rect(0, 0, 30000, 20000))[:3]
+
+        room = _build_room_polygon(walls)
+
+        assert room.equals(box(0, 0, 30000, 20000))
+
+
+class TestRoomsAndHoles:
+    def test_separate_rooms_come_back_together(self):
+        walls = _loop(_rect(0, 0, 20000, 20000), pieces=4) + _loop(_rect(25000, 0, 45000, 10000), pieces=4)
+
+        rooms = _build_room_polygon(walls)
+
+        assert rooms.geom_type == "MultiPolygon"
+        assert len(rooms.geoms) == 2
+        assert rooms.area == 20000 * 20000 + 20000 * 10000
+
+    def test_a_loop_inside_a_room_is_a_hole_and_one_inside_that_a_room(self):
+        walls = (
+            _loop(_rect(0, 0, 40000, 40000), pieces=4)
+            + _loop(_rect(10000, 10000, 30000, 30000), pieces=4)
+            + _loop(_rect(15000, 15000, 25000, 25000))
+        )
+
+        rooms = _build_room_polygon(walls)
+
+        assert rooms.area == 40000 ** 2 - 20000 ** 2 + 10000 ** 2
+        assert not rooms.contains(box(11000, 11000, 12000, 12000).centroid)
+        assert rooms.contains(box(19000, 19000, 21000, 21000))
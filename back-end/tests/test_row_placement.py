@@ -0,0 +1,102 @@
+"""The default auto-placement lays aisle-aligned rows, deterministically, with sections in blocks."""
+import math
+
+import pytest
+
+import services.placement_service as PlacementService
+from services.placement_service import auto_place_tables, validate_placement
+
+AISLES = {"wall_buffer_mm": 1500, "table_spacing_mm": 1200, "walkway_width_mm": 2000}
+TABLE_TYPES = [
+    {"id": "t6", "name": "6ft", "width_mm": 1830, "height_mm": 760, "max_capacity": 2},
+    {"id": "t8", "name": "8ft", "width_mm": 2440, "height_mm": 760, "max_capacity": 2},
+]
+
+
+def _room(width, depth, angle_deg=0.0):
+    a = math.radians(angle_deg)
+
+    def turn(x, y):
+        return [x * math.cos(a) - y * math.sin(a), x * math.sin(a) + y * math.cos(a)]
+
+    corners = [(0, 0), (width, 0), (width, depth), (0, depth)]
+    return [
+        {"start": turn(*corners[i]), "end": turn(*corners[(i + 1) % 4]), "thickness_mm": 200}
+        for i in range(4)
+    ]
+
+
+def _place(walls, counts, obstacles=(), **kwargs):
+    return auto_place_tables(walls, list(obstacles), TABLE_TYPES, counts, 0.1, AISLES, **kwargs)
+
+
+def _with_ids(placed):
+    return [{"id": str(i), **p} for i, p in enumerate(placed)]
+
+
+class TestRowsAreValidLayouts:
+    def test_every_table_clears_walls_obstacles_and_neighbours(self):
+        walls = _room(60000, 40000)
+        pillars = [
+            {"id": f"p{i}", "polygon": [[x, 12000], [x + 800, 12000], [x + 800, 12800], [x, 12800]], "type": "pillar"}
+            for i, x in enumerate(range(8000, 56000, 12000))
+        ]
+
+        placed = _place(walls, {"t6": 120, "t8": 60}, pillars)
+
+        assert len(placed) == 180
+        assert validate_placement(walls, pillars, _with_ids(placed), AISLES)["valid"] is True
+
+    def test_rows_follow_a_rotated_hall(self):
+        walls = _room(50000, 20000, angle_deg=30)
+
+        placed = _place(walls, {"t6": 40, "t8": 0})
+
+        assert {p["rotation"] for p in placed} == {30.0}
+        assert validate_placement(walls, [], _with_ids(placed), AISLES)["valid"] is True
+
+    def test_the_layout_is_deterministic(self):
+        walls = _room(30000, 20000)
+
+        assert _place(walls, {"t6": 30, "t8": 10}) == _place(walls, {"t6": 30, "t8": 10})
+
+    def test_rows_are_a_walkway_apart(self):
+        placed = _place(_room(30000, 20000), {"t6": 40, "t8": 0})
+
+        row_centres = sorted({p["y_mm"] for p in placed})
+        assert len(row_centres) > 1
+        assert row_centres[1] - row_centres[0] == pytest.approx(760 + 2000)
+
+
+class TestSectionsComeOutInBlocks:
+    def test_each_section_is_one_contiguous_run_of_the_sweep(self):
+        placed = _place(
+            _room(30000, 20000), {"t6": 30, "t8": 0},
+            sections=[{"name": "A", "count": 12}, {"name": "B", "count": 10}],
+        )
+
+        names = [p.get("section_name") for p in placed]
+        assert names == ["A"] * 12 + ["B"] * 10 + [None] * 8
+
+
+class TestStrategies:
+    def test_an_unknown_strategy_is_refused(self):
+        with pytest.raises(ValueError):
+            _place(_room(30000, 20000), {"t6": 1}, strategy="spiral")
+
+    def test_pack_skips_the_row_layout(self, monkeypatch):
+        monkeypatch.setattr(PlacementService, "_row_place", lambda *_a, **_k: pytest.fail("rows used"))
+        monkeypatch.setattr(PlacementService, "_pack_place", lambda *_a, **_k: [{"packed": True}])
+
+        assert _place(_room(30000, 20000), {"t6": 1}, strategy="pack") == [{"packed": True}]
+
+    def test_refine_keeps_the_packing_only_when_it_fits_more(self, monkeypatch):
+        packed = [{"packed": i} for i in range(500)]
+        monkeypatch.setattr(PlacementService, "_pack_place", lambda *_a, **_k: packed)
+        walls = _room(12000, 8000)
+
+        plain = _place(walls, {"t6": 500, "t8": 0})
+        refined = _place(walls, {"t6": 500, "t8": 0}, refine=True)
+
+        assert len(plain) < 500
+        assert refined is packed
@@ -0,0 +1,103 @@
+"""Floorplan collision checks go through spatial indexes that only test nearby shapes, and count it."""
+from shapely.geometry import box
+
+from services.placement_service import validate_placement
+from services.spatial_index import GeometryIndex, GridHash, PlacementIndex, table_footprint
+
+ROOM_WALLS = [
+    {"start": [0, 0], "end": [20000, 0], "thickness_mm": 200},
+    {"start": [20000, 0], "end": [20000, 10000], "thickness_mm": 200},
+    {"start": [20000, 10000], "end": [0, 10000], "thickness_mm": 200},
+    {"start": [0, 10000], "end": [0, 0], "thickness_mm": 200},
+]
+AISLES = {"wall_buffer_mm": 1000, "table_spacing_mm": 1200}
+
+
+def _table(table_id, x, y, rotation=0.0):
+    return {"id": table_id, "x_mm": x, "y_mm": y, "width_mm": 1800, "height_mm": 800, "rotation": rotation}
+
+
+class TestIndexesOnlyTestNearbyShapes:
+    def test_a_grid_hash_query_skips_shapes_in_far_cells(self):
+        index = GridHash(cell_mm=1000.0)
+        for i in range(50):
+            index.insert(i, box(i * 5000, 0, i * 5000 + 100, 100))
+
+        hits = index.query(box(0, 0, 200, 200))
+
+        assert hits == [0]
+        assert index.stats.candidates == 1
+
+    def test_a_grid_hash_finds_shapes_within_distance(self):
+        index = GridHash(cell_mm=500.0)
+        index.insert("a", box(0, 0, 100, 100))
+
+        assert index.query(box(1000, 0, 1100, 100), distance=950) == ["a"]
+        assert index.query(box(1000, 0, 1100, 100), distance=850) == []
+
+    def test_moving_a_shape_reindexes_it(self):
+        index = GridHash(cell_mm=1000.0)
+        index.insert("a", box(0, 0, 100, 100))
+        index.insert("a", box(9000, 9000, 9100, 9100))
+
+        assert index.query(box(0, 0, 200, 200)) == []
+        assert index.query(box(9000, 9000, 9200, 9200)) == ["a"]
+        assert len(index) == 1
+
+    def test_a_static_index_answers_by_key(self):
+        index = GeometryIndex([("pillar", box(0, 0, 500, 500)), ("stage", box(5000, 5000, 8000, 7000))])
+
+        assert index.query(box(400, 400, 600, 600)) == ["pillar"]
+        assert index.stats.as_dict()["queries"] == 1
+
+
+class TestPlacementConflicts:
+    def test_overlap_and_too_close_are_told_apart(self):
+        index = PlacementIndex(box(0, 0, 20000, 20000), spacing_mm=1200.0)
+        index.add("a", table_footprint(5000, 5000, 1800, 800))
+        index.add("b", table_footprint(5000, 6500, 1800, 800))
+
+        found = index.conflicts(table_footprint(5500, 5000, 1800, 800))
+
+        assert found["overlapping"] == ["a"]
+        assert found["too_close"] == ["b"]
+        assert found["outside_zone"] is False
+
+    def test_a_rotated_footprint_swaps_its_extent(self):
+        rect = table_footprint(0, 0, 1800, 800, rotation=90)
+
+        minx, miny, maxx, maxy = rect.bounds
+        assert round(maxx - minx) == 800 and round(maxy - miny) == 1800
+
+
+class TestValidatePlacement:
+    def test_clear_tables_are_valid(self):
+        result = validate_placement(
+            ROOM_WALLS, [], [_table("t1", 4000, 4000), _table("t2", 9000, 4000)], AISLES,
+        )
+
+        assert result["valid"] is True
+        assert result["conflicts"] == []
+
+    def test_a_dragged_table_reports_what_it_hits(self):
+        obstacles = [{"id": "pillar", "polygon": [[8000, 3000], [9000, 3000], [9000, 4000], [8000, 4000]], "type": "pillar"}]
+        tables = [_table("t1", 4000, 4000), _table("t2", 8500, 3500), _table("t3", 4500, 4200)]
+
+        result = validate_placement(ROOM_WALLS, obstacles, tables, AISLES, table_ids=["t2", "t3"])
+
+        conflicts = {c["id"]: c for c in result["conflicts"]}
+        assert result["valid"] is False
+        assert set(conflicts) == {"t2", "t3"}
+        assert conflicts["t2"]["obstacles"] == ["pillar"]
+        assert conflicts["t3"]["overlapping"] == ["t1"]
+
+    def test_a_table_in_the_wall_buffer_is_outside_the_zone(self):
+        result = validate_placement(ROOM_WALLS, [], [_table("t1", 1000, 5000)], AISLES)
+
+        assert result["conflicts"][0]["outside_zone"] is True
+
+    def test_query_counts_are_reported(self):
+        result = validate_placement(ROOM_WALLS, [], [_table("t1", 4000, 4000)], AISLES)
+
+        assert result["index_stats"]["tables"]["queries"] == 1
+        assert result["index_stats"]["zone"]["queries"] == 1
@@ -10,7 +10,7 @@ from types import SimpleNamespace
 
 import pytest
 
-from conftest import skip_without_real_dependencies
+from conftest import mongo_project, skip_without_real_dependencies
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -65,8 +65,8 @@ class FakeMarketsCollection:
         self.doc = doc
         self.updates = []
 
-    def find_one(self, query):
-        return dict(self.doc) if _matches(self.doc, query) else None
+    def find_one(self, query, projection=None):
+        return mongo_project(dict(self.doc), projection) if _matches(self.doc, query) else None
 
     def update_one(self, filter_query, update):
         self.updates.append((filter_query, update))
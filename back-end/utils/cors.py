@@ -110,8 +110,11 @@ def install_cors(app, origins: List[AllowedOrigin]) -> None:
     configured and *changing* the app are two different calls: flask-cors installs an
     ``after_request`` handler per invocation, and a check that quietly installed one would leave a
     handler behind every time anything asked it a question.
+
+    ``X-Total-Count`` is exposed because paged endpoints report their total there, and a browser
+    hides every non-safelisted response header from cross-origin scripts unless told otherwise.
     """
-    CORS(app, origins=origins, supports_credentials=True)
+    CORS(app, origins=origins, supports_credentials=True, expose_headers=["X-Total-Count"])
 
 
 def describe_origins(origins: List[AllowedOrigin]) -> str:
@@ -1,16 +1,121 @@
 """
 PDF-to-image conversion utility using pdf2image.
 Renders each PDF page as a PNG byte string.
+
+Pages are rasterized one at a time, straight to PNG by poppler, on a shared
+pool of at most ``PDF_RASTER_WORKERS`` pages in flight across all requests.
+A venue packet of dozens of pages at 200 DPI never has more than that many
+pages in memory, and each page can be stored as soon as it is rendered.
 """
 
-import io
 import logging
-from typing import List
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator, List, NamedTuple, Optional
 
-from pdf2image import convert_from_bytes
+from pdf2image import convert_from_path, pdfinfo_from_path
 
 logger = logging.getLogger(__name__)
 
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+class RenderedPage(NamedTuple):
+    """One rasterized page: its 1-based number, PNG bytes and render time."""
+
+    number: int
+    png: bytes
+    seconds: float
+
+
+def _raster_workers() -> int:
+    try:
+        return max(int(os.getenv("PDF_RASTER_WORKERS", "")), 1)
+    except ValueError:
+        return max(min(os.cpu_count() or 2, 4), 1)
+
+
+def _raster_pool() -> ThreadPoolExecutor:
+    """The shared page pool, started on first use.
+
+    Threads are enough: each page is rendered by a ``pdftoppm`` process of
+    its own, and the thread only waits for it and reads the file it wrote.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=_raster_workers(), thread_name_prefix="pdf-raster")
+        return _pool
+
+
+def _render_page(pdf_path: str, folder: str, number: int, dpi: int) -> RenderedPage:
+    started = time.perf_counter()
+    paths = convert_from_path(
+        pdf_path, dpi=dpi, first_page=number, last_page=number,
+        fmt="png", output_folder=folder, output_file=f"page{number}_", paths_only=True,
+    )
+    if not paths:
+        raise RuntimeError(f"page {number} produced no image")
+    with open(paths[0], "rb") as page_file:
+        png = page_file.read()
+    os.remove(paths[0])
+    return RenderedPage(number, png, time.perf_counter() - started)
+
+
+def iter_pdf_pages(pdf_bytes: bytes, dpi: int = 200) -> Iterator[RenderedPage]:
+    """Rasterize *pdf_bytes* page by page, yielding each page as it is ready.
+
+    Pages arrive in the order they finish, not page order.  At most as many
+    pages as the pool has workers are rendering or waiting to be consumed at
+    once.  A page that fails to render is logged and skipped; a file poppler
+    cannot read yields nothing.
+    """
+    if not pdf_bytes:
+        logger.warning("iter_pdf_pages called with empty bytes")
+        return
+
+    with tempfile.TemporaryDirectory(prefix="pdf-pages-") as folder:
+        pdf_path = os.path.join(folder, "source.pdf")
+        with open(pdf_path, "wb") as pdf_file:
+            pdf_file.write(pdf_bytes)
+        try:
+            page_count = int(pdfinfo_from_path(pdf_path)["Pages"])
+        except Exception as e:
+            logger.error(f"Failed to read PDF: {e}")
+            return
+
+        pool = _raster_pool()
+        numbers = iter(range(1, page_count + 1))
+        pending = set()
+
+        def submit_next() -> None:
+            number = next(numbers, None)
+            if number is not None:
+                pending.add(pool.submit(_render_page, pdf_path, folder, number, dpi))
+
+        for _ in range(_raster_workers()):
+            submit_next()
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.discard(future)
+                    submit_next()
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        logger.warning(f"Failed to render a PDF page: {e}")
+        finally:
+            # A consumer that stops early leaves nothing rendering into a
+            # folder that is about to be removed
+            for future in pending:
+                future.cancel()
+            wait(pending)
+
 
 def pdf_to_images(pdf_bytes: bytes, dpi: int = 200) -> List[bytes]:
     """Convert PDF bytes to a list of PNG image bytes (one per page).
@@ -20,34 +125,13 @@ def pdf_to_images(pdf_bytes: bytes, dpi: int = 200) -> List[bytes]:
         dpi: Output image DPI (default: 200). Higher values yield larger, sharper images.
 
     Returns:
-        List of PNG bytes, one element per page. Returns an empty list if
-        conversion fails (graceful degradation).
+        List of PNG bytes, one element per page, in page order. Returns an
+        empty list if conversion fails (graceful degradation).
     """
-    if not pdf_bytes:
-        logger.warning("pdf_to_images called with empty bytes")
-        return []
-
-    try:
-        images = convert_from_bytes(pdf_bytes, dpi=dpi)
-    except Exception as e:
-        logger.error(f"Failed to convert PDF to images: {e}")
-        return []
-
-    result: List[bytes] = []
-    for i, image in enumerate(images):
-        try:
-            buf = io.BytesIO()
-            image.save(buf, format="PNG")
-            buf.seek(0)
-            result.append(buf.getvalue())
-        except Exception as e:
-            logger.warning(f"Failed to encode page {i + 1} as PNG: {e}")
-            continue
-
-    if not result:
+    pages = sorted(iter_pdf_pages(pdf_bytes, dpi=dpi))
+    if not pages:
         logger.warning("pdf_to_images produced zero valid page images")
-
-    return result
+    return [page.png for page in pages]
 
 
 def is_pdf(content_type: str) -> bool:
@@ -332,3 +332,14 @@ export interface FloorplanTemplate {
   createdAt: string;
   updatedAt: string;
 }
+
+/** A template as listed by GET /floorplans/templates; fetch the template itself to load it. */
+export interface FloorplanTemplateSummary {
+  id: string;
+  name: string;
+  ownerUserId?: string;
+  organizationId?: string;
+  tableTypeCount: number;
+  createdAt: string;
+  updatedAt: string;
+}